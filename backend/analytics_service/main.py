@@ -14,7 +14,16 @@ import logging
 import time
 
 from config import settings
-from models import connect_to_databases, close_database_connections
+from common.health import create_health_checker
+from common.deadline import DeadlineMiddleware
+from common.rate_limit import RateLimitMiddleware
+from models import (
+    connect_to_databases,
+    close_database_connections,
+    POSTGRES,
+    REDIS,
+)
+from .rollups import analytics_rollups
 
 logging.basicConfig(
     level=settings.log_level,
@@ -22,6 +31,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Backends this service cannot serve without, and ones it connects on demand
+# Redis holds the rollup lock that keeps replicas from rolling up together
+REQUIRED_BACKENDS = (POSTGRES, REDIS)
+OPTIONAL_BACKENDS = ()
+
+health = create_health_checker(REQUIRED_BACKENDS, OPTIONAL_BACKENDS)
+
 REQUEST_COUNT = Counter(
     "analytics_service_requests_total",
     "Total requests to Analytics Service",
@@ -38,13 +54,16 @@ REQUEST_DURATION = Histogram(
 async def lifespan(app: FastAPI):
     logger.info("Starting Analytics Service...")
     try:
-        await connect_to_databases()
+        await connect_to_databases(required=REQUIRED_BACKENDS, optional=OPTIONAL_BACKENDS)
+        # Keep the rollups the analytics endpoints read up to date
+        analytics_rollups.start(settings.analytics_rollup_interval_s)
         logger.info("Analytics Service started successfully")
     except Exception as e:
         logger.error(f"Failed to start Analytics Service: {e}")
         raise
     yield
     logger.info("Shutting down Analytics Service...")
+    await analytics_rollups.stop()
     await close_database_connections()
     logger.info("Analytics Service stopped")
 
@@ -57,6 +76,8 @@ app = FastAPI(
     debug=settings.debug,
 )
 
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -108,14 +129,15 @@ async def health_check():
 
 @app.get("/ready", tags=["Health"])
 async def readiness_check():
-    return {
-        "status": "ready",
-        "service": "analytics-service",
-        "checks": {
-            "database": "ok",
-            "metrics": "ok"
+    result = await health.check()
+    return JSONResponse(
+        status_code=200 if result["status"] == "ready" else 503,
+        content={
+            "status": result["status"],
+            "service": "analytics-service",
+            "checks": result["checks"],
         }
-    }
+    )
 
 
 @app.get("/metrics", tags=["Monitoring"])
@@ -123,6 +145,12 @@ async def metrics():
     return Response(content=generate_latest(), media_type="text/plain")
 
 
+# Import and include routers
+from .routes import analytics_router
+
+app.include_router(analytics_router, prefix="/api/v1/analytics", tags=["Analytics"])
+
+
 @app.get("/api/v1/status", tags=["API"])
 async def api_status():
     return {
@@ -137,60 +165,12 @@ async def api_status():
             "overview": "/api/v1/analytics/overview",
             "user_metrics": "/api/v1/analytics/users",
             "content_metrics": "/api/v1/analytics/content",
-            "search_metrics": "/api/v1/analytics/search"
+            "search_metrics": "/api/v1/analytics/search",
+            "refresh_rollups": "/api/v1/analytics/rollups/refresh"
         }
     }
 
 
-@app.get("/api/v1/analytics/overview", tags=["Analytics"])
-async def get_overview():
-    """Get analytics overview"""
-    return {
-        "total_users": 12543,
-        "content_views": 89234,
-        "chat_sessions": 45678,
-        "avg_engagement": 0.78,
-        "period": "last_7_days"
-    }
-
-
-@app.get("/api/v1/analytics/users", tags=["Analytics"])
-async def get_user_metrics():
-    """Get user analytics"""
-    return {
-        "active_users": 12543,
-        "new_users": 1234,
-        "returning_users": 11309,
-        "churn_rate": 0.02
-    }
-
-
-@app.get("/api/v1/analytics/content", tags=["Analytics"])
-async def get_content_metrics():
-    """Get content analytics"""
-    return {
-        "total_content": 5000,
-        "views_today": 8920,
-        "most_viewed": [
-            {"title": "Liberty 4 NC Review", "views": 1234},
-            {"title": "Best Earbuds 2024", "views": 987}
-        ]
-    }
-
-
-@app.get("/api/v1/analytics/search", tags=["Analytics"])
-async def get_search_metrics():
-    """Get search analytics"""
-    return {
-        "total_searches": 15000,
-        "avg_results": 8.5,
-        "top_queries": [
-            {"query": "how to connect", "count": 234},
-            {"query": "battery life", "count": 189}
-        ]
-    }
-
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,590 @@
+"""
+Analytics Service - Rollups
+Hourly and daily pre-aggregated metrics, maintained incrementally from the
+search, support and content tables
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+import asyncio
+import logging
+import uuid
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import and_, case, delete, func, insert, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.database import AsyncSessionLocal, redis_cache
+from models.knowledge import (
+    AnalyticsRollup,
+    AnalyticsUser,
+    AnalyticsUserDay,
+    AnalyticsWatermark,
+    ContentGeneration,
+    SearchQuery,
+    SupportConversation,
+)
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+ROLLUP_ROWS = Counter(
+    "analytics_rollup_source_rows_total",
+    "New source rows rolled up",
+    ["source"]
+)
+ROLLUP_BUCKETS = Counter(
+    "analytics_rollup_buckets_total",
+    "Rollup buckets recomputed",
+    ["source", "granularity"]
+)
+ROLLUP_DURATION = Histogram(
+    "analytics_rollup_duration_seconds",
+    "Rollup run duration in seconds"
+)
+
+HOUR = "hour"
+DAY = "day"
+USERS = "users"
+
+_LOCK_KEY = "kcp:lock:analytics_rollup"
+# The lock is released when a run ends; the expiry only frees it if the
+# holder dies mid-run
+_LOCK_TTL_S = 900
+
+# Delete the lock only if it is still ours
+# KEYS: lock key; ARGV: token
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def hour_floor(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def day_floor(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _ranges(buckets: Iterable[datetime], step: timedelta) -> List[Tuple[datetime, datetime]]:
+    """Collapse bucket starts into contiguous [start, end) ranges"""
+    ranges: List[Tuple[datetime, datetime]] = []
+    for bucket in sorted(buckets):
+        if ranges and ranges[-1][1] == bucket:
+            ranges[-1] = (ranges[-1][0], bucket + step)
+        else:
+            ranges.append((bucket, bucket + step))
+    return ranges
+
+
+def _within(column: Any, ranges: Sequence[Tuple[datetime, datetime]]):
+    return or_(*[and_(column >= start, column < end) for start, end in ranges])
+
+
+def _number(value: Any) -> Any:
+    """JSON-friendly metric value (SUM over integers comes back as Decimal)"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return value
+    return int(value) if value == int(value) else float(value)
+
+
+def add_metrics(total: Dict[str, Any], metrics: Dict[str, Any]) -> Dict[str, Any]:
+    for name, value in metrics.items():
+        total[name] = total.get(name, 0) + value
+    return total
+
+
+# ============================================================================
+# Rollup Specs
+# ============================================================================
+
+def _count_if(condition) -> Any:
+    return func.sum(case((condition, 1), else_=0))
+
+
+class RollupSpec(NamedTuple):
+    """
+    How one source table is rolled up
+
+    Every metric must be additive (counts and sums) so daily buckets can
+    be summed from hourly ones and periods from days; averages are derived
+    when reading. With top_n, only that many dimension values are kept per
+    bucket, ranked by the first metric.
+    """
+    source: str
+    model: Any
+    dimension: Any
+    metrics: Dict[str, Any]
+    top_n: int = 0
+    track_users: bool = False
+
+
+sq = SearchQuery
+sc = SupportConversation
+cg = ContentGeneration
+
+ROLLUP_SPECS = [
+    RollupSpec(
+        source="search",
+        model=sq,
+        dimension=sq.search_type,
+        metrics={
+            "searches": func.count(),
+            "zero_results": _count_if(sq.result_count == 0),
+            "results": func.coalesce(func.sum(sq.result_count), 0),
+            "clicks": func.count(sq.clicked_result_id),
+            "search_time_ms": func.coalesce(func.sum(sq.search_time_ms), 0),
+            "timed": func.count(sq.search_time_ms),
+        },
+        track_users=True,
+    ),
+    RollupSpec(
+        source="search_queries",
+        model=sq,
+        dimension=func.coalesce(sq.normalized_query, func.lower(sq.query_text)),
+        metrics={
+            "searches": func.count(),
+            "zero_results": _count_if(sq.result_count == 0),
+            "clicks": func.count(sq.clicked_result_id),
+        },
+        top_n=settings.analytics_top_queries,
+    ),
+    RollupSpec(
+        source="support",
+        model=sc,
+        dimension=func.coalesce(sc.intent, ""),
+        metrics={
+            "conversations": func.count(),
+            "escalations": _count_if(sc.escalated_to_human.is_(True)),
+            "helpful": _count_if(sc.was_helpful.is_(True)),
+            "unhelpful": _count_if(sc.was_helpful.is_(False)),
+            "rated": func.count(sc.user_rating),
+            "rating_sum": func.coalesce(func.sum(sc.user_rating), 0),
+            "response_time_ms": func.coalesce(func.sum(sc.response_time_ms), 0),
+            "timed": func.count(sc.response_time_ms),
+        },
+        track_users=True,
+    ),
+    # Only insert-time facts are rolled up: publishing, views and quality
+    # scores change long after a row is created, so they are read live
+    # (see read_content_metrics)
+    RollupSpec(
+        source="content_generated",
+        model=cg,
+        dimension=cg.content_type,
+        metrics={"generated": func.count()},
+    ),
+]
+
+# Content metrics that change after insert, aggregated when read
+CONTENT_LIVE_METRICS = {
+    "published": _count_if(cg.status == "published"),
+    "views": func.coalesce(func.sum(cg.view_count), 0),
+    "seo_sum": func.coalesce(func.sum(cg.seo_score), 0),
+    "seo_scored": func.count(cg.seo_score),
+    "readability_sum": func.coalesce(func.sum(cg.readability_score), 0),
+    "readability_scored": func.count(cg.readability_score),
+    "originality_sum": func.coalesce(func.sum(cg.originality_score), 0),
+    "originality_scored": func.count(cg.originality_score),
+}
+
+
+# ============================================================================
+# Analytics Rollups
+# ============================================================================
+
+class AnalyticsRollups:
+    """
+    Incremental rollup of raw event tables
+
+    Each source keeps a watermark on the highest row id rolled up. A run
+    reads the hour buckets of rows past the watermark (an id range scan),
+    recomputes just those hours from raw rows by created_at, and rebuilds
+    the days they fall in from the hourly rollups, so cost follows the
+    volume of new data rather than the size of the table.
+
+    The most recent restatement_hours are recomputed on every run as well.
+    That picks up rows that are updated after insert (clicks, ratings,
+    escalations) and ids that commit out of order behind the watermark.
+    Buckets are replaced rather than incremented, so reruns are idempotent.
+    """
+
+    def __init__(self, batch_rows: int = 100000, restatement_hours: int = 2):
+        self.batch_rows = batch_rows
+        self.restatement_hours = restatement_hours
+        self._task: Optional[asyncio.Task] = None
+
+    async def _new_hours(self, db: AsyncSession, spec: RollupSpec, after_id: int, upto_id: int) -> Set[datetime]:
+        model = spec.model
+        result = await db.execute(
+            select(func.date_trunc(HOUR, model.created_at).distinct())
+            .where(model.id > after_id, model.id <= upto_id)
+        )
+        return set(result.scalars().all())
+
+    async def _replace(
+        self,
+        db: AsyncSession,
+        source: str,
+        granularity: str,
+        ranges: Sequence[Tuple[datetime, datetime]],
+        rows: List[Dict[str, Any]]
+    ):
+        await db.execute(
+            delete(AnalyticsRollup).where(
+                AnalyticsRollup.source == source,
+                AnalyticsRollup.granularity == granularity,
+                _within(AnalyticsRollup.bucket, ranges),
+            )
+        )
+        if rows:
+            now = datetime.utcnow()
+            await db.execute(
+                insert(AnalyticsRollup),
+                [{"source": source, "granularity": granularity, "updated_at": now, **row} for row in rows]
+            )
+
+    async def _rollup_hours(self, db: AsyncSession, spec: RollupSpec, hours: Set[datetime]):
+        """Recompute hourly buckets from raw rows"""
+        model = spec.model
+        ranges = _ranges(hours, timedelta(hours=1))
+        bucket = func.date_trunc(HOUR, model.created_at)
+        dimension = func.coalesce(spec.dimension, "")
+        query = (
+            select(
+                bucket.label("bucket"),
+                dimension.label("dimension"),
+                *[aggregate.label(name) for name, aggregate in spec.metrics.items()]
+            )
+            .where(_within(model.created_at, ranges))
+            .group_by(bucket, dimension)
+        )
+        if spec.top_n:
+            first = next(iter(spec.metrics.values()))
+            ranked = query.add_columns(
+                func.row_number().over(partition_by=bucket, order_by=(first.desc(), dimension)).label("rank")
+            ).subquery()
+            query = select(*[c for c in ranked.c if c.name != "rank"]).where(ranked.c.rank <= spec.top_n)
+
+        rows = [
+            {
+                "bucket": row["bucket"],
+                "dimension": row["dimension"],
+                "metrics": {name: _number(row[name]) for name in spec.metrics},
+            }
+            for row in (await db.execute(query)).mappings().all()
+        ]
+        await self._replace(db, spec.source, HOUR, ranges, rows)
+        ROLLUP_BUCKETS.labels(source=spec.source, granularity=HOUR).inc(len(hours))
+
+    async def _rollup_days(self, db: AsyncSession, spec: RollupSpec, days: Set[datetime]):
+        """Rebuild daily buckets by summing their hourly rollups"""
+        ranges = _ranges(days, timedelta(days=1))
+        result = await db.execute(
+            select(AnalyticsRollup.bucket, AnalyticsRollup.dimension, AnalyticsRollup.metrics)
+            .where(
+                AnalyticsRollup.source == spec.source,
+                AnalyticsRollup.granularity == HOUR,
+                _within(AnalyticsRollup.bucket, ranges),
+            )
+        )
+        totals: Dict[Tuple[datetime, str], Dict[str, Any]] = {}
+        for bucket, dimension, metrics in result.all():
+            add_metrics(totals.setdefault((day_floor(bucket), dimension), {}), metrics)
+
+        rows = [{"bucket": day, "dimension": dimension, "metrics": metrics} for (day, dimension), metrics in totals.items()]
+        if spec.top_n:
+            first = next(iter(spec.metrics))
+            by_day: Dict[datetime, List[Dict[str, Any]]] = {}
+            for row in rows:
+                by_day.setdefault(row["bucket"], []).append(row)
+            rows = [
+                row
+                for day_rows in by_day.values()
+                for row in sorted(day_rows, key=lambda r: (-r["metrics"][first], r["dimension"]))[:spec.top_n]
+            ]
+        await self._replace(db, spec.source, DAY, ranges, rows)
+        ROLLUP_BUCKETS.labels(source=spec.source, granularity=DAY).inc(len(days))
+
+    async def _track_users(self, db: AsyncSession, spec: RollupSpec, after_id: int, upto_id: int) -> Set[datetime]:
+        """
+        Record first-seen and active days for users in new rows; returns the days touched
+
+        A user first seen earlier in this source than in one rolled up
+        before moves to an earlier day, so the day they were counted on
+        is returned too and loses them as a new user.
+        """
+        model = spec.model
+        new_rows = and_(model.id > after_id, model.id <= upto_id, model.user_id.isnot(None))
+        firsts = (
+            select(model.user_id, func.min(model.created_at).label("first_seen"))
+            .where(new_rows)
+            .group_by(model.user_id)
+        )
+
+        earlier = firsts.subquery()
+        moved = await db.execute(
+            select(func.date_trunc(DAY, AnalyticsUser.first_seen).distinct())
+            .join(earlier, earlier.c.user_id == AnalyticsUser.user_id)
+            .where(earlier.c.first_seen < AnalyticsUser.first_seen)
+        )
+        days = set(moved.scalars().all())
+
+        first_seen = pg_insert(AnalyticsUser).from_select(["user_id", "first_seen"], firsts)
+        await db.execute(first_seen.on_conflict_do_update(
+            index_elements=[AnalyticsUser.user_id],
+            set_={"first_seen": func.least(AnalyticsUser.first_seen, first_seen.excluded.first_seen)},
+        ))
+
+        day = func.date_trunc(DAY, model.created_at)
+        active = pg_insert(AnalyticsUserDay).from_select(
+            ["day", "user_id"],
+            select(day, model.user_id).where(new_rows).group_by(day, model.user_id)
+        ).on_conflict_do_nothing()
+        await db.execute(active)
+
+        result = await db.execute(select(day.distinct()).where(new_rows))
+        return days | set(result.scalars().all())
+
+    async def _rollup_users(self, db: AsyncSession, days: Set[datetime]):
+        """Daily active and new users, counted from the per-user tables"""
+        ranges = _ranges(days, timedelta(days=1))
+        active = await db.execute(
+            select(AnalyticsUserDay.day, func.count())
+            .where(_within(AnalyticsUserDay.day, ranges))
+            .group_by(AnalyticsUserDay.day)
+        )
+        first_day = func.date_trunc(DAY, AnalyticsUser.first_seen)
+        new = await db.execute(
+            select(first_day, func.count())
+            .where(_within(AnalyticsUser.first_seen, ranges))
+            .group_by(first_day)
+        )
+        counts = {day: {"active_users": 0, "new_users": 0} for day in days}
+        for day, count in active.all():
+            counts[day]["active_users"] = count
+        for day, count in new.all():
+            counts[day]["new_users"] = count
+
+        rows = [{"bucket": day, "dimension": "", "metrics": metrics} for day, metrics in counts.items()]
+        await self._replace(db, USERS, DAY, ranges, rows)
+        ROLLUP_BUCKETS.labels(source=USERS, granularity=DAY).inc(len(days))
+
+    async def rollup_source(self, spec: RollupSpec, now: Optional[datetime] = None) -> int:
+        """Roll up rows past the source's watermark; returns new rows seen"""
+        now = now or datetime.utcnow()
+        model = spec.model
+
+        async with AsyncSessionLocal() as db:
+            watermark = await db.get(AnalyticsWatermark, spec.source)
+            last_id = watermark.last_id if watermark else 0
+            max_id = (await db.execute(select(func.max(model.id)))).scalar() or 0
+
+        recent_from = hour_floor(now - timedelta(hours=self.restatement_hours))
+        recent = {recent_from + timedelta(hours=i) for i in range(self.restatement_hours + 1)}
+        seen = 0
+
+        while True:
+            upto_id = min(max_id, last_id + self.batch_rows)
+            caught_up = upto_id >= max_id
+            async with AsyncSessionLocal() as db:
+                hours = await self._new_hours(db, spec, last_id, upto_id) if upto_id > last_id else set()
+                if caught_up:
+                    hours |= recent
+                if hours:
+                    await self._rollup_hours(db, spec, hours)
+                    await self._rollup_days(db, spec, {day_floor(h) for h in hours})
+                if spec.track_users and upto_id > last_id:
+                    user_days = await self._track_users(db, spec, last_id, upto_id)
+                    if user_days:
+                        await self._rollup_users(db, user_days)
+
+                # Advanced in the same transaction as the buckets it covers
+                await db.execute(
+                    pg_insert(AnalyticsWatermark)
+                    .values(source=spec.source, last_id=upto_id, updated_at=now)
+                    .on_conflict_do_update(
+                        index_elements=[AnalyticsWatermark.source],
+                        set_={"last_id": upto_id, "updated_at": now},
+                    )
+                )
+                await db.commit()
+
+            new_rows = max(0, upto_id - last_id)
+            seen += new_rows
+            ROLLUP_ROWS.labels(source=spec.source).inc(new_rows)
+            last_id = upto_id
+            if caught_up:
+                return seen
+
+    async def run(self) -> Dict[str, int]:
+        """Roll up every source"""
+        with ROLLUP_DURATION.time():
+            return {spec.source: await self.rollup_source(spec) for spec in ROLLUP_SPECS}
+
+    async def _acquire_lock(self, ttl_s: int) -> Optional[str]:
+        """Take the lock that lets a single replica roll up at a time; returns its token"""
+        await redis_cache.ensure_connected()
+        token = uuid.uuid4().hex
+        if await redis_cache.client.set(_LOCK_KEY, token, nx=True, ex=ttl_s):
+            return token
+        return None
+
+    async def _release_lock(self, token: str):
+        await redis_cache.client.eval(_RELEASE_SCRIPT, 1, _LOCK_KEY, token)
+
+    async def run_exclusive(self) -> Optional[Dict[str, int]]:
+        """Roll up every source unless another replica is; returns None if it is"""
+        token = await self._acquire_lock(ttl_s=_LOCK_TTL_S)
+        if token is None:
+            return None
+        try:
+            return await self.run()
+        finally:
+            await self._release_lock(token)
+
+    async def run_periodic(self, interval_s: int):
+        """Roll up every interval_s seconds on whichever replica takes the lock"""
+        while True:
+            try:
+                counts = await self.run_exclusive()
+                if counts and any(counts.values()):
+                    logger.info(f"Analytics rolled up: {counts}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Analytics rollup failed: {e}")
+            await asyncio.sleep(interval_s)
+
+    def start(self, interval_s: int):
+        """Start periodic rollups in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_periodic(interval_s))
+
+    async def stop(self):
+        """Stop periodic rollups"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Global rollup instance
+analytics_rollups = AnalyticsRollups(
+    batch_rows=settings.analytics_rollup_batch_rows,
+    restatement_hours=settings.analytics_restatement_hours,
+)
+
+
+# ============================================================================
+# Reading
+# ============================================================================
+
+async def read_rollups(
+    db: AsyncSession,
+    source: str,
+    granularity: str,
+    since: datetime,
+    until: Optional[datetime] = None
+) -> List[AnalyticsRollup]:
+    """Rollup rows of a source from since (inclusive) to until (exclusive), oldest first"""
+    conditions = [
+        AnalyticsRollup.source == source,
+        AnalyticsRollup.granularity == granularity,
+        AnalyticsRollup.bucket >= since,
+    ]
+    if until is not None:
+        conditions.append(AnalyticsRollup.bucket < until)
+    result = await db.execute(
+        select(AnalyticsRollup).where(*conditions).order_by(AnalyticsRollup.bucket, AnalyticsRollup.dimension)
+    )
+    return list(result.scalars().all())
+
+
+def total(rows: Iterable[AnalyticsRollup]) -> Dict[str, Any]:
+    totals: Dict[str, Any] = {}
+    for row in rows:
+        add_metrics(totals, row.metrics)
+    return totals
+
+
+def by_dimension(rows: Iterable[AnalyticsRollup]) -> Dict[str, Dict[str, Any]]:
+    totals: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        add_metrics(totals.setdefault(row.dimension, {}), row.metrics)
+    return totals
+
+
+def by_bucket(rows: Iterable[AnalyticsRollup]) -> Dict[datetime, Dict[str, Any]]:
+    totals: Dict[datetime, Dict[str, Any]] = {}
+    for row in rows:
+        add_metrics(totals.setdefault(row.bucket, {}), row.metrics)
+    return totals
+
+
+class MetricRow(NamedTuple):
+    """A live aggregate shaped like a rollup row, for the same readers"""
+    bucket: datetime
+    dimension: str
+    metrics: Dict[str, Any]
+
+
+async def read_content_metrics(db: AsyncSession, granularity: str, since: datetime) -> List[MetricRow]:
+    """
+    Current publishing, view and score totals of content created since,
+    by creation bucket and content type
+
+    Aggregated from the content table on each read (a created_at index
+    range), so later publishes, views and score backfills are included.
+    """
+    bucket = func.date_trunc(granularity, cg.created_at)
+    result = await db.execute(
+        select(
+            bucket.label("bucket"),
+            cg.content_type.label("dimension"),
+            *[aggregate.label(name) for name, aggregate in CONTENT_LIVE_METRICS.items()]
+        )
+        .where(cg.created_at >= since)
+        .group_by(bucket, cg.content_type)
+    )
+    return [
+        MetricRow(row["bucket"], row["dimension"], {name: _number(row[name]) for name in CONTENT_LIVE_METRICS})
+        for row in result.mappings().all()
+    ]
+
+
+async def last_rollup_at(db: AsyncSession) -> Optional[datetime]:
+    """When the rollups were last advanced"""
+    return (await db.execute(select(func.max(AnalyticsWatermark.updated_at)))).scalar()
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "HOUR",
+    "DAY",
+    "USERS",
+    "hour_floor",
+    "day_floor",
+    "RollupSpec",
+    "ROLLUP_SPECS",
+    "AnalyticsRollups",
+    "analytics_rollups",
+    "read_rollups",
+    "MetricRow",
+    "read_content_metrics",
+    "total",
+    "by_dimension",
+    "by_bucket",
+    "last_rollup_at",
+]
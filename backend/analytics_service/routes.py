@@ -0,0 +1,210 @@
+"""
+Analytics Service - API Routes
+FastAPI route handlers for analytics reports, read from the hourly and daily rollups
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import get_db
+from .rollups import (
+    DAY,
+    HOUR,
+    USERS,
+    analytics_rollups,
+    by_bucket,
+    by_dimension,
+    day_floor,
+    last_rollup_at,
+    read_content_metrics,
+    read_rollups,
+    total,
+)
+
+# Create router
+analytics_router = APIRouter()
+
+MAX_DAYS = 90
+# Hourly series are only served for short periods
+MAX_HOURLY_DAYS = 7
+
+Days = Query(7, ge=1, le=MAX_DAYS, description="Days to report, including today")
+Granularity = Query(DAY, description="Series bucket size (hour is limited to 7 days)")
+
+
+def _since(days: int) -> datetime:
+    return day_floor(datetime.utcnow()) - timedelta(days=days - 1)
+
+
+def _ratio(numerator: Any, denominator: Any, digits: int = 4) -> Optional[float]:
+    return round(numerator / denominator, digits) if denominator else None
+
+
+def _series(rows, fields: List[str]) -> List[Dict[str, Any]]:
+    return [
+        {"bucket": bucket.isoformat(), **{name: metrics.get(name, 0) for name in fields}}
+        for bucket, metrics in sorted(by_bucket(rows).items())
+    ]
+
+
+async def _granular(db: AsyncSession, source: str, days: int, granularity: str, daily_rows):
+    """Rows for a series: the daily rows already loaded, or hourly ones"""
+    if granularity == HOUR and days <= MAX_HOURLY_DAYS:
+        return await read_rollups(db, source, HOUR, _since(days))
+    return daily_rows
+
+
+async def _content_rows(db: AsyncSession, granularity: str, since: datetime):
+    """Rolled-up generation counts plus live publishing, view and score totals"""
+    return (
+        await read_rollups(db, "content_generated", granularity, since)
+        + await read_content_metrics(db, granularity, since)
+    )
+
+
+@analytics_router.get("/overview", summary="Get analytics overview")
+async def get_overview(days: int = Days, db: AsyncSession = Depends(get_db)):
+    """Headline search, support, content and user metrics for the period"""
+    since = _since(days)
+    search = total(await read_rollups(db, "search", DAY, since))
+    support = total(await read_rollups(db, "support", DAY, since))
+    content = total(await _content_rows(db, DAY, since))
+    users = by_bucket(await read_rollups(db, USERS, DAY, datetime.min))
+
+    active = [metrics.get("active_users", 0) for bucket, metrics in users.items() if bucket >= since]
+    return {
+        "total_users": sum(metrics.get("new_users", 0) for metrics in users.values()),
+        "avg_daily_active_users": _ratio(sum(active), days, 1) or 0,
+        "new_users": sum(metrics.get("new_users", 0) for bucket, metrics in users.items() if bucket >= since),
+        "searches": search.get("searches", 0),
+        "search_click_through_rate": _ratio(search.get("clicks", 0), search.get("searches", 0)),
+        "chat_messages": support.get("conversations", 0),
+        "chat_escalation_rate": _ratio(support.get("escalations", 0), support.get("conversations", 0)),
+        "content_generated": content.get("generated", 0),
+        "content_views": content.get("views", 0),
+        "period": f"last_{days}_days",
+        "as_of": await last_rollup_at(db),
+    }
+
+
+@analytics_router.get("/users", summary="Get user analytics")
+async def get_user_metrics(days: int = Days, db: AsyncSession = Depends(get_db)):
+    """
+    Daily active and new users for the period
+
+    Users are counted from search and support activity with a user_id.
+    Distinct users do not add up across days, so the period is reported
+    as the average and peak of daily actives.
+    """
+    rows = await read_rollups(db, USERS, DAY, _since(days))
+    daily = _series(rows, ["active_users", "new_users"])
+    active = [day["active_users"] for day in daily]
+    new_users = sum(day["new_users"] for day in daily)
+    return {
+        "metrics": {
+            "avg_daily_active_users": _ratio(sum(active), days, 1) or 0,
+            "peak_daily_active_users": max(active, default=0),
+            "new_users": new_users,
+            "returning_user_days": sum(active) - new_users,
+        },
+        "daily": daily,
+        "period": f"last_{days}_days",
+    }
+
+
+@analytics_router.get("/content", summary="Get content analytics")
+async def get_content_metrics(
+    days: int = Days,
+    granularity: Literal["hour", "day"] = Granularity,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Generated content, publishing and quality scores by content type
+
+    Content is bucketed by creation time. Publishing, views and scores
+    are current totals for that content, read live.
+    """
+    since = _since(days)
+    rows = await _content_rows(db, DAY, since)
+    totals = total(rows)
+    today = day_floor(datetime.utcnow())
+    series_rows = rows
+    if granularity == HOUR and days <= MAX_HOURLY_DAYS:
+        series_rows = await _content_rows(db, HOUR, since)
+
+    def summary(metrics: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "generated": metrics.get("generated", 0),
+            "published": metrics.get("published", 0),
+            "views": metrics.get("views", 0),
+            "avg_seo_score": _ratio(metrics.get("seo_sum", 0), metrics.get("seo_scored", 0)),
+            "avg_readability_score": _ratio(metrics.get("readability_sum", 0), metrics.get("readability_scored", 0)),
+            "avg_originality_score": _ratio(metrics.get("originality_sum", 0), metrics.get("originality_scored", 0)),
+        }
+
+    return {
+        "metrics": {
+            **summary(totals),
+            "generated_today": total(row for row in rows if row.bucket == today).get("generated", 0),
+        },
+        "by_type": {content_type: summary(metrics) for content_type, metrics in by_dimension(rows).items()},
+        "series": _series(series_rows, ["generated", "published"]),
+        "period": f"last_{days}_days",
+    }
+
+
+@analytics_router.get("/search", summary="Get search analytics")
+async def get_search_metrics(
+    days: int = Days,
+    granularity: Literal["hour", "day"] = Granularity,
+    top: int = Query(10, ge=1, le=100, description="Top queries to return"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search volume, quality and top queries for the period
+
+    Top query counts come from each day's most frequent queries, so counts
+    for queries outside a day's top list are lower bounds.
+    """
+    since = _since(days)
+    rows = await read_rollups(db, "search", DAY, since)
+    totals = total(rows)
+    queries = by_dimension(await read_rollups(db, "search_queries", DAY, since))
+    top_queries = sorted(queries.items(), key=lambda item: (-item[1]["searches"], item[0]))[:top]
+
+    return {
+        "metrics": {
+            "total_searches": totals.get("searches", 0),
+            "avg_results": _ratio(totals.get("results", 0), totals.get("searches", 0), 2),
+            "zero_result_rate": _ratio(totals.get("zero_results", 0), totals.get("searches", 0)),
+            "click_through_rate": _ratio(totals.get("clicks", 0), totals.get("searches", 0)),
+            "avg_search_time_ms": _ratio(totals.get("search_time_ms", 0), totals.get("timed", 0), 1),
+        },
+        "by_type": {
+            search_type: {"searches": metrics["searches"], "clicks": metrics["clicks"]}
+            for search_type, metrics in by_dimension(rows).items()
+        },
+        "queries": [
+            {"query": query, "count": metrics["searches"], "clicks": metrics["clicks"]}
+            for query, metrics in top_queries
+        ],
+        "series": _series(await _granular(db, "search", days, granularity, rows), ["searches", "clicks"]),
+        "period": f"last_{days}_days",
+    }
+
+
+@analytics_router.post("/rollups/refresh", summary="Refresh analytics rollups")
+async def refresh_rollups():
+    """
+    Roll up new rows now instead of waiting for the scheduled run
+
+    Returns the number of new source rows rolled up per source, or 409 if
+    a rollup is already running.
+    """
+    counts = await analytics_rollups.run_exclusive()
+    if counts is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A rollup is already running")
+    return {"status": "completed", "rows": counts}
@@ -14,7 +14,15 @@ import logging
 import time
 
 from config import settings
-from models import connect_to_databases, close_database_connections
+from common.health import create_health_checker
+from common.deadline import DeadlineMiddleware
+from common.rate_limit import RateLimitMiddleware
+from models import (
+    connect_to_databases,
+    close_database_connections,
+    POSTGRES,
+    REDIS,
+)
 
 logging.basicConfig(
     level=settings.log_level,
@@ -22,6 +30,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Backends this service cannot serve without, and ones it connects on demand
+REQUIRED_BACKENDS = (POSTGRES,)
+OPTIONAL_BACKENDS = (REDIS,)
+
+health = create_health_checker(REQUIRED_BACKENDS, OPTIONAL_BACKENDS)
+
 REQUEST_COUNT = Counter(
     "auth_service_requests_total",
     "Total requests to Auth Service",
@@ -38,7 +52,7 @@ REQUEST_DURATION = Histogram(
 async def lifespan(app: FastAPI):
     logger.info("Starting Auth Service...")
     try:
-        await connect_to_databases()
+        await connect_to_databases(required=REQUIRED_BACKENDS, optional=OPTIONAL_BACKENDS)
         logger.info("Auth Service started successfully")
     except Exception as e:
         logger.error(f"Failed to start Auth Service: {e}")
@@ -57,6 +71,8 @@ app = FastAPI(
     debug=settings.debug,
 )
 
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -108,14 +124,15 @@ async def health_check():
 
 @app.get("/ready", tags=["Health"])
 async def readiness_check():
-    return {
-        "status": "ready",
-        "service": "auth-service",
-        "checks": {
-            "database": "ok",
-            "jwt": "ok"
+    result = await health.check()
+    return JSONResponse(
+        status_code=200 if result["status"] == "ready" else 503,
+        content={
+            "status": result["status"],
+            "service": "auth-service",
+            "checks": result["checks"],
         }
-    }
+    )
 
 
 @app.get("/metrics", tags=["Monitoring"])
@@ -0,0 +1,34 @@
+"""
+Common Module
+Shared infrastructure used by the Soundcore KCP services
+"""
+
+from .queue import (
+    JobQueue,
+    RedisStreamJobQueue,
+    InMemoryJobQueue,
+    create_job_queue,
+)
+from .outbox import (
+    add_outbox_event,
+    OutboxRelay,
+    create_outbox_sink,
+    create_outbox_relay,
+)
+from .health import (
+    HealthChecker,
+    create_health_checker,
+)
+
+__all__ = [
+    "JobQueue",
+    "RedisStreamJobQueue",
+    "InMemoryJobQueue",
+    "create_job_queue",
+    "add_outbox_event",
+    "OutboxRelay",
+    "create_outbox_sink",
+    "create_outbox_relay",
+    "HealthChecker",
+    "create_health_checker",
+]
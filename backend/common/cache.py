@@ -0,0 +1,357 @@
+"""
+Read-Through Cache
+Two-tier (in-process + Redis) cache for hot reads with stampede protection
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from enum import Enum as PyEnum
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import asyncio
+import logging
+import math
+import random
+import time
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import DateTime, Enum as SQLEnum
+
+from config import settings
+from models.database import redis_cache, pack_value, unpack_value
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by outcome",
+    ["cache", "result"]  # "local_hit", "redis_hit", "miss", "coalesced", "early_refresh"
+)
+CACHE_LATENCY = Histogram(
+    "cache_request_duration_seconds",
+    "Cache lookup latency in seconds by source of the value",
+    ["cache", "source"],  # "local", "redis", "loader"
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+class CacheEntry:
+    """A cached value with the data needed for probabilistic early refresh"""
+
+    __slots__ = ("value", "expires_at", "load_time")
+
+    def __init__(self, value: Any, expires_at: float, load_time: float):
+        self.value = value
+        self.expires_at = expires_at  # wall clock, shared with other processes
+        self.load_time = load_time  # seconds the loader took
+
+    def should_refresh(self, beta: float, now: float) -> bool:
+        """
+        XFetch: refresh early with a probability that rises towards expiry
+
+        Slow-to-load entries start refreshing sooner, and because each
+        reader draws independently, refreshes spread out instead of every
+        process missing at the same instant.
+        """
+        if beta <= 0:
+            return now >= self.expires_at
+        return now - self.load_time * beta * math.log(random.random() or 1e-12) >= self.expires_at
+
+
+class TwoTierCache:
+    """
+    In-process LRU/TTL tier in front of Redis
+
+    The local tier absorbs repeated reads within a process; Redis shares
+    loaded values between processes. Concurrent misses for the same key
+    within a process share one loader call (single-flight).
+
+    Values must be msgpack-serializable; use a codec for anything else.
+    Invalidation clears Redis and this process's local tier; other
+    processes may serve their local copy for up to local_ttl_s.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_s: int = 300,
+        local_ttl_s: float = 30.0,
+        max_local_items: int = 5000,
+        beta: float = 1.0
+    ):
+        self.name = name
+        self.ttl_s = ttl_s
+        self.local_ttl_s = local_ttl_s
+        self.max_local_items = max_local_items
+        self.beta = beta
+        self._local: "OrderedDict[Hashable, Tuple[float, CacheEntry]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Bumped on every invalidation; loads that started earlier are not stored
+        self._epoch = 0
+
+    def redis_key(self, key: Hashable) -> str:
+        return f"kcp:cache:{self.name}:{key}"
+
+    # ------------------------------------------------------------------
+    # Tiers
+    # ------------------------------------------------------------------
+
+    def _get_local(self, key: Hashable) -> Optional[CacheEntry]:
+        item = self._local.get(key)
+        if item is None:
+            return None
+        local_expires_at, entry = item
+        if local_expires_at <= time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return entry
+
+    def _put_local(self, key: Hashable, entry: CacheEntry):
+        local_ttl = min(self.local_ttl_s, max(0.0, entry.expires_at - time.time()))
+        self._local[key] = (time.monotonic() + local_ttl, entry)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local_items:
+            self._local.popitem(last=False)
+
+    async def _get_redis(self, key: Hashable) -> Optional[CacheEntry]:
+        if redis_cache.binary is None:
+            return None
+        try:
+            raw = await redis_cache.binary.get(self.redis_key(key))
+        except Exception as e:
+            logger.warning(f"Cache {self.name}: Redis read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        value, expires_at, load_time = unpack_value(raw)
+        return CacheEntry(value, expires_at, load_time)
+
+    async def _put_redis(self, key: Hashable, entry: CacheEntry):
+        if redis_cache.binary is None:
+            return
+        try:
+            await redis_cache.binary.set(
+                self.redis_key(key),
+                pack_value([entry.value, entry.expires_at, entry.load_time]),
+                ex=self.ttl_s
+            )
+        except Exception as e:
+            logger.warning(f"Cache {self.name}: Redis write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, calling loader on a miss
+
+        None results are returned but not cached.
+        """
+        started = time.perf_counter()
+        now = time.time()
+
+        entry = self._get_local(key)
+        source = "local"
+        if entry is None:
+            entry = await self._get_redis(key)
+            source = "redis"
+            if entry is not None:
+                self._put_local(key, entry)
+
+        if entry is not None:
+            if not entry.should_refresh(self.beta, now):
+                CACHE_REQUESTS.labels(cache=self.name, result=f"{source}_hit").inc()
+                CACHE_LATENCY.labels(cache=self.name, source=source).observe(time.perf_counter() - started)
+                return entry.value
+            CACHE_REQUESTS.labels(cache=self.name, result="early_refresh").inc()
+        else:
+            CACHE_REQUESTS.labels(cache=self.name, result="miss").inc()
+
+        value = await self._load(key, loader)
+        CACHE_LATENCY.labels(cache=self.name, source="loader").observe(time.perf_counter() - started)
+        return value
+
+    async def get(self, key: Hashable) -> Any:
+        """Return the cached value for key without loading, or None"""
+        entry = self._get_local(key)
+        source = "local"
+        if entry is None:
+            entry = await self._get_redis(key)
+            source = "redis"
+            if entry is not None:
+                self._put_local(key, entry)
+        if entry is None or entry.expires_at <= time.time():
+            CACHE_REQUESTS.labels(cache=self.name, result="miss").inc()
+            return None
+        CACHE_REQUESTS.labels(cache=self.name, result=f"{source}_hit").inc()
+        return entry.value
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            CACHE_REQUESTS.labels(cache=self.name, result="coalesced").inc()
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    # The caller running the loader went away; load ourselves
+                    return await self._load(key, loader)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        epoch = self._epoch
+        try:
+            started = time.perf_counter()
+            value = await loader()
+            load_time = time.perf_counter() - started
+            if value is not None and epoch == self._epoch:
+                entry = CacheEntry(value, time.time() + self.ttl_s, load_time)
+                self._put_local(key, entry)
+                await self._put_redis(key, entry)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited future does not log a warning
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def invalidate(self, *keys: Hashable):
+        """Drop keys from both tiers"""
+        self._epoch += 1
+        for key in keys:
+            self._local.pop(key, None)
+        if redis_cache.binary is None or not keys:
+            return
+        try:
+            await redis_cache.binary.delete(*(self.redis_key(k) for k in keys))
+        except Exception as e:
+            logger.warning(f"Cache {self.name}: Redis invalidation failed: {e}")
+
+    def clear_local(self):
+        """Drop the in-process tier"""
+        self._local.clear()
+
+
+# ============================================================================
+# Decorator
+# ============================================================================
+
+class Codec:
+    """Converts loader results to and from a msgpack-serializable form"""
+
+    def dump(self, value: Any) -> Any:
+        return value
+
+    def load(self, data: Any) -> Any:
+        return data
+
+
+class OrmCodec(Codec):
+    """
+    Caches an ORM row as a dict of its column values
+
+    Loading builds a new, detached instance, so cached rows are read-only
+    snapshots: relationships are not loaded and changes are not persisted.
+    """
+
+    def __init__(self, model: Any):
+        self.model = model
+        columns = model.__table__.columns
+        self._datetimes = {c.key for c in columns if isinstance(c.type, DateTime)}
+        self._enums = {
+            c.key: c.type.enum_class
+            for c in columns
+            if isinstance(c.type, SQLEnum) and c.type.enum_class is not None
+        }
+        self._keys = [c.key for c in columns]
+
+    def dump(self, row: Any) -> Dict[str, Any]:
+        data = {}
+        for key in self._keys:
+            value = getattr(row, key)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, PyEnum):
+                value = value.value
+            data[key] = value
+        return data
+
+    def load(self, data: Dict[str, Any]) -> Any:
+        values = dict(data)
+        for key in self._datetimes:
+            if values.get(key) is not None:
+                values[key] = datetime.fromisoformat(values[key])
+        for key, enum_class in self._enums.items():
+            if values.get(key) is not None:
+                values[key] = enum_class(values[key])
+        return self.model(**values)
+
+
+def cached(
+    name: str,
+    key: Callable[..., Hashable],
+    codec: Optional[Codec] = None,
+    ttl_s: Optional[int] = None
+):
+    """
+    Cache an async function's results in a TwoTierCache
+
+    key receives the function's arguments and returns the cache key. The
+    wrapper exposes `cache` and `invalidate(key)` for write paths.
+
+    Usage:
+        @cached("product", key=lambda db, product_id: product_id, codec=OrmCodec(Product))
+        async def get_product(db, product_id): ...
+
+        await get_product.invalidate(product_id)
+    """
+    codec = codec or Codec()
+    cache = TwoTierCache(
+        name,
+        ttl_s=ttl_s or settings.cache_ttl_s,
+        local_ttl_s=settings.cache_local_ttl_s,
+        max_local_items=settings.cache_local_max_items,
+        beta=settings.cache_early_refresh_beta,
+    )
+
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            async def load():
+                value = await func(*args, **kwargs)
+                return codec.dump(value) if value is not None else None
+
+            data = await cache.get_or_load(key(*args, **kwargs), load)
+            return codec.load(data) if data is not None else None
+
+        async def invalidate(*keys: Hashable):
+            await cache.invalidate(*keys)
+
+        wrapper.cache = cache
+        wrapper.invalidate = invalidate
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "TwoTierCache",
+    "Codec",
+    "OrmCodec",
+    "cached",
+]
@@ -0,0 +1,204 @@
+"""
+Request Deadlines
+Per-request time budgets propagated to database statements
+"""
+
+from contextvars import ContextVar
+from typing import Dict, Optional
+import asyncio
+import json
+import logging
+import time
+
+from prometheus_client import Counter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+DEADLINE_EXCEEDED = Counter(
+    "request_deadline_exceeded_total",
+    "Requests that ran past their deadline",
+    ["endpoint", "source"]  # "request": cancelled by the middleware, "statement": Postgres statement_timeout
+)
+CLIENT_DISCONNECTS = Counter(
+    "request_client_disconnects_total",
+    "Requests cancelled because the client disconnected",
+    ["endpoint"]
+)
+
+# Default budgets by path prefix (longest match wins); other routes have no
+# deadline unless the client sends one
+ROUTE_TIMEOUTS_MS: Dict[str, int] = {
+    "/api/v1/search/rag": 30000,
+    "/api/v1/search": 5000,
+    "/api/v1/stats": 10000,
+    "/api/v1/analytics": 15000,
+}
+
+TIMEOUT_HEADER = b"x-request-timeout-ms"
+
+# Postgres SQLSTATE for a statement cancelled by statement_timeout
+_QUERY_CANCELED = "57014"
+
+# Absolute deadline (time.monotonic()) of the current request
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining_s() -> Optional[float]:
+    """Seconds left before the current request's deadline, or None if unbounded"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    """Bound every statement in the transaction by the request's remaining time"""
+    remaining = remaining_s()
+    if remaining is None or connection.dialect.name != "postgresql":
+        return
+    # SET LOCAL expires with the transaction, so pooled connections come back clean
+    timeout_ms = max(1, int(remaining * 1000))
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
+
+def _is_statement_timeout(exc: BaseException) -> bool:
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if getattr(exc, "sqlstate", None) == _QUERY_CANCELED:
+            return True
+        exc = getattr(exc, "orig", None) or exc.__cause__
+    return False
+
+
+def _endpoint(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope["path"]
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware enforcing per-request deadlines
+
+    The budget comes from the X-Request-Timeout-Ms header (capped at
+    request_timeout_max_ms) or the route default. Database transactions
+    opened while handling the request get a matching statement_timeout.
+    The handler is cancelled, and its in-flight query with it, when the
+    deadline passes (504) or the client disconnects.
+    """
+
+    def __init__(self, app, route_timeouts_ms: Optional[Dict[str, int]] = None):
+        self.app = app
+        timeouts = route_timeouts_ms if route_timeouts_ms is not None else ROUTE_TIMEOUTS_MS
+        self.route_timeouts = sorted(timeouts.items(), key=lambda kv: len(kv[0]), reverse=True)
+
+    def _timeout_s(self, scope) -> Optional[float]:
+        for key, value in scope.get("headers", []):
+            if key.lower() == TIMEOUT_HEADER:
+                try:
+                    requested = int(value)
+                except ValueError:
+                    break
+                if requested > 0:
+                    return min(requested, settings.request_timeout_max_ms) / 1000.0
+        for prefix, timeout_ms in self.route_timeouts:
+            if scope["path"].startswith(prefix):
+                return timeout_ms / 1000.0
+        if settings.request_timeout_ms > 0:
+            return settings.request_timeout_ms / 1000.0
+        return None
+
+    async def __call__(self, scope, receive, send):
+        timeout = self._timeout_s(scope) if scope["type"] == "http" else None
+        if timeout is None:
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        # Read the client side ourselves so a disconnect is noticed while
+        # the handler is still busy; the handler reads from the queue
+        messages: asyncio.Queue = asyncio.Queue()
+        disconnected = False
+
+        async def listen():
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    disconnected = True
+                    handler.cancel()
+                    return
+
+        token = _deadline.set(time.monotonic() + timeout)
+        try:
+            handler = asyncio.create_task(self.app(scope, messages.get, send_wrapper))
+        finally:
+            _deadline.reset(token)
+        listener = asyncio.create_task(listen())
+
+        try:
+            done, _ = await asyncio.wait({handler}, timeout=timeout)
+            if not done:
+                handler.cancel()
+                await asyncio.gather(handler, return_exceptions=True)
+                DEADLINE_EXCEEDED.labels(endpoint=_endpoint(scope), source="request").inc()
+                if not response_started:
+                    await self._timeout_response(send, timeout)
+                return
+            if handler.cancelled():
+                if disconnected:
+                    CLIENT_DISCONNECTS.labels(endpoint=_endpoint(scope)).inc()
+                    return
+                raise asyncio.CancelledError()
+            exc = handler.exception()
+            if exc is not None:
+                if _is_statement_timeout(exc):
+                    DEADLINE_EXCEEDED.labels(endpoint=_endpoint(scope), source="statement").inc()
+                    if not response_started:
+                        await self._timeout_response(send, timeout)
+                        return
+                raise exc
+        finally:
+            listener.cancel()
+            if not handler.done():
+                handler.cancel()
+
+    async def _timeout_response(self, send, timeout: float):
+        body = json.dumps({
+            "error": "DeadlineExceeded",
+            "message": f"Request did not complete within {int(timeout * 1000)} ms",
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "ROUTE_TIMEOUTS_MS",
+    "remaining_s",
+    "DeadlineMiddleware",
+]
@@ -0,0 +1,175 @@
+"""
+Readiness Probes
+Concurrent, timeout-bounded backend health checks with a short-lived cache
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+import asyncio
+import logging
+import time
+
+from prometheus_client import Gauge
+from sqlalchemy import text
+
+from config import settings
+from models.database import (
+    engine,
+    mongodb,
+    neo4j_db,
+    redis_cache,
+    POSTGRES,
+    MONGODB,
+    NEO4J,
+    REDIS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+BACKEND_PROBE_LATENCY = Gauge(
+    "backend_probe_latency_seconds",
+    "Latency of the last readiness probe per backend",
+    ["backend"]
+)
+BACKEND_UP = Gauge(
+    "backend_up",
+    "Whether the last readiness probe of a backend succeeded",
+    ["backend"]
+)
+
+
+# ============================================================================
+# Probes
+# ============================================================================
+
+async def _probe_postgres():
+    # Checking out a connection also catches an exhausted pool
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def _probe_mongodb():
+    await mongodb.client.admin.command("ping")
+
+
+async def _probe_neo4j():
+    await neo4j_db.driver.verify_connectivity()
+
+
+async def _probe_redis():
+    await redis_cache.client.ping()
+
+
+_PROBES: Dict[str, Callable[[], Awaitable[None]]] = {
+    POSTGRES: _probe_postgres,
+    MONGODB: _probe_mongodb,
+    NEO4J: _probe_neo4j,
+    REDIS: _probe_redis,
+}
+
+
+def _enabled(backend: str) -> bool:
+    return backend != NEO4J or settings.enable_knowledge_graph
+
+
+def _is_connected(backend: str) -> bool:
+    if backend == MONGODB:
+        return mongodb.client is not None
+    if backend == NEO4J:
+        return neo4j_db.driver is not None
+    if backend == REDIS:
+        return redis_cache.client is not None
+    return True  # the engine connects per checkout
+
+
+# ============================================================================
+# Health Checker
+# ============================================================================
+
+class HealthChecker:
+    """
+    Probes a service's backends for its readiness endpoint
+
+    All probes run concurrently, each bounded by a timeout, and the combined
+    result is reused for cache_ttl_s so frequent probe traffic does not add
+    load. Concurrent callers during a refresh share one probe round.
+
+    Only required backends decide readiness. Optional backends are reported
+    but never fail the check, and are not probed until something else has
+    connected them.
+    """
+
+    def __init__(
+        self,
+        required: Iterable[str],
+        optional: Iterable[str] = (),
+        timeout_ms: int = 1000,
+        cache_ttl_s: float = 5.0
+    ):
+        self.required = [b for b in required if _enabled(b)]
+        self.optional = [b for b in optional if _enabled(b) and b not in self.required]
+        self.timeout_s = timeout_ms / 1000.0
+        self.cache_ttl_s = cache_ttl_s
+        self._result: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def _probe(self, backend: str) -> Dict[str, Any]:
+        if not _is_connected(backend):
+            BACKEND_UP.labels(backend=backend).set(0)
+            return {"status": "not_connected", "latency_ms": None}
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(_PROBES[backend](), timeout=self.timeout_s)
+            status = "ok"
+        except asyncio.TimeoutError:
+            status = "timeout"
+        except Exception as e:
+            status = f"error: {type(e).__name__}"
+            logger.warning(f"Readiness probe for {backend} failed: {e}")
+        latency = time.perf_counter() - started
+
+        BACKEND_PROBE_LATENCY.labels(backend=backend).set(latency)
+        BACKEND_UP.labels(backend=backend).set(1 if status == "ok" else 0)
+        return {"status": status, "latency_ms": round(latency * 1000, 1)}
+
+    async def _run(self) -> Dict[str, Any]:
+        probed = self.required + [b for b in self.optional if _is_connected(b)]
+        results = await asyncio.gather(*(self._probe(b) for b in probed))
+        checks = dict(zip(probed, results))
+        for backend in self.optional:
+            checks.setdefault(backend, {"status": "deferred", "latency_ms": None})
+
+        ready = all(checks[b]["status"] == "ok" for b in self.required)
+        result = {"status": "ready" if ready else "not_ready", "checks": checks}
+        self._result = result
+        self._expires_at = time.monotonic() + self.cache_ttl_s
+        return result
+
+    async def check(self) -> Dict[str, Any]:
+        """Current readiness, probing the backends if the cached result is stale"""
+        if self._result is not None and time.monotonic() < self._expires_at:
+            return self._result
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._run())
+        return await asyncio.shield(self._refresh)
+
+
+def create_health_checker(required: Iterable[str], optional: Iterable[str] = ()) -> HealthChecker:
+    """Create a health checker with the configured timeout and cache TTL"""
+    return HealthChecker(
+        required,
+        optional,
+        timeout_ms=settings.readiness_probe_timeout_ms,
+        cache_ttl_s=settings.readiness_cache_ttl_s,
+    )
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "HealthChecker",
+    "create_health_checker",
+]
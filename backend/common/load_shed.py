@@ -0,0 +1,250 @@
+"""
+Load Shedding
+Adaptive (AIMD) concurrency limits with fast rejection for expensive routes
+"""
+
+from collections import deque
+from typing import Deque, Dict, Optional
+import asyncio
+import json
+import logging
+import time
+
+from prometheus_client import Counter, Gauge
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+CONCURRENCY_LIMIT = Gauge(
+    "load_shed_concurrency_limit",
+    "Current adaptive concurrency limit",
+    ["group"]
+)
+INFLIGHT = Gauge(
+    "load_shed_inflight",
+    "Requests currently admitted",
+    ["group"]
+)
+SHED_REQUESTS = Counter(
+    "load_shed_rejected_total",
+    "Requests rejected by the concurrency limiter",
+    ["group", "priority"]
+)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# Response statuses that count as an overload signal
+_OVERLOAD_STATUSES = {500, 502, 503, 504}
+
+# X-Request-Priority values treated as batch traffic
+_BATCH_PRIORITIES = {"batch", "export", "low", "background"}
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that adapts to observed latency (AIMD)
+
+    Each request that finishes within the latency target raises the limit
+    by 1/limit (about +1 per limit's worth of requests); a slow or failed
+    request cuts it by `backoff`, at most once per target interval so one
+    burst of slow requests counts as a single congestion signal.
+
+    Interactive requests over the limit wait in a short queue for up to
+    max_wait_s. Batch requests never queue and may only use batch_share
+    of the limit, leaving headroom for interactive traffic.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        target_latency_s: float,
+        initial_limit: int = 20,
+        min_limit: int = 2,
+        max_limit: int = 200,
+        backoff: float = 0.8,
+        batch_share: float = 0.5,
+        queue_size: int = 50,
+        max_wait_s: float = 0.2
+    ):
+        self.name = name
+        self.target_latency_s = target_latency_s
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.batch_share = batch_share
+        self.queue_size = queue_size
+        self.max_wait_s = max_wait_s
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        CONCURRENCY_LIMIT.labels(group=name).set(self.limit)
+
+    def _capacity(self, priority: str) -> int:
+        if priority == BATCH:
+            return max(1, int(self.limit * self.batch_share))
+        return max(1, int(self.limit))
+
+    def _admit(self):
+        self.inflight += 1
+        INFLIGHT.labels(group=self.name).set(self.inflight)
+
+    async def acquire(self, priority: str = INTERACTIVE) -> bool:
+        """Admit a request, or return False if it should be shed"""
+        if self.inflight < self._capacity(priority) and (priority == BATCH or not self._waiters):
+            self._admit()
+            return True
+        if priority == BATCH or len(self._waiters) >= self.queue_size:
+            SHED_REQUESTS.labels(group=self.name, priority=priority).inc()
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.max_wait_s)
+            return True
+        except asyncio.TimeoutError:
+            SHED_REQUESTS.labels(group=self.name, priority=priority).inc()
+            return False
+        except asyncio.CancelledError:
+            # Admitted just as the caller went away: give the slot back
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, latency_s: Optional[float], failed: bool = False):
+        """
+        Finish an admitted request
+
+        latency_s of None releases the slot without adjusting the limit.
+        """
+        self.inflight -= 1
+        if latency_s is not None:
+            now = time.monotonic()
+            if failed or latency_s > self.target_latency_s:
+                if now - self._last_decrease > self.target_latency_s:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            CONCURRENCY_LIMIT.labels(group=self.name).set(self.limit)
+
+        # Hand freed slots to queued interactive requests
+        while self._waiters and self.inflight < self._capacity(INTERACTIVE):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.inflight += 1
+                waiter.set_result(True)
+        INFLIGHT.labels(group=self.name).set(self.inflight)
+
+
+def request_priority(scope) -> str:
+    """Batch/export clients mark requests with X-Request-Priority"""
+    for key, value in scope.get("headers", []):
+        if key.lower() == b"x-request-priority":
+            return BATCH if value.decode("latin-1").strip().lower() in _BATCH_PRIORITIES else INTERACTIVE
+    return INTERACTIVE
+
+
+class LoadShedMiddleware:
+    """
+    ASGI middleware applying an AdaptiveLimiter per route group
+
+    Usage:
+        app.add_middleware(LoadShedMiddleware, limiters={
+            "/api/v1/search/rag": create_limiter("rag", settings.rag_target_latency_ms),
+            "/api/v1/search": create_limiter("search", settings.search_target_latency_ms),
+        })
+
+    Paths match the longest configured prefix. Shed requests get an
+    immediate 503 with Retry-After.
+    """
+
+    def __init__(self, app, limiters: Dict[str, AdaptiveLimiter], enabled: Optional[bool] = None):
+        self.app = app
+        self.limiters = sorted(limiters.items(), key=lambda kv: len(kv[0]), reverse=True)
+        self.enabled = settings.load_shed_enabled if enabled is None else enabled
+
+    def _limiter(self, path: str) -> Optional[AdaptiveLimiter]:
+        for prefix, limiter in self.limiters:
+            if path.startswith(prefix):
+                return limiter
+        return None
+
+    async def __call__(self, scope, receive, send):
+        limiter = self._limiter(scope["path"]) if self.enabled and scope["type"] == "http" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        priority = request_priority(scope)
+        if not await limiter.acquire(priority):
+            body = json.dumps({
+                "error": "ServiceOverloaded",
+                "message": "Service is busy. Please retry shortly.",
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", b"1"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except asyncio.CancelledError:
+            # Client went away; says nothing about backend latency
+            limiter.release(None)
+            raise
+        except Exception:
+            limiter.release(time.perf_counter() - started, failed=True)
+            raise
+        limiter.release(time.perf_counter() - started, failed=status_code in _OVERLOAD_STATUSES)
+
+
+def create_limiter(name: str, target_latency_ms: int) -> AdaptiveLimiter:
+    """Create a limiter with the configured bounds"""
+    return AdaptiveLimiter(
+        name,
+        target_latency_s=target_latency_ms / 1000.0,
+        initial_limit=settings.load_shed_initial_limit,
+        min_limit=settings.load_shed_min_limit,
+        max_limit=settings.load_shed_max_limit,
+        batch_share=settings.load_shed_batch_share,
+        queue_size=settings.load_shed_queue_size,
+        max_wait_s=settings.load_shed_max_wait_ms / 1000.0,
+    )
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "INTERACTIVE",
+    "BATCH",
+    "AdaptiveLimiter",
+    "LoadShedMiddleware",
+    "request_priority",
+    "create_limiter",
+]
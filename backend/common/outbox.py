@@ -0,0 +1,317 @@
+"""
+Transactional Outbox
+Change events recorded with database writes and relayed to a message sink
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.database import AsyncSessionLocal, redis_cache
+from models.knowledge import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+OUTBOX_PUBLISHED = Counter(
+    "outbox_events_published_total",
+    "Outbox events delivered to the sink",
+    ["sink"]
+)
+OUTBOX_FAILURES = Counter(
+    "outbox_publish_failures_total",
+    "Failed outbox relay batches",
+    ["sink"]
+)
+OUTBOX_LAG = Gauge(
+    "outbox_relay_lag_seconds",
+    "Age of the oldest event in the last relayed batch",
+    ["sink"]
+)
+
+
+def add_outbox_event(
+    db: AsyncSession,
+    aggregate_type: str,
+    aggregate_id: Any,
+    event_type: str,
+    payload: Dict[str, Any]
+) -> OutboxEvent:
+    """
+    Record a change event in the caller's transaction
+
+    The event is only visible to the relay once the surrounding transaction
+    commits, so it is published if and only if the change is.
+    """
+    event = OutboxEvent(
+        aggregate_type=aggregate_type,
+        aggregate_id=str(aggregate_id),
+        event_type=event_type,
+        payload=payload,
+    )
+    db.add(event)
+    return event
+
+
+def event_message(event: OutboxEvent) -> Dict[str, Any]:
+    """Wire format of an outbox event"""
+    return {
+        "event_id": event.id,
+        "aggregate_type": event.aggregate_type,
+        "aggregate_id": event.aggregate_id,
+        "event_type": event.event_type,
+        "payload": event.payload,
+        "occurred_at": event.created_at.isoformat(),
+    }
+
+
+# ============================================================================
+# Sinks
+# ============================================================================
+
+class OutboxSink:
+    """
+    Destination for relayed events
+
+    publish() must only return once every message is durably accepted;
+    raising leaves the whole batch in the outbox for redelivery.
+    """
+
+    name = "base"
+
+    async def publish(self, messages: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    async def close(self):
+        """Release sink resources"""
+
+
+class KafkaSink(OutboxSink):
+    """Publishes to Kafka topic <prefix>.<aggregate_type>, keyed by aggregate id"""
+
+    name = "kafka"
+
+    def __init__(self, bootstrap_servers: str, topic_prefix: str):
+        self.bootstrap_servers = bootstrap_servers
+        self.topic_prefix = topic_prefix
+        self._producer = None
+
+    def _publish_sync(self, messages: List[Dict[str, Any]]):
+        if self._producer is None:
+            from kafka import KafkaProducer
+
+            self._producer = KafkaProducer(
+                bootstrap_servers=self.bootstrap_servers.split(","),
+                acks="all",
+                linger_ms=5,
+                key_serializer=lambda k: k.encode("utf-8"),
+                value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+            )
+        futures = [
+            self._producer.send(
+                f"{self.topic_prefix}.{m['aggregate_type']}",
+                key=m["aggregate_id"],
+                value=m
+            )
+            for m in messages
+        ]
+        self._producer.flush()
+        for future in futures:
+            future.get(timeout=10)
+
+    async def publish(self, messages: List[Dict[str, Any]]):
+        # kafka-python is blocking; keep it off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self._publish_sync, messages)
+
+    async def close(self):
+        if self._producer is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._producer.close)
+            self._producer = None
+
+
+class RedisStreamSink(OutboxSink):
+    """Publishes to Redis stream kcp:events:<aggregate_type>"""
+
+    name = "redis"
+
+    def __init__(self, maxlen: int = 100000):
+        self.maxlen = maxlen
+
+    async def publish(self, messages: List[Dict[str, Any]]):
+        if not redis_cache.client:
+            raise RuntimeError("Redis not connected")
+        async with redis_cache.client.pipeline(transaction=False) as pipe:
+            for m in messages:
+                pipe.xadd(
+                    f"kcp:events:{m['aggregate_type']}",
+                    {"event": json.dumps(m)},
+                    maxlen=self.maxlen,
+                    approximate=True
+                )
+            await pipe.execute()
+
+
+class FileSink(OutboxSink):
+    """Appends events as JSON lines to a local file (development and tests)"""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _append(self, messages: List[Dict[str, Any]]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for m in messages:
+                f.write(json.dumps(m) + "\n")
+
+    async def publish(self, messages: List[Dict[str, Any]]):
+        await asyncio.get_running_loop().run_in_executor(None, self._append, messages)
+
+
+def create_outbox_sink(name: Optional[str] = None) -> OutboxSink:
+    """Create the configured outbox sink"""
+    name = name or settings.outbox_sink
+    if name == "kafka":
+        return KafkaSink(settings.kafka_bootstrap_servers, settings.kafka_topic_prefix)
+    if name == "redis":
+        return RedisStreamSink()
+    if name == "file":
+        return FileSink(settings.outbox_file_path)
+    raise ValueError(f"Unknown outbox sink: {name}")
+
+
+# ============================================================================
+# Relay
+# ============================================================================
+
+class OutboxRelay:
+    """
+    Moves committed outbox events to the sink in batches
+
+    Rows are locked with SKIP LOCKED so several replicas can relay
+    concurrently, and marked published only after the sink accepts the batch
+    (at-least-once: consumers dedupe on event_id).
+    """
+
+    def __init__(
+        self,
+        sink: OutboxSink,
+        batch_size: int = 500,
+        poll_interval_ms: int = 500,
+        retention_hours: int = 72
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval_ms / 1000.0
+        self.retention = timedelta(hours=retention_hours)
+        self._task: Optional[asyncio.Task] = None
+
+    async def relay_batch(self) -> int:
+        """Publish one batch of pending events; returns the number published"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(OutboxEvent)
+                .where(OutboxEvent.published_at.is_(None))
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events = list(result.scalars().all())
+            if not events:
+                return 0
+
+            await self.sink.publish([event_message(e) for e in events])
+
+            now = datetime.utcnow()
+            await db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_([e.id for e in events]))
+                .values(published_at=now)
+            )
+            await db.commit()
+
+        OUTBOX_PUBLISHED.labels(sink=self.sink.name).inc(len(events))
+        OUTBOX_LAG.labels(sink=self.sink.name).set((now - events[0].created_at).total_seconds())
+        return len(events)
+
+    async def purge_published(self) -> int:
+        """Delete delivered events older than the retention period"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(OutboxEvent)
+                .where(OutboxEvent.published_at < datetime.utcnow() - self.retention)
+            )
+            await db.commit()
+            return result.rowcount or 0
+
+    async def run(self):
+        """Relay loop with exponential backoff on sink failures"""
+        backoff = self.poll_interval
+        last_purge = datetime.utcnow()
+        while True:
+            try:
+                published = await self.relay_batch()
+                backoff = self.poll_interval
+                if datetime.utcnow() - last_purge > timedelta(hours=1):
+                    last_purge = datetime.utcnow()
+                    await self.purge_published()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                OUTBOX_FAILURES.labels(sink=self.sink.name).inc()
+                logger.warning(f"Outbox relay to {self.sink.name} failed, retrying in {backoff:.1f}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+
+            # Drain backlogs immediately; poll when caught up
+            if published < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        """Start the relay loop in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+            logger.info(f"Outbox relay started (sink: {self.sink.name})")
+
+    async def stop(self):
+        """Stop the relay loop and close the sink"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.sink.close()
+
+
+def create_outbox_relay() -> OutboxRelay:
+    """Create a relay for the configured sink"""
+    return OutboxRelay(
+        create_outbox_sink(),
+        batch_size=settings.outbox_batch_size,
+        poll_interval_ms=settings.outbox_poll_interval_ms,
+        retention_hours=settings.outbox_retention_hours,
+    )
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "add_outbox_event",
+    "event_message",
+    "OutboxSink",
+    "KafkaSink",
+    "RedisStreamSink",
+    "FileSink",
+    "create_outbox_sink",
+    "OutboxRelay",
+    "create_outbox_relay",
+]
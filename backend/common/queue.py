@@ -0,0 +1,459 @@
+"""
+Background Job Queue
+Durable, coalescing job queue on Redis streams with an in-memory fallback
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from config import settings
+from models.database import redis_cache
+
+logger = logging.getLogger(__name__)
+
+# Handler signature: (entity_id, payload) -> None
+JobHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+# Prometheus metrics
+JOB_COUNT = Counter(
+    "job_queue_jobs_total",
+    "Jobs by outcome (enqueued, coalesced, skipped, succeeded, retried, failed)",
+    ["queue", "job_type", "status"]
+)
+JOB_DURATION = Histogram(
+    "job_queue_job_duration_seconds",
+    "Job handler duration in seconds",
+    ["queue", "job_type"]
+)
+JOB_LAG = Histogram(
+    "job_queue_lag_seconds",
+    "Time from first enqueue to processing start",
+    ["queue"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+)
+QUEUE_DEPTH = Gauge(
+    "job_queue_depth",
+    "Jobs waiting or in progress",
+    ["queue"]
+)
+
+
+class Delivery(NamedTuple):
+    """A job handed to a worker"""
+    field: str  # "<job_type>:<entity_id>", the coalescing key
+    raw: str  # Job JSON as stored, compared on completion
+    job: Dict[str, Any]
+    enqueued_at: float
+    attempts: int
+    token: Any  # Backend-specific delivery handle
+
+
+class JobQueue:
+    """
+    Base job queue
+
+    Jobs are keyed by (job_type, entity_id). Enqueuing a job for an entity that
+    already has one waiting replaces its payload instead of adding a second
+    job, so a burst of updates to one item runs its side effects once. A job
+    whose version (e.g. content hash) matches the last completed version for
+    that entity is skipped, unless a job for the entity is still waiting or
+    running: that job would otherwise record its own version as done after
+    processing state the skipped job describes, so the new version replaces
+    its payload instead.
+    """
+
+    def __init__(self, name: str, max_retries: int = 3):
+        self.name = name
+        self.max_retries = max_retries
+        self.handlers: Dict[str, JobHandler] = {}
+        self._workers: List[asyncio.Task] = []
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def register(self, job_type: str, handler: JobHandler):
+        """Register the handler for a job type"""
+        self.handlers[job_type] = handler
+
+    async def enqueue(
+        self,
+        job_type: str,
+        entity_id: Any,
+        version: Optional[str] = None,
+        payload: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Enqueue a job
+
+        Returns:
+            "enqueued", "coalesced" (merged into a waiting job) or "skipped" (version already done)
+        """
+        field = f"{job_type}:{entity_id}"
+        raw = json.dumps({
+            "job_type": job_type,
+            "entity_id": str(entity_id),
+            "version": version,
+            "payload": payload or {},
+        })
+        status, depth = await self._put(field, raw, version)
+        JOB_COUNT.labels(queue=self.name, job_type=job_type, status=status).inc()
+        QUEUE_DEPTH.labels(queue=self.name).set(depth)
+        return status
+
+    async def start(self, concurrency: int = 4):
+        """Start worker tasks"""
+        if self._running:
+            return
+        await self._setup()
+        self._running = True
+        self._workers = [
+            asyncio.create_task(self._work(f"{socket.gethostname()}-{os.getpid()}-{i}"))
+            for i in range(max(1, concurrency))
+        ]
+        logger.info(f"Job queue '{self.name}' started with {len(self._workers)} workers")
+
+    async def stop(self):
+        """Stop worker tasks; unfinished jobs stay queued"""
+        self._running = False
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info(f"Job queue '{self.name}' stopped")
+
+    async def _work(self, consumer: str):
+        """Worker loop"""
+        while self._running:
+            try:
+                delivery = await self._take(consumer)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job queue '{self.name}' read failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if delivery is not None:
+                await self._process(delivery)
+
+    async def _process(self, delivery: Delivery):
+        """Run a job and record its outcome"""
+        job_type = delivery.job["job_type"]
+        JOB_LAG.labels(queue=self.name).observe(max(0.0, time.time() - delivery.enqueued_at))
+
+        handler = self.handlers.get(job_type)
+        if handler is None:
+            logger.error(f"No handler registered for job type '{job_type}'")
+            await self._fail(delivery)
+            JOB_COUNT.labels(queue=self.name, job_type=job_type, status="failed").inc()
+            return
+
+        start_time = time.perf_counter()
+        try:
+            await handler(delivery.job["entity_id"], delivery.job["payload"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if delivery.attempts + 1 < self.max_retries:
+                logger.warning(f"Job {delivery.field} failed (attempt {delivery.attempts + 1}), retrying: {e}")
+                await self._retry(delivery)
+                status = "retried"
+            else:
+                logger.error(f"Job {delivery.field} failed after {delivery.attempts + 1} attempts: {e}")
+                await self._fail(delivery)
+                status = "failed"
+        else:
+            depth = await self._complete(delivery)
+            QUEUE_DEPTH.labels(queue=self.name).set(depth)
+            status = "succeeded"
+        finally:
+            JOB_DURATION.labels(queue=self.name, job_type=job_type).observe(
+                time.perf_counter() - start_time
+            )
+        JOB_COUNT.labels(queue=self.name, job_type=job_type, status=status).inc()
+
+    # Backend hooks -----------------------------------------------------------
+
+    async def _setup(self):
+        """Prepare backend structures"""
+
+    async def depth(self) -> int:
+        """Number of jobs waiting or in progress"""
+        raise NotImplementedError
+
+    async def _put(self, field: str, raw: str, version: Optional[str]) -> tuple[str, int]:
+        raise NotImplementedError
+
+    async def _take(self, consumer: str) -> Optional[Delivery]:
+        raise NotImplementedError
+
+    async def _complete(self, delivery: Delivery) -> int:
+        raise NotImplementedError
+
+    async def _retry(self, delivery: Delivery):
+        raise NotImplementedError
+
+    async def _fail(self, delivery: Delivery):
+        raise NotImplementedError
+
+
+# ============================================================================
+# Redis Streams Backend
+# ============================================================================
+
+# KEYS: pending hash, stream, versions hash
+# ARGV: field, job JSON, version ("" for none)
+_PUT_SCRIPT = """
+local existed = redis.call('HEXISTS', KEYS[1], ARGV[1])
+if existed == 0 and ARGV[3] ~= '' and redis.call('HGET', KEYS[3], ARGV[1]) == ARGV[3] then
+    return {'skipped', redis.call('HLEN', KEYS[1])}
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+if existed == 0 then
+    redis.call('XADD', KEYS[2], '*', 'key', ARGV[1], 'attempts', '0')
+    return {'enqueued', redis.call('HLEN', KEYS[1])}
+end
+return {'coalesced', redis.call('HLEN', KEYS[1])}
+"""
+
+# Remove the job only if no newer payload arrived while it ran; otherwise
+# queue a fresh entry for the newer payload.
+# KEYS: pending hash, stream, versions hash
+# ARGV: field, job JSON that was processed, version ("" for none)
+_COMPLETE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if current == ARGV[2] then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+elseif current then
+    redis.call('XADD', KEYS[2], '*', 'key', ARGV[1], 'attempts', '0')
+end
+if ARGV[3] ~= '' then
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[3])
+end
+return redis.call('HLEN', KEYS[1])
+"""
+
+
+class RedisStreamJobQueue(JobQueue):
+    """
+    Job queue on a Redis stream with a consumer group
+
+    The stream carries coalescing keys; payloads live in a hash so repeated
+    enqueues overwrite rather than append. Entries are acknowledged only after
+    the handler finishes, and entries left unacknowledged by a crashed worker
+    are reclaimed after the visibility timeout.
+    """
+
+    def __init__(self, name: str, max_retries: int = 3, visibility_timeout_s: int = 300):
+        super().__init__(name, max_retries)
+        self.visibility_timeout_ms = visibility_timeout_s * 1000
+        prefix = f"kcp:jobs:{name}"
+        self.stream_key = f"{prefix}:stream"
+        self.pending_key = f"{prefix}:pending"
+        self.versions_key = f"{prefix}:versions"
+        self.dead_letter_key = f"{prefix}:dead"
+        self.group = f"{name}-workers"
+        self._put_script = None
+        self._complete_script = None
+        self._last_reclaim = 0.0
+
+    @property
+    def client(self):
+        if not redis_cache.client:
+            raise RuntimeError("Redis not connected")
+        return redis_cache.client
+
+    async def _setup(self):
+        try:
+            await self.client.xgroup_create(self.stream_key, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _scripts(self):
+        if self._put_script is None:
+            self._put_script = self.client.register_script(_PUT_SCRIPT)
+            self._complete_script = self.client.register_script(_COMPLETE_SCRIPT)
+        return self._put_script, self._complete_script
+
+    async def depth(self) -> int:
+        return int(await self.client.hlen(self.pending_key))
+
+    async def _put(self, field: str, raw: str, version: Optional[str]) -> tuple[str, int]:
+        put_script, _ = self._scripts()
+        status, depth = await put_script(
+            keys=[self.pending_key, self.stream_key, self.versions_key],
+            args=[field, raw, version or ""]
+        )
+        return str(status), int(depth)
+
+    async def _take(self, consumer: str) -> Optional[Delivery]:
+        entries = None
+
+        # Periodically take over entries abandoned by dead workers
+        now = time.monotonic()
+        if now - self._last_reclaim > self.visibility_timeout_ms / 2000:
+            self._last_reclaim = now
+            claimed = await self.client.xautoclaim(
+                self.stream_key, self.group, consumer,
+                min_idle_time=self.visibility_timeout_ms, count=1
+            )
+            if claimed and claimed[1]:
+                entries = claimed[1]
+
+        if not entries:
+            response = await self.client.xreadgroup(
+                self.group, consumer, {self.stream_key: ">"}, count=1, block=1000
+            )
+            if not response:
+                return None
+            entries = response[0][1]
+
+        entry_id, fields = entries[0]
+        field = fields["key"]
+        raw = await self.client.hget(self.pending_key, field)
+        if raw is None:
+            # Payload already handled through a newer entry
+            await self.client.xack(self.stream_key, self.group, entry_id)
+            return None
+
+        return Delivery(
+            field=field,
+            raw=raw,
+            job=json.loads(raw),
+            enqueued_at=int(entry_id.split("-")[0]) / 1000.0,
+            attempts=int(fields.get("attempts", 0)),
+            token=entry_id,
+        )
+
+    async def _complete(self, delivery: Delivery) -> int:
+        _, complete_script = self._scripts()
+        depth = await complete_script(
+            keys=[self.pending_key, self.stream_key, self.versions_key],
+            args=[delivery.field, delivery.raw, delivery.job.get("version") or ""]
+        )
+        await self.client.xack(self.stream_key, self.group, delivery.token)
+        return int(depth)
+
+    async def _retry(self, delivery: Delivery):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.stream_key, {"key": delivery.field, "attempts": str(delivery.attempts + 1)})
+            pipe.xack(self.stream_key, self.group, delivery.token)
+            await pipe.execute()
+
+    async def _fail(self, delivery: Delivery):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.dead_letter_key, {"key": delivery.field, "job": delivery.raw}, maxlen=10000)
+            pipe.hdel(self.pending_key, delivery.field)
+            pipe.xack(self.stream_key, self.group, delivery.token)
+            await pipe.execute()
+
+
+# ============================================================================
+# In-Memory Backend
+# ============================================================================
+
+class InMemoryJobQueue(JobQueue):
+    """
+    Process-local job queue with the same coalescing semantics
+
+    Not durable: queued jobs are lost on restart. Used when Redis is not
+    available and in development.
+    """
+
+    def __init__(self, name: str, max_retries: int = 3):
+        super().__init__(name, max_retries)
+        self._pending: Dict[str, str] = {}
+        self._versions: Dict[str, str] = {}
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self.dead_letters: List[str] = []
+
+    async def depth(self) -> int:
+        return len(self._pending)
+
+    async def _put(self, field: str, raw: str, version: Optional[str]) -> tuple[str, int]:
+        existed = field in self._pending
+        if not existed and version and self._versions.get(field) == version:
+            return "skipped", len(self._pending)
+        self._pending[field] = raw
+        if existed:
+            return "coalesced", len(self._pending)
+        self._ready.put_nowait((field, time.time(), 0))
+        return "enqueued", len(self._pending)
+
+    async def _take(self, consumer: str) -> Optional[Delivery]:
+        try:
+            field, enqueued_at, attempts = await asyncio.wait_for(self._ready.get(), timeout=1.0)
+        except asyncio.TimeoutError:
+            return None
+        raw = self._pending.get(field)
+        if raw is None:
+            return None
+        return Delivery(
+            field=field,
+            raw=raw,
+            job=json.loads(raw),
+            enqueued_at=enqueued_at,
+            attempts=attempts,
+            token=None,
+        )
+
+    async def _complete(self, delivery: Delivery) -> int:
+        current = self._pending.get(delivery.field)
+        if current == delivery.raw:
+            del self._pending[delivery.field]
+        elif current is not None:
+            self._ready.put_nowait((delivery.field, time.time(), 0))
+        version = delivery.job.get("version")
+        if version:
+            self._versions[delivery.field] = version
+        return len(self._pending)
+
+    async def _retry(self, delivery: Delivery):
+        self._ready.put_nowait((delivery.field, delivery.enqueued_at, delivery.attempts + 1))
+
+    async def _fail(self, delivery: Delivery):
+        self._pending.pop(delivery.field, None)
+        self.dead_letters.append(delivery.raw)
+
+
+def create_job_queue(name: str) -> JobQueue:
+    """
+    Create a job queue for a service
+
+    Uses Redis streams unless TASK_QUEUE_BACKEND=memory. Redis must be
+    connected first; a queue silently falling back to process memory
+    would split jobs between replicas.
+    """
+    if settings.task_queue_backend == "memory":
+        logger.warning(f"Job queue '{name}' using in-memory backend; queued jobs are not durable")
+        return InMemoryJobQueue(name, max_retries=settings.task_queue_max_retries)
+    if redis_cache.client is None:
+        raise RuntimeError(f"Job queue '{name}' needs Redis; connect it first or set TASK_QUEUE_BACKEND=memory")
+    return RedisStreamJobQueue(
+        name,
+        max_retries=settings.task_queue_max_retries,
+        visibility_timeout_s=settings.task_queue_visibility_timeout_s,
+    )
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "JobHandler",
+    "Delivery",
+    "JobQueue",
+    "RedisStreamJobQueue",
+    "InMemoryJobQueue",
+    "create_job_queue",
+]
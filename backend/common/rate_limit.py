@@ -0,0 +1,396 @@
+"""
+Rate Limiting
+Distributed sliding-window rate limiter enforced as ASGI middleware
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+import asyncio
+import hashlib
+import ipaddress
+import json
+import logging
+import math
+import time
+
+from jose import JWTError, jwt
+from prometheus_client import Counter
+
+from config import settings
+from models.database import redis_cache
+
+logger = logging.getLogger(__name__)
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+# Prometheus metrics
+RATE_LIMIT_DECISIONS = Counter(
+    "rate_limit_decisions_total",
+    "Rate limit decisions by outcome",
+    ["result"]  # "allowed", "allowed_local", "rejected", "rejected_local", "unavailable"
+)
+
+# Request cost by path prefix (longest match wins). Other requests cost
+# DEFAULT_READ_COST for GET/HEAD and DEFAULT_WRITE_COST otherwise.
+ROUTE_COSTS: Dict[str, int] = {
+    "/api/v1/search/rag": 10,
+    "/api/v1/search": 3,
+    "/api/v1/content/generate": 10,
+    "/api/v1/support/chat": 5,
+    "/api/v1/auth/login": 5,
+    "/api/v1/auth/register": 5,
+}
+DEFAULT_READ_COST = 1
+DEFAULT_WRITE_COST = 2
+
+EXEMPT_PATHS = ("/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+_WINDOWS = (60, 3600)
+
+# Sliding-window counter over two fixed buckets per window. The previous
+# bucket is weighted by how much of it still overlaps the window. A grant
+# may exceed the request cost: the surplus is a lease the calling process
+# spends locally without asking Redis again. Leases are charged to the
+# minute window only, where unused units lapse with the bucket; the hour
+# window is charged the request cost plus the units the process reports
+# it spent from its previous lease, so it counts only real requests.
+#
+# KEYS: minute current, minute previous, hour current, hour previous
+# ARGV: cost, lease fraction, units spent from the previous lease,
+#       then per window: limit, previous weight, ttl
+# Returns: {allowed, remaining after grant, granted}
+_ACQUIRE_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local lease_fraction = tonumber(ARGV[2])
+local spent = tonumber(ARGV[3])
+if spent > 0 then
+    redis.call('INCRBY', KEYS[3], spent)
+    redis.call('EXPIRE', KEYS[3], tonumber(ARGV[9]))
+end
+local remaining = nil
+for i = 0, 1 do
+    local limit = tonumber(ARGV[4 + i * 3])
+    local weight = tonumber(ARGV[5 + i * 3])
+    local current = tonumber(redis.call('GET', KEYS[1 + i * 2]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 + i * 2]) or '0')
+    local left = limit - current - math.floor(previous * weight)
+    if remaining == nil or left < remaining then
+        remaining = left
+    end
+end
+if remaining < cost then
+    return {0, remaining, 0}
+end
+local grant = math.max(cost, math.floor(remaining * lease_fraction))
+redis.call('INCRBY', KEYS[1], grant)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[6]))
+redis.call('INCRBY', KEYS[3], cost)
+redis.call('EXPIRE', KEYS[3], tonumber(ARGV[9]))
+return {1, remaining - grant, grant}
+"""
+
+
+def parse_networks(value: str) -> List[IPNetwork]:
+    """Parse a comma-separated list of IP addresses and CIDR ranges"""
+    networks = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+        except ValueError:
+            logger.warning(f"Ignoring invalid trusted proxy '{entry}'")
+    return networks
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()[:16]
+
+
+def _is_trusted(address: str, trusted_proxies: List[IPNetwork]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def _client_ip(headers: Dict[str, str], peer: Optional[str], trusted_proxies: List[IPNetwork]) -> str:
+    """
+    Client address, honouring X-Forwarded-For only from trusted proxies
+
+    Hops are read from the right, skipping trusted proxies; the first
+    untrusted hop is the client. Earlier hops are set by the client and
+    are ignored.
+    """
+    if peer is None:
+        return "unknown"
+    forwarded_for = headers.get("x-forwarded-for")
+    if not forwarded_for or not _is_trusted(peer, trusted_proxies):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted_proxies):
+            return hop
+    return hops[0] if hops else peer
+
+
+def _token_subject(token: str) -> Optional[str]:
+    """Subject of a bearer token signed with our key, or None"""
+    try:
+        claims = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+    except JWTError:
+        return None
+    subject = claims.get("sub")
+    return str(subject) if subject is not None else None
+
+
+def client_identifier(
+    scope: Dict[str, Any],
+    trusted_proxies: Optional[List[IPNetwork]] = None,
+    api_keys: FrozenSet[str] = frozenset()
+) -> str:
+    """
+    Identify the caller: known API key, then verified token, then client IP
+
+    Credentials that cannot be verified are ignored so that a client cannot
+    get a fresh limit by sending a new header value. API keys are compared
+    and stored as hashes so they never appear in Redis keys.
+    """
+    headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+
+    api_key = headers.get("x-api-key")
+    if api_key and _hash(api_key) in api_keys:
+        return f"apikey:{_hash(api_key)}"
+
+    auth = headers.get("authorization", "")
+    if auth.startswith("Bearer "):
+        subject = _token_subject(auth[7:])
+        if subject is not None:
+            return f"user:{subject}"
+
+    client = scope.get("client")
+    return f"ip:{_client_ip(headers, client[0] if client else None, trusted_proxies or [])}"
+
+
+def request_cost(method: str, path: str, route_costs: Dict[str, int]) -> int:
+    """Cost of a request in rate limit units"""
+    best = None
+    for prefix, cost in route_costs.items():
+        if path.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+            best = (prefix, cost)
+    if best is not None:
+        return best[1]
+    return DEFAULT_READ_COST if method in ("GET", "HEAD") else DEFAULT_WRITE_COST
+
+
+class RateLimiter:
+    """
+    Per-client limits per minute and per hour, shared through Redis
+
+    Each decision is one Lua call. Two local tiers avoid most of those
+    calls: clients well under their limit receive a lease of extra units
+    that this process spends locally until the minute bucket rolls over,
+    and rejected clients are refused locally until their retry time.
+    Leased units count against the client's minute window whether used
+    or not, so the lease fraction trades Redis traffic for precision.
+    Units spent from a lease are reported to the hour window on the
+    client's next Redis call. Leases shrink as the client approaches its
+    limit.
+
+    When Redis is unreachable requests are allowed.
+    """
+
+    def __init__(
+        self,
+        per_minute: int,
+        per_hour: int,
+        lease_fraction: float = 0.1,
+        max_local_clients: int = 10000
+    ):
+        self.limits = (per_minute, per_hour)
+        self.lease_fraction = lease_fraction
+        self.max_local_clients = max_local_clients
+        # client -> (minute bucket, units left, units spent)
+        self._leases: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()
+        self._blocked: Dict[str, float] = {}  # client -> monotonic time allowed again
+        self._script = None
+        self._next_connect_attempt = 0.0
+
+    async def _client(self):
+        if redis_cache.client is None and time.monotonic() >= self._next_connect_attempt:
+            try:
+                await asyncio.wait_for(redis_cache.ensure_connected(), timeout=settings.db_connect_timeout_s)
+            except Exception as e:
+                self._next_connect_attempt = time.monotonic() + 30
+                logger.warning(f"Rate limiter: Redis unavailable, allowing requests: {e}")
+        if redis_cache.client is not None and self._script is None:
+            self._script = redis_cache.client.register_script(_ACQUIRE_SCRIPT)
+        return redis_cache.client
+
+    def _take_lease(self, client: str, cost: int, minute_bucket: int) -> bool:
+        lease = self._leases.get(client)
+        if lease is None or lease[0] != minute_bucket or lease[1] < cost:
+            return False
+        self._leases[client] = (minute_bucket, lease[1] - cost, lease[2] + cost)
+        self._leases.move_to_end(client)
+        return True
+
+    def _store_lease(self, client: str, lease: Tuple[int, int, int]):
+        if lease[1] <= 0 and lease[2] <= 0:
+            self._leases.pop(client, None)
+            return
+        self._leases[client] = lease
+        self._leases.move_to_end(client)
+        while len(self._leases) > self.max_local_clients:
+            self._leases.popitem(last=False)
+
+    def _block(self, client: str, retry_after: int):
+        if len(self._blocked) >= self.max_local_clients:
+            now = time.monotonic()
+            self._blocked = {c: t for c, t in self._blocked.items() if t > now}
+            if len(self._blocked) >= self.max_local_clients:
+                return
+        self._blocked[client] = time.monotonic() + retry_after
+
+    async def acquire(self, client: str, cost: int) -> Tuple[bool, Optional[int], int]:
+        """
+        Try to spend cost units for client
+
+        Returns (allowed, remaining units or None if unknown, retry after seconds).
+        """
+        now = time.time()
+        minute_bucket = int(now // 60)
+
+        blocked_until = self._blocked.get(client)
+        if blocked_until is not None:
+            if time.monotonic() < blocked_until:
+                RATE_LIMIT_DECISIONS.labels(result="rejected_local").inc()
+                return False, 0, max(1, math.ceil(blocked_until - time.monotonic()))
+            del self._blocked[client]
+
+        if self._take_lease(client, cost, minute_bucket):
+            RATE_LIMIT_DECISIONS.labels(result="allowed_local").inc()
+            return True, None, 0
+
+        redis = await self._client()
+        if redis is None:
+            RATE_LIMIT_DECISIONS.labels(result="unavailable").inc()
+            return True, None, 0
+
+        # Units spent from the previous lease are charged to the hour window by this call
+        previous = self._leases.pop(client, None)
+        spent = previous[2] if previous else 0
+
+        keys: List[str] = []
+        args: List[Any] = [cost, self.lease_fraction, spent]
+        for window, limit in zip(_WINDOWS, self.limits):
+            bucket = int(now // window)
+            keys += [f"kcp:ratelimit:{client}:{window}:{bucket}", f"kcp:ratelimit:{client}:{window}:{bucket - 1}"]
+            args += [limit, 1.0 - (now % window) / window, window * 2]
+
+        try:
+            allowed, remaining, granted = await self._script(keys=keys, args=args, client=redis)
+        except Exception as e:
+            if spent:
+                self._store_lease(client, (previous[0], 0, spent))
+            RATE_LIMIT_DECISIONS.labels(result="unavailable").inc()
+            logger.warning(f"Rate limiter: Redis call failed, allowing request: {e}")
+            return True, None, 0
+
+        if not allowed:
+            # The minute window frees capacity as the previous bucket's weight decays
+            retry_after = max(1, math.ceil(60 - now % 60))
+            self._block(client, retry_after)
+            RATE_LIMIT_DECISIONS.labels(result="rejected").inc()
+            return False, max(0, remaining), retry_after
+
+        self._store_lease(client, (minute_bucket, granted - cost, 0))
+        RATE_LIMIT_DECISIONS.labels(result="allowed").inc()
+        return True, remaining, 0
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing the configured per-client rate limits
+
+    Usage:
+        app.add_middleware(RateLimitMiddleware)
+    """
+
+    def __init__(
+        self,
+        app,
+        per_minute: Optional[int] = None,
+        per_hour: Optional[int] = None,
+        route_costs: Optional[Dict[str, int]] = None,
+        exempt_paths: Tuple[str, ...] = EXEMPT_PATHS,
+        enabled: Optional[bool] = None
+    ):
+        self.app = app
+        self.route_costs = route_costs if route_costs is not None else ROUTE_COSTS
+        self.exempt_paths = exempt_paths
+        self.enabled = settings.rate_limit_enabled if enabled is None else enabled
+        self.trusted_proxies = parse_networks(settings.rate_limit_trusted_proxies)
+        self.api_keys = frozenset(
+            _hash(key.strip()) for key in settings.rate_limit_api_keys.split(",") if key.strip()
+        )
+        self.limiter = RateLimiter(
+            per_minute or settings.rate_limit_per_minute,
+            per_hour or settings.rate_limit_per_hour,
+            lease_fraction=settings.rate_limit_lease_fraction,
+        )
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        client = client_identifier(scope, self.trusted_proxies, self.api_keys)
+        cost = request_cost(scope["method"], scope["path"], self.route_costs)
+        allowed, remaining, retry_after = await self.limiter.acquire(client, cost)
+
+        limit_headers = [(b"x-ratelimit-limit", str(self.limiter.limits[0]).encode())]
+        if remaining is not None:
+            limit_headers.append((b"x-ratelimit-remaining", str(max(0, remaining)).encode()))
+
+        if not allowed:
+            body = json.dumps({
+                "error": "RateLimitExceeded",
+                "message": "Too many requests. Please try again later.",
+                "retry_after": retry_after,
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ] + limit_headers,
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + limit_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "ROUTE_COSTS",
+    "client_identifier",
+    "parse_networks",
+    "request_cost",
+    "RateLimiter",
+    "RateLimitMiddleware",
+]
@@ -0,0 +1,507 @@
+"""
+Content Quality Scoring
+Readability, SEO and originality scores computed locally over batches of documents
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Type
+import asyncio
+import logging
+import re
+import zlib
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from prometheus_client import Counter, Histogram
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from config import settings
+from models.database import AsyncSessionLocal
+from models.knowledge import ContentGeneration, KnowledgeItem, Product
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+SCORED_DOCUMENTS = Counter(
+    "quality_scored_documents_total",
+    "Documents given quality scores",
+    ["table"]
+)
+SCORING_DURATION = Histogram(
+    "quality_scoring_batch_seconds",
+    "Time to score a batch of documents, excluding database access",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+)
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+_TOKEN_RE = re.compile(r"\w+")
+_SENTENCE_RE = re.compile(r"[.!?。！？]+(?=\s|$)")
+_VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+# Trailing silent "e" ("make", "store"), but not "-le" ("table")
+_SILENT_E_RE = re.compile(r"(?<=[a-z][aeiouy])[^aeiouyl\W]e\b")
+_STRUCTURE_RE = re.compile(r"^\s*(?:#{1,6}\s|[-*•]\s|\d+[.)]\s)", re.MULTILINE)
+
+# SEO heuristics: keyword density inside this band scores fully
+SEO_DENSITY_LOW = 0.01
+SEO_DENSITY_HIGH = 0.03
+SEO_TITLE_CHARS = (30, 65)
+SEO_WEIGHTS = {"density": 0.3, "coverage": 0.2, "title": 0.2, "length": 0.2, "structure": 0.1}
+
+
+# ============================================================================
+# Readability & SEO
+# ============================================================================
+
+def readability_scores(texts: Sequence[str]) -> np.ndarray:
+    """
+    Flesch reading ease per text, clipped to 0-100 (NaN for texts without words)
+
+    Syllables are estimated from vowel groups, so scores are approximate
+    for non-English text.
+    """
+    counts = np.zeros((len(texts), 3), dtype=np.float64)  # words, sentences, syllables
+    for i, text in enumerate(texts):
+        lowered = text.lower()
+        words = len(_WORD_RE.findall(lowered))
+        syllables = len(_VOWEL_GROUP_RE.findall(lowered)) - len(_SILENT_E_RE.findall(lowered))
+        counts[i] = (words, len(_SENTENCE_RE.findall(text)), syllables)
+
+    words, sentences, syllables = counts.T
+    sentences = np.maximum(sentences, 1)
+    syllables = np.maximum(syllables, words)  # at least one per word
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = 206.835 - 1.015 * (words / sentences) - 84.6 * (syllables / words)
+    return np.where(words > 0, np.clip(score, 0, 100), np.nan)
+
+
+def seo_scores(
+    texts: Sequence[str],
+    titles: Sequence[Optional[str]],
+    keywords: Sequence[Optional[Sequence[str]]]
+) -> np.ndarray:
+    """
+    SEO heuristic per text, 0-100
+
+    Combines keyword density (1-3% of words), keyword coverage, keywords
+    and length of the title, body length against the target word count,
+    and structure (headings or lists). Keyword components are left out
+    for texts without keywords.
+    """
+    n = len(texts)
+    words = np.zeros(n)
+    keyword_words = np.zeros(n)
+    found = np.zeros(n)
+    wanted = np.zeros(n)
+    title_hit = np.zeros(n)
+    title_len = np.zeros(n)
+    structured = np.zeros(n)
+    for i, (text, title, terms) in enumerate(zip(texts, titles, keywords)):
+        tokens = _TOKEN_RE.findall(text.lower())
+        lowered = f" {' '.join(tokens)} "
+        title_lowered = (title or "").lower()
+        words[i] = len(tokens)
+        title_len[i] = len(title or "")
+        structured[i] = _STRUCTURE_RE.search(text) is not None
+        terms = [t.lower().strip() for t in (terms or []) if t and t.strip()]
+        wanted[i] = len(terms)
+        for term in terms:
+            occurrences = lowered.count(f" {' '.join(_TOKEN_RE.findall(term))} ")
+            keyword_words[i] += occurrences * len(term.split())
+            found[i] += occurrences > 0
+            title_hit[i] = title_hit[i] or term in title_lowered
+
+    has_keywords = wanted > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        density = np.where(words > 0, keyword_words / words, 0.0)
+        coverage = np.where(has_keywords, found / wanted, 0.0)
+    density_score = np.where(
+        density < SEO_DENSITY_LOW,
+        density / SEO_DENSITY_LOW,
+        np.clip(1 - (density - SEO_DENSITY_HIGH) / SEO_DENSITY_HIGH, 0, 1),
+    )
+    low, high = SEO_TITLE_CHARS
+    title_fit = ((title_len >= low) & (title_len <= high)).astype(np.float64)
+    title_score = np.where(has_keywords, 0.5 * title_hit + 0.5 * title_fit, title_fit)
+    length_score = np.minimum(words / max(settings.scoring_seo_target_words, 1), 1.0)
+
+    w = SEO_WEIGHTS
+    keyword_part = w["density"] * density_score + w["coverage"] * coverage
+    total = keyword_part * has_keywords + w["title"] * title_score + w["length"] * length_score + w["structure"] * structured
+    max_total = np.where(has_keywords, 1.0, 1.0 - w["density"] - w["coverage"])
+    return np.round(100 * total / max_total, 2)
+
+
+# ============================================================================
+# MinHash
+# ============================================================================
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles
+
+    Shingle hashes are stable across processes (CRC32 tokens combined
+    polynomially), and signatures use multiply-shift hashing, so signatures
+    computed anywhere are comparable. The fraction of equal signature
+    positions estimates the Jaccard similarity of two documents' shingles.
+    """
+
+    # Documents are hashed in groups of about this many shingles
+    GROUP_SHINGLES = 32768
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+        self._powers = rng.integers(1, 2**63, size=shingle_size, dtype=np.uint64) | np.uint64(1)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Distinct shingle hashes of a text"""
+        tokens = _TOKEN_RE.findall(text.lower())
+        if not tokens:
+            return np.zeros(0, dtype=np.uint64)
+        hashed = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.uint64, count=len(tokens))
+        k = min(self.shingle_size, len(hashed))
+        windows = sliding_window_view(hashed, k)
+        with np.errstate(over="ignore"):
+            return np.unique((windows * self._powers[:k]).sum(axis=1, dtype=np.uint64))
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), num_perm) uint32 signatures; empty texts get all-max signatures"""
+        out = np.full((len(texts), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        group: List[Tuple[int, np.ndarray]] = []
+        size = 0
+        for i, text in enumerate(texts):
+            shingles = self.shingles(text)
+            if not len(shingles):
+                continue
+            group.append((i, shingles))
+            size += len(shingles)
+            if size >= self.GROUP_SHINGLES:
+                self._hash_group(group, out)
+                group, size = [], 0
+        if group:
+            self._hash_group(group, out)
+        return out
+
+    def _hash_group(self, group: List[Tuple[int, np.ndarray]], out: np.ndarray):
+        rows = [i for i, _ in group]
+        shingles = np.concatenate([s for _, s in group])
+        offsets = np.cumsum([0] + [len(s) for _, s in group[:-1]])
+        with np.errstate(over="ignore"):
+            hashed = ((self._a[:, None] * shingles[None, :] + self._b[:, None]) >> np.uint64(32)).astype(np.uint32)
+        out[rows] = np.minimum.reduceat(hashed, offsets, axis=1).T
+
+
+def empty_signatures(signatures: np.ndarray) -> np.ndarray:
+    """Mask of signatures of texts without shingles (all positions at the maximum)"""
+    return (signatures == np.iinfo(np.uint32).max).all(axis=1)
+
+
+def signature_similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(len(a), len(b)) estimated Jaccard similarities between two signature sets"""
+    block = max(1, 4_000_000 // max(1, len(b) * a.shape[1]))
+    return np.concatenate([
+        (a[i:i + block, None, :] == b[None, :, :]).mean(axis=2)
+        for i in range(0, len(a), block)
+    ]) if len(a) and len(b) else np.zeros((len(a), len(b)))
+
+
+_minhasher: Optional[MinHasher] = None
+
+
+def get_minhasher() -> MinHasher:
+    """The shared MinHasher configured from settings"""
+    global _minhasher
+    if _minhasher is None:
+        _minhasher = MinHasher(settings.scoring_minhash_perm, settings.scoring_shingle_size)
+    return _minhasher
+
+
+# ============================================================================
+# Originality
+# ============================================================================
+
+class SignatureCorpus:
+    """
+    MinHash signatures of a table's documents, by id
+
+    A document's originality is measured against documents with lower ids
+    only, so the first copy of duplicated text stays original and later
+    copies score low. Documents without shingles are not kept: their
+    signatures are all equal and would match each other.
+    """
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.signatures = np.zeros((0, get_minhasher().num_perm), dtype=np.uint32)
+        self.loaded_at: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: Sequence[int], signatures: np.ndarray):
+        """Add or replace documents' signatures; empty documents are only removed"""
+        ids = np.asarray(ids, dtype=np.int64)
+        keep = ~np.isin(self.ids, ids)
+        text = ~empty_signatures(signatures)
+        self.ids = np.concatenate([self.ids[keep], ids[text]])
+        self.signatures = np.concatenate([self.signatures[keep], signatures[text]])
+
+    def trim(self, max_docs: int):
+        """Keep only the newest max_docs documents"""
+        if len(self.ids) > max_docs:
+            newest = np.argsort(self.ids)[-max_docs:]
+            self.ids, self.signatures = self.ids[newest], self.signatures[newest]
+
+    def max_similarity(self, signatures: np.ndarray, ids: Optional[Sequence[Optional[int]]] = None) -> np.ndarray:
+        """Highest similarity of each signature to an earlier document (0 if none)"""
+        if not len(self.ids) or not len(signatures):
+            return np.zeros(len(signatures))
+        limit = np.array(
+            [np.iinfo(np.int64).max if i is None else i for i in (ids or [None] * len(signatures))],
+            dtype=np.int64
+        )
+        best = np.zeros(len(signatures))
+        block = max(1, 4_000_000 // max(1, len(signatures) * signatures.shape[1]))
+        for start in range(0, len(self.ids), block):
+            similarity = signature_similarity(signatures, self.signatures[start:start + block])
+            earlier = self.ids[None, start:start + block] < limit[:, None]
+            best = np.maximum(best, np.where(earlier, similarity, 0).max(axis=1))
+        return best
+
+
+# Per-process corpora by table, loaded on first use and refreshed periodically
+_corpora: Dict[str, SignatureCorpus] = {}
+_corpus_lock = asyncio.Lock()
+
+ScoredModel = Type[Any]  # KnowledgeItem or ContentGeneration
+
+
+async def _product_keywords(db: AsyncSession, product_ids: Sequence[Optional[int]]) -> Dict[int, List[str]]:
+    ids = {pid for pid in product_ids if pid is not None}
+    if not ids:
+        return {}
+    result = await db.execute(select(Product.id, Product.keywords).where(Product.id.in_(ids)))
+    return {pid: list(keywords or []) for pid, keywords in result.all()}
+
+
+async def _signatures(texts: Sequence[str]) -> np.ndarray:
+    return await asyncio.get_running_loop().run_in_executor(None, get_minhasher().signatures, texts)
+
+
+async def get_corpus(model: ScoredModel) -> SignatureCorpus:
+    """
+    The signature corpus for a table
+
+    Built from the newest scoring_corpus_max_docs rows on first use and
+    rebuilt after scoring_corpus_refresh_s, which picks up rows written by
+    other processes.
+    """
+    table = model.__tablename__
+    corpus = _corpora.get(table)
+    refresh = timedelta(seconds=settings.scoring_corpus_refresh_s)
+    if corpus is not None and datetime.utcnow() - corpus.loaded_at < refresh:
+        return corpus
+
+    async with _corpus_lock:
+        corpus = _corpora.get(table)
+        if corpus is not None and datetime.utcnow() - corpus.loaded_at < refresh:
+            return corpus
+        corpus = SignatureCorpus()
+        cursor = None
+        batch_size = settings.scoring_batch_size
+        async with AsyncSessionLocal() as db:
+            while len(corpus) < settings.scoring_corpus_max_docs:
+                query = select(model.id, model.content).order_by(model.id.desc()).limit(batch_size)
+                if cursor is not None:
+                    query = query.where(model.id < cursor)
+                rows = (await db.execute(query)).all()
+                if not rows:
+                    break
+                corpus.add([r.id for r in rows], await _signatures([r.content for r in rows]))
+                cursor = rows[-1].id
+        corpus.loaded_at = datetime.utcnow()
+        _corpora[table] = corpus
+        logger.info(f"Loaded {len(corpus)} {table} signatures for originality scoring")
+        return corpus
+
+
+def _score_batch(
+    texts: Sequence[str],
+    titles: Sequence[Optional[str]],
+    keywords: Sequence[Optional[Sequence[str]]],
+    signatures: np.ndarray,
+    ids: Sequence[Optional[int]],
+    corpus: SignatureCorpus
+) -> List[Dict[str, Optional[float]]]:
+    readability = readability_scores(texts)
+    seo = seo_scores(texts, titles, keywords)
+    originality = 100 * (1 - corpus.max_similarity(signatures, ids))
+    empty = empty_signatures(signatures)
+    return [
+        {
+            "readability_score": None if np.isnan(r) else round(float(r), 2),
+            "seo_score": float(s),
+            "originality_score": None if e else round(float(o), 2),
+        }
+        for r, s, o, e in zip(readability, seo, originality, empty)
+    ]
+
+
+async def score_documents(
+    db: AsyncSession,
+    model: ScoredModel,
+    documents: Sequence[Dict[str, Any]],
+    corpus: Optional[SignatureCorpus] = None
+) -> List[Dict[str, Optional[float]]]:
+    """
+    Score documents of a table without writing anything
+
+    documents: dicts with content, title, optional id, product_id and tags.
+    Keywords are the product's keywords plus the document's tags. Documents
+    with an id are added to the corpus (and compared with lower ids,
+    including earlier documents in the same batch); new ones are compared
+    with every document in it.
+    """
+    if corpus is None:
+        corpus = await get_corpus(model)
+    product_keywords = await _product_keywords(db, [d.get("product_id") for d in documents])
+    texts = [d["content"] or "" for d in documents]
+    keywords = [
+        product_keywords.get(d.get("product_id"), []) + list(d.get("tags") or [])
+        for d in documents
+    ]
+    ids = [d.get("id") for d in documents]
+
+    signatures = await _signatures(texts)
+    known = [i for i, doc_id in enumerate(ids) if doc_id is not None]
+    if known:
+        corpus.add([ids[i] for i in known], signatures[known])
+    with SCORING_DURATION.time():
+        scores = _score_batch(texts, [d.get("title") for d in documents], keywords, signatures, ids, corpus)
+    corpus.trim(settings.scoring_corpus_max_docs)
+    SCORED_DOCUMENTS.labels(table=model.__tablename__).inc(len(documents))
+    return scores
+
+
+def _document(row: Any) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "content": row.content,
+        "title": row.title,
+        "product_id": row.product_id,
+        "tags": getattr(row, "tags", None),
+    }
+
+
+async def score_rows(db: AsyncSession, model: ScoredModel, rows: Sequence[Any]) -> List[Dict[str, Optional[float]]]:
+    """
+    Score stored rows and write their score columns (does not commit)
+
+    updated_at is left unchanged: scores are derived data, not an edit.
+    Callers writing KnowledgeItem scores must invalidate the item cache.
+    """
+    if not rows:
+        return []
+    scores = await score_documents(db, model, [_document(r) for r in rows])
+    await _write_scores(db, model, rows, scores)
+    return scores
+
+
+async def _write_scores(db: AsyncSession, model: ScoredModel, rows: Sequence[Any], scores: Sequence[Dict[str, Any]]):
+    """Bulk update score columns by id and mirror them on the loaded rows"""
+    await db.execute(
+        update(model),
+        [{"id": r.id, "updated_at": r.updated_at, **s} for r, s in zip(rows, scores)]
+    )
+    for row, row_scores in zip(rows, scores):
+        for column, value in row_scores.items():
+            set_committed_value(row, column, value)
+
+
+async def backfill_scores(
+    model: ScoredModel,
+    only_missing: bool = True,
+    batch_size: Optional[int] = None,
+    on_scored: Optional[Callable[[List[int]], Awaitable[None]]] = None
+) -> Dict[str, int]:
+    """
+    Score a whole table in id order, committing after each batch
+
+    Originality is computed against a corpus built as the walk goes, so
+    every row is compared with all earlier rows. With only_missing, rows
+    that already have scores are read for the corpus but not rewritten.
+    on_scored is awaited with each committed batch's ids (e.g. to
+    invalidate cached items). The finished corpus replaces this process's
+    cached one.
+    """
+    batch_size = batch_size or settings.scoring_batch_size
+    corpus = SignatureCorpus()
+    scanned = scored = 0
+    last_id = 0
+
+    async with AsyncSessionLocal() as db:
+        while True:
+            rows = list((await db.execute(
+                select(model).where(model.id > last_id).order_by(model.id).limit(batch_size)
+            )).scalars().all())
+            if not rows:
+                break
+            last_id = rows[-1].id
+            scanned += len(rows)
+
+            documents = [_document(r) for r in rows]
+            if only_missing:
+                missing = [
+                    r.readability_score is None or r.seo_score is None or r.originality_score is None
+                    for r in rows
+                ]
+                done = [i for i, m in enumerate(missing) if not m]
+                if done:
+                    corpus.add([rows[i].id for i in done], await _signatures([documents[i]["content"] for i in done]))
+                rows = [r for r, m in zip(rows, missing) if m]
+                documents = [d for d, m in zip(documents, missing) if m]
+            if rows:
+                scores = await score_documents(db, model, documents, corpus=corpus)
+                await _write_scores(db, model, rows, scores)
+                await db.commit()
+                scored += len(rows)
+                if on_scored is not None:
+                    await on_scored([r.id for r in rows])
+            db.expunge_all()
+            logger.info(f"Scored {scored} of {scanned} {model.__tablename__} rows")
+
+    corpus.loaded_at = datetime.utcnow()
+    corpus.trim(settings.scoring_corpus_max_docs)
+    _corpora[model.__tablename__] = corpus
+    return {"scanned": scanned, "scored": scored}
+
+
+SCORED_MODELS: Dict[str, ScoredModel] = {
+    "knowledge_items": KnowledgeItem,
+    "content_generation": ContentGeneration,
+}
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "readability_scores",
+    "seo_scores",
+    "MinHasher",
+    "empty_signatures",
+    "signature_similarity",
+    "get_minhasher",
+    "SignatureCorpus",
+    "get_corpus",
+    "score_documents",
+    "score_rows",
+    "backfill_scores",
+    "SCORED_MODELS",
+]
@@ -48,6 +48,15 @@ class Settings(BaseSettings):
         """Construct PostgreSQL connection URL"""
         return f"postgresql://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
 
+    # Database Startup
+    db_auto_create_tables: bool = Field(default=True, description="Create missing tables on startup (never in production)")
+    db_connect_timeout_s: float = Field(default=5.0, description="Timeout per database connection attempt (seconds)")
+    db_connect_retries: int = Field(default=3, description="Connection attempts per required database on startup")
+
+    # Statement Caching
+    db_query_cache_size: int = Field(default=1200, description="Compiled SQL statements cached per engine")
+    db_prepared_statement_cache_size: int = Field(default=500, description="asyncpg prepared statements cached per connection (0 behind PgBouncer transaction pooling)")
+
     # Database - MongoDB
     mongodb_host: str = Field(default="localhost", description="MongoDB host")
     mongodb_port: int = Field(default=27017, description="MongoDB port")
@@ -121,19 +130,54 @@ class Settings(BaseSettings):
     # Rate Limiting
     rate_limit_per_minute: int = Field(default=1000, description="Rate limit per minute")
     rate_limit_per_hour: int = Field(default=10000, description="Rate limit per hour")
+    rate_limit_enabled: bool = Field(default=True, description="Enforce per-client rate limits")
+    rate_limit_lease_fraction: float = Field(default=0.1, description="Share of remaining quota leased to a process for local decisions (0 disables)")
+    rate_limit_trusted_proxies: str = Field(default="", description="Comma-separated proxy IPs/CIDRs whose X-Forwarded-For is honoured")
+    rate_limit_api_keys: str = Field(default="", description="Comma-separated API keys that get their own rate limit")
+
+    # Load Shedding
+    load_shed_enabled: bool = Field(default=True, description="Adaptive concurrency limits on search routes")
+    search_target_latency_ms: int = Field(default=500, description="Search latency above which concurrency backs off")
+    rag_target_latency_ms: int = Field(default=8000, description="RAG latency above which concurrency backs off")
+    load_shed_initial_limit: int = Field(default=20, description="Starting concurrency limit per route group")
+    load_shed_min_limit: int = Field(default=2, description="Lowest concurrency limit")
+    load_shed_max_limit: int = Field(default=200, description="Highest concurrency limit")
+    load_shed_batch_share: float = Field(default=0.5, description="Share of the limit usable by batch/export requests")
+    load_shed_queue_size: int = Field(default=50, description="Interactive requests allowed to wait for a slot")
+    load_shed_max_wait_ms: int = Field(default=200, description="Longest wait for a slot before shedding")
+
+    # Request Deadlines
+    request_timeout_ms: int = Field(default=0, description="Deadline for routes without a default (0 = none)")
+    request_timeout_max_ms: int = Field(default=60000, description="Upper bound on client-requested X-Request-Timeout-Ms")
+    db_command_timeout_s: float = Field(default=60.0, description="Client-side asyncpg timeout per statement (seconds)")
 
     # Kafka Message Queue
     kafka_bootstrap_servers: str = Field(default="localhost:9092", description="Kafka servers")
     kafka_topic_prefix: str = Field(default="soundcore_kcp", description="Kafka topic prefix")
 
+    # Change Event Outbox
+    outbox_sink: str = Field(default="kafka", description="Outbox relay sink (kafka/redis/file)")
+    outbox_file_path: str = Field(default="outbox_events.jsonl", description="Output file for the file sink")
+    outbox_batch_size: int = Field(default=500, description="Events relayed per batch")
+    outbox_poll_interval_ms: int = Field(default=500, description="Relay poll interval when idle (ms)")
+    outbox_retention_hours: int = Field(default=72, description="Hours to keep delivered events")
+
     # Celery Task Queue
     celery_broker_url: str = Field(default="redis://localhost:6379/1", description="Celery broker URL")
     celery_result_backend: str = Field(default="redis://localhost:6379/2", description="Celery result backend")
 
+    # Background Job Queue
+    task_queue_backend: str = Field(default="redis", description="Job queue backend (redis/memory)")
+    task_queue_concurrency: int = Field(default=4, description="Job queue workers per service")
+    task_queue_max_retries: int = Field(default=3, description="Attempts before a job is dead-lettered")
+    task_queue_visibility_timeout_s: int = Field(default=300, description="Idle time before an unacknowledged job is reclaimed")
+
     # Monitoring & Logging
     log_level: str = Field(default="INFO", description="Logging level")
     prometheus_port: int = Field(default=9090, description="Prometheus metrics port")
     sentry_dsn: Optional[str] = Field(default=None, description="Sentry DSN for error tracking")
+    readiness_probe_timeout_ms: int = Field(default=1000, description="Timeout per backend readiness probe (ms)")
+    readiness_cache_ttl_s: float = Field(default=5.0, description="Seconds a readiness result is reused")
 
     # Feature Flags
     enable_rag_engine: bool = Field(default=True, description="Enable RAG engine")
@@ -141,6 +185,24 @@ class Settings(BaseSettings):
     enable_auto_tagging: bool = Field(default=True, description="Enable auto-tagging")
     enable_knowledge_graph: bool = Field(default=True, description="Enable knowledge graph")
 
+    # Knowledge Graph Sync
+    graph_sync_batch_size: int = Field(default=2000, description="Rows per UNWIND batch written to Neo4j")
+    graph_sync_interval_s: int = Field(default=60, description="Seconds between incremental graph syncs")
+
+    # Related Content
+    related_top_n: int = Field(default=10, description="Related items precomputed per knowledge item")
+    related_fanout: int = Field(default=200, description="Max paths explored per traversal branch")
+    related_refresh_interval_s: int = Field(default=3600, description="Seconds between neighborhood precomputes")
+    related_cache_ttl_s: int = Field(default=86400, description="Redis TTL for precomputed neighborhoods")
+    related_local_ttl_s: int = Field(default=60, description="In-process TTL for precomputed neighborhoods")
+    related_local_max_items: int = Field(default=10000, description="In-process neighborhood cache size")
+
+    # Read Cache
+    cache_ttl_s: int = Field(default=300, description="Redis TTL for cached reads")
+    cache_local_ttl_s: float = Field(default=30.0, description="In-process TTL for cached reads (bounds cross-process staleness)")
+    cache_local_max_items: int = Field(default=5000, description="In-process entries per cache")
+    cache_early_refresh_beta: float = Field(default=1.0, description="Early refresh aggressiveness (0 disables)")
+
     # Vector Search Configuration
     vector_dimension: int = Field(default=1536, description="Vector embedding dimension")
     vector_similarity_metric: str = Field(default="cosine", description="Similarity metric")
@@ -149,6 +211,33 @@ class Settings(BaseSettings):
     # Content Generation
     content_max_length: int = Field(default=2000, description="Max content length")
     content_min_quality_score: float = Field(default=0.7, description="Min quality score")
+    content_provider: str = Field(default="openai", description="Default generation provider (openai/anthropic)")
+    content_model: str = Field(default="", description="Default generation model (empty uses the provider's default model)")
+    content_workers: int = Field(default=8, description="Generation job workers per content service process")
+    content_openai_concurrency: int = Field(default=4, description="Concurrent OpenAI generation calls per process")
+    content_anthropic_concurrency: int = Field(default=4, description="Concurrent Anthropic generation calls per process")
+    content_cache_ttl_s: int = Field(default=604800, description="Seconds generated text is cached for deterministic settings (0 disables)")
+    content_cache_max_temperature: float = Field(default=0.0, description="Highest temperature whose results are cached")
+    content_job_ttl_s: int = Field(default=86400, description="Seconds generation job status and output are kept")
+    content_batch_page_size: int = Field(default=50, description="Products generated concurrently and inserted together per batch page")
+    content_batch_lock_ttl_s: int = Field(default=600, description="Seconds before an abandoned batch can be resumed by another worker")
+    content_template_cache_size: int = Field(default=256, description="Compiled template versions kept per process")
+    content_template_knowledge_items: int = Field(default=3, description="Published knowledge items per product in template context")
+
+    # Quality Scoring
+    scoring_batch_size: int = Field(default=500, description="Documents scored together per batch")
+    scoring_minhash_perm: int = Field(default=128, description="MinHash signature length")
+    scoring_shingle_size: int = Field(default=5, description="Words per shingle for originality")
+    scoring_corpus_max_docs: int = Field(default=50000, description="Newest documents per table compared for originality")
+    scoring_corpus_refresh_s: int = Field(default=3600, description="Seconds before a process reloads its originality corpus")
+    scoring_seo_target_words: int = Field(default=300, description="Word count that earns the full SEO length score")
+    knowledge_dedupe_threshold: float = Field(default=0.8, description="Estimated Jaccard similarity at which knowledge items are near-duplicates")
+
+    # Analytics Rollups
+    analytics_rollup_interval_s: int = Field(default=300, description="Seconds between incremental analytics rollups")
+    analytics_rollup_batch_rows: int = Field(default=100000, description="Max new source rows rolled up per transaction")
+    analytics_restatement_hours: int = Field(default=2, description="Recent hours recomputed on every rollup to pick up late updates")
+    analytics_top_queries: int = Field(default=100, description="Top search queries kept per rollup bucket")
 
     # RAG Configuration
     rag_retrieval_top_k: int = Field(default=5, description="RAG retrieval top K")
@@ -156,6 +245,34 @@ class Settings(BaseSettings):
     rag_chunk_size: int = Field(default=512, description="RAG chunk size")
     rag_chunk_overlap: int = Field(default=50, description="RAG chunk overlap")
 
+    # Reranking
+    rag_rerank_model: str = Field(default="", description="Cross-encoder rerank model (empty uses lexical reranker)")
+    rag_rerank_candidates: int = Field(default=50, description="First-stage candidates passed to the reranker")
+    rag_rerank_batch_size: int = Field(default=32, description="Rerank scoring batch size")
+    rag_rerank_timeout_ms: int = Field(default=200, description="Rerank latency budget (ms)")
+    rag_rerank_workers: int = Field(default=2, description="Rerank thread pool size")
+
+    # Support Chat
+    support_chat_provider: str = Field(default="openai", description="Chat model provider (openai/anthropic)")
+    support_chat_model: str = Field(default="", description="Chat model (empty uses the provider's default model)")
+    support_chat_max_tokens: int = Field(default=800, description="Max tokens per chat answer")
+    support_chat_temperature: float = Field(default=0.3, description="Chat generation temperature")
+    support_session_ttl_s: int = Field(default=86400, description="Idle time before a chat session expires from Redis")
+    support_session_max_turns: int = Field(default=20, description="Turns kept verbatim before older ones are summarized")
+    support_session_keep_turns: int = Field(default=8, description="Recent turns kept verbatim after summarizing")
+    support_session_summary_max_chars: int = Field(default=2000, description="Max length of a session summary")
+    support_faq_threshold: float = Field(default=0.75, description="FAQ title similarity answered without the model")
+    support_faq_context_threshold: float = Field(default=0.3, description="FAQ similarity above which answers are given to the model as context")
+    support_faq_context_items: int = Field(default=3, description="FAQ answers passed to the model as context")
+    support_faq_refresh_interval_s: int = Field(default=300, description="Seconds between FAQ index rebuilds")
+
+    # Support Tickets
+    support_ticket_claim_timeout_s: int = Field(default=900, description="Seconds an agent holds a claimed ticket before it returns to the queue")
+    support_ticket_retention_s: int = Field(default=604800, description="Seconds resolved tickets are kept in Redis")
+    support_ticket_negative_boost_s: int = Field(default=1800, description="Wait credited to tickets with negative sentiment")
+    support_ticket_product_boost_s: int = Field(default=900, description="Wait credited to tickets about priority products")
+    support_ticket_priority_product_ids: List[int] = Field(default=[], description="Products whose tickets are prioritized (JSON list)")
+
 
 # Global settings instance
 settings = Settings()
@@ -0,0 +1,503 @@
+"""
+Content Service - Catalog Batches
+Generates content for every product matching a filter, resumably
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+
+from prometheus_client import Counter
+from sqlalchemy import insert, select, update
+
+from config import settings
+from common.scoring import score_documents
+from models.database import AsyncSessionLocal, redis_cache
+from models.knowledge import ContentGeneration, Product, ProductCategory
+from .generation import cache_key, generate_stream, get_generator, is_cacheable, result_cache
+from .templates import TemplateVersion, get_template, load_render_contexts, render_batch
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+BATCH_ITEMS = Counter(
+    "content_batch_items_total",
+    "Products processed by catalog batches",
+    ["status"]  # "succeeded", "failed"
+)
+BATCH_TOKENS = Counter(
+    "content_batch_tokens_total",
+    "Tokens used by catalog batches",
+    ["kind"]  # "input", "output"
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Product IDs of failed items kept in the batch state for retries
+MAX_FAILED_IDS = 1000
+
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+# ============================================================================
+# Checkpoint Stores
+# ============================================================================
+
+class BatchStore:
+    """
+    Base store for batch state and checkpoints
+
+    Batch state is a flat dict saved after every page. A lease lock keeps
+    two workers from running the same batch; it expires if its holder dies
+    so another worker can resume the batch.
+    """
+
+    def __init__(self):
+        self._cancelled: set = set()
+
+    async def get(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def save(self, batch_id: str, state: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def acquire(self, batch_id: str, owner: str, ttl_s: int) -> bool:
+        """Take or renew the batch's lease lock"""
+        return True
+
+    async def release(self, batch_id: str, owner: str):
+        pass
+
+    async def request_cancel(self, batch_id: str):
+        """Ask the worker running a batch to stop after its current page"""
+        self._cancelled.add(batch_id)
+
+    async def cancel_requested(self, batch_id: str) -> bool:
+        return batch_id in self._cancelled
+
+
+# Take the lock if free or already ours, refreshing its expiry
+# KEYS: lock key; ARGV: owner, ttl seconds
+_ACQUIRE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current == false or current == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', tonumber(ARGV[2]))
+    return 1
+end
+return 0
+"""
+
+
+class RedisBatchStore(BatchStore):
+    """Batch state as JSON in Redis, shared by all content service instances"""
+
+    def __init__(self, ttl_s: int = 30 * 86400):
+        super().__init__()
+        self.ttl_s = ttl_s
+        self._acquire_script = None
+
+    @staticmethod
+    def _keys(batch_id: str) -> Tuple[str, str, str]:
+        prefix = f"kcp:content:batch:{batch_id}"
+        return prefix, f"{prefix}:lock", f"{prefix}:cancel"
+
+    @property
+    def client(self):
+        if not redis_cache.client:
+            raise RuntimeError("Redis not connected")
+        return redis_cache.client
+
+    async def get(self, batch_id):
+        state_key, _, _ = self._keys(batch_id)
+        raw = await self.client.get(state_key)
+        return json.loads(raw) if raw else None
+
+    async def save(self, batch_id, state):
+        state_key, _, _ = self._keys(batch_id)
+        await self.client.set(state_key, json.dumps(state), ex=self.ttl_s)
+
+    async def acquire(self, batch_id, owner, ttl_s):
+        if self._acquire_script is None:
+            self._acquire_script = self.client.register_script(_ACQUIRE_SCRIPT)
+        _, lock_key, _ = self._keys(batch_id)
+        return bool(await self._acquire_script(keys=[lock_key], args=[owner, ttl_s]))
+
+    async def release(self, batch_id, owner):
+        _, lock_key, _ = self._keys(batch_id)
+        if await self.client.get(lock_key) == owner:
+            await self.client.delete(lock_key)
+
+    async def request_cancel(self, batch_id):
+        _, _, cancel_key = self._keys(batch_id)
+        await self.client.set(cancel_key, "1", ex=self.ttl_s)
+
+    async def cancel_requested(self, batch_id):
+        _, _, cancel_key = self._keys(batch_id)
+        return bool(await self.client.exists(cancel_key))
+
+
+class InMemoryBatchStore(BatchStore):
+    """Process-local batch state; batches resume only within this process"""
+
+    def __init__(self):
+        super().__init__()
+        self._states: Dict[str, str] = {}
+
+    async def get(self, batch_id):
+        raw = self._states.get(batch_id)
+        return json.loads(raw) if raw else None
+
+    async def save(self, batch_id, state):
+        self._states[batch_id] = json.dumps(state)
+
+
+class FileBatchStore(BatchStore):
+    """Batch state in a local JSON file, for command-line runs without Redis"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def _read(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    async def get(self, batch_id):
+        return self._read().get(batch_id)
+
+    async def save(self, batch_id, state):
+        states = self._read()
+        states[batch_id] = state
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(states, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def create_batch_store() -> BatchStore:
+    """
+    Create the batch store
+
+    Uses Redis, so batches resume on any instance after a restart. The
+    in-memory store is only used with TASK_QUEUE_BACKEND=memory; otherwise
+    Redis must be connected first.
+    """
+    if settings.task_queue_backend == "memory":
+        logger.warning("Content batches using in-memory state; batches cannot resume after a restart")
+        return InMemoryBatchStore()
+    if redis_cache.client is None:
+        raise RuntimeError("Content batch store needs Redis; connect it first or set TASK_QUEUE_BACKEND=memory")
+    return RedisBatchStore()
+
+
+# ============================================================================
+# Batch Runs
+# ============================================================================
+
+def new_batch(params: Dict[str, Any], batch_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Initial state for a batch
+
+    params: product filter (category, series, is_active, product_ids, limit)
+    and generation options (content_type, provider, model, temperature,
+    max_tokens, instructions, page_size, template, template_version,
+    variables).
+    """
+    provider = params.get("provider") or settings.content_provider
+    return {
+        "id": batch_id or uuid.uuid4().hex,
+        "status": QUEUED,
+        "params": {
+            **params,
+            "provider": provider,
+            "model": params.get("model") or settings.content_model or get_generator(provider).default_model,
+        },
+        "cursor": 0,
+        "processed": 0,
+        "succeeded": 0,
+        "failed": 0,
+        "failed_ids": [],
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "elapsed_s": 0.0,
+        "created_at": time.time(),
+        "updated_at": time.time(),
+        "finished_at": None,
+        "error": None,
+    }
+
+
+def throughput(state: Dict[str, Any]) -> Dict[str, Any]:
+    """State with items/min and output tokens/s over the batch's active time"""
+    elapsed = state.get("elapsed_s") or 0.0
+    return {
+        **state,
+        "items_per_min": round(state["processed"] * 60 / elapsed, 2) if elapsed else None,
+        "tokens_per_s": round(state["output_tokens"] / elapsed, 2) if elapsed else None,
+    }
+
+
+def product_prompt(product: Product, content_type: str, instructions: Optional[str] = None) -> str:
+    """Generation prompt for one product"""
+    kind = content_type.replace("_", " ")
+    category = product.category.value if isinstance(product.category, ProductCategory) else product.category
+    lines = [f"Write a {kind} for the Soundcore {product.name} ({product.model}), a {category} product."]
+    if product.description:
+        lines.append(f"Product summary: {product.description}")
+    if product.features:
+        lines.append("Features: " + ", ".join(product.features))
+    if product.specs:
+        lines.append("Specifications: " + "; ".join(f"{k.replace('_', ' ')}: {v}" for k, v in product.specs.items()))
+    if product.price is not None:
+        lines.append(f"Price: {product.price:.2f} {product.currency or 'USD'}")
+    if product.keywords:
+        lines.append("Work in these search keywords naturally: " + ", ".join(product.keywords))
+    if instructions:
+        lines.append(instructions)
+    return "\n".join(lines)
+
+
+async def resolve_template(params: Dict[str, Any]) -> Optional[TemplateVersion]:
+    """
+    The batch's prompt template, pinning its version in params
+
+    The first call records the latest version so a resumed batch keeps
+    rendering with the version it started with. Raises LookupError if the
+    template does not exist.
+    """
+    if not params.get("template"):
+        return None
+    async with AsyncSessionLocal() as db:
+        template = await get_template(db, params["template"], params.get("template_version"))
+    if template is None:
+        raise LookupError(f"Template {params['template']} not found")
+    params["template_version"] = template.version
+    return template
+
+
+async def _page_prompts(
+    params: Dict[str, Any],
+    products: List[Product],
+    template: Optional[TemplateVersion]
+) -> List[Any]:
+    """Prompt per product, or the render error for that product"""
+    instructions = params.get("instructions")
+    if template is None:
+        return [product_prompt(p, params["content_type"], instructions) for p in products]
+    async with AsyncSessionLocal() as db:
+        contexts = await load_render_contexts(db, [p.id for p in products])
+    rendered = render_batch(template, [contexts[p.id] for p in products], params.get("variables"))
+    if instructions:
+        rendered = [r if isinstance(r, Exception) else f"{r}\n{instructions}" for r in rendered]
+    return rendered
+
+
+async def _next_page(params: Dict[str, Any], cursor: int, size: int) -> List[Product]:
+    """Next products after cursor, in ID order"""
+    query = select(Product).where(Product.id > cursor)
+    if params.get("category"):
+        query = query.where(Product.category == ProductCategory(params["category"]))
+    if params.get("series"):
+        query = query.where(Product.series == params["series"])
+    if params.get("is_active") is not None:
+        query = query.where(Product.is_active == params["is_active"])
+    if params.get("product_ids"):
+        query = query.where(Product.id.in_(params["product_ids"]))
+    query = query.order_by(Product.id).limit(size)
+    async with AsyncSessionLocal() as db:
+        return list((await db.execute(query)).scalars().all())
+
+
+async def _generate(params: Dict[str, Any], system: str, prompt: str) -> Dict[str, Any]:
+    async def load():
+        usage: Dict[str, int] = {}
+        parts = [
+            text async for text in generate_stream(
+                get_generator(params["provider"]), prompt, params["model"],
+                params["temperature"], params["max_tokens"], usage, system=system
+            )
+        ]
+        return {"content": "".join(parts), "input_tokens": usage.get("input"), "output_tokens": usage.get("output")}
+
+    if is_cacheable(params["temperature"]):
+        key = cache_key(prompt, params["model"], params["temperature"], params["max_tokens"], system)
+        return await result_cache.get_or_load(key, load)
+    return await load()
+
+
+async def _raise(error: Exception):
+    raise error
+
+
+async def _renew_lease(store: BatchStore, batch_id: str, owner: str, ttl_s: int):
+    """Renew the batch's lease while pages run; returns once it is lost"""
+    while True:
+        await asyncio.sleep(ttl_s / 3)
+        if not await store.acquire(batch_id, owner, ttl_s):
+            return
+
+
+async def run_batch(
+    batch_id: str,
+    store: BatchStore,
+    system: str,
+    on_progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    Run or resume a batch from its last checkpoint
+
+    Products are read in ID pages. Each page is generated concurrently
+    (provider concurrency limits still apply), its successful results are
+    written in one bulk insert and scored together, and the page's last
+    product ID is saved as
+    the checkpoint. With a template, each page's prompts are rendered from
+    one context query. A crash repeats at most the page in flight. A batch
+    already running elsewhere is left alone. The lease is renewed while
+    pages run; if it is lost anyway, the page in flight is dropped without
+    writing so the new holder does not duplicate it. Cancellation is
+    checked between pages.
+    """
+    state = await store.get(batch_id)
+    if state is None:
+        raise KeyError(batch_id)
+    if state["status"] in (COMPLETED, CANCELLED):
+        return throughput(state)
+
+    owner = uuid.uuid4().hex
+    lock_ttl = settings.content_batch_lock_ttl_s
+    if not await store.acquire(batch_id, owner, lock_ttl):
+        logger.info(f"Batch {batch_id} is already running elsewhere")
+        return throughput(state)
+
+    params = state["params"]
+    limit = params.get("limit")
+    page_size = params.get("page_size") or settings.content_batch_page_size
+    state.update(status=RUNNING, error=None)
+    await store.save(batch_id, state)
+    logger.info(f"Batch {batch_id} {'resuming after product ' + str(state['cursor']) if state['cursor'] else 'starting'}")
+
+    lease = asyncio.create_task(_renew_lease(store, batch_id, owner, lock_ttl))
+    try:
+        template = await resolve_template(params)
+        if template is not None and template.system:
+            system = template.system
+        while True:
+            if await store.cancel_requested(batch_id):
+                state["status"] = CANCELLED
+                break
+            size = page_size if limit is None else min(page_size, limit - state["processed"])
+            products = await _next_page(params, state["cursor"], size) if size > 0 else []
+            if not products:
+                state["status"] = COMPLETED
+                break
+
+            page_started = time.perf_counter()
+            prompts = await _page_prompts(params, products, template)
+            results = await asyncio.gather(
+                *(
+                    _generate(params, system, prompt) if isinstance(prompt, str) else _raise(prompt)
+                    for prompt in prompts
+                ),
+                return_exceptions=True
+            )
+
+            rows = []
+            tokens = {"input": 0, "output": 0}
+            for product, prompt, result in zip(products, prompts, results):
+                if isinstance(result, BaseException):
+                    logger.warning(f"Batch {batch_id}: product {product.id} failed: {result}")
+                    state["failed"] += 1
+                    if len(state["failed_ids"]) < MAX_FAILED_IDS:
+                        state["failed_ids"].append(product.id)
+                    continue
+                rows.append({
+                    "title": f"{product.name} - {params['content_type'].replace('_', ' ')}"[:500],
+                    "content": result["content"],
+                    "content_type": params["content_type"],
+                    "model_used": params["model"],
+                    "prompt": prompt,
+                    "temperature": params["temperature"],
+                    "max_tokens": params["max_tokens"],
+                    "product_id": product.id,
+                })
+                tokens["input"] += result.get("input_tokens") or 0
+                tokens["output"] += result.get("output_tokens") or 0
+            if lease.done() or not await store.acquire(batch_id, owner, lock_ttl):
+                logger.warning(f"Batch {batch_id}: lease lost, dropping the page after product {state['cursor']}")
+                return throughput(state)
+            if rows:
+                async with AsyncSessionLocal() as db:
+                    ids = (await db.execute(
+                        insert(ContentGeneration).returning(ContentGeneration.id, sort_by_parameter_order=True),
+                        rows
+                    )).scalars().all()
+                    scores = await score_documents(
+                        db, ContentGeneration, [{**row, "id": row_id} for row, row_id in zip(rows, ids)]
+                    )
+                    await db.execute(
+                        update(ContentGeneration),
+                        [{"id": row_id, **row_scores} for row_id, row_scores in zip(ids, scores)]
+                    )
+                    await db.commit()
+
+            state["input_tokens"] += tokens["input"]
+            state["output_tokens"] += tokens["output"]
+            state["succeeded"] += len(rows)
+            state["processed"] += len(products)
+            state["cursor"] = products[-1].id
+            state["elapsed_s"] += time.perf_counter() - page_started
+            state["updated_at"] = time.time()
+            await store.save(batch_id, state)
+
+            BATCH_ITEMS.labels(status="succeeded").inc(len(rows))
+            BATCH_ITEMS.labels(status="failed").inc(len(products) - len(rows))
+            for kind, count in tokens.items():
+                BATCH_TOKENS.labels(kind=kind).inc(count)
+            report = throughput(state)
+            logger.info(
+                f"Batch {batch_id}: {state['processed']} products "
+                f"({state['failed']} failed), {report['items_per_min']} items/min, "
+                f"{report['tokens_per_s']} tokens/s"
+            )
+            if on_progress is not None:
+                await on_progress(report)
+    except Exception as e:
+        state.update(status=FAILED, error=str(e), updated_at=time.time())
+        await store.save(batch_id, state)
+        raise
+    finally:
+        lease.cancel()
+        await store.release(batch_id, owner)
+
+    state.update(finished_at=time.time(), updated_at=time.time())
+    await store.save(batch_id, state)
+    logger.info(f"Batch {batch_id} {state['status']}: {state['succeeded']} generated, {state['failed']} failed")
+    return throughput(state)
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "BatchStore",
+    "RedisBatchStore",
+    "InMemoryBatchStore",
+    "FileBatchStore",
+    "create_batch_store",
+    "new_batch",
+    "throughput",
+    "product_prompt",
+    "resolve_template",
+    "run_batch",
+]
@@ -0,0 +1,268 @@
+"""
+Content Service - Generation
+LLM text generation with per-provider concurrency limits and result caching
+"""
+
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import hashlib
+import logging
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from config import settings
+from common.cache import TwoTierCache
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+GENERATION_DURATION = Histogram(
+    "content_generation_duration_seconds",
+    "Provider call duration for one generation",
+    ["provider"],
+    buckets=(0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0, 128.0)
+)
+GENERATION_TOKENS = Counter(
+    "content_generation_tokens_total",
+    "Tokens used by content generation",
+    ["provider", "kind"]  # kind: "input", "output"
+)
+PROVIDER_INFLIGHT = Gauge(
+    "content_provider_inflight",
+    "Generation calls in progress per provider",
+    ["provider"]
+)
+PROVIDER_WAIT = Histogram(
+    "content_provider_wait_seconds",
+    "Time a generation waited for a provider concurrency slot",
+    ["provider"],
+    buckets=(0.001, 0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+
+class GenerationUnavailable(Exception):
+    """The requested provider is not configured"""
+
+
+# ============================================================================
+# Generators
+# ============================================================================
+
+class TextGenerator:
+    """
+    Base text generator
+    Streams completion text for a prompt; token usage is written to `usage`
+    """
+
+    provider = "base"
+    default_model = ""
+
+    async def stream(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        usage: Dict[str, int],
+        system: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    async def close(self):
+        pass
+
+
+class OpenAIGenerator(TextGenerator):
+    """Completions from the OpenAI chat API"""
+
+    provider = "openai"
+
+    def __init__(self, api_key: str, default_model: str):
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(api_key=api_key)
+        self.default_model = default_model
+
+    async def stream(self, prompt, model, temperature, max_tokens, usage, system=None):
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in response:
+            if chunk.usage:
+                usage["input"] = chunk.usage.prompt_tokens
+                usage["output"] = chunk.usage.completion_tokens
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def close(self):
+        await self.client.close()
+
+
+class AnthropicGenerator(TextGenerator):
+    """Completions from the Anthropic messages API"""
+
+    provider = "anthropic"
+
+    def __init__(self, api_key: str, default_model: str):
+        from anthropic import AsyncAnthropic
+
+        self.client = AsyncAnthropic(api_key=api_key)
+        self.default_model = default_model
+
+    async def stream(self, prompt, model, temperature, max_tokens, usage, system=None):
+        options = {"system": system} if system else {}
+        response = await self.client.messages.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            **options,
+        )
+        async for event in response:
+            if event.type == "message_start":
+                usage["input"] = event.message.usage.input_tokens
+            elif event.type == "message_delta":
+                usage["output"] = event.usage.output_tokens
+            elif event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                yield event.delta.text
+
+    async def close(self):
+        await self.client.close()
+
+
+def create_generator(provider: str) -> Optional[TextGenerator]:
+    """Create a generator for a provider, or None if it has no API key"""
+    try:
+        if provider == "openai" and settings.openai_api_key:
+            return OpenAIGenerator(settings.openai_api_key, settings.openai_model)
+        if provider == "anthropic" and settings.anthropic_api_key:
+            return AnthropicGenerator(settings.anthropic_api_key, settings.anthropic_model)
+    except Exception as e:
+        logger.error(f"Failed to create {provider} generator: {e}")
+    return None
+
+
+# Global generators and concurrency limits, created on first use per provider
+_generators: Dict[str, Optional[TextGenerator]] = {}
+_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def provider_concurrency(provider: str) -> int:
+    """Max concurrent generation calls to a provider from this process"""
+    if provider == "anthropic":
+        return settings.content_anthropic_concurrency
+    return settings.content_openai_concurrency
+
+
+def get_generator(provider: str) -> TextGenerator:
+    """The shared generator for a provider; raises GenerationUnavailable if not configured"""
+    if provider not in _generators:
+        _generators[provider] = create_generator(provider)
+    generator = _generators[provider]
+    if generator is None:
+        raise GenerationUnavailable(f"Content generation provider '{provider}' is not configured")
+    return generator
+
+
+def _limit(provider: str) -> asyncio.Semaphore:
+    if provider not in _limits:
+        _limits[provider] = asyncio.Semaphore(provider_concurrency(provider))
+    return _limits[provider]
+
+
+async def close_generators():
+    """Close the shared generators' HTTP clients"""
+    for generator in _generators.values():
+        if generator is not None:
+            await generator.close()
+    _generators.clear()
+    _limits.clear()
+
+
+async def generate_stream(
+    generator: TextGenerator,
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    usage: Dict[str, int],
+    system: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a completion, holding one of the provider's concurrency slots
+
+    Calls beyond the provider's limit wait for a slot, so a burst of jobs
+    never exceeds the provider's rate limits no matter how many workers
+    the job queue runs.
+    """
+    provider = generator.provider
+    limit = _limit(provider)
+    waited = time.perf_counter()
+    async with limit:
+        PROVIDER_WAIT.labels(provider=provider).observe(time.perf_counter() - waited)
+        PROVIDER_INFLIGHT.labels(provider=provider).inc()
+        started = time.perf_counter()
+        try:
+            async for text in generator.stream(prompt, model, temperature, max_tokens, usage, system):
+                yield text
+        finally:
+            PROVIDER_INFLIGHT.labels(provider=provider).dec()
+            GENERATION_DURATION.labels(provider=provider).observe(time.perf_counter() - started)
+            for kind in ("input", "output"):
+                if usage.get(kind):
+                    GENERATION_TOKENS.labels(provider=provider, kind=kind).inc(usage[kind])
+
+
+# ============================================================================
+# Result Cache
+# ============================================================================
+
+# Generated text for deterministic settings: {"content", "input_tokens", "output_tokens"}
+result_cache = TwoTierCache(
+    "content_generation",
+    ttl_s=settings.content_cache_ttl_s,
+    local_ttl_s=300.0,
+    max_local_items=1000,
+)
+
+
+def is_cacheable(temperature: float) -> bool:
+    """Whether a completion at this temperature is reproducible enough to cache"""
+    return settings.content_cache_ttl_s > 0 and temperature <= settings.content_cache_max_temperature
+
+
+def cache_key(prompt: str, model: str, temperature: float, max_tokens: int, system: Optional[str] = None) -> str:
+    """Result cache key for (prompt hash, model, temperature, max_tokens)"""
+    digest = hashlib.sha256(f"{system or ''}\x00{prompt}".encode()).hexdigest()[:32]
+    return f"{digest}:{model}:{temperature:g}:{max_tokens}"
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "GenerationUnavailable",
+    "TextGenerator",
+    "OpenAIGenerator",
+    "AnthropicGenerator",
+    "create_generator",
+    "provider_concurrency",
+    "get_generator",
+    "close_generators",
+    "generate_stream",
+    "result_cache",
+    "is_cacheable",
+    "cache_key",
+]
@@ -0,0 +1,253 @@
+"""
+Content Service - Generation Jobs
+Job state and streamed output, in Redis with an in-memory fallback
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from config import settings
+from models.database import redis_cache
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+FINISHED = (COMPLETED, FAILED)
+
+_INT_FIELDS = ("input_tokens", "output_tokens", "content_id", "product_id", "max_tokens")
+_FLOAT_FIELDS = ("created_at", "started_at", "finished_at", "temperature")
+
+
+def _decode(raw: Dict[str, str]) -> Dict[str, Any]:
+    """Stored job hash -> API dict"""
+    job: Dict[str, Any] = {k: (v if v != "" else None) for k, v in raw.items()}
+    for key in _INT_FIELDS:
+        if job.get(key) is not None:
+            job[key] = int(job[key])
+    for key in _FLOAT_FIELDS:
+        if job.get(key) is not None:
+            job[key] = float(job[key])
+    job["cached"] = job.get("cached") == "1"
+    return job
+
+
+def _encode(fields: Dict[str, Any]) -> Dict[str, str]:
+    encoded = {}
+    for key, value in fields.items():
+        if isinstance(value, bool):
+            encoded[key] = "1" if value else "0"
+        elif value is None:
+            encoded[key] = ""
+        else:
+            encoded[key] = str(value)
+    return encoded
+
+
+class JobStore:
+    """
+    Base store for generation job state
+
+    A job is a flat record (status, parameters, result) plus an
+    append-only stream of output chunks that readers can follow while
+    the job runs. The stream ends with an end marker once the job
+    finishes. Records expire after ttl_s.
+    """
+
+    def __init__(self, ttl_s: int = 86400):
+        self.ttl_s = ttl_s
+
+    async def create(self, job_id: str, fields: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def update(self, job_id: str, fields: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def append_chunk(self, job_id: str, text: str):
+        raise NotImplementedError
+
+    async def end_stream(self, job_id: str):
+        raise NotImplementedError
+
+    async def read_chunks(self, job_id: str, after: str, block_ms: int) -> Tuple[List[str], str, bool]:
+        """
+        Chunks written after the position `after` ("0" for the start)
+
+        Waits up to block_ms for new chunks. Returns (chunks, new position,
+        whether the stream has ended).
+        """
+        raise NotImplementedError
+
+
+class RedisJobStore(JobStore):
+    """Job records in Redis hashes, output chunks in Redis streams"""
+
+    @staticmethod
+    def _keys(job_id: str) -> Tuple[str, str]:
+        prefix = f"kcp:content:job:{job_id}"
+        return prefix, f"{prefix}:chunks"
+
+    @property
+    def client(self):
+        if not redis_cache.client:
+            raise RuntimeError("Redis not connected")
+        return redis_cache.client
+
+    async def create(self, job_id, fields):
+        job_key, _ = self._keys(job_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(job_key, mapping=_encode(fields))
+            pipe.expire(job_key, self.ttl_s)
+            await pipe.execute()
+
+    async def get(self, job_id):
+        job_key, _ = self._keys(job_id)
+        raw = await self.client.hgetall(job_key)
+        return _decode(raw) if raw else None
+
+    async def update(self, job_id, fields):
+        job_key, _ = self._keys(job_id)
+        await self.client.hset(job_key, mapping=_encode(fields))
+
+    async def append_chunk(self, job_id, text):
+        _, chunks_key = self._keys(job_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.xadd(chunks_key, {"t": text})
+            pipe.expire(chunks_key, self.ttl_s)
+            await pipe.execute()
+
+    async def end_stream(self, job_id):
+        _, chunks_key = self._keys(job_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.xadd(chunks_key, {"end": "1"})
+            pipe.expire(chunks_key, self.ttl_s)
+            await pipe.execute()
+
+    async def read_chunks(self, job_id, after, block_ms):
+        _, chunks_key = self._keys(job_id)
+        response = await self.client.xread({chunks_key: after}, count=500, block=block_ms)
+        if not response:
+            return [], after, False
+        chunks, ended = [], False
+        for entry_id, fields in response[0][1]:
+            after = entry_id
+            if "end" in fields:
+                ended = True
+                break
+            chunks.append(fields["t"])
+        return chunks, after, ended
+
+
+class InMemoryJobStore(JobStore):
+    """
+    Process-local job store
+
+    Jobs are only visible to the process that runs them. Used when Redis
+    is not available and in development.
+    """
+
+    def __init__(self, ttl_s: int = 86400, max_jobs: int = 10000):
+        super().__init__(ttl_s)
+        self.max_jobs = max_jobs
+        # job_id -> {"expires_at", "fields", "chunks", "ended", "changed"}
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _entry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._jobs.get(job_id)
+        if entry is not None and entry["expires_at"] <= time.time():
+            del self._jobs[job_id]
+            return None
+        return entry
+
+    async def create(self, job_id, fields):
+        self._jobs[job_id] = {
+            "expires_at": time.time() + self.ttl_s,
+            "fields": _encode(fields),
+            "chunks": [],
+            "ended": False,
+            "changed": asyncio.Condition(),
+        }
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+    async def get(self, job_id):
+        entry = self._entry(job_id)
+        return _decode(entry["fields"]) if entry else None
+
+    async def update(self, job_id, fields):
+        entry = self._entry(job_id)
+        if entry is not None:
+            entry["fields"].update(_encode(fields))
+
+    async def _notify(self, entry: Dict[str, Any]):
+        async with entry["changed"]:
+            entry["changed"].notify_all()
+
+    async def append_chunk(self, job_id, text):
+        entry = self._entry(job_id)
+        if entry is not None:
+            entry["chunks"].append(text)
+            await self._notify(entry)
+
+    async def end_stream(self, job_id):
+        entry = self._entry(job_id)
+        if entry is not None:
+            entry["ended"] = True
+            await self._notify(entry)
+
+    async def read_chunks(self, job_id, after, block_ms):
+        entry = self._entry(job_id)
+        if entry is None:
+            return [], after, True
+        position = int(after) if after.isdigit() else 0
+        if position >= len(entry["chunks"]) and not entry["ended"]:
+            async with entry["changed"]:
+                try:
+                    await asyncio.wait_for(entry["changed"].wait(), timeout=block_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+        chunks = entry["chunks"][position:]
+        ended = entry["ended"]
+        return chunks, str(position + len(chunks)), ended
+
+
+def create_job_store() -> JobStore:
+    """
+    Create the generation job store
+
+    Uses Redis, so any instance can serve status and streams for jobs run
+    by another. The in-memory store is only used with
+    TASK_QUEUE_BACKEND=memory, alongside an in-memory queue; otherwise
+    Redis must be connected first.
+    """
+    if settings.task_queue_backend == "memory":
+        logger.warning("Content jobs using in-memory store; job status is only visible to this process")
+        return InMemoryJobStore(ttl_s=settings.content_job_ttl_s)
+    if redis_cache.client is None:
+        raise RuntimeError("Content job store needs Redis; connect it first or set TASK_QUEUE_BACKEND=memory")
+    return RedisJobStore(ttl_s=settings.content_job_ttl_s)
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "QUEUED",
+    "RUNNING",
+    "COMPLETED",
+    "FAILED",
+    "FINISHED",
+    "JobStore",
+    "RedisJobStore",
+    "InMemoryJobStore",
+    "create_job_store",
+]
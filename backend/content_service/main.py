@@ -14,7 +14,17 @@ import logging
 import time
 
 from config import settings
-from models import connect_to_databases, close_database_connections
+from common.health import create_health_checker
+from common.deadline import DeadlineMiddleware
+from common.rate_limit import RateLimitMiddleware
+from models import (
+    connect_to_databases,
+    close_database_connections,
+    POSTGRES,
+    REDIS,
+)
+from .generation import close_generators
+from .tasks import start_task_queue, stop_task_queue
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +33,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Backends this service cannot serve without, and ones it connects on demand
+# Redis backs the job queue, job and batch stores and result cache, which
+# are chosen at startup, so it must be connected before they are built
+REQUIRED_BACKENDS = (POSTGRES, REDIS)
+OPTIONAL_BACKENDS = ()
+
+health = create_health_checker(REQUIRED_BACKENDS, OPTIONAL_BACKENDS)
+
 # Prometheus metrics
 REQUEST_COUNT = Counter(
     "content_service_requests_total",
@@ -46,7 +64,8 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Content Service...")
     try:
-        await connect_to_databases()
+        await connect_to_databases(required=REQUIRED_BACKENDS, optional=OPTIONAL_BACKENDS)
+        await start_task_queue()
         logger.info("Content Service started successfully")
     except Exception as e:
         logger.error(f"Failed to start Content Service: {e}")
@@ -56,6 +75,8 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down Content Service...")
+    await stop_task_queue()
+    await close_generators()
     await close_database_connections()
     logger.info("Content Service stopped")
 
@@ -72,6 +93,12 @@ app = FastAPI(
     debug=settings.debug,
 )
 
+# Request Deadline Middleware (cancels work past its deadline or after the client disconnects)
+app.add_middleware(DeadlineMiddleware)
+
+# Rate Limiting Middleware (inside CORS so 429 responses carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -129,14 +156,15 @@ async def health_check():
 
 @app.get("/ready", tags=["Health"])
 async def readiness_check():
-    return {
-        "status": "ready",
-        "service": "content-service",
-        "checks": {
-            "database": "ok",
-            "llm": "ok"
+    result = await health.check()
+    return JSONResponse(
+        status_code=200 if result["status"] == "ready" else 503,
+        content={
+            "status": result["status"],
+            "service": "content-service",
+            "checks": result["checks"],
         }
-    }
+    )
 
 
 @app.get("/metrics", tags=["Monitoring"])
@@ -148,6 +176,12 @@ async def metrics():
 # API Routes
 # ============================================================================
 
+# Import and include routers
+from .routes import generation_router
+
+app.include_router(generation_router, prefix="/api/v1/content", tags=["Content"])
+
+
 @app.get("/api/v1/status", tags=["API"])
 async def api_status():
     return {
@@ -160,6 +194,8 @@ async def api_status():
         },
         "endpoints": {
             "generate": "/api/v1/content/generate",
+            "jobs": "/api/v1/content/jobs/{job_id}",
+            "batches": "/api/v1/content/batches",
             "templates": "/api/v1/content/templates",
             "history": "/api/v1/content/history"
         }
@@ -167,27 +203,6 @@ async def api_status():
 
 
 # Placeholder endpoints
-@app.post("/api/v1/content/generate", tags=["Content"])
-async def generate_content():
-    """Generate AI content (blogs, social, emails)"""
-    return {
-        "message": "Content generation endpoint - Coming soon",
-        "status": "not_implemented"
-    }
-
-
-@app.get("/api/v1/content/templates", tags=["Content"])
-async def list_templates():
-    """List available content templates"""
-    return {
-        "templates": [
-            {"id": "blog", "name": "Blog Post", "description": "SEO-optimized blog articles"},
-            {"id": "social", "name": "Social Media", "description": "Social media posts"},
-            {"id": "email", "name": "Email", "description": "Marketing emails"}
-        ]
-    }
-
-
 @app.get("/api/v1/content/history", tags=["Content"])
 async def content_history():
     """Get content generation history"""
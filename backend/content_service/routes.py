@@ -0,0 +1,320 @@
+"""
+Content Service - API Routes
+FastAPI route handlers for content generation jobs, catalog batches and templates
+"""
+
+from typing import AsyncIterator, List, Optional
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import get_db
+from . import schemas, templates
+from .batch import CANCELLED, COMPLETED, throughput
+from .generation import GenerationUnavailable
+from .jobs import FINISHED
+from .tasks import (
+    enqueue_batch,
+    enqueue_score_backfill,
+    get_batch_store,
+    get_job_store,
+    submit_batch,
+    submit_generation,
+)
+
+# Create router
+generation_router = APIRouter()
+
+# Template slugs used in paths
+SLUG_PATTERN = r"^[a-z0-9][a-z0-9_-]*$"
+
+# How long a stream read waits for output before sending a keep-alive
+STREAM_BLOCK_MS = 15000
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@generation_router.post(
+    "/generate",
+    response_model=schemas.GenerationJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit a content generation job"
+)
+async def generate_content(request: schemas.GenerateRequest):
+    """
+    Queue a content generation job and return it without waiting
+
+    Poll /jobs/{id} or follow /jobs/{id}/stream for the result. Requests
+    at temperature 0 are cached by (prompt, model, temperature, max_tokens);
+    a cached result is returned already completed.
+    """
+    try:
+        return await submit_generation(request)
+    except GenerationUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+
+@generation_router.get(
+    "/jobs/{job_id}",
+    response_model=schemas.GenerationJobResponse,
+    summary="Get a generation job"
+)
+async def get_generation_job(job_id: str = Path(..., description="Job ID")):
+    """Get a generation job's status, and its content once completed"""
+    job = await get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return job
+
+
+@generation_router.get(
+    "/jobs/{job_id}/stream",
+    summary="Stream a generation job's output (SSE)"
+)
+async def stream_generation_job(job_id: str = Path(..., description="Job ID")):
+    """
+    Follow a generation job's output as server-sent events
+
+    Output generated before connecting is replayed first.
+
+    Events:
+    - **token**: `{"text": ...}` generated text
+    - **done**: the completed job, without content
+    - **error**: `{"message": ...}` if the job failed
+    """
+    store = get_job_store()
+    if await store.get(job_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+
+    async def events() -> AsyncIterator[str]:
+        position = "0"
+        while True:
+            chunks, position, ended = await store.read_chunks(job_id, position, STREAM_BLOCK_MS)
+            for text in chunks:
+                yield _sse("token", {"text": text})
+            if ended:
+                break
+            if not chunks:
+                job = await store.get(job_id)
+                if job is None or job["status"] in FINISHED:
+                    break
+                yield ": keep-alive\n\n"
+
+        job = await store.get(job_id)
+        if job is None or job["status"] != "completed":
+            yield _sse("error", {"message": (job or {}).get("error") or "Generation failed"})
+            return
+        job.pop("content", None)
+        yield _sse("done", job)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ============================================================================
+# Catalog Batch Endpoints
+# ============================================================================
+
+async def _get_batch(batch_id: str):
+    state = await get_batch_store().get(batch_id)
+    if state is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Batch {batch_id} not found")
+    return state
+
+
+@generation_router.post(
+    "/batches",
+    response_model=schemas.BatchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Generate content across the product catalog"
+)
+async def create_batch(request: schemas.BatchCreate):
+    """
+    Queue a batch that generates content for every matching product
+
+    Progress is checkpointed after every page of products, so a batch
+    interrupted by a crash resumes where it stopped. Poll /batches/{id}
+    for progress and throughput.
+    """
+    try:
+        return await submit_batch(request.model_dump())
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except GenerationUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+
+@generation_router.get(
+    "/batches/{batch_id}",
+    response_model=schemas.BatchResponse,
+    summary="Get catalog batch progress"
+)
+async def get_batch(batch_id: str = Path(..., description="Batch ID")):
+    """Progress, items/min and tokens/s of a catalog batch"""
+    return throughput(await _get_batch(batch_id))
+
+
+@generation_router.post(
+    "/batches/{batch_id}/resume",
+    response_model=schemas.BatchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Resume a catalog batch"
+)
+async def resume_batch(batch_id: str = Path(..., description="Batch ID")):
+    """Queue a failed or interrupted batch to continue from its checkpoint"""
+    state = await _get_batch(batch_id)
+    if state["status"] in (COMPLETED, CANCELLED):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Batch {batch_id} is {state['status']}"
+        )
+    await enqueue_batch(batch_id)
+    return throughput(await _get_batch(batch_id))
+
+
+@generation_router.post(
+    "/batches/{batch_id}/cancel",
+    response_model=schemas.BatchResponse,
+    summary="Cancel a catalog batch"
+)
+async def cancel_batch(batch_id: str = Path(..., description="Batch ID")):
+    """Stop a batch after the page in progress; generated content is kept"""
+    state = await _get_batch(batch_id)
+    await get_batch_store().request_cancel(batch_id)
+    return throughput(state)
+
+
+# ============================================================================
+# Scoring Endpoints
+# ============================================================================
+
+@generation_router.post(
+    "/scores/backfill",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Backfill content quality scores"
+)
+async def backfill_content_scores(
+    rescore: bool = Query(False, description="Rescore content that already has scores")
+):
+    """
+    Compute readability, SEO and originality scores for all generated content
+
+    New content is scored when it is saved; this covers older rows.
+    Queued as a background job when the task queue is running, otherwise
+    run inline.
+    """
+    counts = await enqueue_score_backfill(only_missing=not rescore)
+    if counts is None:
+        return {"status": "queued"}
+    return {"status": "completed", **counts}
+
+
+# ============================================================================
+# Template Endpoints
+# ============================================================================
+
+@generation_router.get(
+    "/templates",
+    response_model=List[schemas.TemplateResponse],
+    summary="List content templates"
+)
+async def list_templates(db: AsyncSession = Depends(get_db)):
+    """Latest version of every template, including the built-in defaults"""
+    return await templates.list_templates(db)
+
+
+@generation_router.post(
+    "/templates/{slug}",
+    response_model=schemas.TemplateResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Save a new template version"
+)
+async def create_template(
+    request: schemas.TemplateCreate,
+    slug: str = Path(..., description="Template slug", max_length=100, pattern=SLUG_PATTERN),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Save a template as the next version of its slug
+
+    Versions are immutable; renders use the latest version unless one is
+    pinned. The body must be a valid Jinja2 template.
+    """
+    try:
+        return await templates.create_template_version(db, slug, request.model_dump())
+    except templates.TemplateError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid template: {e}")
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Template {slug} was updated concurrently; retry"
+        )
+
+
+@generation_router.get(
+    "/templates/{slug}",
+    response_model=schemas.TemplateResponse,
+    summary="Get a content template"
+)
+async def get_template(
+    slug: str = Path(..., description="Template slug", max_length=100),
+    version: Optional[int] = Query(None, ge=0, description="Version (defaults to the latest)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the latest or a specific version of a template"""
+    template = await templates.get_template(db, slug, version)
+    if template is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Template {slug} not found")
+    return template
+
+
+@generation_router.post(
+    "/templates/{slug}/render",
+    response_model=schemas.RenderResponse,
+    summary="Render a template for products"
+)
+async def render_template(
+    request: schemas.RenderRequest,
+    slug: str = Path(..., description="Template slug", max_length=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Render prompts from a template for a set of products
+
+    The template is compiled once per version and product and knowledge
+    context for all products is loaded in one query. Per-product render
+    errors (such as an undefined variable) are returned with that prompt.
+    """
+    template = await templates.get_template(db, slug, request.version)
+    if template is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Template {slug} not found")
+
+    product_ids = list(dict.fromkeys(request.product_ids))
+    if product_ids:
+        contexts = await templates.load_render_contexts(db, product_ids, request.knowledge_items)
+        found = [pid for pid in product_ids if pid in contexts]
+        missing = [pid for pid in product_ids if pid not in contexts]
+        rendered = templates.render_batch(template, [contexts[pid] for pid in found], request.variables)
+    else:
+        found, missing = [None], []
+        rendered = templates.render_batch(template, [{}], request.variables)
+
+    return {
+        "slug": template.slug,
+        "version": template.version,
+        "prompts": [
+            {"product_id": pid, "error": str(result)} if isinstance(result, Exception)
+            else {"product_id": pid, "prompt": result}
+            for pid, result in zip(found, rendered)
+        ],
+        "missing_product_ids": missing,
+    }
@@ -0,0 +1,144 @@
+"""
+Content Service - Pydantic Schemas
+Request and response models for API validation
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+# ============================================================================
+# Generation Schemas
+# ============================================================================
+
+class GenerateRequest(BaseModel):
+    """A content generation request"""
+    prompt: str = Field(..., description="Generation prompt", min_length=1, max_length=20000)
+    system: Optional[str] = Field(None, description="System instructions (defaults to the copywriter prompt)", max_length=4000)
+    content_type: str = Field("product_description", description="Content type (blog, social, email, product_description)", max_length=100)
+    title: Optional[str] = Field(None, description="Title for the saved content (defaults to the start of the prompt)", max_length=500)
+    product_id: Optional[int] = Field(None, description="Product the content is about")
+    provider: Optional[Literal["openai", "anthropic"]] = Field(None, description="Provider (defaults to CONTENT_PROVIDER)")
+    model: Optional[str] = Field(None, description="Model (defaults to CONTENT_MODEL or the provider's model)", max_length=100)
+    temperature: float = Field(0.7, ge=0, le=2, description="Sampling temperature; results at 0 are cached")
+    max_tokens: int = Field(1000, ge=1, le=8000, description="Max output tokens")
+    save: bool = Field(True, description="Save the result as a ContentGeneration record")
+
+
+class GenerationJobResponse(BaseModel):
+    """A content generation job"""
+    id: str
+    status: str = Field(..., description="queued, running, completed or failed")
+    content_type: str
+    provider: str
+    model: str
+    temperature: float
+    max_tokens: int
+    product_id: Optional[int] = None
+    cached: bool = Field(False, description="Result served from the generation cache")
+    content: Optional[str] = None
+    content_id: Optional[int] = Field(None, description="Saved ContentGeneration ID")
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+# ============================================================================
+# Batch Schemas
+# ============================================================================
+
+class BatchCreate(BaseModel):
+    """Generate content for every product matching a filter"""
+    category: Optional[Literal["earbuds", "headphones", "speakers", "accessories"]] = None
+    series: Optional[str] = Field(None, max_length=100)
+    is_active: Optional[bool] = Field(True, description="Product status filter (null for all)")
+    product_ids: Optional[List[int]] = Field(None, description="Only these products", max_length=10000)
+    limit: Optional[int] = Field(None, ge=1, description="Stop after this many products")
+    content_type: str = Field("product_description", max_length=100)
+    instructions: Optional[str] = Field(None, description="Extra instructions appended to every prompt", max_length=2000)
+    provider: Optional[Literal["openai", "anthropic"]] = None
+    model: Optional[str] = Field(None, max_length=100)
+    temperature: float = Field(0.7, ge=0, le=2)
+    max_tokens: int = Field(600, ge=1, le=8000)
+    page_size: Optional[int] = Field(None, ge=1, le=500, description="Products per page (defaults to CONTENT_BATCH_PAGE_SIZE)")
+    template: Optional[str] = Field(None, description="Render prompts with this template instead of the default prompt", max_length=100)
+    template_version: Optional[int] = Field(None, ge=0, description="Template version (defaults to the latest when the batch is created)")
+    variables: Dict[str, Any] = Field(default_factory=dict, description="Extra template variables")
+
+
+class BatchResponse(BaseModel):
+    """Catalog batch progress"""
+    id: str
+    status: str = Field(..., description="queued, running, completed, failed or cancelled")
+    params: Dict[str, Any]
+    cursor: int = Field(..., description="Last product ID checkpointed")
+    processed: int
+    succeeded: int
+    failed: int
+    failed_ids: List[int]
+    input_tokens: int
+    output_tokens: int
+    elapsed_s: float
+    items_per_min: Optional[float] = None
+    tokens_per_s: Optional[float] = Field(None, description="Output tokens per second")
+    created_at: float
+    updated_at: float
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+# ============================================================================
+# Template Schemas
+# ============================================================================
+
+class TemplateCreate(BaseModel):
+    """A new version of a prompt template"""
+    name: str = Field(..., description="Display name", min_length=1, max_length=200)
+    description: Optional[str] = Field(None, description="What the template is for", max_length=1000)
+    content_type: str = Field("product_description", description="Content type the prompts produce", max_length=100)
+    body: str = Field(..., description="Jinja2 template; `product`, `knowledge` and request variables are available", min_length=1, max_length=20000)
+    system: Optional[str] = Field(None, description="System instructions used with this template", max_length=4000)
+    author: Optional[str] = Field(None, max_length=100)
+
+
+class TemplateResponse(BaseModel):
+    """One version of a prompt template"""
+    slug: str
+    version: int = Field(..., description="Version number; 0 is the built-in default")
+    name: str
+    description: Optional[str] = None
+    content_type: str
+    body: str
+    system: Optional[str] = None
+    author: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class RenderRequest(BaseModel):
+    """Render a template for a set of products"""
+    product_ids: List[int] = Field(default_factory=list, description="Products to render for (none renders once without product context)", max_length=10000)
+    version: Optional[int] = Field(None, ge=0, description="Template version (defaults to the latest)")
+    variables: Dict[str, Any] = Field(default_factory=dict, description="Extra template variables")
+    knowledge_items: Optional[int] = Field(None, ge=0, le=20, description="Published knowledge items per product (defaults to CONTENT_TEMPLATE_KNOWLEDGE_ITEMS)")
+
+
+class RenderedPrompt(BaseModel):
+    """A rendered prompt, or why it could not be rendered"""
+    product_id: Optional[int] = None
+    prompt: Optional[str] = None
+    error: Optional[str] = None
+
+
+class RenderResponse(BaseModel):
+    """Prompts rendered from one template version"""
+    slug: str
+    version: int
+    prompts: List[RenderedPrompt]
+    missing_product_ids: List[int] = Field(default_factory=list, description="Requested products that do not exist")
@@ -0,0 +1,350 @@
+"""
+Content Service - Background Tasks
+Generation jobs run off the request path by a bounded worker pool
+"""
+
+from typing import Any, Dict, Optional
+import logging
+import time
+import uuid
+
+from prometheus_client import Counter
+
+from config import settings
+from common.queue import JobQueue, create_job_queue
+from common.scoring import backfill_scores, score_rows
+from models.database import AsyncSessionLocal
+from models.knowledge import ContentGeneration
+from .batch import BatchStore, create_batch_store, new_batch, resolve_template, run_batch, throughput
+from .generation import (
+    GenerationUnavailable,
+    cache_key,
+    generate_stream,
+    get_generator,
+    is_cacheable,
+    result_cache,
+)
+from .jobs import COMPLETED, FAILED, QUEUED, RUNNING, JobStore, create_job_store
+from .schemas import GenerateRequest
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+GENERATION_JOBS = Counter(
+    "content_generation_jobs_total",
+    "Generation jobs by outcome",
+    ["status"]  # "submitted", "cache_hit", "completed", "failed"
+)
+
+# Job types
+CONTENT_GENERATE = "content.generate"
+CONTENT_BATCH = "content.batch"
+CONTENT_SCORES = "content.scores"
+
+DEFAULT_SYSTEM_PROMPT = (
+    "You are a marketing copywriter for Soundcore audio products. Write accurate, "
+    "engaging, SEO-friendly copy. Do not invent specifications that are not given."
+)
+
+# Output is written to the job stream in chunks of at least this many
+# characters, or after this many seconds, instead of once per token
+STREAM_FLUSH_CHARS = 64
+STREAM_FLUSH_S = 0.1
+
+# Global job queue and stores (started in the service lifespan)
+content_queue: Optional[JobQueue] = None
+_job_store: Optional[JobStore] = None
+_batch_store: Optional[BatchStore] = None
+
+
+def get_job_store() -> JobStore:
+    """The shared generation job store"""
+    global _job_store
+    if _job_store is None:
+        _job_store = create_job_store()
+    return _job_store
+
+
+def get_batch_store() -> BatchStore:
+    """The shared catalog batch store"""
+    global _batch_store
+    if _batch_store is None:
+        _batch_store = create_batch_store()
+    return _batch_store
+
+
+# ============================================================================
+# Handlers
+# ============================================================================
+
+async def _stream_to_store(store: JobStore, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate, appending output to the job stream; returns the cacheable result"""
+    usage: Dict[str, int] = {}
+    parts, buffer = [], []
+    buffered, flushed_at = 0, time.monotonic()
+    async for text in generate_stream(
+        get_generator(payload["provider"]),
+        payload["prompt"],
+        payload["model"],
+        payload["temperature"],
+        payload["max_tokens"],
+        usage,
+        system=payload["system"],
+    ):
+        parts.append(text)
+        buffer.append(text)
+        buffered += len(text)
+        if buffered >= STREAM_FLUSH_CHARS or time.monotonic() - flushed_at >= STREAM_FLUSH_S:
+            await store.append_chunk(job_id, "".join(buffer))
+            buffer, buffered, flushed_at = [], 0, time.monotonic()
+    if buffer:
+        await store.append_chunk(job_id, "".join(buffer))
+    return {
+        "content": "".join(parts),
+        "input_tokens": usage.get("input"),
+        "output_tokens": usage.get("output"),
+    }
+
+
+async def _save(payload: Dict[str, Any], content: str) -> int:
+    """Insert the generated content as a scored ContentGeneration row"""
+    title = payload.get("title") or " ".join(payload["prompt"].split())[:200]
+    async with AsyncSessionLocal() as db:
+        record = ContentGeneration(
+            title=title,
+            content=content,
+            content_type=payload["content_type"],
+            model_used=payload["model"],
+            prompt=payload["prompt"],
+            temperature=payload["temperature"],
+            max_tokens=payload["max_tokens"],
+            product_id=payload.get("product_id"),
+        )
+        db.add(record)
+        await db.flush()
+        await score_rows(db, ContentGeneration, [record])
+        await db.commit()
+        return record.id
+
+
+async def _finish(store: JobStore, job_id: str, payload: Dict[str, Any], result: Dict[str, Any], cached: bool):
+    content_id = await _save(payload, result["content"]) if payload.get("save") else None
+    await store.update(job_id, {
+        "status": COMPLETED,
+        "cached": cached,
+        "content": result["content"],
+        "content_id": content_id,
+        "input_tokens": result.get("input_tokens"),
+        "output_tokens": result.get("output_tokens"),
+        "finished_at": time.time(),
+    })
+    await store.end_stream(job_id)
+    GENERATION_JOBS.labels(status="completed").inc()
+
+
+async def run_generation(job_id: str, payload: Dict[str, Any]):
+    """
+    Run a generation job
+
+    Deterministic requests go through the result cache; identical requests
+    running at the same time in this process share one provider call.
+    Provider errors fail the job rather than retrying it, since the
+    provider SDKs already retry transient errors.
+    """
+    store = get_job_store()
+    await store.update(job_id, {"status": RUNNING, "started_at": time.time()})
+    try:
+        if is_cacheable(payload["temperature"]):
+            produced = False
+
+            async def load():
+                nonlocal produced
+                produced = True
+                return await _stream_to_store(store, job_id, payload)
+
+            key = cache_key(
+                payload["prompt"], payload["model"], payload["temperature"], payload["max_tokens"], payload["system"]
+            )
+            result = await result_cache.get_or_load(key, load)
+            if not produced:
+                await store.append_chunk(job_id, result["content"])
+            await _finish(store, job_id, payload, result, cached=not produced)
+        else:
+            result = await _stream_to_store(store, job_id, payload)
+            await _finish(store, job_id, payload, result, cached=False)
+    except Exception as e:
+        logger.error(f"Generation job {job_id} failed: {e}")
+        await store.update(job_id, {"status": FAILED, "error": str(e), "finished_at": time.time()})
+        await store.end_stream(job_id)
+        GENERATION_JOBS.labels(status="failed").inc()
+
+
+async def run_catalog_batch(batch_id: str, payload: Dict[str, Any]):
+    """
+    Run a catalog batch from its checkpoint
+
+    A failure leaves the checkpoint in place, so the queue's retries
+    resume the batch instead of restarting it.
+    """
+    await run_batch(batch_id, get_batch_store(), DEFAULT_SYSTEM_PROMPT)
+
+
+async def backfill_content_scores(entity_id: str, payload: Dict[str, Any]):
+    """Score all generated content (or only unscored rows) in id order"""
+    counts = await backfill_scores(ContentGeneration, only_missing=payload.get("only_missing", True))
+    logger.info(f"Content score backfill: {counts}")
+
+
+# ============================================================================
+# Submission
+# ============================================================================
+
+async def submit_generation(request: GenerateRequest) -> Dict[str, Any]:
+    """
+    Create a generation job and queue it
+
+    A deterministic request whose result is cached completes immediately.
+    Without a running queue (scripts, tests) the job runs inline.
+    Raises GenerationUnavailable if generation is disabled or the
+    provider is not configured.
+    """
+    if not settings.enable_content_generation:
+        raise GenerationUnavailable("Content generation is disabled")
+    provider = request.provider or settings.content_provider
+    generator = get_generator(provider)
+    model = request.model or settings.content_model or generator.default_model
+
+    job_id = uuid.uuid4().hex
+    payload = {
+        "prompt": request.prompt,
+        "system": request.system or DEFAULT_SYSTEM_PROMPT,
+        "content_type": request.content_type,
+        "title": request.title,
+        "product_id": request.product_id,
+        "provider": provider,
+        "model": model,
+        "temperature": request.temperature,
+        "max_tokens": request.max_tokens,
+        "save": request.save,
+    }
+    store = get_job_store()
+    await store.create(job_id, {
+        "id": job_id,
+        "status": QUEUED,
+        "content_type": request.content_type,
+        "provider": provider,
+        "model": model,
+        "temperature": request.temperature,
+        "max_tokens": request.max_tokens,
+        "product_id": request.product_id,
+        "cached": False,
+        "created_at": time.time(),
+    })
+    GENERATION_JOBS.labels(status="submitted").inc()
+
+    if is_cacheable(request.temperature):
+        hit = await result_cache.get(
+            cache_key(request.prompt, model, request.temperature, request.max_tokens, payload["system"])
+        )
+        if hit is not None:
+            GENERATION_JOBS.labels(status="cache_hit").inc()
+            await store.append_chunk(job_id, hit["content"])
+            await _finish(store, job_id, payload, hit, cached=True)
+            return await store.get(job_id)
+
+    if content_queue is not None and content_queue.running:
+        await content_queue.enqueue(CONTENT_GENERATE, job_id, payload=payload)
+    else:
+        await run_generation(job_id, payload)
+    return await store.get(job_id)
+
+
+async def submit_batch(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create a catalog batch and queue it
+
+    A template's version is pinned when the batch is created. Raises
+    GenerationUnavailable if generation is disabled or the provider is not
+    configured, and LookupError if the template does not exist.
+    """
+    if not settings.enable_content_generation:
+        raise GenerationUnavailable("Content generation is disabled")
+    state = new_batch(params)
+    await resolve_template(state["params"])
+    await get_batch_store().save(state["id"], state)
+    await enqueue_batch(state["id"])
+    return throughput(state)
+
+
+async def enqueue_batch(batch_id: str):
+    """
+    Queue a batch to run or resume
+
+    Without a running queue (scripts, tests) the batch runs inline.
+    """
+    if content_queue is not None and content_queue.running:
+        await content_queue.enqueue(CONTENT_BATCH, batch_id)
+        return
+    await run_catalog_batch(batch_id, {})
+
+
+async def enqueue_score_backfill(only_missing: bool = True) -> Optional[Dict[str, int]]:
+    """
+    Schedule a quality score backfill over all generated content
+
+    Requests made while one is waiting coalesce. Without a running queue
+    the backfill runs inline and its counts are returned.
+    """
+    if content_queue is not None and content_queue.running:
+        await content_queue.enqueue(
+            CONTENT_SCORES, ContentGeneration.__tablename__, payload={"only_missing": only_missing}
+        )
+        return None
+    return await backfill_scores(ContentGeneration, only_missing=only_missing)
+
+
+# ============================================================================
+# Lifecycle
+# ============================================================================
+
+async def start_task_queue():
+    """Create the content job queue and start its workers"""
+    global content_queue
+    get_job_store()
+    get_batch_store()
+    content_queue = create_job_queue("content")
+    content_queue.register(CONTENT_GENERATE, run_generation)
+    content_queue.register(CONTENT_BATCH, run_catalog_batch)
+    content_queue.register(CONTENT_SCORES, backfill_content_scores)
+    await content_queue.start(concurrency=settings.content_workers)
+
+
+async def stop_task_queue():
+    """Stop the content job queue workers"""
+    global content_queue
+    if content_queue is not None:
+        await content_queue.stop()
+        content_queue = None
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "CONTENT_GENERATE",
+    "CONTENT_BATCH",
+    "CONTENT_SCORES",
+    "DEFAULT_SYSTEM_PROMPT",
+    "get_job_store",
+    "get_batch_store",
+    "run_generation",
+    "run_catalog_batch",
+    "backfill_content_scores",
+    "submit_generation",
+    "submit_batch",
+    "enqueue_batch",
+    "enqueue_score_backfill",
+    "start_task_queue",
+    "stop_task_queue",
+]
@@ -0,0 +1,321 @@
+"""
+Content Service - Prompt Templates
+Versioned Jinja2 prompt templates, compiled once and rendered in batches
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+import time
+
+from jinja2 import StrictUndefined, Template, TemplateError
+from jinja2.sandbox import SandboxedEnvironment
+from prometheus_client import Counter, Histogram
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.knowledge import ContentTemplate, KnowledgeItem, KnowledgeStatus, Product, ProductCategory
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+TEMPLATE_COMPILES = Counter(
+    "content_template_compiles_total",
+    "Template compilations (cache misses)"
+)
+TEMPLATE_RENDER_DURATION = Histogram(
+    "content_template_render_batch_seconds",
+    "Time to render a batch of prompts, excluding the context query",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+
+# Knowledge text passed to templates is clipped to this many characters
+KNOWLEDGE_CONTENT_CHARS = 1000
+
+# Templates available without any stored versions (version 0)
+BUILTIN_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "product_description": {
+        "name": "Product Description",
+        "description": "SEO product page description",
+        "content_type": "product_description",
+        "body": (
+            "Write an SEO-optimized product description for the Soundcore {{ product.name }} "
+            "({{ product.model }}), a {{ product.category }} product.\n"
+            "{% if product.description %}Summary: {{ product.description }}\n{% endif %}"
+            "{% if product.features %}Features: {{ product.features | join(', ') }}\n{% endif %}"
+            "{% for name, value in (product.specs or {}).items() %}"
+            "- {{ name | replace('_', ' ') }}: {{ value }}\n"
+            "{% endfor %}"
+            "{% if product.keywords %}Keywords: {{ product.keywords | join(', ') }}\n{% endif %}"
+            "{% for item in knowledge %}Reference ({{ item.type }}): {{ item.title }} - {{ item.summary or item.content }}\n{% endfor %}"
+        ),
+    },
+    "blog": {
+        "name": "Blog Post",
+        "description": "SEO-optimized blog articles",
+        "content_type": "blog",
+        "body": (
+            "Write a blog article about the Soundcore {{ product.name }} for {{ audience | default('music lovers') }}.\n"
+            "{% if product.features %}Cover these features: {{ product.features | join(', ') }}\n{% endif %}"
+            "{% for item in knowledge %}Use this reference: {{ item.title }} - {{ item.summary or item.content }}\n{% endfor %}"
+        ),
+    },
+    "social": {
+        "name": "Social Media",
+        "description": "Social media posts",
+        "content_type": "social",
+        "body": (
+            "Write a short {{ platform | default('Instagram') }} post announcing the Soundcore {{ product.name }}."
+            "{% if product.features %} Highlight: {{ product.features[:3] | join(', ') }}.{% endif %}"
+        ),
+    },
+    "email": {
+        "name": "Email",
+        "description": "Marketing emails",
+        "content_type": "email",
+        "body": (
+            "Write a marketing email promoting the Soundcore {{ product.name }}"
+            "{% if product.price %} at {{ '%.2f' | format(product.price) }} {{ product.currency }}{% endif %}.\n"
+            "{% if product.features %}Key features: {{ product.features | join(', ') }}\n{% endif %}"
+        ),
+    },
+}
+
+_env = SandboxedEnvironment(undefined=StrictUndefined, autoescape=False)
+
+
+@dataclass(frozen=True)
+class TemplateVersion:
+    """One immutable version of a template"""
+    slug: str
+    version: int
+    name: str
+    content_type: str
+    body: str
+    description: Optional[str] = None
+    system: Optional[str] = None
+    author: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: ContentTemplate) -> "TemplateVersion":
+        return cls(
+            slug=row.slug,
+            version=row.version,
+            name=row.name,
+            content_type=row.content_type,
+            body=row.body,
+            description=row.description,
+            system=row.system,
+            author=row.author,
+            created_at=row.created_at,
+        )
+
+
+def builtin_template(slug: str) -> Optional[TemplateVersion]:
+    spec = BUILTIN_TEMPLATES.get(slug)
+    return TemplateVersion(slug=slug, version=0, **spec) if spec else None
+
+
+# ============================================================================
+# Compilation
+# ============================================================================
+
+# (slug, version) -> compiled template; versions never change once stored
+_compiled: "OrderedDict[Tuple[str, int], Template]" = OrderedDict()
+
+
+def validate_source(body: str):
+    """Raise TemplateError if body is not a valid template"""
+    _env.parse(body)
+
+
+def compile_template(template: TemplateVersion) -> Template:
+    """Compiled template for a version, parsed only on first use in this process"""
+    key = (template.slug, template.version)
+    compiled = _compiled.get(key)
+    if compiled is not None:
+        _compiled.move_to_end(key)
+        return compiled
+    compiled = _env.from_string(template.body)
+    TEMPLATE_COMPILES.inc()
+    _compiled[key] = compiled
+    while len(_compiled) > settings.content_template_cache_size:
+        _compiled.popitem(last=False)
+    return compiled
+
+
+# ============================================================================
+# Storage
+# ============================================================================
+
+async def get_template(db: AsyncSession, slug: str, version: Optional[int] = None) -> Optional[TemplateVersion]:
+    """A specific version, or the latest stored version falling back to the built-in"""
+    query = select(ContentTemplate).where(ContentTemplate.slug == slug)
+    if version is not None:
+        if version == 0:
+            return builtin_template(slug)
+        query = query.where(ContentTemplate.version == version)
+    row = (await db.execute(query.order_by(ContentTemplate.version.desc()).limit(1))).scalar_one_or_none()
+    if row is not None:
+        return TemplateVersion.from_row(row)
+    return builtin_template(slug) if version is None else None
+
+
+async def list_templates(db: AsyncSession) -> List[TemplateVersion]:
+    """Latest version of every template, built-ins included"""
+    latest = (
+        select(ContentTemplate)
+        .distinct(ContentTemplate.slug)
+        .order_by(ContentTemplate.slug, ContentTemplate.version.desc())
+    )
+    stored = {row.slug: TemplateVersion.from_row(row) for row in (await db.execute(latest)).scalars().all()}
+    for slug in BUILTIN_TEMPLATES:
+        stored.setdefault(slug, builtin_template(slug))
+    return sorted(stored.values(), key=lambda t: t.slug)
+
+
+async def create_template_version(db: AsyncSession, slug: str, fields: Dict[str, Any]) -> TemplateVersion:
+    """
+    Store a new version of a template
+
+    Raises TemplateError if the body does not parse. Concurrent saves of
+    the same slug conflict on the (slug, version) unique index.
+    """
+    validate_source(fields["body"])
+    current = await db.execute(
+        select(func.max(ContentTemplate.version)).where(ContentTemplate.slug == slug)
+    )
+    row = ContentTemplate(slug=slug, version=(current.scalar() or 0) + 1, **fields)
+    db.add(row)
+    await db.commit()
+    await db.refresh(row)
+    return TemplateVersion.from_row(row)
+
+
+# ============================================================================
+# Rendering
+# ============================================================================
+
+def _product_context(product: Product) -> Dict[str, Any]:
+    category = product.category.value if isinstance(product.category, ProductCategory) else product.category
+    return {
+        "id": product.id,
+        "sku": product.sku,
+        "name": product.name,
+        "model": product.model,
+        "series": product.series,
+        "category": category,
+        "description": product.description,
+        "price": product.price,
+        "currency": product.currency or "USD",
+        "features": product.features or [],
+        "specs": product.specs or {},
+        "colors": product.colors or [],
+        "keywords": product.keywords or [],
+        "slug": product.slug,
+    }
+
+
+async def load_render_contexts(
+    db: AsyncSession,
+    product_ids: Sequence[int],
+    knowledge_items: Optional[int] = None
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Template context for each product, from a single query
+
+    Each product comes with its top published knowledge items by quality,
+    joined in the same statement so a render batch costs one round trip
+    regardless of its size.
+    """
+    if not product_ids:
+        return {}
+    limit = settings.content_template_knowledge_items if knowledge_items is None else knowledge_items
+
+    ranked = (
+        select(
+            KnowledgeItem.product_id,
+            KnowledgeItem.id,
+            KnowledgeItem.title,
+            KnowledgeItem.type,
+            KnowledgeItem.summary,
+            func.left(KnowledgeItem.content, KNOWLEDGE_CONTENT_CHARS).label("content"),
+            func.row_number().over(
+                partition_by=KnowledgeItem.product_id,
+                order_by=(KnowledgeItem.quality_score.desc(), KnowledgeItem.id)
+            ).label("rank"),
+        )
+        .where(
+            KnowledgeItem.product_id.in_(product_ids),
+            KnowledgeItem.status == KnowledgeStatus.PUBLISHED,
+        )
+        .subquery()
+    )
+    query = (
+        select(Product, ranked.c.id, ranked.c.title, ranked.c.type, ranked.c.summary, ranked.c.content)
+        .outerjoin(ranked, and_(ranked.c.product_id == Product.id, ranked.c.rank <= limit))
+        .where(Product.id.in_(product_ids))
+        .order_by(Product.id, ranked.c.rank)
+    )
+
+    contexts: Dict[int, Dict[str, Any]] = {}
+    for product, item_id, title, item_type, summary, content in (await db.execute(query)).all():
+        context = contexts.get(product.id)
+        if context is None:
+            context = contexts[product.id] = {"product": _product_context(product), "knowledge": []}
+        if item_id is not None and limit > 0:
+            context["knowledge"].append({
+                "id": item_id,
+                "title": title,
+                "type": item_type.value if hasattr(item_type, "value") else item_type,
+                "summary": summary,
+                "content": content,
+            })
+    return contexts
+
+
+def render_batch(
+    template: TemplateVersion,
+    contexts: Sequence[Dict[str, Any]],
+    variables: Optional[Dict[str, Any]] = None
+) -> List[Any]:
+    """
+    Render a prompt per context with the compiled template
+
+    Returns the prompt, or the error raised for that context (an undefined
+    variable, or a runtime error in an expression such as a division by
+    zero), in input order.
+    """
+    compiled = compile_template(template)
+    started = time.perf_counter()
+    rendered: List[Any] = []
+    for context in contexts:
+        try:
+            rendered.append(compiled.render({**(variables or {}), **context}).strip())
+        except Exception as e:
+            rendered.append(e)
+    TEMPLATE_RENDER_DURATION.observe(time.perf_counter() - started)
+    return rendered
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "BUILTIN_TEMPLATES",
+    "TemplateError",
+    "TemplateVersion",
+    "builtin_template",
+    "validate_source",
+    "compile_template",
+    "get_template",
+    "list_templates",
+    "create_template_version",
+    "load_render_contexts",
+    "render_batch",
+]
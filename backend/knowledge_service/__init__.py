@@ -4,6 +4,6 @@ Handles knowledge base management, semantic search, and RAG operations
 """
 
 from .main import app
-from . import schemas, crud, routes
+from . import schemas, crud, routes, rerank, chunking, tasks, graph_sync, related
 
-__all__ = ["app", "schemas", "crud", "routes"]
+__all__ = ["app", "schemas", "crud", "routes", "rerank", "chunking", "tasks", "graph_sync", "related"]
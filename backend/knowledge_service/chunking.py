@@ -0,0 +1,232 @@
+"""
+Knowledge Service - Content Chunking
+Splits knowledge content into overlapping passages for retrieval
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import hashlib
+import re
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+
+from config import settings
+from models.knowledge import KnowledgeItem, KnowledgeChunk
+
+_WORD_RE = re.compile(r"\S+")
+_SENTENCE_END_RE = re.compile(r"[.!?。！？]$")
+
+
+class TextChunk(NamedTuple):
+    """A passage of text with its character span in the source"""
+    index: int
+    text: str
+    char_start: int
+    char_end: int
+    token_count: int
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_text(
+    text: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None
+) -> List[TextChunk]:
+    """
+    Split text into overlapping chunks
+
+    Sizes are counted in whitespace-delimited tokens. When a sentence ends in
+    the last quarter of a window, the chunk is cut there so passages do not
+    stop mid-sentence.
+
+    Args:
+        text: Source text
+        chunk_size: Tokens per chunk (defaults to settings.rag_chunk_size)
+        chunk_overlap: Tokens shared between neighbouring chunks (defaults to settings.rag_chunk_overlap)
+    """
+    chunk_size = chunk_size or settings.rag_chunk_size
+    chunk_overlap = settings.rag_chunk_overlap if chunk_overlap is None else chunk_overlap
+    chunk_overlap = max(0, min(chunk_overlap, chunk_size - 1))
+
+    words = list(_WORD_RE.finditer(text))
+    if not words:
+        return []
+
+    chunks: List[TextChunk] = []
+    start = 0
+    while start < len(words):
+        end = min(start + chunk_size, len(words))
+
+        # Prefer a sentence boundary near the end of the window
+        if end < len(words):
+            min_end = start + max(chunk_overlap + 1, (chunk_size * 3) // 4)
+            for i in range(end - 1, min_end - 1, -1):
+                if _SENTENCE_END_RE.search(words[i].group()):
+                    end = i + 1
+                    break
+
+        char_start = words[start].start()
+        char_end = words[end - 1].end()
+        chunks.append(TextChunk(
+            index=len(chunks),
+            text=text[char_start:char_end],
+            char_start=char_start,
+            char_end=char_end,
+            token_count=end - start,
+        ))
+
+        if end >= len(words):
+            break
+        start = end - chunk_overlap
+
+    return chunks
+
+
+# ============================================================================
+# Chunk Storage
+# ============================================================================
+
+async def sync_item_chunks(db: AsyncSession, item: KnowledgeItem, force: bool = False) -> bool:
+    """
+    Rebuild an item's chunks if its content changed since they were built
+
+    The item must have an id (flush first for new items). Does not commit.
+
+    Returns:
+        True if the chunks were rebuilt
+    """
+    digest = content_hash(item.content)
+    if not force and item.content_hash == digest:
+        return False
+
+    await db.execute(delete(KnowledgeChunk).where(KnowledgeChunk.knowledge_id == item.id))
+    db.add_all([
+        KnowledgeChunk(
+            knowledge_id=item.id,
+            chunk_index=chunk.index,
+            content=chunk.text,
+            content_hash=content_hash(chunk.text),
+            char_start=chunk.char_start,
+            char_end=chunk.char_end,
+            token_count=chunk.token_count,
+        )
+        for chunk in chunk_text(item.content)
+    ])
+    item.content_hash = digest
+    return True
+
+
+async def rechunk_stale_items(db: AsyncSession, batch_size: int = 200) -> Dict[str, int]:
+    """
+    Backfill chunks for items never chunked or whose content changed
+
+    Walks the table in id order, committing after each batch.
+    """
+    scanned = 0
+    rechunked = 0
+    last_id = 0
+
+    while True:
+        result = await db.execute(
+            select(KnowledgeItem)
+            .where(KnowledgeItem.id > last_id)
+            .order_by(KnowledgeItem.id)
+            .limit(batch_size)
+        )
+        items = list(result.scalars().all())
+        if not items:
+            break
+
+        for item in items:
+            if await sync_item_chunks(db, item):
+                rechunked += 1
+        await db.commit()
+
+        scanned += len(items)
+        last_id = items[-1].id
+
+    return {"scanned": scanned, "rechunked": rechunked}
+
+
+# ============================================================================
+# Aggregation
+# ============================================================================
+
+class Passage(NamedTuple):
+    """
+    A search candidate
+
+    Either a matching chunk, or a whole item that matched outside its
+    chunks (on title or summary, or because it has not been chunked yet).
+    """
+    knowledge_id: int
+    item: KnowledgeItem
+    text: str  # Scored by the reranker
+    highlight: Optional[str]  # Chunk text; None for item-level matches
+
+
+def merge_passages(
+    chunks: Sequence[KnowledgeChunk],
+    items: Sequence[KnowledgeItem],
+    item_text: Callable[[KnowledgeItem], str]
+) -> List[Passage]:
+    """
+    Combine chunk matches with item-level matches, best quality first
+
+    Items already represented by a matching chunk are not added again.
+    Both inputs are ordered by quality, and the merge is stable.
+    Chunks must have their parent item loaded.
+    """
+    passages = [Passage(c.knowledge_id, c.item, c.content, c.content) for c in chunks]
+    chunked = {c.knowledge_id for c in chunks}
+    passages.extend(Passage(i.id, i, item_text(i), None) for i in items if i.id not in chunked)
+    passages.sort(key=lambda p: -(p.item.quality_score or 0.0))
+    return passages
+
+
+def aggregate_passages(
+    passages: Sequence[Passage],
+    scores: Optional[Sequence[float]] = None,
+    top_k: Optional[int] = None,
+    max_highlights: int = 3
+) -> List[Tuple[KnowledgeItem, Optional[float], List[str]]]:
+    """
+    Collapse ranked passages back into their parent items
+
+    Items keep the rank of their best passage and are scored by it.
+    Highlights come from matching chunks only.
+
+    Returns:
+        (item, score, highlight passages) tuples, best first
+    """
+    grouped: Dict[int, List[Any]] = {}
+    for idx, passage in enumerate(passages):
+        entry = grouped.get(passage.knowledge_id)
+        if entry is None:
+            score = scores[idx] if scores is not None else None
+            entry = grouped[passage.knowledge_id] = [passage.item, score, []]
+        if passage.highlight is not None and len(entry[2]) < max_highlights:
+            entry[2].append(passage.highlight)
+
+    results = [tuple(entry) for entry in grouped.values()]
+    return results[:top_k] if top_k is not None else results
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "TextChunk",
+    "content_hash",
+    "chunk_text",
+    "sync_item_chunks",
+    "rechunk_stale_items",
+    "Passage",
+    "merge_passages",
+    "aggregate_passages",
+]
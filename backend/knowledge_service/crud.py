@@ -3,15 +3,17 @@ Knowledge Service - CRUD Operations
 Database operations for knowledge management
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from functools import lru_cache
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_, and_
+from sqlalchemy import select, update, func, or_, and_, bindparam, Select
 from sqlalchemy.orm import selectinload
 from datetime import datetime
 
 from models.knowledge import (
     Product,
     KnowledgeItem,
+    KnowledgeChunk,
     KnowledgeType,
     KnowledgeStatus,
     SearchQuery
@@ -23,6 +25,41 @@ from .schemas import (
     KnowledgeItemUpdate,
     SearchFilters
 )
+from common.cache import OrmCodec, cached
+from common.outbox import add_outbox_event
+from .dedupe import unindex_item
+from .tasks import enqueue_knowledge_sync
+
+
+# ============================================================================
+# Change Events
+# ============================================================================
+
+def _product_event(db: AsyncSession, product: Product, event_type: str):
+    """Record a product change in the outbox"""
+    add_outbox_event(db, "product", product.id, event_type, {
+        "id": product.id,
+        "sku": product.sku,
+        "model": product.model,
+        "series": product.series,
+        "category": product.category.value if product.category else None,
+        "is_active": product.is_active,
+        "updated_at": product.updated_at.isoformat() if product.updated_at else None,
+    })
+
+
+def _knowledge_event(db: AsyncSession, item: KnowledgeItem, event_type: str):
+    """Record a knowledge item change in the outbox"""
+    add_outbox_event(db, "knowledge_item", item.id, event_type, {
+        "id": item.id,
+        "title": item.title,
+        "type": item.type.value if item.type else None,
+        "status": item.status.value if item.status else None,
+        "product_id": item.product_id,
+        "tags": item.tags,
+        "language": item.language,
+        "updated_at": item.updated_at.isoformat() if item.updated_at else None,
+    })
 
 
 # ============================================================================
@@ -35,27 +72,65 @@ async def create_product(db: AsyncSession, product: ProductCreate) -> Product:
         **product.model_dump(exclude_unset=True)
     )
     db.add(db_product)
+    await db.flush()
+    _product_event(db, db_product, "created")
     await db.commit()
     await db.refresh(db_product)
     return db_product
 
 
+@cached("product", key=lambda db, product_id: product_id, codec=OrmCodec(Product))
 async def get_product(db: AsyncSession, product_id: int) -> Optional[Product]:
-    """Get product by ID"""
+    """Get product by ID (cached, detached snapshot)"""
     result = await db.execute(
         select(Product).where(Product.id == product_id)
     )
     return result.scalar_one_or_none()
 
 
+@cached("product_sku", key=lambda db, sku: sku, codec=OrmCodec(Product))
 async def get_product_by_sku(db: AsyncSession, sku: str) -> Optional[Product]:
-    """Get product by SKU"""
+    """Get product by SKU (cached, detached snapshot)"""
     result = await db.execute(
         select(Product).where(Product.sku == sku)
     )
     return result.scalar_one_or_none()
 
 
+# List and search statements are built once per combination of filters,
+# with every value a bound parameter. Reusing the statement object reuses
+# its cache key and compiled SQL, so a call only binds new values.
+
+@lru_cache(maxsize=16)
+def _products_statements(filter_keys: Tuple[str, ...]) -> Tuple[Select, Select]:
+    conditions = []
+    if "category" in filter_keys:
+        conditions.append(Product.category == bindparam("category"))
+    if "is_active" in filter_keys:
+        conditions.append(Product.is_active == bindparam("is_active"))
+
+    query = select(Product).where(*conditions).offset(bindparam("skip")).limit(bindparam("limit"))
+    count_query = select(func.count()).select_from(Product).where(*conditions)
+    return query, count_query
+
+
+def products_statements(
+    skip: int = 0,
+    limit: int = 100,
+    category: Optional[str] = None,
+    is_active: Optional[bool] = None
+) -> Tuple[Select, Select, Dict[str, Any]]:
+    """Page statement, count statement and parameters for get_products"""
+    params: Dict[str, Any] = {}
+    if category:
+        params["category"] = category
+    if is_active is not None:
+        params["is_active"] = is_active
+
+    query, count_query = _products_statements(tuple(params))
+    return query, count_query, params
+
+
 async def get_products(
     db: AsyncSession,
     skip: int = 0,
@@ -64,26 +139,12 @@ async def get_products(
     is_active: Optional[bool] = None
 ) -> tuple[List[Product], int]:
     """Get products with filters and pagination"""
-    query = select(Product)
+    query, count_query, params = products_statements(skip, limit, category, is_active)
 
-    # Apply filters
-    conditions = []
-    if category:
-        conditions.append(Product.category == category)
-    if is_active is not None:
-        conditions.append(Product.is_active == is_active)
-
-    if conditions:
-        query = query.where(and_(*conditions))
-
-    # Count total
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
+    total_result = await db.execute(count_query, params)
     total = total_result.scalar() or 0
 
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
+    result = await db.execute(query, {**params, "skip": skip, "limit": limit})
     products = result.scalars().all()
 
     return list(products), total
@@ -95,7 +156,7 @@ async def update_product(
     product_update: ProductUpdate
 ) -> Optional[Product]:
     """Update a product"""
-    db_product = await get_product(db, product_id)
+    db_product = await db.get(Product, product_id)
     if not db_product:
         return None
 
@@ -104,23 +165,32 @@ async def update_product(
         setattr(db_product, field, value)
 
     db_product.updated_at = datetime.utcnow()
+    _product_event(db, db_product, "updated")
     await db.commit()
+    await _invalidate_product(db_product)
     await db.refresh(db_product)
     return db_product
 
 
 async def delete_product(db: AsyncSession, product_id: int) -> bool:
     """Delete a product (soft delete by setting is_active=False)"""
-    db_product = await get_product(db, product_id)
+    db_product = await db.get(Product, product_id)
     if not db_product:
         return False
 
     db_product.is_active = False
     db_product.discontinued_date = datetime.utcnow()
+    _product_event(db, db_product, "deleted")
     await db.commit()
+    await _invalidate_product(db_product)
     return True
 
 
+async def _invalidate_product(product: Product):
+    await get_product.invalidate(product.id)
+    await get_product_by_sku.invalidate(product.sku)
+
+
 # ============================================================================
 # Knowledge Item CRUD
 # ============================================================================
@@ -134,22 +204,99 @@ async def create_knowledge_item(
         **item.model_dump(exclude_unset=True)
     )
     db.add(db_item)
+    await db.flush()
+    _knowledge_event(db, db_item, "created")
     await db.commit()
     await db.refresh(db_item)
+    await enqueue_knowledge_sync(db, db_item)
     return db_item
 
 
+@cached("knowledge_item", key=lambda db, item_id: item_id, codec=OrmCodec(KnowledgeItem))
 async def get_knowledge_item(
     db: AsyncSession,
     item_id: int
 ) -> Optional[KnowledgeItem]:
-    """Get knowledge item by ID"""
+    """
+    Get knowledge item by ID
+
+    Cached: returns a detached snapshot without the product relationship.
+    View and like counts may lag by up to the cache TTL.
+    """
     result = await db.execute(
+        select(KnowledgeItem).where(KnowledgeItem.id == item_id)
+    )
+    return result.scalar_one_or_none()
+
+
+def _knowledge_filter_params(filters: Optional[SearchFilters], extended: bool = True) -> Dict[str, Any]:
+    """
+    Bound parameter values for the SearchFilters that are set
+
+    Tag, language and quality filters apply only when extended is set.
+    """
+    params: Dict[str, Any] = {}
+    if not filters:
+        return params
+
+    if filters.types:
+        params["types"] = [t.value for t in filters.types]
+    if filters.product_ids:
+        params["product_ids"] = list(filters.product_ids)
+    if extended:
+        if filters.tags:
+            params["tags"] = list(filters.tags)
+        if filters.language:
+            params["language"] = filters.language
+        if filters.min_quality_score is not None:
+            params["min_quality_score"] = filters.min_quality_score
+    if filters.status:
+        params["statuses"] = [st.value for st in filters.status]
+    return params
+
+
+def _knowledge_conditions(filter_keys: Tuple[str, ...]) -> list:
+    conditions = []
+    if "types" in filter_keys:
+        conditions.append(KnowledgeItem.type.in_(bindparam("types", expanding=True)))
+    if "product_ids" in filter_keys:
+        conditions.append(KnowledgeItem.product_id.in_(bindparam("product_ids", expanding=True)))
+    if "tags" in filter_keys:
+        # Check if any tag matches (PostgreSQL array overlap)
+        conditions.append(KnowledgeItem.tags.overlap(bindparam("tags")))
+    if "language" in filter_keys:
+        conditions.append(KnowledgeItem.language == bindparam("language"))
+    if "min_quality_score" in filter_keys:
+        conditions.append(KnowledgeItem.quality_score >= bindparam("min_quality_score"))
+    if "statuses" in filter_keys:
+        conditions.append(KnowledgeItem.status.in_(bindparam("statuses", expanding=True)))
+    return conditions
+
+
+@lru_cache(maxsize=64)
+def _knowledge_items_statements(filter_keys: Tuple[str, ...]) -> Tuple[Select, Select]:
+    conditions = _knowledge_conditions(filter_keys)
+    query = (
         select(KnowledgeItem)
         .options(selectinload(KnowledgeItem.product))
-        .where(KnowledgeItem.id == item_id)
+        .where(*conditions)
+        .order_by(KnowledgeItem.created_at.desc())
+        .offset(bindparam("skip"))
+        .limit(bindparam("limit"))
     )
-    return result.scalar_one_or_none()
+    count_query = select(func.count()).select_from(KnowledgeItem).where(*conditions)
+    return query, count_query
+
+
+def knowledge_items_statements(
+    skip: int = 0,
+    limit: int = 100,
+    filters: Optional[SearchFilters] = None
+) -> Tuple[Select, Select, Dict[str, Any]]:
+    """Page statement, count statement and parameters for get_knowledge_items"""
+    params = _knowledge_filter_params(filters)
+    query, count_query = _knowledge_items_statements(tuple(params))
+    return query, count_query, params
 
 
 async def get_knowledge_items(
@@ -159,42 +306,12 @@ async def get_knowledge_items(
     filters: Optional[SearchFilters] = None
 ) -> tuple[List[KnowledgeItem], int]:
     """Get knowledge items with filters and pagination"""
-    query = select(KnowledgeItem).options(selectinload(KnowledgeItem.product))
-
-    # Apply filters
-    conditions = []
+    query, count_query, params = knowledge_items_statements(skip, limit, filters)
 
-    if filters:
-        if filters.types:
-            conditions.append(KnowledgeItem.type.in_([t.value for t in filters.types]))
-
-        if filters.product_ids:
-            conditions.append(KnowledgeItem.product_id.in_(filters.product_ids))
-
-        if filters.tags:
-            # Check if any tag matches (PostgreSQL array overlap)
-            conditions.append(KnowledgeItem.tags.overlap(filters.tags))
-
-        if filters.language:
-            conditions.append(KnowledgeItem.language == filters.language)
-
-        if filters.min_quality_score is not None:
-            conditions.append(KnowledgeItem.quality_score >= filters.min_quality_score)
-
-        if filters.status:
-            conditions.append(KnowledgeItem.status.in_([s.value for s in filters.status]))
-
-    if conditions:
-        query = query.where(and_(*conditions))
-
-    # Count total
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
+    total_result = await db.execute(count_query, params)
     total = total_result.scalar() or 0
 
-    # Apply pagination and ordering
-    query = query.order_by(KnowledgeItem.created_at.desc()).offset(skip).limit(limit)
-    result = await db.execute(query)
+    result = await db.execute(query, {**params, "skip": skip, "limit": limit})
     items = result.scalars().all()
 
     return list(items), total
@@ -206,7 +323,7 @@ async def update_knowledge_item(
     item_update: KnowledgeItemUpdate
 ) -> Optional[KnowledgeItem]:
     """Update a knowledge item"""
-    db_item = await get_knowledge_item(db, item_id)
+    db_item = await db.get(KnowledgeItem, item_id)
     if not db_item:
         return None
 
@@ -215,52 +332,95 @@ async def update_knowledge_item(
         setattr(db_item, field, value)
 
     db_item.updated_at = datetime.utcnow()
+    _knowledge_event(db, db_item, "updated")
     await db.commit()
+    await get_knowledge_item.invalidate(item_id)
     await db.refresh(db_item)
+    await enqueue_knowledge_sync(db, db_item)
     return db_item
 
 
 async def delete_knowledge_item(db: AsyncSession, item_id: int) -> bool:
     """Delete a knowledge item (soft delete by archiving)"""
-    db_item = await get_knowledge_item(db, item_id)
+    db_item = await db.get(KnowledgeItem, item_id)
     if not db_item:
         return False
 
     db_item.status = KnowledgeStatus.ARCHIVED
+    _knowledge_event(db, db_item, "deleted")
     await db.commit()
+    await get_knowledge_item.invalidate(item_id)
+    await unindex_item(item_id)
     return True
 
 
 async def increment_view_count(db: AsyncSession, item_id: int) -> bool:
-    """Increment view count for a knowledge item"""
-    db_item = await get_knowledge_item(db, item_id)
-    if not db_item:
-        return False
+    """
+    Increment view count for a knowledge item
 
-    db_item.view_count += 1
+    Does not invalidate the item cache; cached view counts catch up on
+    expiry.
+    """
+    result = await db.execute(
+        update(KnowledgeItem)
+        .where(KnowledgeItem.id == item_id)
+        .values(view_count=KnowledgeItem.view_count + 1)
+    )
     await db.commit()
-    return True
+    return result.rowcount > 0
 
 
 async def toggle_like(db: AsyncSession, item_id: int, increment: bool = True) -> bool:
     """Toggle like count for a knowledge item"""
-    db_item = await get_knowledge_item(db, item_id)
-    if not db_item:
-        return False
-
     if increment:
-        db_item.like_count += 1
+        like_count = KnowledgeItem.like_count + 1
     else:
-        db_item.like_count = max(0, db_item.like_count - 1)
+        like_count = func.greatest(KnowledgeItem.like_count - 1, 0)
 
+    result = await db.execute(
+        update(KnowledgeItem)
+        .where(KnowledgeItem.id == item_id)
+        .values(like_count=like_count)
+    )
     await db.commit()
-    return True
+    await get_knowledge_item.invalidate(item_id)
+    return result.rowcount > 0
 
 
 # ============================================================================
 # Search Operations
 # ============================================================================
 
+@lru_cache(maxsize=16)
+def _keyword_search_statement(filter_keys: Tuple[str, ...]) -> Select:
+    pattern = bindparam("pattern")
+    return (
+        select(KnowledgeItem)
+        .options(selectinload(KnowledgeItem.product))
+        .where(
+            or_(
+                KnowledgeItem.title.ilike(pattern),
+                KnowledgeItem.content.ilike(pattern),
+                KnowledgeItem.summary.ilike(pattern)
+            ),
+            *_knowledge_conditions(filter_keys)
+        )
+        .order_by(KnowledgeItem.quality_score.desc())
+        .limit(bindparam("top_k"))
+    )
+
+
+def keyword_search_statement(
+    query: str,
+    top_k: int = 10,
+    filters: Optional[SearchFilters] = None
+) -> Tuple[Select, Dict[str, Any]]:
+    """Statement and parameters for keyword_search"""
+    params = _knowledge_filter_params(filters, extended=False)
+    search_query = _keyword_search_statement(tuple(params))
+    return search_query, {**params, "pattern": f"%{query}%", "top_k": top_k}
+
+
 async def keyword_search(
     db: AsyncSession,
     query: str,
@@ -271,18 +431,29 @@ async def keyword_search(
     Keyword-based search
     Uses PostgreSQL full-text search (to be enhanced with tsvector)
     """
-    search_query = select(KnowledgeItem).options(selectinload(KnowledgeItem.product))
-
-    # Build search conditions
-    conditions = [
-        or_(
-            KnowledgeItem.title.ilike(f"%{query}%"),
-            KnowledgeItem.content.ilike(f"%{query}%"),
-            KnowledgeItem.summary.ilike(f"%{query}%")
-        )
-    ]
+    search_query, params = keyword_search_statement(query, top_k, filters)
+    result = await db.execute(search_query, params)
+    return list(result.scalars().all())
+
+
+async def chunk_keyword_search(
+    db: AsyncSession,
+    query: str,
+    top_k: int = 50,
+    filters: Optional[SearchFilters] = None
+) -> List[KnowledgeChunk]:
+    """
+    Keyword search over knowledge chunks
+    Returns matching chunks (with their parent item loaded), best items first
+    """
+    search_query = (
+        select(KnowledgeChunk)
+        .join(KnowledgeItem, KnowledgeChunk.knowledge_id == KnowledgeItem.id)
+        .options(selectinload(KnowledgeChunk.item))
+    )
+
+    conditions = [KnowledgeChunk.content.ilike(f"%{query}%")]
 
-    # Apply additional filters
     if filters:
         if filters.types:
             conditions.append(KnowledgeItem.type.in_([t.value for t in filters.types]))
@@ -292,12 +463,22 @@ async def keyword_search(
             conditions.append(KnowledgeItem.status.in_([s.value for s in filters.status]))
 
     search_query = search_query.where(and_(*conditions))
-    search_query = search_query.order_by(KnowledgeItem.quality_score.desc()).limit(top_k)
+    search_query = search_query.order_by(
+        KnowledgeItem.quality_score.desc(),
+        KnowledgeChunk.knowledge_id,
+        KnowledgeChunk.chunk_index
+    ).limit(top_k)
 
     result = await db.execute(search_query)
     return list(result.scalars().all())
 
 
+def rerank_passage(item: KnowledgeItem, max_chars: int = 2000) -> str:
+    """Build the passage text scored by the reranker for a knowledge item"""
+    parts = [item.title, item.summary or "", item.content[:max_chars]]
+    return "\n".join(p for p in parts if p)
+
+
 async def log_search_query(
     db: AsyncSession,
     query_text: str,
@@ -413,6 +594,8 @@ __all__ = [
     "increment_view_count",
     "toggle_like",
     "keyword_search",
+    "chunk_keyword_search",
+    "rerank_passage",
     "log_search_query",
     "get_knowledge_stats",
 ]
@@ -0,0 +1,459 @@
+"""
+Knowledge Service - Near-Duplicate Detection
+MinHash/LSH index over knowledge item content
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import base64
+import hashlib
+import json
+import logging
+
+import numpy as np
+from prometheus_client import Counter, Histogram
+from sqlalchemy import select
+
+from config import settings
+from common.scoring import empty_signatures, get_minhasher, signature_similarity
+from models.database import AsyncSessionLocal, redis_cache
+from models.knowledge import KnowledgeItem, KnowledgeStatus
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+DEDUPE_LOOKUPS = Counter(
+    "knowledge_dedupe_lookups_total",
+    "Near-duplicate lookups against the LSH index"
+)
+DEDUPE_CANDIDATES = Histogram(
+    "knowledge_dedupe_candidates",
+    "LSH candidates compared per lookup",
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+)
+
+_KEY_PREFIX = "kcp:dedupe:"
+_REPORT_KEY = f"{_KEY_PREFIX}report"
+
+
+# ============================================================================
+# LSH Parameters
+# ============================================================================
+
+def _collision_probability(similarity: np.ndarray, bands: int, rows: int) -> np.ndarray:
+    """Chance two documents share at least one band bucket"""
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+def lsh_params(
+    num_perm: int,
+    threshold: float,
+    false_positive_weight: float = 0.5,
+    false_negative_weight: float = 0.5
+) -> Tuple[int, int]:
+    """
+    (bands, rows per band) minimizing weighted false positive and negative
+    probability mass around threshold
+
+    More rows per band make buckets more selective, so a lookup only
+    touches items that are likely above the threshold instead of scanning
+    the corpus.
+    """
+    grid = np.linspace(0, 1, 201)
+    below, above = grid[grid < threshold], grid[grid >= threshold]
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        false_positive = np.trapz(_collision_probability(below, bands, rows), below) if len(below) > 1 else 0.0
+        false_negative = np.trapz(1 - _collision_probability(above, bands, rows), above) if len(above) > 1 else 0.0
+        error = false_positive_weight * false_positive + false_negative_weight * false_negative
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+def band_keys(signature: np.ndarray, bands: int, rows: int) -> List[str]:
+    """Bucket key of each band of a signature"""
+    return [
+        f"{band}:{hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(bands)
+    ]
+
+
+def _encode(signature: np.ndarray) -> str:
+    return base64.b64encode(signature.astype(np.uint32).tobytes()).decode("ascii")
+
+
+def _decode(raw: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(raw), dtype=np.uint32)
+
+
+# ============================================================================
+# Index Backends
+# ============================================================================
+
+class DedupeIndex:
+    """
+    Base LSH index: item signatures plus band buckets of item ids
+
+    A lookup reads the item's band buckets and compares signatures only
+    with the items found there.
+    """
+
+    def __init__(self, num_perm: int, threshold: float):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_params(num_perm, threshold)
+        logger.info(f"Dedupe index: {self.bands} bands x {self.rows} rows for threshold {threshold}")
+
+    async def upsert_many(self, signatures: Dict[int, np.ndarray]):
+        raise NotImplementedError
+
+    async def remove(self, item_id: int):
+        raise NotImplementedError
+
+    async def candidates(self, signature: np.ndarray) -> Set[int]:
+        raise NotImplementedError
+
+    async def signatures(self, item_ids: Sequence[int]) -> Dict[int, np.ndarray]:
+        raise NotImplementedError
+
+    async def indexed_ids(self) -> Set[int]:
+        raise NotImplementedError
+
+    async def save_report(self, report: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def get_report(self) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def upsert(self, item_id: int, signature: np.ndarray):
+        await self.upsert_many({item_id: signature})
+
+
+class RedisDedupeIndex(DedupeIndex):
+    """Index in Redis sets, shared by all knowledge service instances"""
+
+    @property
+    def client(self):
+        if not redis_cache.client:
+            raise RuntimeError("Redis not connected")
+        return redis_cache.client
+
+    @staticmethod
+    def _bucket(key: str) -> str:
+        return f"{_KEY_PREFIX}band:{key}"
+
+    async def upsert_many(self, signatures):
+        if not signatures:
+            return
+        old = await self.signatures(list(signatures))
+        async with self.client.pipeline(transaction=False) as pipe:
+            for item_id, signature in signatures.items():
+                if item_id in old:
+                    for key in band_keys(old[item_id], self.bands, self.rows):
+                        pipe.srem(self._bucket(key), item_id)
+                for key in band_keys(signature, self.bands, self.rows):
+                    pipe.sadd(self._bucket(key), item_id)
+            pipe.hset(f"{_KEY_PREFIX}sig", mapping={item_id: _encode(s) for item_id, s in signatures.items()})
+            await pipe.execute()
+
+    async def remove(self, item_id):
+        old = await self.signatures([item_id])
+        if item_id not in old:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in band_keys(old[item_id], self.bands, self.rows):
+                pipe.srem(self._bucket(key), item_id)
+            pipe.hdel(f"{_KEY_PREFIX}sig", item_id)
+            await pipe.execute()
+
+    async def candidates(self, signature):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in band_keys(signature, self.bands, self.rows):
+                pipe.smembers(self._bucket(key))
+            buckets = await pipe.execute()
+        return {int(item_id) for bucket in buckets for item_id in bucket}
+
+    async def signatures(self, item_ids):
+        if not item_ids:
+            return {}
+        raw = await self.client.hmget(f"{_KEY_PREFIX}sig", list(item_ids))
+        return {item_id: _decode(value) for item_id, value in zip(item_ids, raw) if value}
+
+    async def indexed_ids(self):
+        return {int(item_id) for item_id in await self.client.hkeys(f"{_KEY_PREFIX}sig")}
+
+    async def save_report(self, report):
+        await self.client.set(_REPORT_KEY, json.dumps(report))
+
+    async def get_report(self):
+        raw = await self.client.get(_REPORT_KEY)
+        return json.loads(raw) if raw else None
+
+
+class InMemoryDedupeIndex(DedupeIndex):
+    """Process-local index; rebuilt by the dedupe report job after a restart"""
+
+    def __init__(self, num_perm: int, threshold: float):
+        super().__init__(num_perm, threshold)
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._buckets: Dict[str, Set[int]] = {}
+        self._report: Optional[Dict[str, Any]] = None
+
+    async def upsert_many(self, signatures):
+        for item_id, signature in signatures.items():
+            await self.remove(item_id)
+            self._signatures[item_id] = signature
+            for key in band_keys(signature, self.bands, self.rows):
+                self._buckets.setdefault(key, set()).add(item_id)
+
+    async def remove(self, item_id):
+        old = self._signatures.pop(item_id, None)
+        if old is None:
+            return
+        for key in band_keys(old, self.bands, self.rows):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    async def candidates(self, signature):
+        found: Set[int] = set()
+        for key in band_keys(signature, self.bands, self.rows):
+            found |= self._buckets.get(key, set())
+        return found
+
+    async def signatures(self, item_ids):
+        return {i: self._signatures[i] for i in item_ids if i in self._signatures}
+
+    async def indexed_ids(self):
+        return set(self._signatures)
+
+    async def save_report(self, report):
+        self._report = report
+
+    async def get_report(self):
+        return self._report
+
+
+_index: Optional[DedupeIndex] = None
+
+
+def get_dedupe_index() -> DedupeIndex:
+    """The shared index: Redis when connected, otherwise process-local"""
+    global _index
+    if _index is None:
+        num_perm = get_minhasher().num_perm
+        threshold = settings.knowledge_dedupe_threshold
+        if redis_cache.client is not None:
+            _index = RedisDedupeIndex(num_perm, threshold)
+        else:
+            logger.warning("Dedupe index using process-local storage; run the dedupe report to rebuild it")
+            _index = InMemoryDedupeIndex(num_perm, threshold)
+    return _index
+
+
+# ============================================================================
+# Lookups
+# ============================================================================
+
+async def index_item(item: KnowledgeItem):
+    """Add, refresh or (for archived or empty items) remove an item's index entry"""
+    index = get_dedupe_index()
+    signature = get_minhasher().signatures([item.content or ""])
+    if item.status == KnowledgeStatus.ARCHIVED or empty_signatures(signature)[0]:
+        await index.remove(item.id)
+        return
+    await index.upsert(item.id, signature[0])
+
+
+async def unindex_item(item_id: int):
+    """Drop an archived item from the index; a failure only leaves a stale entry"""
+    try:
+        await get_dedupe_index().remove(item_id)
+    except Exception as e:
+        logger.warning(f"Failed to remove knowledge item {item_id} from the dedupe index: {e}")
+
+
+async def find_duplicates(item: KnowledgeItem, threshold: Optional[float] = None) -> List[Tuple[int, float]]:
+    """
+    Indexed items whose content is at least threshold similar to an item's
+
+    Only the item's LSH buckets are read, so the cost depends on the number
+    of candidates rather than the corpus size. Returns (item id, estimated
+    Jaccard similarity) pairs, most similar first; an item without any
+    words has no duplicates.
+    """
+    index = get_dedupe_index()
+    threshold = index.threshold if threshold is None else threshold
+    stored = await index.signatures([item.id])
+    signature = stored.get(item.id)
+    if signature is None:
+        signature = get_minhasher().signatures([item.content or ""])[0]
+        if empty_signatures(signature[None, :])[0]:
+            return []
+
+    candidates = sorted((await index.candidates(signature)) - {item.id})
+    DEDUPE_LOOKUPS.inc()
+    DEDUPE_CANDIDATES.observe(len(candidates))
+    if not candidates:
+        return []
+    found = await index.signatures(candidates)
+    ids = [i for i in candidates if i in found]
+    if not ids:
+        return []
+    similarity = signature_similarity(signature[None, :], np.stack([found[i] for i in ids]))[0]
+    return sorted(
+        ((item_id, round(float(s), 4)) for item_id, s in zip(ids, similarity) if s >= threshold),
+        key=lambda pair: -pair[1]
+    )
+
+
+# ============================================================================
+# Bulk Report
+# ============================================================================
+
+def _clusters(pairs: Iterable[Tuple[int, int]]) -> List[List[int]]:
+    """Connected components of duplicate pairs (union-find)"""
+    parent: Dict[int, int] = {}
+
+    def root(x: int) -> int:
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in pairs:
+        ra, rb = root(a), root(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    groups: Dict[int, List[int]] = {}
+    for x in parent:
+        groups.setdefault(root(x), []).append(x)
+    return sorted((sorted(g) for g in groups.values()), key=lambda g: (-len(g), g[0]))
+
+
+async def build_dedupe_report(
+    threshold: Optional[float] = None,
+    batch_size: Optional[int] = None,
+    max_clusters: int = 500
+) -> Dict[str, Any]:
+    """
+    Refresh the index from the table and report duplicate clusters
+
+    Signatures are computed in batches and upserted, and entries for items
+    no longer in the table (or archived) are dropped, so lookups keep
+    working while the report runs. candidate pairs come from items
+    sharing a band bucket and are kept when their estimated similarity
+    reaches threshold. Items in a cluster are transitively near-duplicate;
+    the lowest id is the likely original. Items without any words are
+    neither indexed nor clustered, since their signatures are all equal.
+    The report is stored for GET /duplicates/report.
+    """
+    index = get_dedupe_index()
+    threshold = index.threshold if threshold is None else threshold
+    batch_size = batch_size or settings.scoring_batch_size
+    minhasher = get_minhasher()
+    started = datetime.utcnow()
+
+    ids: List[int] = []
+    empty = 0
+    meta: Dict[int, Dict[str, Any]] = {}
+    parts: List[np.ndarray] = []
+    last_id = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            rows = (await db.execute(
+                select(KnowledgeItem.id, KnowledgeItem.content, KnowledgeItem.title,
+                       KnowledgeItem.product_id, KnowledgeItem.language)
+                .where(KnowledgeItem.id > last_id, KnowledgeItem.status != KnowledgeStatus.ARCHIVED)
+                .order_by(KnowledgeItem.id)
+                .limit(batch_size)
+            )).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            signatures = minhasher.signatures([r.content or "" for r in rows])
+            text = ~empty_signatures(signatures)
+            empty += int((~text).sum())
+            rows, signatures = [r for r, t in zip(rows, text) if t], signatures[text]
+            await index.upsert_many({r.id: s for r, s in zip(rows, signatures)})
+            ids.extend(r.id for r in rows)
+            parts.append(signatures)
+            for r in rows:
+                meta[r.id] = {"title": r.title, "product_id": r.product_id, "language": r.language}
+
+    for stale in await index.indexed_ids() - set(ids):
+        await index.remove(stale)
+
+    signatures = np.concatenate(parts) if parts else np.zeros((0, minhasher.num_perm), dtype=np.uint32)
+    buckets: Dict[str, List[int]] = {}
+    for position, signature in enumerate(signatures):
+        for key in band_keys(signature, index.bands, index.rows):
+            buckets.setdefault(key, []).append(position)
+    candidate_pairs = {
+        (a, b)
+        for members in buckets.values() if len(members) > 1
+        for i, a in enumerate(members) for b in members[i + 1:]
+    }
+    duplicate_pairs = []
+    if candidate_pairs:
+        left, right = (np.array(side) for side in zip(*sorted(candidate_pairs)))
+        similarity = (signatures[left] == signatures[right]).mean(axis=1)
+        duplicate_pairs = [
+            (ids[a], ids[b], float(s))
+            for a, b, s in zip(left, right, similarity) if s >= threshold
+        ]
+
+    best: Dict[int, float] = {}
+    for a, b, s in duplicate_pairs:
+        best[a] = max(best.get(a, 0.0), s)
+        best[b] = max(best.get(b, 0.0), s)
+    clusters = _clusters((a, b) for a, b, _ in duplicate_pairs)
+    report = {
+        "generated_at": started.isoformat(),
+        "threshold": threshold,
+        "bands": index.bands,
+        "rows": index.rows,
+        "items": len(ids),
+        "empty_items": empty,
+        "candidate_pairs": len(candidate_pairs),
+        "duplicate_pairs": len(duplicate_pairs),
+        "duplicate_items": sum(len(c) - 1 for c in clusters),
+        "clusters": [
+            {
+                "original_id": cluster[0],
+                "size": len(cluster),
+                "items": [{"id": i, **meta[i], "similarity": round(best.get(i, 0.0), 4)} for i in cluster],
+            }
+            for cluster in clusters[:max_clusters]
+        ],
+        "duration_s": round((datetime.utcnow() - started).total_seconds(), 2),
+    }
+    await index.save_report(report)
+    logger.info(
+        f"Dedupe report: {report['items']} items, {report['candidate_pairs']} candidate pairs, "
+        f"{report['duplicate_items']} duplicates in {len(clusters)} clusters"
+    )
+    return report
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "lsh_params",
+    "band_keys",
+    "DedupeIndex",
+    "RedisDedupeIndex",
+    "InMemoryDedupeIndex",
+    "get_dedupe_index",
+    "index_item",
+    "unindex_item",
+    "find_duplicates",
+    "build_dedupe_report",
+]
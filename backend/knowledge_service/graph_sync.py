@@ -0,0 +1,372 @@
+"""
+Knowledge Service - Knowledge Graph Sync
+Projects products, knowledge items, tags and competitors into Neo4j
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import logging
+import uuid
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import select, or_, and_
+
+from config import settings
+from models.database import AsyncSessionLocal, neo4j_db, redis_cache
+from models.knowledge import Product, KnowledgeItem, CompetitorTracking
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+GRAPH_SYNC_ROWS = Counter(
+    "knowledge_graph_sync_rows_total",
+    "Rows written to the knowledge graph",
+    ["entity"]
+)
+GRAPH_SYNC_DURATION = Histogram(
+    "knowledge_graph_sync_duration_seconds",
+    "Knowledge graph sync run duration in seconds",
+    ["mode"]
+)
+
+_EPOCH = datetime(1970, 1, 1)
+_LOCK_KEY = "kcp:lock:graph_sync"
+
+
+# ============================================================================
+# Cypher
+# ============================================================================
+
+_CONSTRAINTS = [
+    "CREATE CONSTRAINT product_id IF NOT EXISTS FOR (n:Product) REQUIRE n.id IS UNIQUE",
+    "CREATE CONSTRAINT knowledge_item_id IF NOT EXISTS FOR (n:KnowledgeItem) REQUIRE n.id IS UNIQUE",
+    "CREATE CONSTRAINT competitor_product_id IF NOT EXISTS FOR (n:CompetitorProduct) REQUIRE n.id IS UNIQUE",
+    "CREATE CONSTRAINT tag_name IF NOT EXISTS FOR (n:Tag) REQUIRE n.name IS UNIQUE",
+    "CREATE CONSTRAINT series_name IF NOT EXISTS FOR (n:Series) REQUIRE n.name IS UNIQUE",
+    "CREATE CONSTRAINT feature_name IF NOT EXISTS FOR (n:Feature) REQUIRE n.name IS UNIQUE",
+    "CREATE CONSTRAINT competitor_name IF NOT EXISTS FOR (n:Competitor) REQUIRE n.name IS UNIQUE",
+    "CREATE CONSTRAINT sync_state_entity IF NOT EXISTS FOR (n:SyncState) REQUIRE n.entity IS UNIQUE",
+]
+
+_UPSERT_PRODUCTS = """
+UNWIND $rows AS row
+MERGE (p:Product {id: row.id})
+SET p.sku = row.sku, p.name = row.name, p.model = row.model, p.category = row.category,
+    p.price = row.price, p.is_active = row.is_active, p.updated_at = row.updated_at
+WITH p, row
+CALL {
+    WITH p, row
+    MATCH (p)-[r:IN_SERIES]->(s:Series)
+    WHERE row.series IS NULL OR s.name <> row.series
+    DELETE r
+}
+CALL {
+    WITH p, row
+    MATCH (p)-[r:HAS_FEATURE]->(f:Feature)
+    WHERE NOT f.name IN row.features
+    DELETE r
+}
+FOREACH (name IN CASE WHEN row.series IS NULL THEN [] ELSE [row.series] END |
+    MERGE (s:Series {name: name})
+    MERGE (p)-[:IN_SERIES]->(s))
+FOREACH (name IN row.features |
+    MERGE (f:Feature {name: name})
+    MERGE (p)-[:HAS_FEATURE]->(f))
+"""
+
+_UPSERT_KNOWLEDGE_ITEMS = """
+UNWIND $rows AS row
+MERGE (k:KnowledgeItem {id: row.id})
+SET k.title = row.title, k.type = row.type, k.status = row.status, k.language = row.language,
+    k.quality_score = row.quality_score, k.updated_at = row.updated_at
+WITH k, row
+CALL {
+    WITH k, row
+    MATCH (k)-[r:TAGGED]->(t:Tag)
+    WHERE NOT t.name IN row.tags
+    DELETE r
+}
+CALL {
+    WITH k, row
+    MATCH (k)-[r:ABOUT]->(p:Product)
+    WHERE row.product_id IS NULL OR p.id <> row.product_id
+    DELETE r
+}
+FOREACH (name IN row.tags |
+    MERGE (t:Tag {name: name})
+    MERGE (k)-[:TAGGED]->(t))
+FOREACH (pid IN CASE WHEN row.product_id IS NULL THEN [] ELSE [row.product_id] END |
+    MERGE (p:Product {id: pid})
+    MERGE (k)-[:ABOUT]->(p))
+"""
+
+_UPSERT_COMPETITORS = """
+UNWIND $rows AS row
+MERGE (c:CompetitorProduct {id: row.id})
+SET c.name = row.product_name, c.competitor = row.competitor_name, c.category = row.category,
+    c.price = row.price, c.rating = row.rating, c.updated_at = row.updated_at
+MERGE (comp:Competitor {name: row.competitor_name})
+MERGE (c)-[:MADE_BY]->(comp)
+WITH c, row
+CALL {
+    WITH c, row
+    MATCH (c)-[r:COMPETES_WITH]->(p:Product)
+    WHERE row.product_id IS NULL OR p.id <> row.product_id
+    DELETE r
+}
+FOREACH (pid IN CASE WHEN row.product_id IS NULL THEN [] ELSE [row.product_id] END |
+    MERGE (p:Product {id: pid})
+    MERGE (c)-[:COMPETES_WITH]->(p))
+"""
+
+_SET_WATERMARK = """
+MERGE (s:SyncState {entity: $entity})
+SET s.updated_at = $updated_at, s.last_id = $last_id
+"""
+
+_GET_WATERMARK = """
+MATCH (s:SyncState {entity: $entity})
+RETURN s.updated_at AS updated_at, s.last_id AS last_id
+"""
+
+# Batched deletes keep a full rebuild from building one huge transaction
+_CLEAR_GRAPH = """
+MATCH (n)
+WHERE n:Product OR n:KnowledgeItem OR n:CompetitorProduct OR n:Competitor
+   OR n:Tag OR n:Series OR n:Feature OR n:SyncState
+CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+
+# ============================================================================
+# Entity Specs
+# ============================================================================
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value if hasattr(value, "value") else value
+
+
+class SyncSpec(NamedTuple):
+    """How one table is projected into the graph"""
+    entity: str
+    model: Any
+    columns: List[Any]
+    cypher: str
+    to_row: Callable[[Any], Dict[str, Any]]
+
+
+SYNC_SPECS = [
+    SyncSpec(
+        entity="product",
+        model=Product,
+        columns=[
+            Product.id, Product.sku, Product.name, Product.model, Product.series,
+            Product.category, Product.price, Product.features, Product.is_active, Product.updated_at,
+        ],
+        cypher=_UPSERT_PRODUCTS,
+        to_row=lambda r: {
+            "id": r.id,
+            "sku": r.sku,
+            "name": r.name,
+            "model": r.model,
+            "series": r.series,
+            "category": _enum_value(r.category),
+            "price": r.price,
+            "features": [str(f) for f in (r.features or [])],
+            "is_active": r.is_active,
+            "updated_at": _iso(r.updated_at),
+        },
+    ),
+    SyncSpec(
+        entity="knowledge_item",
+        model=KnowledgeItem,
+        columns=[
+            KnowledgeItem.id, KnowledgeItem.title, KnowledgeItem.type, KnowledgeItem.status,
+            KnowledgeItem.language, KnowledgeItem.quality_score, KnowledgeItem.product_id,
+            KnowledgeItem.tags, KnowledgeItem.updated_at,
+        ],
+        cypher=_UPSERT_KNOWLEDGE_ITEMS,
+        to_row=lambda r: {
+            "id": r.id,
+            "title": r.title,
+            "type": _enum_value(r.type),
+            "status": _enum_value(r.status),
+            "language": r.language,
+            "quality_score": r.quality_score,
+            "product_id": r.product_id,
+            "tags": list(r.tags or []),
+            "updated_at": _iso(r.updated_at),
+        },
+    ),
+    SyncSpec(
+        entity="competitor",
+        model=CompetitorTracking,
+        columns=[
+            CompetitorTracking.id, CompetitorTracking.competitor_name, CompetitorTracking.product_name,
+            CompetitorTracking.category, CompetitorTracking.price, CompetitorTracking.rating,
+            CompetitorTracking.soundcore_product_id, CompetitorTracking.updated_at,
+        ],
+        cypher=_UPSERT_COMPETITORS,
+        to_row=lambda r: {
+            "id": r.id,
+            "competitor_name": r.competitor_name,
+            "product_name": r.product_name,
+            "category": r.category,
+            "price": r.price,
+            "rating": r.rating,
+            "product_id": r.soundcore_product_id,
+            "updated_at": _iso(r.updated_at),
+        },
+    ),
+]
+
+
+# ============================================================================
+# Graph Sync
+# ============================================================================
+
+class GraphSync:
+    """
+    Incremental Postgres -> Neo4j projection
+
+    Each entity is read in (updated_at, id) keyset order from its watermark
+    and written with one UNWIND ... MERGE transaction per batch. The
+    watermark is advanced in the same Neo4j transaction as the batch, so an
+    interrupted sync resumes where it stopped.
+    """
+
+    def __init__(self, batch_size: int = 2000):
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_schema(self):
+        """Create uniqueness constraints (also indexes the MERGE keys)"""
+        await neo4j_db.ensure_connected()
+        async with neo4j_db.get_session() as session:
+            for statement in _CONSTRAINTS:
+                await session.run(statement)
+
+    async def _get_watermark(self, entity: str) -> Tuple[datetime, int]:
+        async with neo4j_db.get_session() as session:
+            result = await session.run(_GET_WATERMARK, entity=entity)
+            record = await result.single()
+        if record is None or record["updated_at"] is None:
+            return _EPOCH, 0
+        return datetime.fromisoformat(record["updated_at"]), record["last_id"] or 0
+
+    @staticmethod
+    async def _write_batch(tx, spec: SyncSpec, rows: List[Dict[str, Any]], last: Any):
+        result = await tx.run(spec.cypher, rows=rows)
+        await result.consume()
+        result = await tx.run(
+            _SET_WATERMARK,
+            entity=spec.entity,
+            updated_at=last.updated_at.isoformat(),
+            last_id=last.id
+        )
+        await result.consume()
+
+    async def sync_entity(self, spec: SyncSpec) -> int:
+        """Project rows changed since the entity's watermark; returns rows written"""
+        updated_at, last_id = await self._get_watermark(spec.entity)
+        model = spec.model
+        written = 0
+
+        while True:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(*spec.columns)
+                    .where(or_(
+                        model.updated_at > updated_at,
+                        and_(model.updated_at == updated_at, model.id > last_id)
+                    ))
+                    .order_by(model.updated_at, model.id)
+                    .limit(self.batch_size)
+                )
+                records = result.all()
+            if not records:
+                break
+
+            rows = [spec.to_row(r) for r in records]
+            async with neo4j_db.get_session() as session:
+                await session.execute_write(self._write_batch, spec, rows, records[-1])
+
+            written += len(rows)
+            GRAPH_SYNC_ROWS.labels(entity=spec.entity).inc(len(rows))
+            updated_at, last_id = records[-1].updated_at, records[-1].id
+
+            if len(records) < self.batch_size:
+                break
+
+        return written
+
+    async def sync(self) -> Dict[str, int]:
+        """Incrementally sync all entities"""
+        await neo4j_db.ensure_connected()
+        with GRAPH_SYNC_DURATION.labels(mode="incremental").time():
+            # Products first so item/competitor edges attach to populated nodes
+            return {spec.entity: await self.sync_entity(spec) for spec in SYNC_SPECS}
+
+    async def rebuild(self) -> Dict[str, int]:
+        """Drop the projected graph and rebuild it from scratch"""
+        await neo4j_db.ensure_connected()
+        with GRAPH_SYNC_DURATION.labels(mode="full").time():
+            async with neo4j_db.get_session() as session:
+                result = await session.run(_CLEAR_GRAPH)
+                await result.consume()
+            await self.ensure_schema()
+            return {spec.entity: await self.sync_entity(spec) for spec in SYNC_SPECS}
+
+    async def _acquire_lock(self, ttl_s: int) -> bool:
+        """Let a single replica sync at a time when Redis is available"""
+        if not redis_cache.client:
+            return True
+        return bool(await redis_cache.client.set(_LOCK_KEY, uuid.uuid4().hex, nx=True, ex=ttl_s))
+
+    async def run_periodic(self, interval_s: int):
+        """Sync every interval_s seconds"""
+        await self.ensure_schema()
+        while True:
+            try:
+                if await self._acquire_lock(ttl_s=max(1, interval_s - 1)):
+                    counts = await self.sync()
+                    if any(counts.values()):
+                        logger.info(f"Knowledge graph synced: {counts}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Knowledge graph sync failed: {e}")
+            await asyncio.sleep(interval_s)
+
+    def start(self, interval_s: int):
+        """Start periodic sync in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_periodic(interval_s))
+
+    async def stop(self):
+        """Stop periodic sync"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Global graph sync instance
+graph_sync = GraphSync(batch_size=settings.graph_sync_batch_size)
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "SyncSpec",
+    "SYNC_SPECS",
+    "GraphSync",
+    "graph_sync",
+]
@@ -14,7 +14,22 @@ import logging
 import time
 
 from config import settings
-from models import connect_to_databases, close_database_connections
+from common.health import create_health_checker
+from common.load_shed import LoadShedMiddleware, create_limiter
+from common.deadline import DeadlineMiddleware
+from common.rate_limit import RateLimitMiddleware
+from common.outbox import create_outbox_relay
+from models import (
+    connect_to_databases,
+    close_database_connections,
+    POSTGRES,
+    NEO4J,
+    REDIS,
+)
+from .rerank import get_rerank_stage, close_rerank_stage
+from .tasks import start_task_queue, stop_task_queue
+from .graph_sync import graph_sync
+from .related import start_precompute, stop_precompute
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +38,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Backends this service cannot serve without, and ones it connects on demand
+REQUIRED_BACKENDS = (POSTGRES, REDIS)
+OPTIONAL_BACKENDS = (NEO4J,)
+
+health = create_health_checker(REQUIRED_BACKENDS, OPTIONAL_BACKENDS)
+
 # Prometheus metrics
 REQUEST_COUNT = Counter(
     "knowledge_service_requests_total",
@@ -53,7 +74,16 @@ async def lifespan(app: FastAPI):
 
     try:
         # Connect to databases
-        await connect_to_databases()
+        await connect_to_databases(required=REQUIRED_BACKENDS, optional=OPTIONAL_BACKENDS)
+        # Load the rerank model up front instead of on the first search
+        get_rerank_stage()
+        await start_task_queue()
+        # Relay change events recorded by the CRUD layer
+        app.state.outbox_relay = create_outbox_relay()
+        app.state.outbox_relay.start()
+        if settings.enable_knowledge_graph:
+            graph_sync.start(settings.graph_sync_interval_s)
+            start_precompute(settings.related_refresh_interval_s)
         logger.info("Knowledge Service started successfully")
     except Exception as e:
         logger.error(f"Failed to start Knowledge Service: {e}")
@@ -63,6 +93,11 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down Knowledge Service...")
+    await stop_precompute()
+    await graph_sync.stop()
+    await app.state.outbox_relay.stop()
+    await stop_task_queue()
+    close_rerank_stage()
     await close_database_connections()
     logger.info("Knowledge Service stopped")
 
@@ -84,6 +119,18 @@ app = FastAPI(
 # Middleware
 # ============================================================================
 
+# Load Shedding Middleware (search routes; innermost so only admitted work is limited)
+app.add_middleware(LoadShedMiddleware, limiters={
+    "/api/v1/search/rag": create_limiter("rag", settings.rag_target_latency_ms),
+    "/api/v1/search": create_limiter("search", settings.search_target_latency_ms),
+})
+
+# Request Deadline Middleware (cancels work past its deadline or after the client disconnects)
+app.add_middleware(DeadlineMiddleware)
+
+# Rate Limiting Middleware (inside CORS so 429 responses carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -170,18 +217,17 @@ async def health_check():
 async def readiness_check():
     """
     Readiness check endpoint
-    Verifies all dependencies are ready
+    Probes the backends this service depends on
     """
-    # TODO: Check database connections, external services
-    return {
-        "status": "ready",
-        "service": "knowledge-service",
-        "checks": {
-            "database": "ok",
-            "cache": "ok",
-            "vector_store": "ok"
+    result = await health.check()
+    return JSONResponse(
+        status_code=200 if result["status"] == "ready" else 503,
+        content={
+            "status": result["status"],
+            "service": "knowledge-service",
+            "checks": result["checks"],
         }
-    }
+    )
 
 
 # ============================================================================
@@ -205,12 +251,13 @@ async def metrics():
 # ============================================================================
 
 # Import and include routers
-from .routes import products_router, knowledge_router, search_router, stats_router
+from .routes import products_router, knowledge_router, search_router, stats_router, graph_router
 
 app.include_router(products_router, prefix="/api/v1/products", tags=["Products"])
 app.include_router(knowledge_router, prefix="/api/v1/knowledge", tags=["Knowledge"])
 app.include_router(search_router, prefix="/api/v1/search", tags=["Search"])
 app.include_router(stats_router, prefix="/api/v1/stats", tags=["Statistics"])
+app.include_router(graph_router, prefix="/api/v1/graph", tags=["Knowledge Graph"])
 
 
 # API status endpoint
@@ -229,7 +276,8 @@ async def api_status():
             "products": "/api/v1/products",
             "knowledge": "/api/v1/knowledge",
             "search": "/api/v1/search",
-            "stats": "/api/v1/stats"
+            "stats": "/api/v1/stats",
+            "graph": "/api/v1/graph"
         }
     }
 
@@ -0,0 +1,263 @@
+"""
+Knowledge Service - Related Content
+Precomputed knowledge graph neighborhoods served from cache
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from prometheus_client import Counter
+from sqlalchemy import select
+
+from config import settings
+from models.database import AsyncSessionLocal, neo4j_db, redis_cache
+from models.knowledge import KnowledgeItem, KnowledgeStatus
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+RELATED_LOOKUPS = Counter(
+    "knowledge_related_lookups_total",
+    "Related-content lookups by cache tier",
+    ["tier"]  # "local", "redis", "miss"
+)
+
+_KEY_PREFIX = "kcp:related:"
+_LOCK_KEY = "kcp:lock:related_precompute"
+
+
+# ============================================================================
+# Cypher
+# ============================================================================
+
+# Each branch is capped at $fanout paths per item so popular tags or
+# products cannot blow up the traversal.
+_RELATED_ITEMS = """
+UNWIND $ids AS kid
+MATCH (k:KnowledgeItem {id: kid})
+CALL {
+    WITH k
+    MATCH (k)-[:TAGGED]->(:Tag)<-[:TAGGED]-(o:KnowledgeItem)
+    WHERE o <> k AND o.status <> 'archived'
+    RETURN o, 1.0 AS weight, 'shared_tag' AS reason LIMIT $fanout
+    UNION ALL
+    WITH k
+    MATCH (k)-[:ABOUT]->(:Product)<-[:ABOUT]-(o:KnowledgeItem)
+    WHERE o <> k AND o.status <> 'archived'
+    RETURN o, 2.0 AS weight, 'same_product' AS reason LIMIT $fanout
+    UNION ALL
+    WITH k
+    MATCH (k)-[:ABOUT]->(p:Product)-[:IN_SERIES]->(:Series)<-[:IN_SERIES]-(p2:Product)<-[:ABOUT]-(o:KnowledgeItem)
+    WHERE p2 <> p AND o <> k AND o.status <> 'archived'
+    RETURN o, 1.0 AS weight, 'same_series' AS reason LIMIT $fanout
+    UNION ALL
+    WITH k
+    MATCH (k)-[:ABOUT]->(p:Product)<-[:COMPETES_WITH]-(:CompetitorProduct)-[:COMPETES_WITH]->(p2:Product)<-[:ABOUT]-(o:KnowledgeItem)
+    WHERE p2 <> p AND o <> k AND o.status <> 'archived'
+    RETURN o, 0.5 AS weight, 'competitor_comparison' AS reason LIMIT $fanout
+}
+WITH k, o, sum(weight) AS score, collect(DISTINCT reason) AS reasons
+ORDER BY score DESC, o.quality_score DESC
+WITH k, collect({id: o.id, title: o.title, type: o.type, score: score, reasons: reasons})[..$limit] AS related
+RETURN k.id AS id, related
+"""
+
+_ACCESSORIES = """
+UNWIND $ids AS kid
+MATCH (k:KnowledgeItem {id: kid})-[:ABOUT]->(p:Product)
+CALL {
+    WITH p
+    MATCH (p)-[:IN_SERIES|HAS_FEATURE]->(x)<-[:IN_SERIES|HAS_FEATURE]-(a:Product)
+    WHERE a <> p AND a.category = 'accessories' AND a.is_active
+    RETURN a, x LIMIT $fanout
+}
+WITH k, a, count(x) AS shared
+ORDER BY shared DESC
+WITH k, collect({id: a.id, name: a.name, sku: a.sku, score: shared})[..$limit] AS accessories
+RETURN k.id AS id, accessories
+"""
+
+
+# ============================================================================
+# Cache
+# ============================================================================
+
+class NeighborhoodCache:
+    """
+    Two-level cache of precomputed neighborhoods
+
+    A bounded in-process TTL map sits in front of Redis so repeated page
+    views of the same item stay inside the process.
+    """
+
+    def __init__(self, max_items: int = 10000, local_ttl_s: int = 60, redis_ttl_s: int = 86400):
+        self.max_items = max_items
+        self.local_ttl_s = local_ttl_s
+        self.redis_ttl_s = redis_ttl_s
+        self._local: "OrderedDict[int, tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def _remember(self, item_id: int, value: Dict[str, Any]):
+        self._local[item_id] = (time.monotonic() + self.local_ttl_s, value)
+        self._local.move_to_end(item_id)
+        while len(self._local) > self.max_items:
+            self._local.popitem(last=False)
+
+    async def get(self, item_id: int) -> Optional[Dict[str, Any]]:
+        entry = self._local.get(item_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                RELATED_LOOKUPS.labels(tier="local").inc()
+                return entry[1]
+            del self._local[item_id]
+
+        if redis_cache.client:
+            raw = await redis_cache.client.get(f"{_KEY_PREFIX}{item_id}")
+            if raw is not None:
+                value = json.loads(raw)
+                self._remember(item_id, value)
+                RELATED_LOOKUPS.labels(tier="redis").inc()
+                return value
+
+        RELATED_LOOKUPS.labels(tier="miss").inc()
+        return None
+
+    async def put_many(self, values: Dict[int, Dict[str, Any]]):
+        for item_id, value in values.items():
+            self._remember(item_id, value)
+        if redis_cache.client and values:
+            async with redis_cache.client.pipeline(transaction=False) as pipe:
+                for item_id, value in values.items():
+                    pipe.set(f"{_KEY_PREFIX}{item_id}", json.dumps(value), ex=self.redis_ttl_s)
+                await pipe.execute()
+
+
+neighborhood_cache = NeighborhoodCache(
+    max_items=settings.related_local_max_items,
+    local_ttl_s=settings.related_local_ttl_s,
+    redis_ttl_s=settings.related_cache_ttl_s,
+)
+
+
+# ============================================================================
+# Computation
+# ============================================================================
+
+async def compute_neighborhoods(item_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+    """Compute related items and accessories for a batch of items in two graph queries"""
+    params = {
+        "ids": list(item_ids),
+        "limit": settings.related_top_n,
+        "fanout": settings.related_fanout,
+    }
+    computed_at = datetime.utcnow().isoformat()
+    results: Dict[int, Dict[str, Any]] = {
+        item_id: {"related": [], "accessories": [], "computed_at": computed_at}
+        for item_id in item_ids
+    }
+
+    await neo4j_db.ensure_connected()
+    async with neo4j_db.get_session() as session:
+        result = await session.run(_RELATED_ITEMS, params)
+        async for record in result:
+            results[record["id"]]["related"] = record["related"]
+        result = await session.run(_ACCESSORIES, params)
+        async for record in result:
+            results[record["id"]]["accessories"] = record["accessories"]
+
+    return results
+
+
+async def refresh_neighborhoods(item_ids: Sequence[int]) -> int:
+    """Recompute and cache neighborhoods for the given items"""
+    values = await compute_neighborhoods(item_ids)
+    await neighborhood_cache.put_many(values)
+    return len(values)
+
+
+async def precompute_all(batch_size: int = 500) -> int:
+    """Recompute neighborhoods for every non-archived knowledge item"""
+    refreshed = 0
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(KnowledgeItem.id)
+                .where(KnowledgeItem.id > last_id)
+                .where(KnowledgeItem.status != KnowledgeStatus.ARCHIVED)
+                .order_by(KnowledgeItem.id)
+                .limit(batch_size)
+            )
+            ids = list(result.scalars().all())
+        if not ids:
+            break
+        refreshed += await refresh_neighborhoods(ids)
+        last_id = ids[-1]
+    return refreshed
+
+
+async def get_related(item_id: int) -> Optional[Dict[str, Any]]:
+    """Cached neighborhood for an item, or None if not computed yet"""
+    return await neighborhood_cache.get(item_id)
+
+
+# ============================================================================
+# Background Precompute
+# ============================================================================
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _run_periodic(interval_s: int):
+    while True:
+        try:
+            acquired = True
+            if redis_cache.client:
+                acquired = bool(await redis_cache.client.set(
+                    _LOCK_KEY, uuid.uuid4().hex, nx=True, ex=max(1, interval_s - 1)
+                ))
+            if acquired:
+                count = await precompute_all()
+                logger.info(f"Precomputed related content for {count} knowledge items")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Related content precompute failed: {e}")
+        await asyncio.sleep(interval_s)
+
+
+def start_precompute(interval_s: int):
+    """Start periodic neighborhood precompute in the background"""
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_run_periodic(interval_s))
+
+
+async def stop_precompute():
+    """Stop periodic neighborhood precompute"""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "NeighborhoodCache",
+    "neighborhood_cache",
+    "compute_neighborhoods",
+    "refresh_neighborhoods",
+    "precompute_all",
+    "get_related",
+    "start_precompute",
+    "stop_precompute",
+]
@@ -0,0 +1,302 @@
+"""
+Knowledge Service - Reranking
+Second-stage reranking of retrieved candidates with a latency budget
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Generic, List, Optional, Sequence, TypeVar
+import asyncio
+import logging
+import math
+import re
+import threading
+import time
+
+from prometheus_client import Counter, Histogram
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Prometheus metrics
+RERANK_TIMEOUTS = Counter(
+    "knowledge_rerank_timeouts_total",
+    "Rerank calls that exceeded the latency budget",
+    ["reranker"]
+)
+RERANK_ERRORS = Counter(
+    "knowledge_rerank_errors_total",
+    "Rerank calls that failed and kept first-stage order",
+    ["reranker"]
+)
+RERANK_DURATION = Histogram(
+    "knowledge_rerank_duration_seconds",
+    "Rerank duration in seconds",
+    ["reranker"]
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokenizer shared by the lexical scorers"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+# ============================================================================
+# Rerankers
+# ============================================================================
+
+class Reranker:
+    """
+    Base reranker
+    Scores (query, passage) pairs; higher is more relevant, range 0-1
+    """
+
+    name = "base"
+
+    def score(self, query: str, passages: Sequence[str]) -> List[float]:
+        """Score a batch of passages against the query"""
+        raise NotImplementedError
+
+
+class LexicalReranker(Reranker):
+    """
+    Lightweight lexical-feature reranker
+    Combines query term coverage, BM25-style term frequency and exact phrase match
+    """
+
+    name = "lexical"
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def score(self, query: str, passages: Sequence[str]) -> List[float]:
+        query_terms = set(tokenize(query))
+        if not query_terms or not passages:
+            return [0.0] * len(passages)
+
+        phrase = " ".join(tokenize(query))
+        tokenized = [tokenize(p) for p in passages]
+        avg_len = sum(len(t) for t in tokenized) / len(tokenized) or 1.0
+
+        scores = []
+        for tokens in tokenized:
+            if not tokens:
+                scores.append(0.0)
+                continue
+
+            counts: dict[str, int] = {}
+            for token in tokens:
+                if token in query_terms:
+                    counts[token] = counts.get(token, 0) + 1
+
+            coverage = len(counts) / len(query_terms)
+
+            # Saturated term frequency, normalized to 0-1 per query term
+            norm = self.k1 * (1 - self.b + self.b * len(tokens) / avg_len)
+            tf = sum(c / (c + norm) for c in counts.values()) / len(query_terms)
+
+            phrase_match = 1.0 if len(query_terms) > 1 and phrase in " ".join(tokens) else 0.0
+
+            scores.append(0.5 * coverage + 0.3 * tf + 0.2 * phrase_match)
+
+        return scores
+
+
+class CrossEncoderReranker(Reranker):
+    """
+    Cross-encoder reranker backed by a local sentence-transformers model
+    """
+
+    name = "cross_encoder"
+
+    def __init__(self, model_name: str, max_length: int = 512):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, max_length=max_length)
+
+    def score(self, query: str, passages: Sequence[str]) -> List[float]:
+        if not passages:
+            return []
+        raw = self.model.predict(
+            [(query, passage) for passage in passages],
+            show_progress_bar=False
+        )
+        # Models emit logits or probabilities; map both onto 0-1
+        return [
+            float(s) if 0.0 <= s <= 1.0 else 1.0 / (1.0 + math.exp(-float(s)))
+            for s in raw
+        ]
+
+
+def create_reranker(model_name: Optional[str] = None) -> Reranker:
+    """
+    Create the configured reranker
+    Falls back to the lexical reranker when no model is configured or it fails to load
+    """
+    model_name = settings.rag_rerank_model if model_name is None else model_name
+    if model_name:
+        try:
+            return CrossEncoderReranker(model_name)
+        except Exception as e:
+            logger.warning(f"Failed to load rerank model '{model_name}', using lexical reranker: {e}")
+    return LexicalReranker()
+
+
+# ============================================================================
+# Rerank Stage
+# ============================================================================
+
+@dataclass
+class RerankOutcome(Generic[T]):
+    """Reranked candidates with their scores (None when first-stage order was kept)"""
+    items: List[T]
+    scores: Optional[List[float]]
+    timed_out: bool = False
+
+
+class RerankStage:
+    """
+    Runs a reranker in a thread pool under a per-request deadline
+
+    Candidates are scored in batches off the event loop. If scoring does not
+    finish within the budget, or the reranker raises, the first-stage order
+    is returned and the timeout or error is counted.
+    """
+
+    def __init__(
+        self,
+        reranker: Reranker,
+        batch_size: int = 32,
+        timeout_ms: int = 200,
+        max_workers: int = 2,
+        top_k: int = 3
+    ):
+        self.reranker = reranker
+        self.batch_size = max(1, batch_size)
+        self.timeout_ms = timeout_ms
+        self.top_k = top_k
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rerank")
+
+    def _score_batches(
+        self,
+        query: str,
+        passages: Sequence[str],
+        cancelled: threading.Event
+    ) -> Optional[List[float]]:
+        """Score passages batch by batch, stopping early once the caller gave up"""
+        scores: List[float] = []
+        for start in range(0, len(passages), self.batch_size):
+            if cancelled.is_set():
+                return None
+            scores.extend(self.reranker.score(query, passages[start:start + self.batch_size]))
+        return scores
+
+    async def rerank(
+        self,
+        query: str,
+        candidates: Sequence[T],
+        text_of: Callable[[T], str],
+        top_k: Optional[int] = None,
+        timeout_ms: Optional[int] = None
+    ) -> RerankOutcome[T]:
+        """
+        Rerank candidates for a query
+
+        Args:
+            query: Search query
+            candidates: First-stage candidates, best first
+            text_of: Extracts the passage text from a candidate
+            top_k: Number of results to keep (defaults to the stage top_k)
+            timeout_ms: Latency budget (defaults to the stage budget)
+        """
+        candidates = list(candidates)
+        top_k = self.top_k if top_k is None else top_k
+        timeout_ms = self.timeout_ms if timeout_ms is None else timeout_ms
+
+        if len(candidates) <= 1:
+            return RerankOutcome(items=candidates[:top_k], scores=None)
+
+        passages = [text_of(c) for c in candidates]
+        cancelled = threading.Event()
+        loop = asyncio.get_running_loop()
+        start_time = time.perf_counter()
+
+        try:
+            scores = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self._score_batches, query, passages, cancelled),
+                timeout=timeout_ms / 1000.0
+            )
+        except asyncio.TimeoutError:
+            cancelled.set()
+            RERANK_TIMEOUTS.labels(reranker=self.reranker.name).inc()
+            logger.warning(f"Rerank exceeded {timeout_ms}ms budget, keeping first-stage order")
+            return RerankOutcome(items=candidates[:top_k], scores=None, timed_out=True)
+        except Exception as e:
+            cancelled.set()
+            RERANK_ERRORS.labels(reranker=self.reranker.name).inc()
+            logger.error(f"Rerank failed, keeping first-stage order: {e}")
+            return RerankOutcome(items=candidates[:top_k], scores=None)
+        finally:
+            RERANK_DURATION.labels(reranker=self.reranker.name).observe(
+                time.perf_counter() - start_time
+            )
+
+        # Stable sort keeps first-stage order between equal scores
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)[:top_k]
+        return RerankOutcome(
+            items=[candidates[i] for i in order],
+            scores=[scores[i] for i in order]
+        )
+
+    def close(self):
+        """Shut down the worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global rerank stage (created on first use so models load lazily)
+_rerank_stage: Optional[RerankStage] = None
+
+
+def get_rerank_stage() -> RerankStage:
+    """Get the shared rerank stage"""
+    global _rerank_stage
+    if _rerank_stage is None:
+        _rerank_stage = RerankStage(
+            create_reranker(),
+            batch_size=settings.rag_rerank_batch_size,
+            timeout_ms=settings.rag_rerank_timeout_ms,
+            max_workers=settings.rag_rerank_workers,
+            top_k=settings.rag_rerank_top_k,
+        )
+    return _rerank_stage
+
+
+def close_rerank_stage():
+    """Shut down the shared rerank stage if it was started"""
+    global _rerank_stage
+    if _rerank_stage is not None:
+        _rerank_stage.close()
+        _rerank_stage = None
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "Reranker",
+    "LexicalReranker",
+    "CrossEncoderReranker",
+    "create_reranker",
+    "RerankOutcome",
+    "RerankStage",
+    "get_rerank_stage",
+    "close_rerank_stage",
+]
@@ -5,11 +5,20 @@ REST API endpoints for knowledge management
 
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 import time
 
+from config import settings
 from models import get_db
+from models.knowledge import KnowledgeItem, KnowledgeStatus
 from . import crud, schemas
+from .chunking import aggregate_passages, merge_passages, rechunk_stale_items
+from .rerank import get_rerank_stage
+from .graph_sync import graph_sync
+from .dedupe import find_duplicates, get_dedupe_index
+from .related import get_related
+from .tasks import enqueue_dedupe_report, enqueue_related_refresh, enqueue_score_backfill
 
 
 # ============================================================================
@@ -20,6 +29,7 @@ products_router = APIRouter()
 knowledge_router = APIRouter()
 search_router = APIRouter()
 stats_router = APIRouter()
+graph_router = APIRouter()
 
 
 # ============================================================================
@@ -317,10 +327,229 @@ async def like_knowledge_item(
     return {"success": True, "action": "unliked" if unlike else "liked"}
 
 
+@knowledge_router.get(
+    "/{item_id}/related",
+    response_model=schemas.RelatedContentResponse,
+    summary="Get related content"
+)
+async def get_related_content(
+    item_id: int = Path(..., description="Knowledge item ID"),
+    limit: int = Query(10, ge=1, le=50, description="Max related items and accessories")
+):
+    """
+    Related articles and compatible accessories for a knowledge item
+
+    Served from precomputed graph neighborhoods; the graph database is never
+    queried on this path. Items not computed yet return status "pending" and
+    are scheduled for computation.
+    """
+    if not settings.enable_knowledge_graph:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Knowledge graph is disabled"
+        )
+
+    neighborhood = await get_related(item_id)
+    if neighborhood is None:
+        await enqueue_related_refresh(item_id)
+        return schemas.RelatedContentResponse(knowledge_id=item_id, status="pending")
+
+    return schemas.RelatedContentResponse(
+        knowledge_id=item_id,
+        status="ready",
+        related=[
+            schemas.RelatedKnowledgeItem(
+                knowledge_id=r["id"],
+                title=r.get("title"),
+                type=r.get("type"),
+                score=r["score"],
+                reasons=r.get("reasons") or []
+            )
+            for r in neighborhood["related"][:limit]
+        ],
+        accessories=[
+            schemas.RelatedAccessory(
+                product_id=a["id"],
+                name=a.get("name"),
+                sku=a.get("sku"),
+                score=a["score"]
+            )
+            for a in neighborhood["accessories"][:limit]
+        ],
+        computed_at=neighborhood.get("computed_at")
+    )
+
+
+@knowledge_router.get(
+    "/{item_id}/duplicates",
+    response_model=schemas.DuplicatesResponse,
+    summary="Get near-duplicates of a knowledge item"
+)
+async def get_duplicates(
+    item_id: int = Path(..., description="Knowledge item ID"),
+    threshold: float | None = Query(None, ge=0, le=1, description="Min similarity (defaults to KNOWLEDGE_DEDUPE_THRESHOLD)"),
+    limit: int = Query(20, ge=1, le=100, description="Max duplicates"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Items whose content nearly duplicates this item's
+
+    Looked up in the MinHash/LSH index, so only items sharing an LSH bucket
+    are compared. Similarity is estimated over 5-word shingles; translated
+    copies are not detected. Thresholds well below the index's tuned
+    threshold may miss matches.
+    """
+    item = await crud.get_knowledge_item(db, item_id)
+    if not item:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Knowledge item with ID {item_id} not found"
+        )
+    matches = await find_duplicates(item, threshold)
+    details = {}
+    if matches:
+        result = await db.execute(
+            select(KnowledgeItem.id, KnowledgeItem.title, KnowledgeItem.product_id, KnowledgeItem.language)
+            .where(KnowledgeItem.id.in_([i for i, _ in matches]), KnowledgeItem.status != KnowledgeStatus.ARCHIVED)
+        )
+        details = {row.id: row for row in result.all()}
+
+    return schemas.DuplicatesResponse(
+        knowledge_id=item_id,
+        threshold=get_dedupe_index().threshold if threshold is None else threshold,
+        duplicates=[
+            schemas.DuplicateItem(
+                knowledge_id=match_id,
+                title=details[match_id].title,
+                product_id=details[match_id].product_id,
+                language=details[match_id].language,
+                similarity=similarity
+            )
+            for match_id, similarity in matches if match_id in details
+        ][:limit]
+    )
+
+
+@knowledge_router.post(
+    "/chunks/rebuild",
+    status_code=status.HTTP_200_OK,
+    summary="Rebuild stale knowledge chunks"
+)
+async def rebuild_knowledge_chunks(db: AsyncSession = Depends(get_db)):
+    """
+    Re-chunk knowledge items whose content changed since they were last chunked
+
+    Items with unchanged content are skipped.
+    """
+    return await rechunk_stale_items(db)
+
+
+@knowledge_router.post(
+    "/scores/backfill",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Backfill knowledge quality scores"
+)
+async def backfill_knowledge_scores(
+    rescore: bool = Query(False, description="Rescore items that already have scores")
+):
+    """
+    Compute readability, SEO and originality scores across all items
+
+    Queued as a background job when the task queue is running, otherwise
+    run inline. Originality compares each item with all earlier items.
+    """
+    counts = await enqueue_score_backfill(only_missing=not rescore)
+    if counts is None:
+        return {"status": "queued"}
+    return {"status": "completed", **counts}
+
+
+@knowledge_router.post(
+    "/duplicates/report",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Build a near-duplicate report"
+)
+async def build_duplicates_report(
+    threshold: float | None = Query(None, ge=0, le=1, description="Min similarity (defaults to KNOWLEDGE_DEDUPE_THRESHOLD)")
+):
+    """
+    Refresh the near-duplicate index from the table and cluster duplicates
+
+    Queued as a background job when the task queue is running, otherwise
+    run inline. Fetch the result from GET /duplicates/report.
+    """
+    report = await enqueue_dedupe_report(threshold)
+    if report is None:
+        return {"status": "queued"}
+    return {"status": "completed", **report}
+
+
+@knowledge_router.get(
+    "/duplicates/report",
+    summary="Get the latest near-duplicate report"
+)
+async def get_duplicates_report():
+    """Duplicate clusters from the last report, largest first; the lowest id is the likely original"""
+    report = await get_dedupe_index().get_report()
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No duplicate report yet; POST /duplicates/report to build one"
+        )
+    return report
+
+
 # ============================================================================
 # Search Endpoints
 # ============================================================================
 
+HIGHLIGHT_CHARS = 300
+
+
+async def _ranked_search(db: AsyncSession, search_request: schemas.SearchRequest):
+    """
+    Retrieve, rerank and aggregate search results
+
+    Matching chunks are merged with item-level matches, so items that
+    match on title or summary, or have not been chunked yet, are ranked
+    alongside chunk matches. Passages are then collapsed into their items.
+
+    Returns:
+        (item, score, highlight passages) tuples, best first
+    """
+    top_k = search_request.top_k
+    # Over-fetch candidates: several chunks may belong to one item
+    candidate_k = min(100, max(top_k, settings.rag_rerank_candidates))
+
+    # For now, use keyword search
+    # TODO: Implement semantic and hybrid search with Pinecone
+    chunks = await crud.chunk_keyword_search(
+        db,
+        query=search_request.query,
+        top_k=candidate_k,
+        filters=search_request.filters
+    )
+    items = await crud.keyword_search(
+        db,
+        query=search_request.query,
+        top_k=candidate_k,
+        filters=search_request.filters
+    )
+    passages = merge_passages(chunks, items, item_text=crud.rerank_passage)
+
+    scores = None
+    if search_request.rerank:
+        # Keep every passage: several may collapse into one item below
+        outcome = await get_rerank_stage().rerank(
+            search_request.query,
+            passages,
+            text_of=lambda passage: passage.text,
+            top_k=len(passages)
+        )
+        passages, scores = outcome.items, outcome.scores
+    return aggregate_passages(passages, scores, top_k=top_k)
+
+
 @search_router.post(
     "/",
     response_model=schemas.SearchResponse,
@@ -341,14 +570,7 @@ async def search_knowledge(
     """
     start_time = time.time()
 
-    # For now, use keyword search
-    # TODO: Implement semantic and hybrid search with Pinecone
-    results = await crud.keyword_search(
-        db,
-        query=search_request.query,
-        top_k=search_request.top_k,
-        filters=search_request.filters
-    )
+    ranked = await _ranked_search(db, search_request)
 
     # Convert to response format
     search_results = [
@@ -357,12 +579,13 @@ async def search_knowledge(
             title=item.title,
             summary=item.summary,
             type=item.type.value,
-            score=item.quality_score / 100.0,  # Normalize to 0-1
-            highlights=None,  # TODO: Add text highlighting
+            # Rerank score when available, otherwise quality score normalized to 0-1
+            score=score if score is not None else item.quality_score / 100.0,
+            highlights=[p[:HIGHLIGHT_CHARS] for p in passages] if passages else None,
             product_id=item.product_id,
             tags=item.tags
         )
-        for item in results
+        for item, score, passages in ranked
     ]
 
     search_time_ms = int((time.time() - start_time) * 1000)
@@ -435,6 +658,33 @@ async def get_stats(db: AsyncSession = Depends(get_db)):
     return schemas.KnowledgeStats(**stats)
 
 
+# ============================================================================
+# Knowledge Graph Endpoints
+# ============================================================================
+
+@graph_router.post(
+    "/sync",
+    status_code=status.HTTP_200_OK,
+    summary="Sync the knowledge graph"
+)
+async def sync_knowledge_graph(
+    full: bool = Query(False, description="Drop and rebuild the whole graph")
+):
+    """
+    Project products, knowledge items, tags and competitors into Neo4j
+
+    Incremental by default (rows changed since the last sync); **full**
+    rebuilds the graph from scratch for bootstrapping.
+    """
+    if not settings.enable_knowledge_graph:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Knowledge graph is disabled"
+        )
+    counts = await (graph_sync.rebuild() if full else graph_sync.sync())
+    return {"mode": "full" if full else "incremental", "synced": counts}
+
+
 # ============================================================================
 # Batch Operations
 # ============================================================================
@@ -485,4 +735,5 @@ __all__ = [
     "knowledge_router",
     "search_router",
     "stats_router",
+    "graph_router",
 ]
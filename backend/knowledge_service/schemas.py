@@ -148,6 +148,7 @@ class KnowledgeItemResponse(KnowledgeItemBase):
     quality_score: Optional[float] = Field(default=0.0)
     readability_score: Optional[float] = None
     seo_score: Optional[float] = None
+    originality_score: Optional[float] = None
     view_count: Optional[int] = Field(default=0)
     like_count: Optional[int] = Field(default=0)
     share_count: Optional[int] = Field(default=0)
@@ -202,6 +203,52 @@ class SearchResponse(BaseModel):
     results: List[SearchResultItem]
 
 
+# ============================================================================
+# Related Content Schemas
+# ============================================================================
+
+class RelatedKnowledgeItem(BaseModel):
+    """Knowledge item related through the knowledge graph"""
+    knowledge_id: int
+    title: Optional[str] = None
+    type: Optional[str] = None
+    score: float
+    reasons: List[str] = Field(default_factory=list, description="shared_tag, same_product, same_series, competitor_comparison")
+
+
+class RelatedAccessory(BaseModel):
+    """Accessory product sharing a series or features with the item's product"""
+    product_id: int
+    name: Optional[str] = None
+    sku: Optional[str] = None
+    score: float
+
+
+class RelatedContentResponse(BaseModel):
+    """Precomputed related content for a knowledge item"""
+    knowledge_id: int
+    status: str = Field(..., description="ready, or pending while the neighborhood is computed")
+    related: List[RelatedKnowledgeItem] = Field(default_factory=list)
+    accessories: List[RelatedAccessory] = Field(default_factory=list)
+    computed_at: Optional[datetime] = None
+
+
+class DuplicateItem(BaseModel):
+    """A near-duplicate of a knowledge item"""
+    knowledge_id: int
+    title: Optional[str] = None
+    product_id: Optional[int] = None
+    language: Optional[str] = None
+    similarity: float = Field(..., description="Estimated Jaccard similarity of content shingles")
+
+
+class DuplicatesResponse(BaseModel):
+    """Near-duplicates of a knowledge item"""
+    knowledge_id: int
+    threshold: float
+    duplicates: List[DuplicateItem] = Field(default_factory=list)
+
+
 # ============================================================================
 # RAG Schemas
 # ============================================================================
@@ -329,6 +376,9 @@ __all__ = [
     "SearchRequest",
     "SearchResultItem",
     "SearchResponse",
+    "RelatedKnowledgeItem",
+    "RelatedAccessory",
+    "RelatedContentResponse",
     "RAGRequest",
     "RAGResponse",
     "KnowledgeStats",
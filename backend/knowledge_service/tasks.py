@@ -0,0 +1,205 @@
+"""
+Knowledge Service - Background Tasks
+Write side effects (chunking, scoring, dedupe indexing) run off the request path
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+import json
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from common.queue import JobQueue, create_job_queue
+from common.scoring import backfill_scores, score_rows
+from models.database import AsyncSessionLocal
+from models.knowledge import KnowledgeItem
+from .chunking import content_hash, sync_item_chunks
+from .dedupe import build_dedupe_report, index_item
+from .related import refresh_neighborhoods
+
+logger = logging.getLogger(__name__)
+
+# Job types
+KNOWLEDGE_SYNC = "knowledge.sync"
+KNOWLEDGE_RELATED = "knowledge.related"
+KNOWLEDGE_SCORES = "knowledge.scores"
+KNOWLEDGE_DEDUPE = "knowledge.dedupe"
+
+# Global job queue (started in the service lifespan)
+knowledge_queue: Optional[JobQueue] = None
+
+
+# ============================================================================
+# Scoring
+# ============================================================================
+
+async def invalidate_items(item_ids: List[int]):
+    """Drop cached copies of knowledge items after writing their columns"""
+    # Imported here: crud imports this module
+    from .crud import get_knowledge_item
+    for item_id in item_ids:
+        await get_knowledge_item.invalidate(item_id)
+
+
+async def score_knowledge_items(db: AsyncSession, items: Sequence[KnowledgeItem]):
+    """Write readability, SEO and originality scores for items and commit"""
+    await score_rows(db, KnowledgeItem, items)
+    await db.commit()
+    await invalidate_items([item.id for item in items])
+
+
+# ============================================================================
+# Handlers
+# ============================================================================
+
+async def sync_knowledge_item(entity_id: str, payload: Dict[str, Any]):
+    """
+    Bring derived data for a knowledge item up to date
+
+    Safe to run repeatedly: steps skip work that is already current.
+    """
+    async with AsyncSessionLocal() as db:
+        item = await db.get(KnowledgeItem, int(entity_id))
+        if item is None:
+            return
+        if await sync_item_chunks(db, item):
+            await db.commit()
+            logger.info(f"Re-chunked knowledge item {item.id}")
+        # Archiving or restoring leaves the chunks alone but changes the index
+        await index_item(item)
+        await score_knowledge_items(db, [item])
+
+
+async def backfill_knowledge_scores(entity_id: str, payload: Dict[str, Any]):
+    """Score every knowledge item (or only unscored ones) in id order"""
+    counts = await backfill_scores(
+        KnowledgeItem,
+        only_missing=payload.get("only_missing", True),
+        on_scored=invalidate_items,
+    )
+    logger.info(f"Knowledge score backfill: {counts}")
+
+
+async def dedupe_report(entity_id: str, payload: Dict[str, Any]):
+    """Refresh the near-duplicate index and store a duplicate report"""
+    await build_dedupe_report(payload.get("threshold"))
+
+
+async def refresh_related(entity_id: str, payload: Dict[str, Any]):
+    """Compute and cache the graph neighborhood of one knowledge item"""
+    await refresh_neighborhoods([int(entity_id)])
+
+
+# ============================================================================
+# Enqueueing
+# ============================================================================
+
+def sync_version(item: KnowledgeItem) -> str:
+    """Job version: a hash of the fields chunking, indexing and scoring read"""
+    return content_hash(json.dumps(
+        [item.title, item.content, item.product_id, sorted(item.tags or []), item.status],
+        ensure_ascii=False
+    ))
+
+
+async def enqueue_knowledge_sync(db: AsyncSession, item: KnowledgeItem):
+    """
+    Schedule side effects for a created or updated knowledge item
+
+    Jobs are keyed by item id and versioned by sync_version. Without a running queue
+    (scripts, tests) the side effects run inline on the given session.
+    """
+    if knowledge_queue is not None and knowledge_queue.running:
+        await knowledge_queue.enqueue(KNOWLEDGE_SYNC, item.id, version=sync_version(item))
+        return
+
+    if await sync_item_chunks(db, item):
+        await db.commit()
+    await index_item(item)
+    await score_knowledge_items(db, [item])
+
+
+async def enqueue_score_backfill(only_missing: bool = True) -> Optional[Dict[str, int]]:
+    """
+    Schedule a quality score backfill over the whole table
+
+    Requests made while one is waiting coalesce. Without a running queue
+    the backfill runs inline and its counts are returned.
+    """
+    if knowledge_queue is not None and knowledge_queue.running:
+        await knowledge_queue.enqueue(KNOWLEDGE_SCORES, KnowledgeItem.__tablename__, payload={"only_missing": only_missing})
+        return None
+    return await backfill_scores(KnowledgeItem, only_missing=only_missing, on_scored=invalidate_items)
+
+
+async def enqueue_dedupe_report(threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Schedule a near-duplicate report over the whole table
+
+    Requests made while one is waiting coalesce. Without a running queue
+    the report is built inline and returned.
+    """
+    if knowledge_queue is not None and knowledge_queue.running:
+        await knowledge_queue.enqueue(KNOWLEDGE_DEDUPE, KnowledgeItem.__tablename__, payload={"threshold": threshold})
+        return None
+    return await build_dedupe_report(threshold)
+
+
+async def enqueue_related_refresh(item_id: int):
+    """
+    Schedule a neighborhood computation for an item missing from the cache
+
+    Concurrent misses for the same item coalesce into one job.
+    """
+    if knowledge_queue is not None and knowledge_queue.running:
+        await knowledge_queue.enqueue(KNOWLEDGE_RELATED, item_id)
+
+
+# ============================================================================
+# Lifecycle
+# ============================================================================
+
+async def start_task_queue():
+    """Create the knowledge job queue and start its workers"""
+    global knowledge_queue
+    knowledge_queue = create_job_queue("knowledge")
+    knowledge_queue.register(KNOWLEDGE_SYNC, sync_knowledge_item)
+    knowledge_queue.register(KNOWLEDGE_SCORES, backfill_knowledge_scores)
+    knowledge_queue.register(KNOWLEDGE_DEDUPE, dedupe_report)
+    if settings.enable_knowledge_graph:
+        knowledge_queue.register(KNOWLEDGE_RELATED, refresh_related)
+    await knowledge_queue.start(concurrency=settings.task_queue_concurrency)
+
+
+async def stop_task_queue():
+    """Stop the knowledge job queue workers"""
+    global knowledge_queue
+    if knowledge_queue is not None:
+        await knowledge_queue.stop()
+        knowledge_queue = None
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "KNOWLEDGE_SYNC",
+    "KNOWLEDGE_RELATED",
+    "KNOWLEDGE_SCORES",
+    "KNOWLEDGE_DEDUPE",
+    "invalidate_items",
+    "sync_version",
+    "score_knowledge_items",
+    "sync_knowledge_item",
+    "backfill_knowledge_scores",
+    "dedupe_report",
+    "refresh_related",
+    "enqueue_knowledge_sync",
+    "enqueue_score_backfill",
+    "enqueue_dedupe_report",
+    "enqueue_related_refresh",
+    "start_task_queue",
+    "stop_task_queue",
+]
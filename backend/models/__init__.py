@@ -13,6 +13,11 @@ from .database import (
     mongodb,
     neo4j_db,
     redis_cache,
+    POSTGRES,
+    MONGODB,
+    NEO4J,
+    REDIS,
+    ALL_BACKENDS,
     connect_to_databases,
     close_database_connections,
 )
@@ -23,10 +28,17 @@ from .knowledge import (
     ProductCategory,
     Product,
     KnowledgeItem,
+    KnowledgeChunk,
     ContentGeneration,
+    ContentTemplate,
     SupportConversation,
     CompetitorTracking,
     SearchQuery,
+    AnalyticsRollup,
+    AnalyticsWatermark,
+    AnalyticsUser,
+    AnalyticsUserDay,
+    OutboxEvent,
 )
 
 __all__ = [
@@ -40,6 +52,11 @@ __all__ = [
     "mongodb",
     "neo4j_db",
     "redis_cache",
+    "POSTGRES",
+    "MONGODB",
+    "NEO4J",
+    "REDIS",
+    "ALL_BACKENDS",
     "connect_to_databases",
     "close_database_connections",
     # Models
@@ -48,8 +65,15 @@ __all__ = [
     "ProductCategory",
     "Product",
     "KnowledgeItem",
+    "KnowledgeChunk",
     "ContentGeneration",
+    "ContentTemplate",
     "SupportConversation",
     "CompetitorTracking",
     "SearchQuery",
+    "AnalyticsRollup",
+    "AnalyticsWatermark",
+    "AnalyticsUser",
+    "AnalyticsUserDay",
+    "OutboxEvent",
 ]
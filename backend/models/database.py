@@ -3,13 +3,20 @@ Database Connection Management
 Handles connections to PostgreSQL, MongoDB, Neo4j, and Redis
 """
 
-from typing import AsyncGenerator, Optional
+from array import array
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from motor.motor_asyncio import AsyncIOMotorClient
 from neo4j import AsyncGraphDatabase
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+import asyncio
 import logging
+import msgpack
+import sys
 
 from config import settings
 
@@ -22,6 +29,12 @@ logger = logging.getLogger(__name__)
 # Convert sync URL to async URL
 ASYNC_DATABASE_URL = settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
 
+# Prepared statements are cached per connection by the asyncpg dialect.
+# Merged into the URL's query so options already in DATABASE_URL are kept.
+ASYNC_DATABASE_URL = make_url(ASYNC_DATABASE_URL).update_query_dict(
+    {"prepared_statement_cache_size": str(settings.db_prepared_statement_cache_size)}
+)
+
 # Create async engine
 engine = create_async_engine(
     ASYNC_DATABASE_URL,
@@ -30,6 +43,9 @@ engine = create_async_engine(
     max_overflow=20,
     pool_pre_ping=True,
     pool_recycle=3600,
+    query_cache_size=settings.db_query_cache_size,
+    # Backstop for statements that outlive any request deadline
+    connect_args={"command_timeout": settings.db_command_timeout_s},
 )
 
 # Create async session factory
@@ -66,7 +82,17 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 
 
 async def init_db():
-    """Initialize database tables"""
+    """
+    Initialize database tables
+
+    Skipped in production, where the schema is managed by migrations; the
+    connection is still verified.
+    """
+    if settings.app_env == "production" or not settings.db_auto_create_tables:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        logger.info("Connected to PostgreSQL (table creation skipped)")
+        return
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     logger.info("Database tables initialized")
@@ -88,28 +114,40 @@ class MongoDBConnection:
     def __init__(self):
         self.client: Optional[AsyncIOMotorClient] = None
         self.db = None
+        self._lock = asyncio.Lock()
 
     async def connect(self):
         """Connect to MongoDB"""
+        client = AsyncIOMotorClient(settings.mongodb_url)
         try:
-            self.client = AsyncIOMotorClient(settings.mongodb_url)
-            self.db = self.client[settings.mongodb_db]
             # Verify connection
-            await self.client.admin.command("ping")
-            logger.info(f"Connected to MongoDB: {settings.mongodb_db}")
+            await client.admin.command("ping")
         except Exception as e:
+            client.close()
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
+        self.client = client
+        self.db = client[settings.mongodb_db]
+        logger.info(f"Connected to MongoDB: {settings.mongodb_db}")
+
+    async def ensure_connected(self):
+        """Connect on first use"""
+        if self.client is None:
+            async with self._lock:
+                if self.client is None:
+                    await self.connect()
 
     async def close(self):
         """Close MongoDB connection"""
         if self.client:
             self.client.close()
+            self.client = None
+            self.db = None
             logger.info("MongoDB connection closed")
 
     def get_collection(self, collection_name: str):
         """Get MongoDB collection"""
-        if not self.db:
+        if self.db is None:
             raise RuntimeError("MongoDB not connected")
         return self.db[collection_name]
 
@@ -127,26 +165,36 @@ class Neo4jConnection:
 
     def __init__(self):
         self.driver = None
+        self._lock = asyncio.Lock()
 
     async def connect(self):
         """Connect to Neo4j"""
+        driver = AsyncGraphDatabase.driver(
+            settings.neo4j_uri,
+            auth=(settings.neo4j_user, settings.neo4j_password)
+        )
         try:
-            self.driver = AsyncGraphDatabase.driver(
-                settings.neo4j_uri,
-                auth=(settings.neo4j_user, settings.neo4j_password)
-            )
             # Verify connection
-            async with self.driver.session() as session:
-                await session.run("RETURN 1")
-            logger.info("Connected to Neo4j knowledge graph")
+            await driver.verify_connectivity()
         except Exception as e:
+            await driver.close()
             logger.error(f"Failed to connect to Neo4j: {e}")
             raise
+        self.driver = driver
+        logger.info("Connected to Neo4j knowledge graph")
+
+    async def ensure_connected(self):
+        """Connect on first use"""
+        if self.driver is None:
+            async with self._lock:
+                if self.driver is None:
+                    await self.connect()
 
     async def close(self):
         """Close Neo4j connection"""
         if self.driver:
             await self.driver.close()
+            self.driver = None
             logger.info("Neo4j connection closed")
 
     def get_session(self):
@@ -165,57 +213,277 @@ neo4j_db = Neo4jConnection()
 # ============================================================================
 
 class RedisConnection:
-    """Redis Connection Manager"""
+    """
+    Redis Connection Manager
+
+    `client` decodes replies to str for text values. `binary` shares the
+    same server with decoding off, for msgpack-encoded structures and raw
+    float32 vectors.
+    """
 
     def __init__(self):
         self.client: Optional[Redis] = None
+        self.binary: Optional[Redis] = None
+        self._lock = asyncio.Lock()
 
     async def connect(self):
         """Connect to Redis"""
+        client = Redis.from_url(
+            settings.redis_url,
+            encoding="utf-8",
+            decode_responses=True,
+            max_connections=50
+        )
         try:
-            self.client = Redis.from_url(
-                settings.redis_url,
-                encoding="utf-8",
-                decode_responses=True,
-                max_connections=50
-            )
             # Verify connection
-            await self.client.ping()
-            logger.info("Connected to Redis cache")
+            await client.ping()
         except Exception as e:
+            await client.close()
             logger.error(f"Failed to connect to Redis: {e}")
             raise
+        self.client = client
+        self.binary = Redis.from_url(
+            settings.redis_url,
+            decode_responses=False,
+            max_connections=20
+        )
+        logger.info("Connected to Redis cache")
+
+    async def ensure_connected(self):
+        """Connect on first use"""
+        if self.client is None:
+            async with self._lock:
+                if self.client is None:
+                    await self.connect()
 
     async def close(self):
         """Close Redis connection"""
         if self.client:
             await self.client.close()
+            await self.binary.close()
+            self.client = None
+            self.binary = None
             logger.info("Redis connection closed")
 
+    # ------------------------------------------------------------------
+    # Strings
+    # ------------------------------------------------------------------
+
     async def get(self, key: str) -> Optional[str]:
         """Get value from Redis"""
-        if not self.client:
-            raise RuntimeError("Redis not connected")
+        await self.ensure_connected()
         return await self.client.get(key)
 
     async def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
         """Set value in Redis with optional expiration"""
-        if not self.client:
-            raise RuntimeError("Redis not connected")
+        await self.ensure_connected()
         return await self.client.set(key, value, ex=ex)
 
-    async def delete(self, key: str) -> bool:
-        """Delete key from Redis"""
-        if not self.client:
-            raise RuntimeError("Redis not connected")
-        return bool(await self.client.delete(key))
+    async def delete(self, *keys: str) -> int:
+        """Delete keys from Redis; returns the number removed"""
+        await self.ensure_connected()
+        if not keys:
+            return 0
+        return await self.client.delete(*keys)
 
     async def exists(self, key: str) -> bool:
         """Check if key exists in Redis"""
-        if not self.client:
-            raise RuntimeError("Redis not connected")
+        await self.ensure_connected()
         return bool(await self.client.exists(key))
 
+    async def mget(self, keys: Sequence[str]) -> List[Optional[str]]:
+        """Get many values in one round trip (None for missing keys)"""
+        await self.ensure_connected()
+        if not keys:
+            return []
+        return await self.client.mget(keys)
+
+    async def mset(self, mapping: Dict[str, str], ex: Optional[int] = None):
+        """Set many values in one round trip, optionally with a shared expiration"""
+        await self.ensure_connected()
+        await _mset(self.client, mapping, ex)
+
+    # ------------------------------------------------------------------
+    # Pipelines and Transactions
+    # ------------------------------------------------------------------
+
+    def pipeline(self, transaction: bool = False, binary: bool = False) -> Pipeline:
+        """
+        Batch commands into one round trip
+
+        Usage:
+            async with redis_cache.pipeline() as pipe:
+                pipe.incr("a")
+                pipe.expire("a", 60)
+                results = await pipe.execute()
+
+        Call ensure_connected() first if Redis may not be connected yet.
+        """
+        client = self.binary if binary else self.client
+        if client is None:
+            raise RuntimeError("Redis not connected")
+        return client.pipeline(transaction=transaction)
+
+    async def transaction(
+        self,
+        func: Callable[[Pipeline], Awaitable[Any]],
+        *watches: str,
+        value_from_callable: bool = False
+    ) -> Any:
+        """
+        Run an optimistic WATCH/MULTI/EXEC transaction, retrying on conflicts
+
+        func reads the watched keys, calls pipe.multi(), then queues writes.
+        """
+        await self.ensure_connected()
+        return await self.client.transaction(
+            func, *watches, value_from_callable=value_from_callable
+        )
+
+    # ------------------------------------------------------------------
+    # Hashes and Counters
+    # ------------------------------------------------------------------
+
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        """Get one hash field"""
+        await self.ensure_connected()
+        return await self.client.hget(key, field)
+
+    async def hmget(self, key: str, fields: Sequence[str]) -> List[Optional[str]]:
+        """Get several hash fields in one round trip"""
+        await self.ensure_connected()
+        if not fields:
+            return []
+        return await self.client.hmget(key, fields)
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        """Get a whole hash"""
+        await self.ensure_connected()
+        return await self.client.hgetall(key)
+
+    async def hset(self, key: str, mapping: Dict[str, Any], ex: Optional[int] = None) -> int:
+        """Set hash fields, optionally refreshing the key's expiration"""
+        await self.ensure_connected()
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=mapping)
+            if ex is not None:
+                pipe.expire(key, ex)
+            results = await pipe.execute()
+        return results[0]
+
+    async def hdel(self, key: str, *fields: str) -> int:
+        """Delete hash fields"""
+        await self.ensure_connected()
+        return await self.client.hdel(key, *fields)
+
+    async def incr(self, key: str, amount: int = 1, ex: Optional[int] = None) -> int:
+        """
+        Increment a counter and return the new value
+
+        With ex, the expiration is set only when the counter is created, so
+        a window counter expires ex seconds after its first increment.
+        """
+        await self.ensure_connected()
+        if ex is None:
+            return await self.client.incrby(key, amount)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incrby(key, amount)
+            pipe.expire(key, ex, nx=True)
+            results = await pipe.execute()
+        return results[0]
+
+    async def hincr(self, key: str, field: str, amount: int = 1) -> int:
+        """Increment a hash field and return the new value"""
+        await self.ensure_connected()
+        return await self.client.hincrby(key, field, amount)
+
+    # ------------------------------------------------------------------
+    # Binary Values
+    # ------------------------------------------------------------------
+
+    async def get_packed(self, key: str) -> Any:
+        """Get a msgpack-encoded value (None if missing)"""
+        await self.ensure_connected()
+        raw = await self.binary.get(key)
+        return unpack_value(raw) if raw is not None else None
+
+    async def set_packed(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        """Store a structured value msgpack-encoded"""
+        await self.ensure_connected()
+        return await self.binary.set(key, pack_value(value), ex=ex)
+
+    async def mget_packed(self, keys: Sequence[str]) -> List[Any]:
+        """Get many msgpack-encoded values in one round trip"""
+        await self.ensure_connected()
+        if not keys:
+            return []
+        raws = await self.binary.mget(keys)
+        return [unpack_value(raw) if raw is not None else None for raw in raws]
+
+    async def mset_packed(self, mapping: Dict[str, Any], ex: Optional[int] = None):
+        """Store many structured values msgpack-encoded in one round trip"""
+        await self.ensure_connected()
+        await _mset(self.binary, {k: pack_value(v) for k, v in mapping.items()}, ex)
+
+    async def get_vector(self, key: str) -> Optional[List[float]]:
+        """Get a float32 vector stored as raw bytes"""
+        await self.ensure_connected()
+        raw = await self.binary.get(key)
+        return unpack_vector(raw) if raw is not None else None
+
+    async def set_vector(self, key: str, vector: Sequence[float], ex: Optional[int] = None) -> bool:
+        """Store a vector as raw little-endian float32 bytes"""
+        await self.ensure_connected()
+        return await self.binary.set(key, pack_vector(vector), ex=ex)
+
+    async def mget_vectors(self, keys: Sequence[str]) -> List[Optional[List[float]]]:
+        """Get many vectors in one round trip"""
+        await self.ensure_connected()
+        if not keys:
+            return []
+        raws = await self.binary.mget(keys)
+        return [unpack_vector(raw) if raw is not None else None for raw in raws]
+
+
+async def _mset(client: Redis, mapping: Dict[str, Any], ex: Optional[int]):
+    if not mapping:
+        return
+    if ex is None:
+        await client.mset(mapping)
+        return
+    # MSET has no expiration option; pipeline SET EX instead
+    async with client.pipeline(transaction=False) as pipe:
+        for key, value in mapping.items():
+            pipe.set(key, value, ex=ex)
+        await pipe.execute()
+
+
+def pack_value(value: Any) -> bytes:
+    """Encode a structured value with msgpack (timezone-aware datetimes as timestamps)"""
+    return msgpack.packb(value, use_bin_type=True, datetime=True)
+
+
+def unpack_value(raw: bytes) -> Any:
+    """Decode a msgpack value written by pack_value"""
+    return msgpack.unpackb(raw, raw=False, timestamp=3)
+
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    """Encode a vector as little-endian float32 bytes"""
+    values = array("f", vector)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_vector(raw: bytes) -> List[float]:
+    """Decode a vector written by pack_vector"""
+    values = array("f")
+    values.frombytes(raw)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tolist()
+
 
 # Global Redis instance
 redis_cache = RedisConnection()
@@ -225,25 +493,83 @@ redis_cache = RedisConnection()
 # Startup and Shutdown Handlers
 # ============================================================================
 
-async def connect_to_databases():
-    """Connect to all databases on startup"""
-    logger.info("Connecting to databases...")
-    await init_db()  # PostgreSQL
-    await mongodb.connect()  # MongoDB
-    if settings.enable_knowledge_graph:
-        await neo4j_db.connect()  # Neo4j
-    await redis_cache.connect()  # Redis
-    logger.info("All databases connected successfully")
+# Backend names used by services to declare their dependencies
+POSTGRES = "postgres"
+MONGODB = "mongodb"
+NEO4J = "neo4j"
+REDIS = "redis"
+ALL_BACKENDS = (POSTGRES, MONGODB, NEO4J, REDIS)
+
+_CONNECTORS = {
+    POSTGRES: init_db,
+    MONGODB: mongodb.connect,
+    NEO4J: neo4j_db.connect,
+    REDIS: redis_cache.connect,
+}
+
+
+def _enabled(backend: str) -> bool:
+    return backend != NEO4J or settings.enable_knowledge_graph
+
+
+async def _connect_with_retry(backend: str):
+    """Connect one backend with a timeout and exponential backoff"""
+    delay = 0.5
+    for attempt in range(1, settings.db_connect_retries + 1):
+        try:
+            await asyncio.wait_for(_CONNECTORS[backend](), timeout=settings.db_connect_timeout_s)
+            return
+        except Exception as e:
+            if attempt == settings.db_connect_retries:
+                raise
+            logger.warning(f"Connecting to {backend} failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+            delay *= 2
+
+
+async def connect_to_databases(
+    required: Iterable[str] = ALL_BACKENDS,
+    optional: Iterable[str] = ()
+):
+    """
+    Connect to databases on startup
+
+    Required backends connect concurrently and startup fails only if one of
+    them is still unreachable after retries. Optional backends are not
+    touched at startup; they connect on first use via ensure_connected().
+
+    Args:
+        required: Backends the service cannot serve without
+        optional: Backends the service uses occasionally
+    """
+    required = [b for b in required if _enabled(b)]
+    deferred = [b for b in optional if _enabled(b) and b not in required]
+    logger.info(f"Connecting to databases: {', '.join(required) or 'none'}")
+
+    results = await asyncio.gather(
+        *(_connect_with_retry(b) for b in required),
+        return_exceptions=True
+    )
+    failed = {b: r for b, r in zip(required, results) if isinstance(r, Exception)}
+    if failed:
+        details = "; ".join(f"{b}: {e!r}" for b, e in failed.items())
+        raise RuntimeError(f"Failed to connect to required databases: {details}")
+
+    if deferred:
+        logger.info(f"Deferred until first use: {', '.join(deferred)}")
+    logger.info("All required databases connected successfully")
 
 
 async def close_database_connections():
-    """Close all database connections on shutdown"""
+    """Close all open database connections on shutdown"""
     logger.info("Closing database connections...")
-    await close_db()  # PostgreSQL
-    await mongodb.close()  # MongoDB
-    if settings.enable_knowledge_graph:
-        await neo4j_db.close()  # Neo4j
-    await redis_cache.close()  # Redis
+    await asyncio.gather(
+        close_db(),  # PostgreSQL
+        mongodb.close(),  # MongoDB
+        neo4j_db.close(),  # Neo4j
+        redis_cache.close(),  # Redis
+        return_exceptions=True
+    )
     logger.info("All database connections closed")
 
 
@@ -261,6 +587,15 @@ __all__ = [
     "mongodb",
     "neo4j_db",
     "redis_cache",
+    "pack_value",
+    "unpack_value",
+    "pack_vector",
+    "unpack_vector",
+    "POSTGRES",
+    "MONGODB",
+    "NEO4J",
+    "REDIS",
+    "ALL_BACKENDS",
     "connect_to_databases",
     "close_database_connections",
 ]
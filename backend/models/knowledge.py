@@ -6,7 +6,7 @@ SQLAlchemy models for knowledge management
 from datetime import datetime
 from typing import Optional, List
 from sqlalchemy import (
-    Column, Integer, String, Text, Float, Boolean, DateTime,
+    Column, Integer, BigInteger, String, Text, Float, Boolean, DateTime,
     JSON, ForeignKey, Index, Enum as SQLEnum
 )
 from sqlalchemy.orm import relationship
@@ -131,10 +131,14 @@ class KnowledgeItem(Base):
     embedding_id = Column(String(100), unique=True, nullable=True, index=True)
     vector_dimension = Column(Integer, default=1536)
 
+    # Hash of the content the current chunks were built from
+    content_hash = Column(String(64), nullable=True)
+
     # Quality Metrics
     quality_score = Column(Float, default=0.0, index=True)
     readability_score = Column(Float, nullable=True)
     seo_score = Column(Float, nullable=True)
+    originality_score = Column(Float, nullable=True)
 
     # Analytics
     view_count = Column(Integer, default=0)
@@ -156,6 +160,42 @@ Index("idx_knowledge_product_type", KnowledgeItem.product_id, KnowledgeItem.type
 Index("idx_knowledge_quality", KnowledgeItem.quality_score.desc())
 
 
+class KnowledgeChunk(Base):
+    """
+    Knowledge Content Chunks
+    Overlapping passages of a knowledge item used for retrieval and RAG context
+    """
+    __tablename__ = "knowledge_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Parent Item
+    knowledge_id = Column(
+        Integer, ForeignKey("knowledge_items.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    item = relationship("KnowledgeItem")
+    chunk_index = Column(Integer, nullable=False)
+
+    # Content
+    content = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=False, index=True)
+    char_start = Column(Integer, nullable=False)
+    char_end = Column(Integer, nullable=False)
+    token_count = Column(Integer, nullable=False)
+
+    # Vector Embeddings (stored in Pinecone, reference here)
+    embedding_id = Column(String(100), unique=True, nullable=True, index=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<KnowledgeChunk(knowledge_id={self.knowledge_id}, index={self.chunk_index})>"
+
+
+Index("idx_chunk_item_index", KnowledgeChunk.knowledge_id, KnowledgeChunk.chunk_index, unique=True)
+
+
 # ============================================================================
 # Content Generation Models
 # ============================================================================
@@ -206,6 +246,38 @@ class ContentGeneration(Base):
         return f"<ContentGeneration(id={self.id}, type={self.content_type}, status={self.status})>"
 
 
+class ContentTemplate(Base):
+    """
+    Content Generation Templates
+    Jinja2 prompt templates; every edit is stored as a new immutable version
+    """
+    __tablename__ = "content_templates"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Identity
+    slug = Column(String(100), nullable=False, index=True)  # "product_description"
+    version = Column(Integer, nullable=False, default=1)
+
+    # Template
+    name = Column(String(200), nullable=False)
+    description = Column(Text, nullable=True)
+    content_type = Column(String(100), nullable=False)
+    body = Column(Text, nullable=False)  # Jinja2 prompt template
+    system = Column(Text, nullable=True)  # Optional system prompt override
+
+    # Audit
+    author = Column(String(200), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ContentTemplate(slug={self.slug}, version={self.version})>"
+
+
+# Latest version lookup and uniqueness of (slug, version)
+Index("idx_content_template_slug_version", ContentTemplate.slug, ContentTemplate.version.desc(), unique=True)
+
+
 # ============================================================================
 # Support Conversation Models
 # ============================================================================
@@ -223,6 +295,7 @@ class SupportConversation(Base):
     user_id = Column(String(100), nullable=True, index=True)
     user_email = Column(String(200), nullable=True)
     session_id = Column(String(100), nullable=False, index=True)
+    turn_id = Column(String(32), unique=True, nullable=True)  # Chat turn id; makes persisting idempotent
 
     # Conversation
     user_query = Column(Text, nullable=False)
@@ -255,6 +328,17 @@ class SupportConversation(Base):
         return f"<SupportConversation(id={self.id}, session={self.session_id}, intent={self.intent})>"
 
 
+# Per-session history in order, and session summaries from an index-only
+# scan (the aggregated columns are included in the index)
+Index(
+    "idx_support_session_created",
+    SupportConversation.session_id,
+    SupportConversation.created_at,
+    SupportConversation.id,
+    postgresql_include=["user_id", "escalated_to_human", "user_rating", "response_time_ms"]
+)
+
+
 # ============================================================================
 # Competitor Tracking Models
 # ============================================================================
@@ -350,6 +434,110 @@ Index("idx_search_query_date", SearchQuery.query_text, SearchQuery.created_at.de
 Index("idx_search_normalized", SearchQuery.normalized_query, SearchQuery.created_at.desc())
 
 
+# ============================================================================
+# Analytics Rollup Models
+# ============================================================================
+
+class AnalyticsRollup(Base):
+    """
+    Pre-aggregated Analytics
+    Additive metrics per source, time bucket and dimension value
+    """
+    __tablename__ = "analytics_rollups"
+
+    source = Column(String(50), primary_key=True)  # "search", "support", "content", "users"
+    granularity = Column(String(10), primary_key=True)  # "hour", "day"
+    bucket = Column(DateTime, primary_key=True)  # Bucket start (UTC)
+    dimension = Column(String(500), primary_key=True, default="")  # e.g. search type, intent
+
+    metrics = Column(JSON, nullable=False)  # {"searches": 120, "clicks": 45, ...}
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<AnalyticsRollup({self.source} {self.granularity} {self.bucket} {self.dimension!r})>"
+
+
+class AnalyticsWatermark(Base):
+    """
+    Rollup Progress
+    Highest source row id already rolled up, per source
+    """
+    __tablename__ = "analytics_watermarks"
+
+    source = Column(String(50), primary_key=True)
+    last_id = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<AnalyticsWatermark({self.source} last_id={self.last_id})>"
+
+
+class AnalyticsUser(Base):
+    """
+    First Activity per User
+    Lets new users per day be counted without scanning event history
+    """
+    __tablename__ = "analytics_users"
+
+    user_id = Column(String(100), primary_key=True)
+    first_seen = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<AnalyticsUser({self.user_id} first_seen={self.first_seen})>"
+
+
+class AnalyticsUserDay(Base):
+    """
+    Daily Active Users
+    One row per user per day with any search or support activity
+    """
+    __tablename__ = "analytics_user_days"
+
+    day = Column(DateTime, primary_key=True)
+    user_id = Column(String(100), primary_key=True)
+
+    def __repr__(self):
+        return f"<AnalyticsUserDay({self.day:%Y-%m-%d} {self.user_id})>"
+
+
+# ============================================================================
+# Change Event Outbox
+# ============================================================================
+
+class OutboxEvent(Base):
+    """
+    Transactional Outbox
+    Change events written with the change itself and relayed to downstream consumers
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(BigInteger, primary_key=True)
+
+    # Event
+    aggregate_type = Column(String(50), nullable=False)  # "knowledge_item", "product"
+    aggregate_id = Column(String(100), nullable=False)
+    event_type = Column(String(50), nullable=False)  # "created", "updated", "deleted"
+    payload = Column(JSON, nullable=False)
+
+    # Delivery
+    published_at = Column(DateTime, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, {self.aggregate_type}:{self.aggregate_id} {self.event_type})>"
+
+
+# Partial index so the relay only scans undelivered events
+Index(
+    "idx_outbox_unpublished",
+    OutboxEvent.id,
+    postgresql_where=OutboxEvent.published_at.is_(None)
+)
+Index("idx_outbox_published_at", OutboxEvent.published_at)
+
+
 # ============================================================================
 # Exports
 # ============================================================================
@@ -360,8 +548,10 @@ __all__ = [
     "ProductCategory",
     "Product",
     "KnowledgeItem",
+    "KnowledgeChunk",
     "ContentGeneration",
     "SupportConversation",
     "CompetitorTracking",
     "SearchQuery",
+    "OutboxEvent",
 ]
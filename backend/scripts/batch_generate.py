@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Catalog Content Batch
+Generates content for every product matching a filter and saves it as
+ContentGeneration rows, checkpointing after each page of products
+
+Requirements:
+    Postgres from docker-compose, and an API key for the chosen provider
+
+Usage:
+    # SEO descriptions for all active products
+    python scripts/batch_generate.py
+
+    # Headphones only, deterministic output, 100 products per page
+    python scripts/batch_generate.py --category headphones --temperature 0 --page-size 100
+
+    # Render prompts with a stored template, pinned to version 3
+    python scripts/batch_generate.py --template product_description --template-version 3
+
+    # Checkpoint to a local file instead of Redis, then resume after a crash
+    python scripts/batch_generate.py --checkpoint-file batch.json
+    python scripts/batch_generate.py --checkpoint-file batch.json --resume <batch-id>
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.database import close_database_connections, redis_cache
+from content_service.batch import FileBatchStore, create_batch_store, new_batch, run_batch
+from content_service.generation import close_generators
+from content_service.tasks import DEFAULT_SYSTEM_PROMPT
+
+
+def template_variable(value: str):
+    name, sep, text = value.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {value!r}")
+    return name, text
+
+
+async def print_progress(report):
+    print(
+        f"  {report['processed']:>6} products  {report['failed']:>4} failed  "
+        f"{report['items_per_min'] or 0:>8.1f} items/min  {report['tokens_per_s'] or 0:>8.1f} tokens/s"
+    )
+
+
+async def run(args) -> int:
+    if args.checkpoint_file:
+        store = FileBatchStore(args.checkpoint_file)
+    else:
+        try:
+            await redis_cache.ensure_connected()
+            store = create_batch_store()
+        except Exception as e:
+            print(f"❌ Redis unavailable ({e}); use --checkpoint-file to checkpoint progress locally")
+            return 1
+
+    try:
+        if args.resume:
+            state = await store.get(args.resume)
+            if state is None:
+                print(f"❌ No checkpoint for batch {args.resume}")
+                return 1
+            print(f"Resuming batch {args.resume} after product {state['cursor']} ({state['processed']} done)")
+        else:
+            state = new_batch({
+                "category": args.category,
+                "series": args.series,
+                "is_active": None if args.include_inactive else True,
+                "product_ids": args.product_id,
+                "limit": args.limit,
+                "content_type": args.content_type,
+                "instructions": args.instructions,
+                "provider": args.provider,
+                "model": args.model,
+                "temperature": args.temperature,
+                "max_tokens": args.max_tokens,
+                "page_size": args.page_size,
+                "template": args.template,
+                "template_version": args.template_version,
+                "variables": dict(args.var or []),
+            })
+            await store.save(state["id"], state)
+            print(f"Starting batch {state['id']}")
+
+        report = await run_batch(state["id"], store, DEFAULT_SYSTEM_PROMPT, on_progress=print_progress)
+    finally:
+        await close_generators()
+        await close_database_connections()
+
+    print(
+        f"\nBatch {report['id']} {report['status']}: {report['succeeded']} generated, "
+        f"{report['failed']} failed in {report['elapsed_s']:.0f}s "
+        f"({report['items_per_min'] or 0:.1f} items/min, {report['tokens_per_s'] or 0:.1f} tokens/s)"
+    )
+    if report["failed_ids"]:
+        print(f"Failed products: {', '.join(str(i) for i in report['failed_ids'][:50])}")
+    return 0 if report["status"] == "completed" else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate content across the product catalog")
+    parser.add_argument("--category", choices=["earbuds", "headphones", "speakers", "accessories"],
+                        help="Only products in this category")
+    parser.add_argument("--series", help="Only products in this series")
+    parser.add_argument("--product-id", type=int, action="append",
+                        help="Only this product (repeatable)")
+    parser.add_argument("--include-inactive", action="store_true",
+                        help="Include inactive products")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Stop after this many products")
+    parser.add_argument("--content-type", default="product_description",
+                        help="Content type to generate")
+    parser.add_argument("--instructions", default=None,
+                        help="Extra instructions appended to every prompt")
+    parser.add_argument("--provider", choices=["openai", "anthropic"], default=None,
+                        help="Provider (default: CONTENT_PROVIDER)")
+    parser.add_argument("--model", default=None,
+                        help="Model (default: CONTENT_MODEL or the provider's model)")
+    parser.add_argument("--temperature", type=float, default=0.7,
+                        help="Sampling temperature; 0 reuses cached results")
+    parser.add_argument("--max-tokens", type=int, default=600,
+                        help="Max output tokens per product")
+    parser.add_argument("--page-size", type=int, default=None,
+                        help="Products per page (default: CONTENT_BATCH_PAGE_SIZE)")
+    parser.add_argument("--template", default=None,
+                        help="Render prompts with this content template")
+    parser.add_argument("--template-version", type=int, default=None,
+                        help="Template version (default: latest)")
+    parser.add_argument("--var", type=template_variable, action="append", metavar="NAME=VALUE",
+                        help="Template variable (repeatable)")
+    parser.add_argument("--checkpoint-file", default=None,
+                        help="Keep checkpoints in this JSON file instead of Redis")
+    parser.add_argument("--resume", metavar="BATCH_ID", default=None,
+                        help="Resume a batch from its checkpoint")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Query Construction Benchmark
+Measures the Python-side cost of building and compiling the hot knowledge
+service queries, comparing the previous per-call select() builders with
+the statements knowledge_service.crud now builds once per filter
+combination and executes with bound parameters
+
+Each iteration does what an execute() does before reaching the driver:
+build the statement, compute its cache key and look up the compiled form
+(compiling on a miss). No database is needed.
+
+Usage:
+    python scripts/query_build_benchmark.py
+    python scripts/query_build_benchmark.py --iterations 20000 --output query-bench.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import select, func, or_, and_  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+from sqlalchemy.util import LRUCache  # noqa: E402
+
+from knowledge_service import crud  # noqa: E402
+from knowledge_service.schemas import SearchFilters  # noqa: E402
+from models.knowledge import Product, KnowledgeItem, KnowledgeType, KnowledgeStatus  # noqa: E402
+
+
+# ============================================================================
+# Previous Builders
+# ============================================================================
+
+def legacy_products_statements(skip, limit, category, is_active):
+    query = select(Product)
+    conditions = []
+    if category:
+        conditions.append(Product.category == category)
+    if is_active is not None:
+        conditions.append(Product.is_active == is_active)
+    if conditions:
+        query = query.where(and_(*conditions))
+    count_query = select(func.count()).select_from(query.subquery())
+    return query.offset(skip).limit(limit), count_query
+
+
+def legacy_knowledge_items_statements(skip, limit, filters):
+    query = select(KnowledgeItem).options(selectinload(KnowledgeItem.product))
+    conditions = []
+    if filters:
+        if filters.types:
+            conditions.append(KnowledgeItem.type.in_([t.value for t in filters.types]))
+        if filters.product_ids:
+            conditions.append(KnowledgeItem.product_id.in_(filters.product_ids))
+        if filters.tags:
+            conditions.append(KnowledgeItem.tags.overlap(filters.tags))
+        if filters.language:
+            conditions.append(KnowledgeItem.language == filters.language)
+        if filters.min_quality_score is not None:
+            conditions.append(KnowledgeItem.quality_score >= filters.min_quality_score)
+        if filters.status:
+            conditions.append(KnowledgeItem.status.in_([s.value for s in filters.status]))
+    if conditions:
+        query = query.where(and_(*conditions))
+    count_query = select(func.count()).select_from(query.subquery())
+    query = query.order_by(KnowledgeItem.created_at.desc()).offset(skip).limit(limit)
+    return query, count_query
+
+
+def legacy_keyword_search_statement(query, top_k, filters):
+    search_query = select(KnowledgeItem).options(selectinload(KnowledgeItem.product))
+    conditions = [
+        or_(
+            KnowledgeItem.title.ilike(f"%{query}%"),
+            KnowledgeItem.content.ilike(f"%{query}%"),
+            KnowledgeItem.summary.ilike(f"%{query}%")
+        )
+    ]
+    if filters:
+        if filters.types:
+            conditions.append(KnowledgeItem.type.in_([t.value for t in filters.types]))
+        if filters.product_ids:
+            conditions.append(KnowledgeItem.product_id.in_(filters.product_ids))
+        if filters.status:
+            conditions.append(KnowledgeItem.status.in_([s.value for s in filters.status]))
+    search_query = search_query.where(and_(*conditions))
+    return search_query.order_by(KnowledgeItem.quality_score.desc()).limit(top_k)
+
+
+# ============================================================================
+# Workloads
+# ============================================================================
+
+FILTERS = SearchFilters(
+    types=[KnowledgeType.FAQ, KnowledgeType.GUIDE],
+    product_ids=[1, 2, 3],
+    tags=["anc", "battery"],
+    language="en",
+    min_quality_score=0.5,
+    status=[KnowledgeStatus.PUBLISHED],
+)
+
+# name -> (before, after); each returns the statements one call executes
+WORKLOADS: Dict[str, Tuple[Callable[[int], Tuple[Any, ...]], Callable[[int], Tuple[Any, ...]]]] = {
+    "get_products": (
+        lambda i: legacy_products_statements(i % 50, 20, "earbuds", True),
+        lambda i: crud.products_statements(i % 50, 20, "earbuds", True)[:2],
+    ),
+    "get_knowledge_items": (
+        lambda i: legacy_knowledge_items_statements(i % 50, 20, FILTERS),
+        lambda i: crud.knowledge_items_statements(i % 50, 20, FILTERS)[:2],
+    ),
+    "keyword_search": (
+        lambda i: (legacy_keyword_search_statement(f"noise {i % 100}", 10, FILTERS),),
+        lambda i: crud.keyword_search_statement(f"noise {i % 100}", 10, FILTERS)[:1],
+    ),
+}
+
+
+def run(build: Callable[[int], Tuple[Any, ...]], iterations: int) -> Dict[str, float]:
+    """Time build + cache key + compiled cache lookup, as execute() does"""
+    dialect = postgresql.asyncpg.dialect()
+    compiled_cache = LRUCache(1200)
+    misses = 0
+
+    def execute(i: int):
+        nonlocal misses
+        for stmt in build(i):
+            _, _, cache_hit = stmt._compile_w_cache(
+                dialect, compiled_cache=compiled_cache, column_keys=[]
+            )
+            if cache_hit != dialect.CACHE_HIT:
+                misses += 1
+
+    for i in range(min(100, iterations)):
+        execute(i)
+
+    started = time.perf_counter()
+    for i in range(iterations):
+        build(i)
+    build_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(iterations):
+        execute(i)
+    total_s = time.perf_counter() - started
+
+    return {
+        "build_us": build_s / iterations * 1e6,
+        "total_us": total_s / iterations * 1e6,
+        "compiled_forms": misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hot query construction")
+    parser.add_argument("--iterations", type=int, default=5000, help="Calls per workload")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    print(f"{'query':<22}{'before µs':>12}{'after µs':>12}{'speedup':>10}{'forms':>8}")
+    for name, (before, after) in WORKLOADS.items():
+        b = run(before, args.iterations)
+        a = run(after, args.iterations)
+        speedup = b["total_us"] / a["total_us"] if a["total_us"] else 0.0
+        print(f"{name:<22}{b['total_us']:>12.1f}{a['total_us']:>12.1f}{speedup:>9.1f}x{a['compiled_forms']:>8}")
+        results.append({"query": name, "before": b, "after": a, "speedup": round(speedup, 2)})
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"iterations": args.iterations, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Service Startup Benchmark
+Measures import time, time to first ready response and resident memory
+for each backend service, and fails when a budget is exceeded
+
+Requirements:
+    Databases from docker-compose must be running for /ready to succeed
+
+Usage:
+    # Benchmark all services
+    python scripts/startup_benchmark.py
+
+    # Import times only (no databases needed)
+    python scripts/startup_benchmark.py --imports-only
+
+    # Specific services with custom budgets
+    python scripts/startup_benchmark.py --service knowledge --service support \\
+        --max-import-ms 1500 --max-ready-s 10 --max-rss-mb 250
+
+    # Save a baseline, then compare later runs against it (+20% allowed)
+    python scripts/startup_benchmark.py --output startup-baseline.json
+    python scripts/startup_benchmark.py --baseline startup-baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVICES = {
+    "knowledge": 8001,
+    "content": 8002,
+    "support": 8003,
+    "analytics": 8004,
+    "auth": 8005,
+}
+
+# Metrics compared against budgets and baselines
+METRICS = ("import_ms", "ready_s", "rss_mb")
+
+
+# ============================================================================
+# Import Time
+# ============================================================================
+
+def _last_line(output: str) -> str:
+    lines = [line for line in output.splitlines() if line.strip()]
+    return lines[-1].strip() if lines else "no output"
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """
+    Parse `python -X importtime` output
+
+    Lines look like:
+        import time: self [us] | cumulative | imported package
+        import time:       312 |        312 |   _io
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            self_us = int(fields[0])
+            cumulative_us = int(fields[1])
+        except ValueError:
+            continue  # header line
+        name = fields[2].rstrip()
+        modules.append({
+            "module": name.strip(),
+            "indent": len(name) - len(name.lstrip()),
+            "self_ms": self_us / 1000,
+            "cumulative_ms": cumulative_us / 1000,
+        })
+    return modules
+
+
+def measure_imports(service: str, top: int = 15) -> Dict[str, Any]:
+    """Import a service's main module in a fresh interpreter with -X importtime"""
+    module = f"{service}_service.main"
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed: {_last_line(proc.stderr)}")
+
+    modules = parse_importtime(proc.stderr)
+    package = f"{service}_service"
+    own = [i for i, m in enumerate(modules) if m["module"] in (package, module)]
+    # Keep only the outermost row; the package and main module nest inside it
+    root = min(own, key=lambda i: modules[i]["indent"])
+
+    # Rows are printed after their children, so the children of a row are
+    # the rows one level deeper just above it. Walk down through the
+    # service's own modules to find the dependencies they import.
+    direct = []
+    pending = [root]
+    while pending:
+        i = pending.pop()
+        indent = modules[i]["indent"]
+        for j in range(i - 1, -1, -1):
+            if modules[j]["indent"] <= indent:
+                break
+            if modules[j]["indent"] == indent + 2:
+                if modules[j]["module"] in (package, module):
+                    pending.append(j)
+                else:
+                    direct.append(modules[j])
+
+    # Self time grouped by top-level package shows which dependency is heavy
+    packages: Dict[str, float] = {}
+    for m in modules:
+        name = m["module"].split(".")[0]
+        packages[name] = packages.get(name, 0.0) + m["self_ms"]
+
+    return {
+        "import_ms": round(modules[root]["cumulative_ms"], 1),
+        "interpreter_ms": round(wall_ms, 1),
+        "slowest_modules": [
+            {"module": m["module"], "cumulative_ms": m["cumulative_ms"]}
+            for m in sorted(direct, key=lambda m: m["cumulative_ms"], reverse=True)[:top]
+        ],
+        "packages": dict(sorted(
+            ((k, round(v, 1)) for k, v in packages.items()),
+            key=lambda kv: kv[1],
+            reverse=True
+        )[:top]),
+    }
+
+
+# ============================================================================
+# Cold Start
+# ============================================================================
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process in MB (Linux /proc, psutil fallback)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def measure_cold_start(service: str, port: int, timeout_s: float = 60.0, settle_s: float = 1.0) -> Dict[str, Any]:
+    """Start a service with uvicorn and time the first successful /ready"""
+    url = f"http://127.0.0.1:{port}/ready"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", f"{service}_service.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        ready_s = None
+        while time.perf_counter() - started < timeout_s:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{service} exited during startup: {_last_line(proc.stderr.read())}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        ready_s = time.perf_counter() - started
+                        break
+            except (urllib.error.URLError, ConnectionError, OSError):
+                pass
+            time.sleep(0.05)
+        if ready_s is None:
+            raise RuntimeError(f"{service} not ready after {timeout_s:.0f}s")
+
+        # Let lazy initialisation triggered by the first request settle
+        time.sleep(settle_s)
+        memory = rss_mb(proc.pid)
+        return {
+            "ready_s": round(ready_s, 3),
+            "rss_mb": round(memory, 1) if memory is not None else None,
+        }
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# ============================================================================
+# Budgets
+# ============================================================================
+
+def check_budgets(
+    results: Dict[str, Dict[str, Any]],
+    budgets: Dict[str, Optional[float]],
+    baseline: Optional[Dict[str, Dict[str, Any]]] = None,
+    tolerance: float = 0.2
+) -> List[str]:
+    """Return a description of every metric over its budget or baseline"""
+    violations = []
+    for service, result in results.items():
+        for metric in METRICS:
+            value = result.get(metric)
+            if value is None:
+                continue
+            limit = budgets.get(metric)
+            if limit is not None and value > limit:
+                violations.append(f"{service}: {metric}={value} exceeds budget {limit}")
+            previous = (baseline or {}).get(service, {}).get(metric)
+            if previous and value > previous * (1 + tolerance):
+                violations.append(
+                    f"{service}: {metric}={value} regressed more than "
+                    f"{tolerance:.0%} from baseline {previous}"
+                )
+    return violations
+
+
+def print_report(results: Dict[str, Dict[str, Any]], verbose: bool):
+    print(f"\n{'Service':<12} {'Import (ms)':>12} {'Ready (s)':>10} {'RSS (MB)':>10}")
+    print("-" * 47)
+    for service, r in results.items():
+        if "error" in r:
+            print(f"{service:<12} ERROR: {r['error']}")
+            continue
+        ready = f"{r['ready_s']:.3f}" if r.get("ready_s") is not None else "-"
+        rss = f"{r['rss_mb']:.1f}" if r.get("rss_mb") is not None else "-"
+        print(f"{service:<12} {r['import_ms']:>12.1f} {ready:>10} {rss:>10}")
+
+    if verbose:
+        for service, r in results.items():
+            if "error" in r:
+                continue
+            print(f"\n{service}: slowest direct imports")
+            for m in r["slowest_modules"]:
+                print(f"  {m['cumulative_ms']:>9.1f} ms  {m['module']}")
+            print(f"{service}: self time by package")
+            for package, ms in r["packages"].items():
+                print(f"  {ms:>9.1f} ms  {package}")
+
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Service startup benchmark")
+    parser.add_argument("--service", action="append", choices=list(SERVICES),
+                        help="Service to benchmark (repeatable, default: all)")
+    parser.add_argument("--imports-only", action="store_true",
+                        help="Only measure import time; do not start the services")
+    parser.add_argument("--port-offset", type=int, default=1000,
+                        help="Added to each service port so a running stack is not disturbed")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="Seconds to wait for /ready")
+    parser.add_argument("--max-import-ms", type=float, default=None,
+                        help="Budget for main module import time")
+    parser.add_argument("--max-ready-s", type=float, default=None,
+                        help="Budget for time to first ready response")
+    parser.add_argument("--max-rss-mb", type=float, default=None,
+                        help="Budget for resident memory after startup")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Report from a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed fractional regression from the baseline")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Write the JSON report to this file")
+    parser.add_argument("--verbose", "-v", action="store_true",
+                        help="Show slowest modules and per-package import time")
+    args = parser.parse_args()
+
+    services = args.service or list(SERVICES)
+    results: Dict[str, Dict[str, Any]] = {}
+
+    for service in services:
+        print(f"Benchmarking {service}-service...")
+        try:
+            result = measure_imports(service)
+            if not args.imports_only:
+                result.update(measure_cold_start(
+                    service, SERVICES[service] + args.port_offset, timeout_s=args.timeout
+                ))
+        except RuntimeError as e:
+            result = {"error": str(e)}
+        results[service] = result
+
+    print_report(results, args.verbose)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "services": results}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["services"]
+
+    budgets = {
+        "import_ms": args.max_import_ms,
+        "ready_s": args.max_ready_s,
+        "rss_mb": args.max_rss_mb,
+    }
+    violations = check_budgets(results, budgets, baseline, args.tolerance)
+    errors = [f"{s}: {r['error']}" for s, r in results.items() if "error" in r]
+
+    if violations or errors:
+        print("\n❌ Startup benchmark failed:")
+        for line in errors + violations:
+            print(f"  - {line}")
+        sys.exit(1)
+    print("\n✅ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
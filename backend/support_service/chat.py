@@ -0,0 +1,325 @@
+"""
+Support Service - Chat
+Streams model answers for support conversations
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+import asyncio
+import logging
+import time
+import uuid
+
+from prometheus_client import Counter, Histogram
+
+from config import settings
+from .faq import FAQ_INTENT, FAST_PATH, FAQMatch, classify_intent, match_faq
+from .schemas import ChatRequest
+from .session import ChatSession, session_store
+from .tasks import enqueue_turn_persist
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+CHAT_TURNS = Counter(
+    "support_chat_turns_total",
+    "Chat turns by outcome",
+    ["status"]  # "completed", "cancelled", "failed"
+)
+TIME_TO_FIRST_TOKEN = Histogram(
+    "support_chat_time_to_first_token_seconds",
+    "Time from receiving a message to the first answer token",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+)
+TURN_DURATION = Histogram(
+    "support_chat_turn_duration_seconds",
+    "Time from receiving a message to the complete answer",
+    buckets=(0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+)
+
+# model_used for turns answered from the FAQ index
+FAQ_MODEL = "faq-index"
+
+SYSTEM_PROMPT = (
+    "You are the Soundcore customer support assistant. Answer questions about "
+    "Soundcore earbuds, headphones and speakers clearly and concisely. If you "
+    "are not sure, say so and offer to connect the customer with a human agent."
+)
+
+
+# ============================================================================
+# Chat Models
+# ============================================================================
+
+class ChatModel:
+    """
+    Base chat model
+    Streams answer text for a list of {"role", "content"} messages
+    """
+
+    name = "base"
+
+    async def stream(self, system: str, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    async def close(self):
+        pass
+
+
+class OpenAIChatModel(ChatModel):
+    """Chat completions from the OpenAI API"""
+
+    def __init__(self, api_key: str, model: str, max_tokens: int, temperature: float):
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(api_key=api_key)
+        self.name = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+
+    async def stream(self, system: str, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        response = await self.client.chat.completions.create(
+            model=self.name,
+            messages=[{"role": "system", "content": system}] + messages,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            stream=True,
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def close(self):
+        await self.client.close()
+
+
+class AnthropicChatModel(ChatModel):
+    """Messages from the Anthropic API"""
+
+    def __init__(self, api_key: str, model: str, max_tokens: int, temperature: float):
+        from anthropic import AsyncAnthropic
+
+        self.client = AsyncAnthropic(api_key=api_key)
+        self.name = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+
+    async def stream(self, system: str, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        response = await self.client.messages.create(
+            model=self.name,
+            system=system,
+            messages=messages,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            stream=True,
+        )
+        async for event in response:
+            if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                yield event.delta.text
+
+    async def close(self):
+        await self.client.close()
+
+
+def create_chat_model() -> Optional[ChatModel]:
+    """Create the configured chat model, or None if no provider is configured"""
+    provider = settings.support_chat_provider
+    options = {
+        "max_tokens": settings.support_chat_max_tokens,
+        "temperature": settings.support_chat_temperature,
+    }
+    try:
+        if provider == "anthropic" and settings.anthropic_api_key:
+            return AnthropicChatModel(
+                settings.anthropic_api_key, settings.support_chat_model or settings.anthropic_model, **options
+            )
+        if provider == "openai" and settings.openai_api_key:
+            return OpenAIChatModel(
+                settings.openai_api_key, settings.support_chat_model or settings.openai_model, **options
+            )
+    except Exception as e:
+        logger.error(f"Failed to create {provider} chat model: {e}")
+        return None
+    logger.warning(f"No API key configured for chat provider '{provider}'; chat is disabled")
+    return None
+
+
+# Global chat model (created on first use or in the service lifespan)
+_chat_model: Optional[ChatModel] = None
+_chat_model_loaded = False
+
+
+def get_chat_model() -> Optional[ChatModel]:
+    """Get the shared chat model, or None if chat is not configured"""
+    global _chat_model, _chat_model_loaded
+    if not _chat_model_loaded:
+        _chat_model = create_chat_model()
+        _chat_model_loaded = True
+    return _chat_model
+
+
+async def close_chat_model():
+    """Close the shared chat model's HTTP client"""
+    global _chat_model, _chat_model_loaded
+    if _chat_model is not None:
+        await _chat_model.close()
+    _chat_model = None
+    _chat_model_loaded = False
+
+
+# ============================================================================
+# Chat Turns
+# ============================================================================
+
+class ChatUnavailable(Exception):
+    """A message needs the chat model but none is configured"""
+
+
+def build_messages(
+    session: ChatSession,
+    message: str,
+    context: Sequence[FAQMatch] = ()
+) -> tuple[str, List[Dict[str, str]]]:
+    """System prompt and message list for the next turn"""
+    system = SYSTEM_PROMPT
+    if context:
+        references = "\n\n".join(f"Q: {m.entry.title}\nA: {m.entry.answer}" for m in context)
+        system += f"\n\nRelevant FAQ entries (use them if they answer the question):\n{references}"
+    if session.summary:
+        system += f"\n\nEarlier in this conversation:\n{session.summary}"
+
+    messages: List[Dict[str, str]] = []
+    for turn in session.turns:
+        messages.append({"role": "user", "content": turn["user"]})
+        messages.append({"role": "assistant", "content": turn["assistant"]})
+    messages.append({"role": "user", "content": message})
+    return system, messages
+
+
+class ChatTurn:
+    """
+    One customer message and its streamed answer
+
+    Messages that closely match an FAQ title are answered from the FAQ
+    index without calling the model. Others go to the model, with the
+    closest FAQ answers as reference context; ChatUnavailable is raised
+    if no model is configured.
+
+    Iterate over stream() for answer text. Once the answer is complete,
+    the turn is appended to the Redis session and queued for persistence
+    in Postgres; nothing is recorded for a turn that fails or is cancelled.
+    """
+
+    def __init__(self, model: Optional[ChatModel], request: ChatRequest):
+        self.model = model
+        self.request = request
+        self.session_id = request.session_id or uuid.uuid4().hex
+        self.turn_id = uuid.uuid4().hex
+        self.response = ""
+        self.response_time_ms = 0
+        self.model_used = model.name if model is not None else ""
+        self.intent, self.confidence = classify_intent(request.message)
+        self.knowledge_ids: List[int] = []
+        self.session: Optional[ChatSession] = None
+
+    async def stream(self) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        parts: List[str] = []
+        try:
+            async for text in self._answer():
+                if not parts:
+                    TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started)
+                parts.append(text)
+                yield text
+        except (GeneratorExit, asyncio.CancelledError):
+            CHAT_TURNS.labels(status="cancelled").inc()
+            raise
+        except Exception:
+            CHAT_TURNS.labels(status="failed").inc()
+            raise
+
+        self.response = "".join(parts)
+        self.response_time_ms = int((time.perf_counter() - started) * 1000)
+        TURN_DURATION.observe(time.perf_counter() - started)
+        CHAT_TURNS.labels(status="completed").inc()
+        await self._record()
+
+    async def _answer(self) -> AsyncIterator[str]:
+        matches = match_faq(
+            self.request.message,
+            top_k=settings.support_faq_context_items,
+            product_id=self.request.product_id,
+        )
+        if matches and matches[0].score >= settings.support_faq_threshold:
+            FAST_PATH.labels(result="hit").inc()
+            best = matches[0]
+            self.intent, self.confidence = FAQ_INTENT, best.score
+            self.knowledge_ids = [best.entry.knowledge_id]
+            self.model_used = FAQ_MODEL
+            # The fast path needs no history; appending only needs the id
+            self.session = ChatSession(self.session_id)
+            yield best.entry.answer
+            return
+
+        FAST_PATH.labels(result="miss").inc()
+        if self.model is None:
+            raise ChatUnavailable("Chat model is not configured")
+
+        context = [m for m in matches if m.score >= settings.support_faq_context_threshold]
+        self.knowledge_ids = [m.entry.knowledge_id for m in context]
+        self.session = await session_store.load(self.session_id)
+        system, messages = build_messages(self.session, self.request.message, context)
+        async for text in self.model.stream(system, messages):
+            yield text
+
+    async def _record(self):
+        meta = {
+            key: str(value)
+            for key, value in (
+                ("user_id", self.request.user_id),
+                ("product_id", self.request.product_id),
+            )
+            if value is not None
+        }
+        await session_store.append(self.session, {
+            "id": self.turn_id,
+            "user": self.request.message,
+            "assistant": self.response,
+            "ts": time.time(),
+        }, meta)
+        await enqueue_turn_persist(self.turn_id, self.row())
+
+    def row(self) -> Dict[str, Any]:
+        """SupportConversation column values for this turn"""
+        return {
+            "session_id": self.session_id,
+            "turn_id": self.turn_id,
+            "user_id": self.request.user_id,
+            "user_email": self.request.user_email,
+            "product_id": self.request.product_id,
+            "user_query": self.request.message,
+            "ai_response": self.response,
+            "intent": self.intent,
+            "confidence_score": round(self.confidence, 4),
+            "knowledge_ids": self.knowledge_ids or None,
+            "response_time_ms": self.response_time_ms,
+            "model_used": self.model_used,
+            "created_at": time.time(),
+        }
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "ChatModel",
+    "OpenAIChatModel",
+    "AnthropicChatModel",
+    "create_chat_model",
+    "get_chat_model",
+    "close_chat_model",
+    "ChatUnavailable",
+    "build_messages",
+    "ChatTurn",
+]
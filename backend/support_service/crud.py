@@ -0,0 +1,174 @@
+"""
+Support Service - CRUD Operations
+Database operations for support conversations
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+import json
+
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.knowledge import SupportConversation
+
+
+# ============================================================================
+# Cursors
+# ============================================================================
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque keyset cursor for the last row of a page"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+# ============================================================================
+# Conversation Operations
+# ============================================================================
+
+async def get_session_summaries(
+    db: AsyncSession,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    escalated: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Per-session aggregates, one row per session, in session_id order
+
+    Aggregation runs in Postgres; groups are read in index order so a page
+    stops after `limit` sessions instead of grouping the whole table.
+    since/until restrict which turns are counted.
+
+    Returns (summaries, cursor for the next page or None).
+    """
+    sc = SupportConversation
+    conditions = []
+    if cursor:
+        (after,) = decode_cursor(cursor, 1)
+        conditions.append(sc.session_id > str(after))
+    if user_id:
+        conditions.append(sc.user_id == user_id)
+    if since:
+        conditions.append(sc.created_at >= since)
+    if until:
+        conditions.append(sc.created_at < until)
+
+    escalated_any = func.coalesce(func.bool_or(sc.escalated_to_human), False)
+    query = (
+        select(
+            sc.session_id,
+            func.max(sc.user_id).label("user_id"),
+            func.count().label("turn_count"),
+            func.min(sc.created_at).label("first_message_at"),
+            func.max(sc.created_at).label("last_message_at"),
+            escalated_any.label("escalated"),
+            func.avg(sc.user_rating).label("avg_rating"),
+            func.count(sc.user_rating).label("rated_turns"),
+            func.avg(sc.response_time_ms).label("avg_response_time_ms"),
+        )
+        .where(*conditions)
+        .group_by(sc.session_id)
+        .order_by(sc.session_id)
+        .limit(limit + 1)
+    )
+    if escalated is not None:
+        query = query.having(escalated_any == escalated)
+
+    rows = (await db.execute(query)).mappings().all()
+    summaries = [dict(row) for row in rows[:limit]]
+    for summary in summaries:
+        for key in ("avg_rating", "avg_response_time_ms"):
+            if summary[key] is not None:
+                summary[key] = float(summary[key])
+
+    next_cursor = encode_cursor([summaries[-1]["session_id"]]) if len(rows) > limit else None
+    return summaries, next_cursor
+
+
+async def get_session_history(
+    db: AsyncSession,
+    session_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Tuple[List[SupportConversation], Optional[str]]:
+    """
+    Turns of one session, oldest first
+
+    Keyset pagination on (created_at, id) within the session follows the
+    session index, so every page is a short index range scan.
+
+    Returns (turns, cursor for the next page or None).
+    """
+    sc = SupportConversation
+    query = select(sc).where(sc.session_id == session_id)
+    if cursor:
+        created_at, turn_id = decode_cursor(cursor, 2)
+        try:
+            after = (datetime.fromisoformat(created_at), int(turn_id))
+        except (TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        query = query.where(tuple_(sc.created_at, sc.id) > tuple_(*after))
+    query = query.order_by(sc.created_at, sc.id).limit(limit + 1)
+
+    turns = list((await db.execute(query)).scalars().all())
+    next_cursor = None
+    if len(turns) > limit:
+        turns = turns[:limit]
+        next_cursor = encode_cursor([turns[-1].created_at, turns[-1].id])
+    return turns, next_cursor
+
+
+async def get_latest_turn(db: AsyncSession, session_id: str) -> Optional[SupportConversation]:
+    """Most recent persisted turn of a session"""
+    result = await db.execute(
+        select(SupportConversation)
+        .where(SupportConversation.session_id == session_id)
+        .order_by(SupportConversation.created_at.desc(), SupportConversation.id.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def mark_session_escalated(db: AsyncSession, session_id: str) -> int:
+    """Flag a session's turns as escalated to a human; returns rows updated"""
+    result = await db.execute(
+        update(SupportConversation)
+        .where(
+            SupportConversation.session_id == session_id,
+            SupportConversation.escalated_to_human.isnot(True)
+        )
+        .values(escalated_to_human=True)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "encode_cursor",
+    "decode_cursor",
+    "get_session_summaries",
+    "get_session_history",
+    "get_latest_turn",
+    "mark_session_escalated",
+]
@@ -0,0 +1,257 @@
+"""
+Support Service - FAQ Matching
+In-memory character n-gram index over FAQ titles and rule-based intents
+"""
+
+from collections import Counter as TermCounter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import math
+import re
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import select
+
+from models.database import AsyncSessionLocal
+from models.knowledge import KnowledgeItem, KnowledgeStatus, KnowledgeType
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+FAST_PATH = Counter(
+    "support_faq_fast_path_total",
+    "Chat messages answered from the FAQ index (hit) or passed to the model (miss)",
+    ["result"]
+)
+FAQ_MATCH_DURATION = Histogram(
+    "support_faq_match_duration_seconds",
+    "FAQ index lookup latency in seconds",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025)
+)
+FAQ_INDEX_SIZE = Gauge(
+    "support_faq_index_size",
+    "FAQ entries in the in-memory index"
+)
+
+FAQ_INTENT = "faq"
+GENERAL_INTENT = "general"
+
+# Intent -> keyword patterns; the intent with the most matches wins
+INTENT_PATTERNS: Dict[str, Sequence[str]] = {
+    "troubleshooting": (
+        r"not work", r"doesn'?t work", r"won'?t", r"can'?t", r"broken", r"issue", r"problem",
+        r"error", r"reset", r"disconnect", r"no sound", r"static", r"crackl", r"pair", r"firmware",
+    ),
+    "product_inquiry": (
+        r"battery", r"waterproof", r"\bip\d", r"noise cancel", r"\banc\b", r"compatible", r"spec",
+        r"feature", r"differen", r"compare", r"which", r"recommend", r"price", r"colou?r",
+    ),
+    "order_status": (r"\border", r"shipping", r"deliver", r"track", r"shipped", r"arriv"),
+    "returns_refund": (r"return", r"refund", r"exchange", r"cancel (my )?order"),
+    "warranty": (r"warrant", r"guarantee", r"replace(ment)?", r"repair"),
+}
+_INTENT_RES = {intent: [re.compile(p) for p in patterns] for intent, patterns in INTENT_PATTERNS.items()}
+
+_NORMALIZE_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def classify_intent(message: str) -> Tuple[str, float]:
+    """
+    Rule-based intent with a confidence in [0, 1)
+
+    Confidence grows with the number of matching keywords and shrinks when
+    other intents match too.
+    """
+    text = message.lower()
+    hits = {intent: sum(1 for r in res if r.search(text)) for intent, res in _INTENT_RES.items()}
+    total = sum(hits.values())
+    if total == 0:
+        return GENERAL_INTENT, 0.0
+    intent = max(hits, key=hits.get)
+    return intent, hits[intent] / (total + 1)
+
+
+def char_ngrams(text: str, n: int = 3) -> TermCounter:
+    """Character n-gram counts of normalized text, word boundaries padded"""
+    normalized = " " + _NORMALIZE_RE.sub(" ", text.lower()).strip() + " "
+    return TermCounter(normalized[i:i + n] for i in range(len(normalized) - n + 1))
+
+
+@dataclass(frozen=True)
+class FAQEntry:
+    """An FAQ answer held in the index"""
+    knowledge_id: int
+    title: str
+    answer: str
+    product_id: Optional[int]
+
+
+@dataclass(frozen=True)
+class FAQMatch:
+    entry: FAQEntry
+    score: float  # cosine similarity of the n-gram TF-IDF vectors, 0-1
+
+
+class FAQIndex:
+    """
+    TF-IDF over character trigrams of FAQ titles, with an inverted index
+
+    Character n-grams tolerate typos and word-form differences that exact
+    keyword matching misses. A lookup touches only the postings of the
+    query's n-grams, so it takes well under a millisecond for thousands of
+    FAQs. The index is immutable; refreshes build a new one and swap it in.
+    """
+
+    def __init__(self, entries: Sequence[FAQEntry], n: int = 3):
+        self.entries = list(entries)
+        self.n = n
+        grams = [char_ngrams(e.title, n) for e in self.entries]
+
+        df: TermCounter = TermCounter()
+        for g in grams:
+            df.update(g.keys())
+        count = len(self.entries)
+        self.idf = {gram: math.log((count + 1) / (freq + 1)) + 1.0 for gram, freq in df.items()}
+
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        for doc, g in enumerate(grams):
+            weights = {gram: tf * self.idf[gram] for gram, tf in g.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for gram, w in weights.items():
+                self.postings.setdefault(gram, []).append((doc, w / norm))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(self, query: str, top_k: int = 3, product_id: Optional[int] = None) -> List[FAQMatch]:
+        """
+        Best matching FAQs for a query
+
+        With product_id, FAQs tied to a different product are skipped.
+        """
+        # N-grams no FAQ title contains weigh like the rarest ones
+        unseen_idf = math.log(len(self.entries) + 1) + 1.0
+        weights = {
+            gram: tf * self.idf.get(gram, unseen_idf)
+            for gram, tf in char_ngrams(query, self.n).items()
+        }
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if not norm:
+            return []
+
+        scores: Dict[int, float] = {}
+        for gram, w in weights.items():
+            for doc, dw in self.postings.get(gram, ()):
+                scores[doc] = scores.get(doc, 0.0) + w * dw
+
+        matches = []
+        for doc, score in sorted(scores.items(), key=lambda kv: kv[1], reverse=True):
+            entry = self.entries[doc]
+            if product_id is not None and entry.product_id not in (None, product_id):
+                continue
+            matches.append(FAQMatch(entry, min(1.0, score / norm)))
+            if len(matches) >= top_k:
+                break
+        return matches
+
+
+# ============================================================================
+# Shared Index
+# ============================================================================
+
+_index = FAQIndex([])
+_task: Optional[asyncio.Task] = None
+
+
+def get_faq_index() -> FAQIndex:
+    """The current FAQ index (empty until the first refresh)"""
+    return _index
+
+
+async def load_faq_entries() -> List[FAQEntry]:
+    """Published FAQ knowledge items"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(
+                KnowledgeItem.id,
+                KnowledgeItem.title,
+                KnowledgeItem.summary,
+                KnowledgeItem.content,
+                KnowledgeItem.product_id,
+            ).where(
+                KnowledgeItem.type == KnowledgeType.FAQ,
+                KnowledgeItem.status == KnowledgeStatus.PUBLISHED,
+            )
+        )
+        return [
+            FAQEntry(row.id, row.title, row.content or row.summary or "", row.product_id)
+            for row in result.all()
+        ]
+
+
+async def refresh_faq_index() -> int:
+    """Rebuild the FAQ index from the database and swap it in"""
+    global _index
+    started = time.perf_counter()
+    _index = FAQIndex(await load_faq_entries())
+    FAQ_INDEX_SIZE.set(len(_index))
+    logger.info(f"Built FAQ index with {len(_index)} entries in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return len(_index)
+
+
+def match_faq(message: str, top_k: int = 3, product_id: Optional[int] = None) -> List[FAQMatch]:
+    """Look up a chat message in the current FAQ index"""
+    started = time.perf_counter()
+    matches = _index.search(message, top_k=top_k, product_id=product_id)
+    FAQ_MATCH_DURATION.observe(time.perf_counter() - started)
+    return matches
+
+
+async def _run_periodic(interval_s: int):
+    while True:
+        try:
+            await refresh_faq_index()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"FAQ index refresh failed: {e}")
+        await asyncio.sleep(interval_s)
+
+
+def start_refresh(interval_s: int):
+    """Build the FAQ index now and rebuild it periodically in the background"""
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_run_periodic(interval_s))
+
+
+async def stop_refresh():
+    """Stop periodic FAQ index rebuilds"""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "FAQ_INTENT",
+    "GENERAL_INTENT",
+    "classify_intent",
+    "char_ngrams",
+    "FAQEntry",
+    "FAQMatch",
+    "FAQIndex",
+    "get_faq_index",
+    "refresh_faq_index",
+    "match_faq",
+    "start_refresh",
+    "stop_refresh",
+]
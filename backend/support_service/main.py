@@ -14,7 +14,19 @@ import logging
 import time
 
 from config import settings
-from models import connect_to_databases, close_database_connections
+from common.health import create_health_checker
+from common.deadline import DeadlineMiddleware
+from common.rate_limit import RateLimitMiddleware
+from models import (
+    connect_to_databases,
+    close_database_connections,
+    POSTGRES,
+    REDIS,
+)
+from . import faq
+from .chat import get_chat_model, close_chat_model
+from .session import session_store
+from .tasks import start_task_queue, stop_task_queue
 
 logging.basicConfig(
     level=settings.log_level,
@@ -22,6 +34,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Backends this service cannot serve without, and ones it connects on demand
+# Redis backs the job queue, chat sessions and ticket queue, so it must
+# be connected before they are built
+REQUIRED_BACKENDS = (POSTGRES, REDIS)
+OPTIONAL_BACKENDS = ()
+
+health = create_health_checker(REQUIRED_BACKENDS, OPTIONAL_BACKENDS)
+
 REQUEST_COUNT = Counter(
     "support_service_requests_total",
     "Total requests to Support Service",
@@ -38,13 +58,21 @@ REQUEST_DURATION = Histogram(
 async def lifespan(app: FastAPI):
     logger.info("Starting Support Service...")
     try:
-        await connect_to_databases()
+        await connect_to_databases(required=REQUIRED_BACKENDS, optional=OPTIONAL_BACKENDS)
+        # Create the chat model client up front instead of on the first message
+        get_chat_model()
+        await session_store.start()
+        await start_task_queue()
+        faq.start_refresh(settings.support_faq_refresh_interval_s)
         logger.info("Support Service started successfully")
     except Exception as e:
         logger.error(f"Failed to start Support Service: {e}")
         raise
     yield
     logger.info("Shutting down Support Service...")
+    await faq.stop_refresh()
+    await stop_task_queue()
+    await close_chat_model()
     await close_database_connections()
     logger.info("Support Service stopped")
 
@@ -57,6 +85,8 @@ app = FastAPI(
     debug=settings.debug,
 )
 
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -108,14 +138,15 @@ async def health_check():
 
 @app.get("/ready", tags=["Health"])
 async def readiness_check():
-    return {
-        "status": "ready",
-        "service": "support-service",
-        "checks": {
-            "database": "ok",
-            "chatbot": "ok"
+    result = await health.check()
+    return JSONResponse(
+        status_code=200 if result["status"] == "ready" else 503,
+        content={
+            "status": result["status"],
+            "service": "support-service",
+            "checks": result["checks"],
         }
-    }
+    )
 
 
 @app.get("/metrics", tags=["Monitoring"])
@@ -123,6 +154,14 @@ async def metrics():
     return Response(content=generate_latest(), media_type="text/plain")
 
 
+# Import and include routers
+from .routes import chat_router, conversations_router, tickets_router
+
+app.include_router(chat_router, prefix="/api/v1/support", tags=["Support"])
+app.include_router(conversations_router, prefix="/api/v1/support/conversations", tags=["Support"])
+app.include_router(tickets_router, prefix="/api/v1/support/tickets", tags=["Support"])
+
+
 @app.get("/api/v1/status", tags=["API"])
 async def api_status():
     return {
@@ -135,39 +174,14 @@ async def api_status():
         },
         "endpoints": {
             "chat": "/api/v1/support/chat",
+            "chat_stream": "/api/v1/support/chat/stream",
+            "chat_websocket": "/api/v1/support/chat/ws",
             "conversations": "/api/v1/support/conversations",
             "tickets": "/api/v1/support/tickets"
         }
     }
 
 
-@app.post("/api/v1/support/chat", tags=["Support"])
-async def chat():
-    """AI chatbot endpoint"""
-    return {
-        "message": "Chatbot endpoint - Coming soon",
-        "status": "not_implemented"
-    }
-
-
-@app.get("/api/v1/support/conversations", tags=["Support"])
-async def list_conversations():
-    """List support conversations"""
-    return {
-        "conversations": [],
-        "total": 0
-    }
-
-
-@app.get("/api/v1/support/tickets", tags=["Support"])
-async def list_tickets():
-    """List support tickets"""
-    return {
-        "tickets": [],
-        "total": 0
-    }
-
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,356 @@
+"""
+Support Service - API Routes
+FastAPI route handlers for support chat, conversation history and tickets
+"""
+
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import AsyncIterator
+import json
+import logging
+
+from fastapi import (
+    APIRouter, Depends, HTTPException, Path, Query, Response, WebSocket, WebSocketDisconnect, status
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import get_db
+from . import crud, schemas
+from .chat import ChatTurn, ChatUnavailable, get_chat_model
+from .tickets import TicketsUnavailable, ticket_queue
+
+logger = logging.getLogger(__name__)
+
+# Create routers
+chat_router = APIRouter()
+conversations_router = APIRouter()
+tickets_router = APIRouter()
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _naive_utc(value: datetime | None) -> datetime | None:
+    """Timestamps are stored as naive UTC; convert aware query values to match"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@chat_router.post(
+    "/chat",
+    response_model=schemas.ChatResponse,
+    summary="Send a chat message"
+)
+async def chat(request: schemas.ChatRequest):
+    """
+    Send a customer message and wait for the complete answer
+
+    Omit **session_id** to start a new conversation; pass the returned one
+    to continue it. Use /chat/stream or /chat/ws to receive the answer as
+    it is generated. Close FAQ matches are answered without the model.
+    """
+    turn = ChatTurn(get_chat_model(), request)
+    try:
+        async with aclosing(turn.stream()) as stream:
+            async for _ in stream:
+                pass
+    except ChatUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return schemas.ChatResponse(
+        session_id=turn.session_id,
+        turn_id=turn.turn_id,
+        response=turn.response,
+        model_used=turn.model_used,
+        intent=turn.intent,
+        confidence_score=turn.confidence,
+        response_time_ms=turn.response_time_ms,
+    )
+
+
+@chat_router.post(
+    "/chat/stream",
+    summary="Send a chat message and stream the answer (SSE)"
+)
+async def chat_stream(request: schemas.ChatRequest):
+    """
+    Send a customer message and stream the answer as server-sent events
+
+    Events:
+    - **token**: `{"text": ...}` answer text as it is generated
+    - **done**: `{"session_id", "turn_id", "intent", "response_time_ms"}` after the last token
+    - **error**: `{"message": ...}` if generation failed
+    """
+    turn = ChatTurn(get_chat_model(), request)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async with aclosing(turn.stream()) as stream:
+                async for text in stream:
+                    yield _sse("token", {"text": text})
+        except ChatUnavailable as e:
+            yield _sse("error", {"message": str(e)})
+            return
+        except Exception as e:
+            logger.error(f"Chat stream failed for session {turn.session_id}: {e}")
+            yield _sse("error", {"message": "Failed to generate a response"})
+            return
+        yield _sse("done", {
+            "session_id": turn.session_id,
+            "turn_id": turn.turn_id,
+            "intent": turn.intent,
+            "response_time_ms": turn.response_time_ms,
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@chat_router.websocket("/chat/ws")
+async def chat_websocket(websocket: WebSocket):
+    """
+    Chat over a WebSocket
+
+    Send `{"message": ..., "session_id"?, "user_id"?, "user_email"?, "product_id"?}`
+    per customer message. Replies are `{"type": "token", "text"}` messages
+    followed by `{"type": "done", "session_id", "turn_id", "intent", "response_time_ms"}`,
+    or `{"type": "error", "message"}`. The session started by the first
+    message is reused for later ones.
+    """
+    await websocket.accept()
+    session_id = None
+    try:
+        while True:
+            data = await websocket.receive_json()
+            try:
+                request = schemas.ChatRequest(**{"session_id": session_id, **data})
+            except (ValidationError, TypeError) as e:
+                await websocket.send_json({"type": "error", "message": f"Invalid message: {e}"})
+                continue
+
+            turn = ChatTurn(get_chat_model(), request)
+            session_id = turn.session_id
+            try:
+                async with aclosing(turn.stream()) as stream:
+                    async for text in stream:
+                        await websocket.send_json({"type": "token", "text": text})
+            except WebSocketDisconnect:
+                raise
+            except ChatUnavailable as e:
+                await websocket.send_json({"type": "error", "message": str(e)})
+                continue
+            except Exception as e:
+                logger.error(f"Chat stream failed for session {session_id}: {e}")
+                await websocket.send_json({"type": "error", "message": "Failed to generate a response"})
+                continue
+            await websocket.send_json({
+                "type": "done",
+                "session_id": turn.session_id,
+                "turn_id": turn.turn_id,
+                "intent": turn.intent,
+                "response_time_ms": turn.response_time_ms,
+            })
+    except WebSocketDisconnect:
+        pass
+
+
+# ============================================================================
+# Conversation Endpoints
+# ============================================================================
+
+@conversations_router.get(
+    "/",
+    response_model=schemas.SessionSummaryPage,
+    summary="List conversation sessions"
+)
+async def list_conversations(
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500, description="Sessions per page"),
+    user_id: str | None = Query(None, description="Filter by user"),
+    escalated: bool | None = Query(None, description="Only sessions with (true) or without (false) an escalated turn"),
+    since: datetime | None = Query(None, description="Count only turns at or after this time (UTC)"),
+    until: datetime | None = Query(None, description="Count only turns before this time (UTC)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    One summary per chat session: turn count, first and last message,
+    escalation and average rating, aggregated in the database
+
+    Pages are keyset-paginated in session_id order; pass **next_cursor**
+    back as **cursor** until it is null.
+    """
+    try:
+        sessions, next_cursor = await crud.get_session_summaries(
+            db, limit=limit, cursor=cursor, user_id=user_id,
+            escalated=escalated, since=_naive_utc(since), until=_naive_utc(until)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return schemas.SessionSummaryPage(sessions=sessions, next_cursor=next_cursor)
+
+
+@conversations_router.get(
+    "/{session_id}",
+    response_model=schemas.ConversationHistoryResponse,
+    summary="Get a conversation's history"
+)
+async def get_conversation(
+    session_id: str = Path(..., description="Chat session ID", max_length=100),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200, description="Turns per page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Persisted turns of a chat session, oldest first"""
+    try:
+        turns, next_cursor = await crud.get_session_history(db, session_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not turns and cursor is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Conversation {session_id} not found"
+        )
+    return schemas.ConversationHistoryResponse(session_id=session_id, turns=turns, next_cursor=next_cursor)
+
+
+# ============================================================================
+# Ticket Endpoints
+# ============================================================================
+
+def _tickets_unavailable(e: TicketsUnavailable) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+
+@tickets_router.post(
+    "/",
+    response_model=schemas.TicketResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Escalate a session to a human agent"
+)
+async def create_ticket(
+    request: schemas.TicketCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Queue a ticket for a chat session and flag its turns as escalated
+
+    Tickets are claimed in order of effective wait: time since creation
+    plus credit for **priority**, negative **sentiment** and priority
+    products. Unset sentiment, product and user are taken from the
+    session's latest turn. If the session already has an open ticket it
+    is returned with status 200.
+    """
+    latest = await crud.get_latest_turn(db, request.session_id)
+    try:
+        ticket, created = await ticket_queue.create(
+            request.session_id,
+            reason=request.reason,
+            user_id=request.user_id or (latest.user_id if latest else None),
+            product_id=request.product_id if request.product_id is not None else (latest.product_id if latest else None),
+            sentiment=request.sentiment or (latest.sentiment if latest else None),
+            priority=request.priority,
+        )
+    except TicketsUnavailable as e:
+        raise _tickets_unavailable(e)
+    if latest is not None:
+        await crud.mark_session_escalated(db, request.session_id)
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return ticket
+
+
+@tickets_router.get(
+    "/",
+    response_model=schemas.TicketQueueResponse,
+    summary="List queued tickets"
+)
+async def list_tickets(limit: int = Query(50, ge=1, le=500, description="Tickets to return")):
+    """Queued tickets in the order agents will receive them, with queue depth"""
+    try:
+        tickets = await ticket_queue.list_queued(limit)
+        stats = await ticket_queue.stats()
+    except TicketsUnavailable as e:
+        raise _tickets_unavailable(e)
+    return schemas.TicketQueueResponse(tickets=tickets, **stats)
+
+
+@tickets_router.post(
+    "/claim",
+    response_model=schemas.TicketResponse,
+    responses={204: {"description": "No tickets waiting"}},
+    summary="Claim the next ticket"
+)
+async def claim_ticket(request: schemas.TicketClaim):
+    """
+    Assign the highest priority ticket to an agent
+
+    Claims are atomic, so concurrent agents never receive the same ticket.
+    A claim not resolved or released within the claim timeout returns to
+    the queue.
+    """
+    try:
+        ticket = await ticket_queue.claim(request.agent_id)
+    except TicketsUnavailable as e:
+        raise _tickets_unavailable(e)
+    if ticket is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return ticket
+
+
+@tickets_router.get(
+    "/{ticket_id}",
+    response_model=schemas.TicketResponse,
+    summary="Get a ticket"
+)
+async def get_ticket(ticket_id: str = Path(..., description="Ticket ID")):
+    """Get a ticket by ID (resolved tickets are kept for the retention period)"""
+    try:
+        ticket = await ticket_queue.get(ticket_id)
+    except TicketsUnavailable as e:
+        raise _tickets_unavailable(e)
+    if ticket is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Ticket {ticket_id} not found")
+    return ticket
+
+
+async def _finish_ticket(ticket_id: str, agent_id: str, resolve: bool):
+    try:
+        done = await (ticket_queue.resolve if resolve else ticket_queue.release)(ticket_id, agent_id)
+        ticket = await ticket_queue.get(ticket_id)
+    except TicketsUnavailable as e:
+        raise _tickets_unavailable(e)
+    if ticket is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Ticket {ticket_id} not found")
+    if not done:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Ticket {ticket_id} is not claimed by agent {agent_id}"
+        )
+    return ticket
+
+
+@tickets_router.post(
+    "/{ticket_id}/resolve",
+    response_model=schemas.TicketResponse,
+    summary="Resolve a claimed ticket"
+)
+async def resolve_ticket(request: schemas.TicketClaim, ticket_id: str = Path(..., description="Ticket ID")):
+    """Close a ticket; only the agent holding the claim can resolve it"""
+    return await _finish_ticket(ticket_id, request.agent_id, resolve=True)
+
+
+@tickets_router.post(
+    "/{ticket_id}/release",
+    response_model=schemas.TicketResponse,
+    summary="Return a claimed ticket to the queue"
+)
+async def release_ticket(request: schemas.TicketClaim, ticket_id: str = Path(..., description="Ticket ID")):
+    """Hand a ticket back to the queue at its original priority"""
+    return await _finish_ticket(ticket_id, request.agent_id, resolve=False)
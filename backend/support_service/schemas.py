@@ -0,0 +1,132 @@
+"""
+Support Service - Pydantic Schemas
+Request and response models for API validation
+"""
+
+from datetime import datetime
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+# ============================================================================
+# Chat Schemas
+# ============================================================================
+
+class ChatRequest(BaseModel):
+    """A customer message in a support chat"""
+    message: str = Field(..., description="Customer message", min_length=1, max_length=4000)
+    session_id: Optional[str] = Field(None, description="Chat session ID (omit to start a new session)", max_length=100)
+    user_id: Optional[str] = Field(None, description="User ID", max_length=100)
+    user_email: Optional[str] = Field(None, description="User email", max_length=200)
+    product_id: Optional[int] = Field(None, description="Product the conversation is about")
+
+
+class ChatResponse(BaseModel):
+    """A completed chat turn"""
+    session_id: str
+    turn_id: str
+    response: str
+    model_used: str = Field(..., description="Model that generated the answer, or faq-index")
+    intent: str
+    confidence_score: float = Field(..., description="FAQ match similarity, or intent rule confidence", ge=0, le=1)
+    response_time_ms: int
+
+
+# ============================================================================
+# Conversation Schemas
+# ============================================================================
+
+class ConversationTurnResponse(BaseModel):
+    """A persisted chat turn"""
+    id: int
+    session_id: str
+    user_id: Optional[str]
+    product_id: Optional[int]
+    user_query: str
+    ai_response: str
+    intent: Optional[str]
+    sentiment: Optional[str]
+    knowledge_ids: Optional[List[int]]
+    was_helpful: Optional[bool]
+    user_rating: Optional[int]
+    escalated_to_human: Optional[bool]
+    response_time_ms: Optional[int]
+    model_used: Optional[str]
+    confidence_score: Optional[float]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ConversationHistoryResponse(BaseModel):
+    """A page of one session's turns, oldest first"""
+    session_id: str
+    turns: List[ConversationTurnResponse]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor for the next page; null on the last page")
+
+
+class SessionSummary(BaseModel):
+    """Per-session aggregates"""
+    session_id: str
+    user_id: Optional[str]
+    turn_count: int
+    first_message_at: datetime
+    last_message_at: datetime
+    escalated: bool = Field(..., description="Any turn was escalated to a human")
+    avg_rating: Optional[float] = Field(None, description="Average user rating of rated turns")
+    rated_turns: int
+    avg_response_time_ms: Optional[float]
+
+
+class SessionSummaryPage(BaseModel):
+    """A page of session summaries in session_id order"""
+    sessions: List[SessionSummary]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor for the next page; null on the last page")
+
+
+# ============================================================================
+# Ticket Schemas
+# ============================================================================
+
+class TicketCreate(BaseModel):
+    """Escalate a chat session to a human agent"""
+    session_id: str = Field(..., description="Chat session to escalate", max_length=100)
+    reason: Optional[str] = Field(None, description="Why the session needs a human", max_length=1000)
+    priority: Literal["urgent", "high", "normal", "low"] = "normal"
+    sentiment: Optional[Literal["positive", "neutral", "negative"]] = Field(
+        None, description="Customer sentiment (defaults to the session's latest turn)"
+    )
+    product_id: Optional[int] = Field(None, description="Product concerned (defaults to the session's latest turn)")
+    user_id: Optional[str] = Field(None, max_length=100)
+
+
+class TicketClaim(BaseModel):
+    """An agent taking or handing back a ticket"""
+    agent_id: str = Field(..., description="Agent ID", min_length=1, max_length=100)
+
+
+class TicketResponse(BaseModel):
+    """An escalation ticket"""
+    id: str
+    session_id: str
+    user_id: Optional[str] = None
+    product_id: Optional[int] = None
+    sentiment: Optional[str] = None
+    priority: str
+    reason: Optional[str] = None
+    status: str = Field(..., description="queued, claimed or resolved")
+    agent_id: Optional[str] = None
+    claims: int = Field(0, description="Times the ticket has been claimed")
+    created_at: float
+    claimed_at: Optional[float] = None
+    claim_expires_at: Optional[float] = None
+    resolved_at: Optional[float] = None
+
+
+class TicketQueueResponse(BaseModel):
+    """Queued tickets in claim order"""
+    tickets: List[TicketResponse]
+    queued: int
+    claimed: int
+    next_wait_s: Optional[float] = Field(None, description="Seconds the next ticket to be claimed has waited")
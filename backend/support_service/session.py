@@ -0,0 +1,211 @@
+"""
+Support Service - Chat Sessions
+Conversation context kept in Redis with bounded, summarized history
+"""
+
+from dataclasses import dataclass, field
+from datetime import timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+import time
+
+from prometheus_client import Histogram
+from sqlalchemy import select
+
+from config import settings
+from models.database import AsyncSessionLocal, redis_cache
+from models.knowledge import SupportConversation
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+SESSION_OP_DURATION = Histogram(
+    "support_session_op_duration_seconds",
+    "Chat session store latency in seconds",
+    ["op", "source"],  # op: "load", "append"; source: "redis", "postgres"
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+@dataclass
+class ChatSession:
+    """Context needed to answer the next message in a conversation"""
+    session_id: str
+    summary: str = ""
+    turns: List[Dict[str, Any]] = field(default_factory=list)  # oldest first: {"id", "user", "assistant", "ts"}
+    meta: Dict[str, str] = field(default_factory=dict)
+
+
+def summarize_turns(summary: str, turns: List[Dict[str, Any]], max_chars: int) -> str:
+    """
+    Fold turns into the running summary
+
+    Extractive: one clipped line per exchange, dropping the oldest lines
+    once the summary exceeds max_chars.
+    """
+    lines = summary.splitlines() if summary else []
+    for turn in turns:
+        user = " ".join(turn["user"].split())[:200]
+        assistant = " ".join(turn["assistant"].split())[:200]
+        lines.append(f"- Customer: {user} | Agent: {assistant}")
+    while lines and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ChatSessionStore:
+    """
+    Chat sessions in Redis
+
+    Each session is a list of recent turns plus a hash holding the summary
+    of older turns and session metadata, both expiring after ttl_s idle.
+    Loading a session is one round trip. When the list grows past
+    max_turns, all but the newest keep_turns are folded into the summary,
+    so the context sent to the model stays bounded.
+
+    Redis must be connected when the service starts, so sessions are
+    shared across replicas and survive restarts. If it becomes unreachable
+    later, sessions are rebuilt from the most recent persisted turns in
+    Postgres (no summary) until it is back.
+    """
+
+    def __init__(
+        self,
+        ttl_s: int = 86400,
+        max_turns: int = 20,
+        keep_turns: int = 8,
+        summary_max_chars: int = 2000
+    ):
+        self.ttl_s = ttl_s
+        self.max_turns = max_turns
+        self.keep_turns = min(keep_turns, max_turns)
+        self.summary_max_chars = summary_max_chars
+        self._next_connect_attempt = 0.0
+
+    @staticmethod
+    def _keys(session_id: str) -> tuple[str, str]:
+        prefix = f"kcp:support:session:{session_id}"
+        return f"{prefix}:turns", f"{prefix}:meta"
+
+    async def start(self):
+        """Connect Redis, failing instead of keeping sessions per process"""
+        await asyncio.wait_for(redis_cache.ensure_connected(), timeout=settings.db_connect_timeout_s)
+        if redis_cache.client is None:
+            raise RuntimeError("Chat sessions need Redis; it is not connected")
+
+    async def _client(self):
+        if redis_cache.client is None and time.monotonic() >= self._next_connect_attempt:
+            try:
+                await asyncio.wait_for(redis_cache.ensure_connected(), timeout=settings.db_connect_timeout_s)
+            except Exception as e:
+                self._next_connect_attempt = time.monotonic() + 30
+                logger.warning(f"Chat sessions: Redis unavailable, using Postgres history: {e}")
+        return redis_cache.client
+
+    async def load(self, session_id: str) -> ChatSession:
+        """Load a session's summary, recent turns and metadata"""
+        started = time.perf_counter()
+        redis = await self._client()
+        if redis is not None:
+            turns_key, meta_key = self._keys(session_id)
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.lrange(turns_key, 0, -1)
+                    pipe.hgetall(meta_key)
+                    raw_turns, meta = await pipe.execute()
+                SESSION_OP_DURATION.labels(op="load", source="redis").observe(time.perf_counter() - started)
+                return ChatSession(
+                    session_id,
+                    summary=meta.pop("summary", ""),
+                    turns=[json.loads(t) for t in raw_turns],
+                    meta=meta,
+                )
+            except Exception as e:
+                logger.warning(f"Chat sessions: Redis load failed for {session_id}: {e}")
+
+        session = await self._load_from_postgres(session_id)
+        SESSION_OP_DURATION.labels(op="load", source="postgres").observe(time.perf_counter() - started)
+        return session
+
+    async def _load_from_postgres(self, session_id: str) -> ChatSession:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(SupportConversation.user_query, SupportConversation.ai_response, SupportConversation.created_at)
+                .where(SupportConversation.session_id == session_id)
+                .order_by(SupportConversation.created_at.desc())
+                .limit(self.keep_turns)
+            )
+            rows = result.all()
+        turns = [
+            {
+                "id": None,
+                "user": row.user_query,
+                "assistant": row.ai_response,
+                "ts": row.created_at.replace(tzinfo=timezone.utc).timestamp(),
+            }
+            for row in reversed(rows)
+        ]
+        return ChatSession(session_id, turns=turns)
+
+    async def append(self, session: ChatSession, turn: Dict[str, Any], meta: Optional[Dict[str, str]] = None):
+        """Record a finished turn, summarizing older turns when the history is full"""
+        session.turns.append(turn)
+        redis = await self._client()
+        if redis is None:
+            return
+
+        started = time.perf_counter()
+        turns_key, meta_key = self._keys(session.session_id)
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.rpush(turns_key, json.dumps(turn))
+                if meta:
+                    pipe.hset(meta_key, mapping=meta)
+                pipe.hsetnx(meta_key, "created_at", str(int(time.time())))
+                pipe.expire(turns_key, self.ttl_s)
+                pipe.expire(meta_key, self.ttl_s)
+                results = await pipe.execute()
+            length = results[0]
+            if length > self.max_turns:
+                await self._compact(redis, session, length - self.keep_turns)
+        except Exception as e:
+            logger.warning(f"Chat sessions: Redis append failed for {session.session_id}: {e}")
+        SESSION_OP_DURATION.labels(op="append", source="redis").observe(time.perf_counter() - started)
+
+    async def _compact(self, redis, session: ChatSession, overflow: int):
+        turns_key, meta_key = self._keys(session.session_id)
+        # Read and drop the oldest turns atomically so concurrent appends are kept
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(turns_key, 0, overflow - 1)
+            pipe.ltrim(turns_key, overflow, -1)
+            pipe.hget(meta_key, "summary")
+            raw_turns, _, summary = await pipe.execute()
+
+        session.summary = summarize_turns(
+            summary or "", [json.loads(t) for t in raw_turns], self.summary_max_chars
+        )
+        session.turns = session.turns[-self.keep_turns:]
+        await redis.hset(meta_key, "summary", session.summary)
+
+
+# Global session store
+session_store = ChatSessionStore(
+    ttl_s=settings.support_session_ttl_s,
+    max_turns=settings.support_session_max_turns,
+    keep_turns=settings.support_session_keep_turns,
+    summary_max_chars=settings.support_session_summary_max_chars,
+)
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "ChatSession",
+    "ChatSessionStore",
+    "summarize_turns",
+    "session_store",
+]
@@ -0,0 +1,95 @@
+"""
+Support Service - Background Tasks
+Conversation turns are written to Postgres off the request path
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import logging
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config import settings
+from common.queue import JobQueue, create_job_queue
+from models.database import AsyncSessionLocal
+from models.knowledge import SupportConversation
+
+logger = logging.getLogger(__name__)
+
+# Job types
+SUPPORT_PERSIST_TURN = "support.persist_turn"
+
+# Global job queue (started in the service lifespan)
+support_queue: Optional[JobQueue] = None
+
+
+# ============================================================================
+# Handlers
+# ============================================================================
+
+async def persist_turn(entity_id: str, payload: Dict[str, Any]):
+    """
+    Insert a finished chat turn as a SupportConversation row
+
+    Jobs may be delivered more than once; a turn already stored under its
+    turn_id is left as is.
+    """
+    values = {"turn_id": entity_id, **payload}
+    # Stored as naive UTC like the column default
+    values["created_at"] = datetime.fromtimestamp(values["created_at"], tz=timezone.utc).replace(tzinfo=None)
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            pg_insert(SupportConversation)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=[SupportConversation.turn_id])
+        )
+        await db.commit()
+
+
+# ============================================================================
+# Enqueueing
+# ============================================================================
+
+async def enqueue_turn_persist(turn_id: str, row: Dict[str, Any]):
+    """
+    Schedule a chat turn for persistence
+
+    Without a running queue (scripts, tests) the row is written inline.
+    """
+    if support_queue is not None and support_queue.running:
+        await support_queue.enqueue(SUPPORT_PERSIST_TURN, turn_id, payload=row)
+        return
+    await persist_turn(turn_id, row)
+
+
+# ============================================================================
+# Lifecycle
+# ============================================================================
+
+async def start_task_queue():
+    """Create the support job queue and start its workers"""
+    global support_queue
+    support_queue = create_job_queue("support")
+    support_queue.register(SUPPORT_PERSIST_TURN, persist_turn)
+    await support_queue.start(concurrency=settings.task_queue_concurrency)
+
+
+async def stop_task_queue():
+    """Stop the support job queue workers"""
+    global support_queue
+    if support_queue is not None:
+        await support_queue.stop()
+        support_queue = None
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "SUPPORT_PERSIST_TURN",
+    "persist_turn",
+    "enqueue_turn_persist",
+    "start_task_queue",
+    "stop_task_queue",
+]
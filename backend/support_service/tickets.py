@@ -0,0 +1,319 @@
+"""
+Support Service - Escalation Tickets
+Priority queue of conversations handed to human agents, on Redis sorted sets
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+import uuid
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from config import settings
+from models.database import redis_cache
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+TICKET_EVENTS = Counter(
+    "support_tickets_total",
+    "Ticket lifecycle events",
+    ["event"]  # "created", "deduplicated", "claimed", "released", "reclaimed", "resolved"
+)
+TICKET_QUEUE_DEPTH = Gauge(
+    "support_ticket_queue_depth",
+    "Tickets waiting for an agent (queued) or being handled (claimed)",
+    ["state"]
+)
+TICKET_WAIT = Histogram(
+    "support_ticket_wait_seconds",
+    "Time from ticket creation to an agent claiming it",
+    buckets=(5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400)
+)
+
+# Requested priority -> seconds of wait the ticket is credited with
+PRIORITY_BOOST_S = {"urgent": 3600, "high": 1200, "normal": 0, "low": -1200}
+
+QUEUED = "queued"
+CLAIMED = "claimed"
+RESOLVED = "resolved"
+
+_PREFIX = "kcp:support:tickets"
+
+# Queue score is creation time minus the ticket's boost, so the lowest
+# score is the ticket with the longest effective wait. Waiting raises a
+# ticket's effective priority without ever rescoring it.
+
+# KEYS: queue zset, open-by-session hash, ticket hash
+# ARGV: ticket id, session id, score, then ticket fields as name/value pairs
+# Returns: {ticket id, created (1) or already open (0), queue depth}
+_CREATE_SCRIPT = """
+local open = redis.call('HGET', KEYS[2], ARGV[2])
+if open then
+    return {open, 0, redis.call('ZCARD', KEYS[1])}
+end
+redis.call('HSET', KEYS[3], unpack(ARGV, 4))
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[2], ARGV[1])
+return {ARGV[1], 1, redis.call('ZCARD', KEYS[1])}
+"""
+
+# Return expired claims to the queue, then pop the highest priority ticket
+# and assign it, all in one step so two agents never get the same ticket.
+# KEYS: queue zset, claimed zset
+# ARGV: now, claim deadline, agent id, ticket key prefix, max reclaims
+# Returns: {ticket id or '', tickets reclaimed, queue depth, claimed count}
+_CLAIM_SCRIPT = """
+local now = tonumber(ARGV[1])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, tonumber(ARGV[5]))
+for _, id in ipairs(expired) do
+    local key = ARGV[4] .. id
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('ZADD', KEYS[1], redis.call('HGET', key, 'score'), id)
+    redis.call('HSET', key, 'status', 'queued', 'agent_id', '', 'claim_expires_at', '')
+end
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+    return {'', #expired, 0, redis.call('ZCARD', KEYS[2])}
+end
+local id = popped[1]
+local key = ARGV[4] .. id
+redis.call('ZADD', KEYS[2], ARGV[2], id)
+redis.call('HSET', key, 'status', 'claimed', 'agent_id', ARGV[3], 'claimed_at', ARGV[1], 'claim_expires_at', ARGV[2])
+redis.call('HINCRBY', key, 'claims', 1)
+return {id, #expired, redis.call('ZCARD', KEYS[1]), redis.call('ZCARD', KEYS[2])}
+"""
+
+# Finish or give back a claimed ticket; only the claiming agent may.
+# KEYS: queue zset, claimed zset, open-by-session hash, ticket hash
+# ARGV: ticket id, agent id, "resolve" or "release", now, retention seconds
+# Returns: {1 on success or 0, queue depth, claimed count}
+_FINISH_SCRIPT = """
+if redis.call('HGET', KEYS[4], 'status') ~= 'claimed' or redis.call('HGET', KEYS[4], 'agent_id') ~= ARGV[2] then
+    return {0, redis.call('ZCARD', KEYS[1]), redis.call('ZCARD', KEYS[2])}
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+if ARGV[3] == 'resolve' then
+    redis.call('HSET', KEYS[4], 'status', 'resolved', 'resolved_at', ARGV[4], 'claim_expires_at', '')
+    redis.call('HDEL', KEYS[3], redis.call('HGET', KEYS[4], 'session_id'))
+    redis.call('EXPIRE', KEYS[4], tonumber(ARGV[5]))
+else
+    redis.call('HSET', KEYS[4], 'status', 'queued', 'agent_id', '', 'claim_expires_at', '')
+    redis.call('ZADD', KEYS[1], redis.call('HGET', KEYS[4], 'score'), ARGV[1])
+end
+return {1, redis.call('ZCARD', KEYS[1]), redis.call('ZCARD', KEYS[2])}
+"""
+
+
+class TicketsUnavailable(Exception):
+    """Redis, which holds the ticket queue, is not reachable"""
+
+
+def priority_boost(
+    sentiment: Optional[str],
+    product_id: Optional[int],
+    priority: str = "normal"
+) -> float:
+    """Seconds of wait a new ticket is credited with"""
+    boost = PRIORITY_BOOST_S.get(priority, 0)
+    if sentiment == "negative":
+        boost += settings.support_ticket_negative_boost_s
+    if product_id is not None and product_id in settings.support_ticket_priority_product_ids:
+        boost += settings.support_ticket_product_boost_s
+    return boost
+
+
+def _decode(raw: Dict[str, str]) -> Dict[str, Any]:
+    """Ticket hash -> API dict"""
+    ticket: Dict[str, Any] = {k: (v if v != "" else None) for k, v in raw.items()}
+    for key in ("created_at", "claimed_at", "claim_expires_at", "resolved_at", "score"):
+        if ticket.get(key) is not None:
+            ticket[key] = float(ticket[key])
+    for key in ("product_id", "claims"):
+        if ticket.get(key) is not None:
+            ticket[key] = int(ticket[key])
+    ticket.setdefault("claims", 0)
+    return ticket
+
+
+class TicketQueue:
+    """
+    Escalation tickets ordered by effective wait
+
+    The queue and the set of claimed tickets are sorted sets, so creating,
+    claiming and finishing a ticket are O(log n). Claims are leases: a
+    ticket not resolved or released within claim_timeout_s goes back to
+    the queue on the next claim. A session has at most one open ticket;
+    escalating it again returns the open one.
+    """
+
+    def __init__(self, claim_timeout_s: int = 900, retention_s: int = 7 * 86400, max_reclaims: int = 100):
+        self.claim_timeout_s = claim_timeout_s
+        self.retention_s = retention_s
+        self.max_reclaims = max_reclaims
+        self.queue_key = f"{_PREFIX}:queue"
+        self.claimed_key = f"{_PREFIX}:claimed"
+        self.open_key = f"{_PREFIX}:open"
+        self.ticket_prefix = f"{_PREFIX}:ticket:"
+        self._scripts: Optional[Tuple[Any, Any, Any]] = None
+
+    async def _client(self):
+        if redis_cache.client is None:
+            try:
+                await asyncio.wait_for(redis_cache.ensure_connected(), timeout=settings.db_connect_timeout_s)
+            except Exception as e:
+                raise TicketsUnavailable(f"Ticket queue unavailable: {e}") from e
+        client = redis_cache.client
+        if self._scripts is None:
+            self._scripts = (
+                client.register_script(_CREATE_SCRIPT),
+                client.register_script(_CLAIM_SCRIPT),
+                client.register_script(_FINISH_SCRIPT),
+            )
+        return client
+
+    def _record_depth(self, queued: int, claimed: Optional[int] = None):
+        TICKET_QUEUE_DEPTH.labels(state=QUEUED).set(queued)
+        if claimed is not None:
+            TICKET_QUEUE_DEPTH.labels(state=CLAIMED).set(claimed)
+
+    async def create(
+        self,
+        session_id: str,
+        reason: Optional[str] = None,
+        user_id: Optional[str] = None,
+        product_id: Optional[int] = None,
+        sentiment: Optional[str] = None,
+        priority: str = "normal"
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queue a ticket for a session
+
+        Returns (ticket, created); created is False if the session already
+        had an open ticket, which is returned instead.
+        """
+        await self._client()
+        create_script = self._scripts[0]
+        now = time.time()
+        ticket_id = uuid.uuid4().hex
+        score = now - priority_boost(sentiment, product_id, priority)
+        fields = {
+            "id": ticket_id,
+            "session_id": session_id,
+            "user_id": user_id or "",
+            "product_id": "" if product_id is None else str(product_id),
+            "sentiment": sentiment or "",
+            "priority": priority,
+            "reason": reason or "",
+            "status": QUEUED,
+            "score": repr(score),
+            "created_at": repr(now),
+            "claims": "0",
+        }
+        args = [ticket_id, session_id, repr(score)]
+        for name, value in fields.items():
+            args.extend((name, value))
+        result_id, created, depth = await create_script(
+            keys=[self.queue_key, self.open_key, self.ticket_prefix + ticket_id],
+            args=args
+        )
+        self._record_depth(int(depth))
+        TICKET_EVENTS.labels(event="created" if created else "deduplicated").inc()
+        return await self.get(str(result_id)), bool(created)
+
+    async def get(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """A ticket by ID, or None if unknown or expired"""
+        client = await self._client()
+        raw = await client.hgetall(self.ticket_prefix + ticket_id)
+        return _decode(raw) if raw else None
+
+    async def claim(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """Assign the highest priority ticket to an agent, or None if the queue is empty"""
+        await self._client()
+        claim_script = self._scripts[1]
+        now = time.time()
+        ticket_id, reclaimed, depth, claimed = await claim_script(
+            keys=[self.queue_key, self.claimed_key],
+            args=[repr(now), repr(now + self.claim_timeout_s), agent_id, self.ticket_prefix, self.max_reclaims]
+        )
+        self._record_depth(int(depth), int(claimed))
+        if reclaimed:
+            TICKET_EVENTS.labels(event="reclaimed").inc(int(reclaimed))
+            logger.info(f"Returned {reclaimed} expired ticket claims to the queue")
+        if not ticket_id:
+            return None
+
+        ticket = await self.get(str(ticket_id))
+        TICKET_EVENTS.labels(event="claimed").inc()
+        if ticket and ticket["claims"] == 1:
+            TICKET_WAIT.observe(now - ticket["created_at"])
+        return ticket
+
+    async def _finish(self, ticket_id: str, agent_id: str, action: str) -> bool:
+        await self._client()
+        finish_script = self._scripts[2]
+        ok, depth, claimed = await finish_script(
+            keys=[self.queue_key, self.claimed_key, self.open_key, self.ticket_prefix + ticket_id],
+            args=[ticket_id, agent_id, action, repr(time.time()), self.retention_s]
+        )
+        self._record_depth(int(depth), int(claimed))
+        if ok:
+            TICKET_EVENTS.labels(event="resolved" if action == "resolve" else "released").inc()
+        return bool(ok)
+
+    async def resolve(self, ticket_id: str, agent_id: str) -> bool:
+        """Close a ticket claimed by agent_id; False if the agent does not hold it"""
+        return await self._finish(ticket_id, agent_id, "resolve")
+
+    async def release(self, ticket_id: str, agent_id: str) -> bool:
+        """Return a ticket claimed by agent_id to the queue at its original priority"""
+        return await self._finish(ticket_id, agent_id, "release")
+
+    async def list_queued(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Queued tickets in the order they will be claimed"""
+        client = await self._client()
+        ticket_ids = await client.zrange(self.queue_key, 0, limit - 1)
+        async with client.pipeline(transaction=False) as pipe:
+            for ticket_id in ticket_ids:
+                pipe.hgetall(self.ticket_prefix + ticket_id)
+            raws = await pipe.execute()
+        return [_decode(raw) for raw in raws if raw]
+
+    async def stats(self) -> Dict[str, Any]:
+        """Queue depth, claimed count and the wait of the next ticket"""
+        client = await self._client()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.zcard(self.queue_key)
+            pipe.zcard(self.claimed_key)
+            pipe.zrange(self.queue_key, 0, 0)
+            queued, claimed, head = await pipe.execute()
+        self._record_depth(int(queued), int(claimed))
+
+        next_wait_s = None
+        if head:
+            created_at = await client.hget(self.ticket_prefix + head[0], "created_at")
+            if created_at:
+                next_wait_s = round(time.time() - float(created_at), 1)
+        return {"queued": int(queued), "claimed": int(claimed), "next_wait_s": next_wait_s}
+
+
+# Global ticket queue
+ticket_queue = TicketQueue(
+    claim_timeout_s=settings.support_ticket_claim_timeout_s,
+    retention_s=settings.support_ticket_retention_s,
+)
+
+
+# ============================================================================
+# Exports
+# ============================================================================
+
+__all__ = [
+    "PRIORITY_BOOST_S",
+    "TicketsUnavailable",
+    "priority_boost",
+    "TicketQueue",
+    "ticket_queue",
+]
@@ -0,0 +1,25 @@
+"""
+Shared fixtures for unit tests
+
+Unit tests import the service packages directly, so the backend directory
+is put on the import path. Redis-backed code runs against fakeredis.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point the shared Redis clients at an in-process fake server"""
+    fakeredis = pytest.importorskip("fakeredis")
+    from models.database import redis_cache
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_cache, "client", fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(redis_cache, "binary", fakeredis.FakeAsyncRedis(server=server))
+    return redis_cache.client
@@ -0,0 +1,156 @@
+"""
+Content Batch Tests
+Store selection, checkpoints, lease locks and lease loss during a run
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from content_service import batch
+from content_service.batch import (
+    COMPLETED,
+    FileBatchStore,
+    InMemoryBatchStore,
+    RedisBatchStore,
+    create_batch_store,
+    new_batch,
+    run_batch,
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def _params(**extra):
+    return {"content_type": "product_description", "model": "test-model", "temperature": 0.7, "max_tokens": 100, **extra}
+
+
+def test_memory_store_only_when_configured(monkeypatch):
+    monkeypatch.setattr(batch.redis_cache, "client", None)
+    monkeypatch.setattr(batch.settings, "task_queue_backend", "memory")
+    assert isinstance(create_batch_store(), InMemoryBatchStore)
+
+    monkeypatch.setattr(batch.settings, "task_queue_backend", "redis")
+    with pytest.raises(RuntimeError):
+        create_batch_store()
+
+
+def test_file_store_keeps_checkpoints(tmp_path):
+    path = str(tmp_path / "batch.json")
+    state = new_batch(_params(), batch_id="b1")
+
+    async def scenario():
+        await FileBatchStore(path).save("b1", state)
+        return await FileBatchStore(path).get("b1"), await FileBatchStore(path).get("b2")
+
+    assert run(scenario()) == (state, None)
+
+
+def test_redis_lease_belongs_to_one_owner(fake_redis):
+    store = RedisBatchStore()
+
+    async def scenario():
+        taken = await store.acquire("b1", "w1", 60)
+        other = await store.acquire("b1", "w2", 60)
+        renewed = await store.acquire("b1", "w1", 60)
+        await store.release("b1", "w2")
+        still_held = await store.acquire("b1", "w2", 60)
+        await store.release("b1", "w1")
+        after_release = await store.acquire("b1", "w2", 60)
+        return taken, other, renewed, still_held, after_release
+
+    assert run(scenario()) == (True, False, True, False, True)
+
+
+class _Session:
+    """Async session that records inserted rows"""
+
+    def __init__(self, inserted):
+        self.inserted = inserted
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, rows=None):
+        if statement.is_insert:
+            self.inserted.extend(rows)
+        ids = list(range(len(self.inserted) - len(rows or []), len(self.inserted)))
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: ids))
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    """Three one-product pages, generated without a provider or database"""
+    products = [SimpleNamespace(id=i, name=f"Product {i}") for i in (1, 2, 3)]
+    inserted = []
+
+    async def next_page(params, cursor, size):
+        return [p for p in products if p.id > cursor][:size]
+
+    async def page_prompts(params, page, template):
+        return [f"Describe {p.name}" for p in page]
+
+    async def generate(params, system, prompt):
+        return {"content": prompt.upper(), "input_tokens": 1, "output_tokens": 2}
+
+    async def score_documents(db, model, documents):
+        return [{} for _ in documents]
+
+    async def no_template(params):
+        return None
+
+    monkeypatch.setattr(batch, "_next_page", next_page)
+    monkeypatch.setattr(batch, "_page_prompts", page_prompts)
+    monkeypatch.setattr(batch, "_generate", generate)
+    monkeypatch.setattr(batch, "score_documents", score_documents)
+    monkeypatch.setattr(batch, "resolve_template", no_template)
+    monkeypatch.setattr(batch, "AsyncSessionLocal", lambda: _Session(inserted))
+    return inserted
+
+
+def test_batch_runs_every_page_once(pages):
+    store = InMemoryBatchStore()
+
+    async def scenario():
+        await store.save("b1", new_batch(_params(page_size=1), batch_id="b1"))
+        report = await run_batch("b1", store, "system")
+        return report, await store.get("b1")
+
+    report, state = run(scenario())
+    assert [row["product_id"] for row in pages] == [1, 2, 3]
+    assert state["status"] == COMPLETED
+    assert (state["processed"], state["succeeded"], state["cursor"]) == (3, 3, 3)
+
+
+def test_lost_lease_stops_before_writing_the_page(pages):
+    class LosingStore(InMemoryBatchStore):
+        """Loses the lease after the first page is written"""
+
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+
+        async def acquire(self, batch_id, owner, ttl_s):
+            self.calls += 1
+            return self.calls <= 2
+
+    store = LosingStore()
+
+    async def scenario():
+        await store.save("b1", new_batch(_params(page_size=1), batch_id="b1"))
+        await run_batch("b1", store, "system")
+        return await store.get("b1")
+
+    state = run(scenario())
+    assert [row["product_id"] for row in pages] == [1]
+    # The new lease holder resumes from the last checkpoint
+    assert (state["cursor"], state["processed"], state["status"]) == (1, 1, "running")
@@ -0,0 +1,94 @@
+"""
+Content Job Store Tests
+Backend selection, job records and streamed output
+"""
+
+import asyncio
+
+import pytest
+
+from content_service import jobs
+from content_service.jobs import COMPLETED, InMemoryJobStore, RedisJobStore, create_job_store
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture(params=["redis", "memory"])
+def store(request):
+    if request.param == "redis":
+        request.getfixturevalue("fake_redis")
+        return RedisJobStore(ttl_s=60)
+    return InMemoryJobStore(ttl_s=60)
+
+
+def test_memory_store_only_when_configured(monkeypatch):
+    monkeypatch.setattr(jobs.redis_cache, "client", None)
+    monkeypatch.setattr(jobs.settings, "task_queue_backend", "memory")
+    assert isinstance(create_job_store(), InMemoryJobStore)
+
+    monkeypatch.setattr(jobs.settings, "task_queue_backend", "redis")
+    with pytest.raises(RuntimeError):
+        create_job_store()
+
+
+def test_redis_store_when_connected(monkeypatch, fake_redis):
+    monkeypatch.setattr(jobs.settings, "task_queue_backend", "redis")
+    assert isinstance(create_job_store(), RedisJobStore)
+
+
+def test_job_record_round_trip(store):
+    async def scenario():
+        await store.create("j1", {"status": "queued", "temperature": 0.2, "max_tokens": 500, "product_id": None})
+        await store.update("j1", {"status": COMPLETED, "output_tokens": 42, "cached": True})
+        return await store.get("j1"), await store.get("missing")
+
+    job, missing = run(scenario())
+    assert job == {
+        "status": COMPLETED,
+        "temperature": 0.2,
+        "max_tokens": 500,
+        "product_id": None,
+        "output_tokens": 42,
+        "cached": True,
+    }
+    assert missing is None
+
+
+def test_stream_is_read_in_order_until_end(store):
+    async def scenario():
+        await store.create("j1", {"status": "running"})
+        await store.append_chunk("j1", "Hello")
+        await store.append_chunk("j1", ", world")
+        first, position, ended = await store.read_chunks("j1", "0", 10)
+        await store.append_chunk("j1", "!")
+        await store.end_stream("j1")
+        rest, _, finished = await store.read_chunks("j1", position, 10)
+        return first, ended, rest, finished
+
+    assert run(scenario()) == (["Hello", ", world"], False, ["!"], True)
+
+
+def test_reader_waits_for_chunks_written_while_it_blocks(store):
+    async def scenario():
+        await store.create("j1", {"status": "running"})
+
+        async def write():
+            await asyncio.sleep(0.05)
+            await store.append_chunk("j1", "late")
+
+        writer = asyncio.create_task(write())
+        chunks, _, _ = await store.read_chunks("j1", "0", 2000)
+        await writer
+        return chunks
+
+    assert run(scenario()) == ["late"]
+
+
+def test_redis_jobs_are_visible_to_other_instances(fake_redis):
+    async def scenario():
+        await RedisJobStore().create("j1", {"status": "queued"})
+        return await RedisJobStore().get("j1")
+
+    assert run(scenario())["status"] == "queued"
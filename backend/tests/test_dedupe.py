@@ -0,0 +1,128 @@
+"""
+Near-Duplicate Detection Tests
+LSH parameters, band keys, the in-memory index and the bulk report
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from common.scoring import get_minhasher
+from knowledge_service import dedupe, tasks
+from knowledge_service.dedupe import InMemoryDedupeIndex, band_keys, lsh_params
+from models.knowledge import KnowledgeStatus
+
+BASE = " ".join(f"word{i}" for i in range(300))
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = InMemoryDedupeIndex(get_minhasher().num_perm, 0.8)
+    monkeypatch.setattr(dedupe, "_index", index)
+    return index
+
+
+def _item(item_id, content, status=KnowledgeStatus.PUBLISHED):
+    return SimpleNamespace(id=item_id, content=content, status=status)
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8, 0.9])
+def test_lsh_params_fit_signature_and_threshold(threshold):
+    bands, rows = lsh_params(128, threshold)
+    assert bands * rows <= 128
+    # The collision curve's midpoint sits near the threshold
+    assert (1 / bands) ** (1 / rows) == pytest.approx(threshold, abs=0.15)
+
+
+def test_higher_threshold_uses_more_rows_per_band():
+    assert lsh_params(128, 0.9)[1] > lsh_params(128, 0.5)[1]
+
+
+def test_band_keys_differ_only_in_changed_bands():
+    signature = np.arange(128, dtype=np.uint32)
+    changed = signature.copy()
+    changed[5] = 999
+    keys, changed_keys = band_keys(signature, 16, 8), band_keys(changed, 16, 8)
+    assert len(set(keys)) == 16
+    assert [a == b for a, b in zip(keys, changed_keys)] == [i != 0 for i in range(16)]
+
+
+def test_find_duplicates_reads_only_shared_buckets(index):
+    words = BASE.split()
+    near = " ".join(words[:295] + ["changed"] * 5)
+
+    async def scenario():
+        await dedupe.index_item(_item(1, BASE))
+        await dedupe.index_item(_item(2, near))
+        await dedupe.index_item(_item(3, "an unrelated article about charging cases and firmware"))
+        return await dedupe.find_duplicates(_item(1, BASE))
+
+    found = asyncio.run(scenario())
+    assert [item_id for item_id, _ in found] == [2]
+    assert found[0][1] >= 0.8
+
+
+def test_empty_and_archived_items_are_not_indexed(index):
+    async def scenario():
+        await dedupe.index_item(_item(1, BASE))
+        await dedupe.index_item(_item(1, "   "))
+        await dedupe.index_item(_item(2, ""))
+        await dedupe.index_item(_item(3, BASE, KnowledgeStatus.ARCHIVED))
+        return await index.indexed_ids(), await dedupe.find_duplicates(_item(4, ""))
+
+    assert asyncio.run(scenario()) == (set(), [])
+
+
+def test_status_change_reindexes_without_rechunking(index, monkeypatch):
+    async def unchanged(db, item, force=False):
+        return False
+
+    async def no_scoring(db, items):
+        return None
+
+    monkeypatch.setattr(tasks, "sync_item_chunks", unchanged)
+    monkeypatch.setattr(tasks, "score_knowledge_items", no_scoring)
+    monkeypatch.setattr(tasks, "knowledge_queue", None)
+    item = SimpleNamespace(id=1, content=BASE, title="t", product_id=None, tags=[], status=KnowledgeStatus.PUBLISHED)
+    published = tasks.sync_version(item)
+
+    async def sync(status):
+        item.status = status
+        await tasks.enqueue_knowledge_sync(None, item)
+        return await index.indexed_ids()
+
+    assert asyncio.run(sync(KnowledgeStatus.ARCHIVED)) == set()
+    assert tasks.sync_version(item) != published
+    assert asyncio.run(sync(KnowledgeStatus.PUBLISHED)) == {1}
+
+
+class _Session:
+    """Async session returning one page of rows, then none"""
+
+    def __init__(self, rows):
+        self.pages = [rows, []]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query):
+        return SimpleNamespace(all=lambda page=self.pages.pop(0): page)
+
+
+def test_report_clusters_duplicates_but_not_empty_items(index, monkeypatch):
+    def row(item_id, content):
+        return SimpleNamespace(id=item_id, content=content, title=f"Item {item_id}", product_id=None, language="en")
+
+    rows = [row(1, BASE), row(2, BASE), row(3, ""), row(4, " "), row(5, None), row(6, "something else entirely")]
+    monkeypatch.setattr(dedupe, "AsyncSessionLocal", lambda: _Session(rows))
+
+    report = asyncio.run(dedupe.build_dedupe_report())
+    assert report["items"] == 3
+    assert report["empty_items"] == 3
+    assert [[i["id"] for i in c["items"]] for c in report["clusters"]] == [[1, 2]]
+    assert asyncio.run(index.indexed_ids()) == {1, 2, 6}
@@ -0,0 +1,126 @@
+"""
+Job Queue Tests
+Coalescing and versioning on the Redis and in-memory backends
+"""
+
+import asyncio
+
+import pytest
+
+from common.queue import InMemoryJobQueue, RedisStreamJobQueue
+
+
+@pytest.fixture(params=["redis", "memory"])
+def queue(request):
+    if request.param == "redis":
+        request.getfixturevalue("fake_redis")
+        return RedisStreamJobQueue("test")
+    return InMemoryJobQueue("test")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _setup(queue):
+    await queue._setup()
+    queue.processed = []
+
+    async def handler(entity_id, payload):
+        queue.processed.append(payload["content"])
+
+    queue.register("sync", handler)
+
+
+async def _take(queue):
+    delivery = await queue._take("worker")
+    assert delivery is not None
+    return delivery
+
+
+async def _drain(queue):
+    while await queue.depth():
+        await queue._process(await _take(queue))
+
+
+def test_burst_of_updates_runs_once_with_latest_payload(queue):
+    async def scenario():
+        await _setup(queue)
+        statuses = [
+            await queue.enqueue("sync", 1, version=v, payload={"content": v})
+            for v in ("a", "b", "c")
+        ]
+        await _drain(queue)
+        return statuses
+
+    assert run(scenario()) == ["enqueued", "coalesced", "coalesced"]
+    assert queue.processed == ["c"]
+
+
+def test_completed_version_is_skipped(queue):
+    async def scenario():
+        await _setup(queue)
+        await queue.enqueue("sync", 1, version="a", payload={"content": "a"})
+        await _drain(queue)
+        return (
+            await queue.enqueue("sync", 1, version="a", payload={"content": "a"}),
+            await queue.enqueue("sync", 2, version="a", payload={"content": "a"}),
+            await queue.enqueue("sync", 1, payload={"content": "a"}),
+        )
+
+    assert run(scenario()) == ("skipped", "enqueued", "enqueued")
+
+
+def test_revert_while_job_is_running_is_not_skipped(queue):
+    async def scenario():
+        await _setup(queue)
+        await queue.enqueue("sync", 1, version="a", payload={"content": "a"})
+        await _drain(queue)
+
+        await queue.enqueue("sync", 1, version="b", payload={"content": "b"})
+        running = await _take(queue)
+        # Reverted to the last completed version while b is in flight
+        reverted = await queue.enqueue("sync", 1, version="a", payload={"content": "a"})
+        await queue._process(running)
+        await _drain(queue)
+
+        again = await queue.enqueue("sync", 1, version="b", payload={"content": "b"})
+        await _drain(queue)
+        return reverted, again
+
+    assert run(scenario()) == ("coalesced", "enqueued")
+    assert queue.processed == ["a", "b", "a", "b"]
+
+
+def test_update_during_run_queues_another_pass(queue):
+    async def scenario():
+        await _setup(queue)
+        await queue.enqueue("sync", 1, version="a", payload={"content": "a"})
+        running = await _take(queue)
+        await queue.enqueue("sync", 1, version="b", payload={"content": "b"})
+        await queue._process(running)
+        await _drain(queue)
+        return await queue.depth()
+
+    assert run(scenario()) == 0
+    assert queue.processed == ["a", "b"]
+
+
+def test_failing_job_is_retried_then_dropped(queue):
+    attempts = []
+
+    async def scenario():
+        await _setup(queue)
+        queue.max_retries = 2
+
+        async def broken(entity_id, payload):
+            attempts.append(entity_id)
+            raise ValueError("boom")
+
+        queue.register("sync", broken)
+        await queue.enqueue("sync", 1, payload={"content": "a"})
+        await _drain(queue)
+        return await queue.depth()
+
+    assert run(scenario()) == 0
+    assert attempts == ["1", "1"]
@@ -0,0 +1,126 @@
+"""
+Rate Limit Tests
+Client identity, request costs and the shared sliding-window limiter
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from jose import jwt
+
+from common import rate_limit
+from common.rate_limit import _hash, client_identifier, parse_networks, request_cost, RateLimiter, ROUTE_COSTS
+from config import settings
+
+PROXIES = parse_networks("10.0.0.0/8")
+
+
+def _scope(headers, peer="203.0.113.9"):
+    return {"headers": [(k.encode(), v.encode()) for k, v in headers.items()], "client": (peer, 443)}
+
+
+def test_forwarded_for_is_ignored_from_untrusted_peers():
+    assert client_identifier(_scope({"x-forwarded-for": "198.51.100.1"}), PROXIES) == "ip:203.0.113.9"
+
+
+def test_forwarded_for_skips_trusted_hops_from_the_right():
+    scope = _scope({"x-forwarded-for": "1.1.1.1, 198.51.100.1, 10.0.0.7"}, peer="10.0.0.2")
+    assert client_identifier(scope, PROXIES) == "ip:198.51.100.1"
+
+
+def test_unverified_credentials_fall_back_to_ip():
+    keys = frozenset({_hash("known-key")})
+    assert client_identifier(_scope({"x-api-key": "random"}), PROXIES, keys) == "ip:203.0.113.9"
+    assert client_identifier(_scope({"authorization": "Bearer forged"}), PROXIES, keys) == "ip:203.0.113.9"
+    forged = jwt.encode({"sub": "1"}, "wrong-secret", algorithm=settings.jwt_algorithm)
+    assert client_identifier(_scope({"authorization": f"Bearer {forged}"}), PROXIES) == "ip:203.0.113.9"
+
+
+def test_verified_credentials_identify_the_caller():
+    keys = frozenset({_hash("known-key")})
+    assert client_identifier(_scope({"x-api-key": "known-key"}), PROXIES, keys) == f"apikey:{_hash('known-key')}"
+    token = jwt.encode({"sub": "42"}, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    assert client_identifier(_scope({"authorization": f"Bearer {token}"}), PROXIES) == "user:42"
+
+
+def test_request_cost_uses_longest_prefix():
+    assert request_cost("POST", "/api/v1/search/rag/answer", ROUTE_COSTS) == 10
+    assert request_cost("POST", "/api/v1/search", ROUTE_COSTS) == 3
+    assert request_cost("GET", "/api/v1/products", ROUTE_COSTS) == 1
+    assert request_cost("DELETE", "/api/v1/products/1", ROUTE_COSTS) == 2
+
+
+def _clock(monkeypatch, start=1_800_000_000.0):
+    now = [start]
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(time=lambda: now[0], monotonic=lambda: now[0]))
+    return now
+
+
+async def _hour_units(redis, client):
+    keys = [key async for key in redis.scan_iter(f"kcp:ratelimit:{client}:3600:*")]
+    return sum([int(await redis.get(key)) for key in keys])
+
+
+def _unreported(limiters, client):
+    return sum(limiter._leases[client][2] for limiter in limiters if client in limiter._leases)
+
+
+def test_hour_window_counts_only_requests_made(monkeypatch, fake_redis):
+    now = _clock(monkeypatch)
+    limiters = [RateLimiter(1000, 10000, lease_fraction=0.1) for _ in range(3)]
+
+    async def scenario():
+        made = rejected = 0
+        checks = []
+        # Light traffic: each process serves a request every 20 seconds for 10 minutes
+        for step in range(30):
+            for limiter in limiters:
+                allowed, _, _ = await limiter.acquire("ip:1", 1)
+                made += allowed
+                rejected += not allowed
+            now[0] += 20
+            checks.append(await _hour_units(fake_redis, "ip:1") + _unreported(limiters, "ip:1") == made)
+        return made, rejected, checks
+
+    made, rejected, checks = asyncio.run(scenario())
+    assert (made, rejected) == (90, 0)
+    assert all(checks)
+
+
+def test_lapsed_leases_do_not_exhaust_the_hour(monkeypatch, fake_redis):
+    now = _clock(monkeypatch)
+    limiters = [RateLimiter(1000, 1000, lease_fraction=0.1) for _ in range(4)]
+
+    async def scenario():
+        made = 0
+        # Each process leases ~100 units a minute but uses one
+        for minute in range(20):
+            for limiter in limiters:
+                allowed, _, _ = await limiter.acquire("ip:1", 1)
+                assert allowed
+                made += 1
+            now[0] += 60
+        # The next call reports every unit spent
+        for limiter in limiters:
+            await limiter.acquire("ip:1", 1)
+            made += 1
+        return made, await _hour_units(fake_redis, "ip:1") + _unreported(limiters, "ip:1")
+
+    made, counted = asyncio.run(scenario())
+    assert counted == made == 84
+
+
+def test_hour_limit_rejects_once_spent(monkeypatch, fake_redis):
+    now = _clock(monkeypatch)
+    limiter = RateLimiter(100, 150, lease_fraction=0)
+
+    async def scenario():
+        results = []
+        for minute in range(3):
+            for _ in range(60):
+                results.append((await limiter.acquire("ip:1", 1))[0])
+            now[0] += 60
+        return results
+
+    results = asyncio.run(scenario())
+    assert sum(results) == 150
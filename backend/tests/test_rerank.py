@@ -0,0 +1,36 @@
+"""
+Rerank Stage Tests
+Kept result counts and the lexical reranker order
+"""
+
+import asyncio
+
+import pytest
+
+from knowledge_service.rerank import LexicalReranker, RerankStage
+
+PASSAGES = [
+    "firmware release notes",
+    "how to pair the charging case",
+    "charging case battery life",
+    "pair the earbuds with a phone",
+]
+
+
+@pytest.fixture
+def stage():
+    stage = RerankStage(LexicalReranker(), top_k=2)
+    yield stage
+    stage.close()
+
+
+def test_rerank_keeps_the_stage_top_k_by_default(stage):
+    outcome = asyncio.run(stage.rerank("charging case", PASSAGES, text_of=str))
+    assert len(outcome.items) == 2
+    assert set(outcome.items) == {PASSAGES[1], PASSAGES[2]}
+
+
+def test_explicit_top_k_overrides_the_default(stage):
+    outcome = asyncio.run(stage.rerank("charging case", PASSAGES, text_of=str, top_k=len(PASSAGES)))
+    assert sorted(outcome.items) == sorted(PASSAGES)
+    assert outcome.scores == sorted(outcome.scores, reverse=True)
@@ -0,0 +1,148 @@
+"""
+Analytics Rollup Tests
+Bucket ranges, metric merging, first-seen tracking and the rollup lock
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.sql.dml import Insert
+
+from analytics_service import rollups
+from analytics_service.rollups import (
+    ROLLUP_SPECS,
+    AnalyticsRollups,
+    _ranges,
+    add_metrics,
+    by_bucket,
+    by_dimension,
+    day_floor,
+    read_content_metrics,
+    total,
+)
+
+HOUR = timedelta(hours=1)
+T0 = datetime(2026, 3, 1, 5)
+
+
+def test_ranges_merge_contiguous_buckets():
+    hours = {T0 + 3 * HOUR, T0, T0 + HOUR, T0 + 5 * HOUR, T0 + 4 * HOUR}
+    assert _ranges(hours, HOUR) == [(T0, T0 + 2 * HOUR), (T0 + 3 * HOUR, T0 + 6 * HOUR)]
+    assert _ranges([], HOUR) == []
+
+
+def test_add_metrics_sums_by_name():
+    merged = add_metrics({"searches": 2, "clicks": 1}, {"searches": 3, "zero_results": 1})
+    assert merged == {"searches": 5, "clicks": 1, "zero_results": 1}
+
+
+def test_readers_group_rows():
+    def row(bucket, dimension, **metrics):
+        return SimpleNamespace(bucket=bucket, dimension=dimension, metrics=metrics)
+
+    rows = [row(T0, "faq", searches=2), row(T0, "semantic", searches=3), row(T0 + HOUR, "faq", searches=1)]
+    assert total(rows) == {"searches": 6}
+    assert by_dimension(rows) == {"faq": {"searches": 3}, "semantic": {"searches": 3}}
+    assert by_bucket(rows) == {T0: {"searches": 5}, T0 + HOUR: {"searches": 1}}
+
+
+class _Session:
+    """Records statements; selects return the queued results in order"""
+
+    def __init__(self, *selects):
+        self.selects = list(selects)
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        values = [] if isinstance(statement, Insert) else self.selects.pop(0)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: values))
+
+
+def test_track_users_recounts_the_previous_first_seen_day():
+    spec = next(spec for spec in ROLLUP_SPECS if spec.track_users)
+    day3, day5 = datetime(2026, 3, 3), datetime(2026, 3, 5)
+    # A user first seen on day 5 turns out to have been active on day 3
+    db = _Session([day5], [day3])
+
+    days = asyncio.run(AnalyticsRollups()._track_users(db, spec, 0, 100))
+
+    assert days == {day3, day5}
+    # The old first_seen is read before the upsert lowers it
+    assert not isinstance(db.statements[0], Insert)
+    assert isinstance(db.statements[1], Insert)
+
+
+def test_content_rollup_keeps_only_insert_time_metrics():
+    spec = next(spec for spec in ROLLUP_SPECS if spec.model is rollups.ContentGeneration)
+    assert set(spec.metrics) == {"generated"}
+
+
+def test_live_content_metrics_merge_with_rollups():
+    live = {"bucket": T0, "dimension": "blog", "published": 2, "views": 40, "seo_sum": 150.0, "seo_scored": 2,
+            "readability_sum": 0, "readability_scored": 0, "originality_sum": 0, "originality_scored": 0}
+
+    class _Live:
+        async def execute(self, statement):
+            return SimpleNamespace(mappings=lambda: SimpleNamespace(all=lambda: [live]))
+
+    rows = asyncio.run(read_content_metrics(_Live(), "day", T0))
+    rolled = [SimpleNamespace(bucket=T0, dimension="blog", metrics={"generated": 3})]
+
+    merged = by_dimension(rolled + rows)["blog"]
+    assert merged["generated"] == 3
+    assert merged["published"] == 2
+    assert merged["views"] == 40
+    assert merged["seo_sum"] == 150.0
+
+
+def test_rollup_lock_is_released_after_a_run(fake_redis):
+    runner = AnalyticsRollups()
+    seen = []
+
+    async def run():
+        seen.append(await runner.run_exclusive())
+        return {"search": 1}
+
+    runner.run = run
+
+    async def scenario():
+        return await runner.run_exclusive(), await fake_redis.exists(rollups._LOCK_KEY)
+
+    assert asyncio.run(scenario()) == ({"search": 1}, 0)
+    # A second run while the first holds the lock is refused
+    assert seen == [None]
+
+
+def test_rollup_lock_is_released_when_the_run_fails(fake_redis):
+    runner = AnalyticsRollups()
+
+    async def run():
+        raise RuntimeError("duplicate key")
+
+    runner.run = run
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await runner.run_exclusive()
+        return await fake_redis.exists(rollups._LOCK_KEY)
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_rollup_lock_held_elsewhere_is_left_alone(fake_redis):
+    runner = AnalyticsRollups()
+
+    async def scenario():
+        await fake_redis.set(rollups._LOCK_KEY, "other-replica")
+        result = await runner.run_exclusive()
+        await runner._release_lock("not-ours")
+        return result, await fake_redis.get(rollups._LOCK_KEY)
+
+    assert asyncio.run(scenario()) == (None, "other-replica")
+
+
+def test_day_floor():
+    assert day_floor(datetime(2026, 3, 1, 23, 59, 59, 999)) == datetime(2026, 3, 1)
@@ -0,0 +1,94 @@
+"""
+Quality Scoring Tests
+Readability, SEO, MinHash signatures and originality
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from common.scoring import (
+    MinHasher,
+    SignatureCorpus,
+    empty_signatures,
+    readability_scores,
+    score_documents,
+    seo_scores,
+    signature_similarity,
+)
+from models.knowledge import ContentGeneration
+
+BASE = " ".join(f"word{i}" for i in range(200))
+
+
+def test_readability_prefers_short_words_and_sentences():
+    simple, dense, empty = readability_scores([
+        "The cat sat. The dog ran. We had fun.",
+        "Comprehensive interoperability necessitates extraordinarily sophisticated considerations",
+        "  ",
+    ])
+    assert 0 <= dense < simple <= 100
+    assert np.isnan(empty)
+
+
+def test_seo_rewards_keywords_in_text_and_title():
+    body = "# Earbuds\n" + " ".join(["wireless earbuds"] + ["sound"] * 98)
+    with_keyword, without_keyword, no_keywords = seo_scores(
+        [body, body.replace("wireless earbuds", "plain item"), body],
+        ["Soundcore wireless earbuds with long battery", "Soundcore wireless earbuds with long battery", None],
+        [["wireless earbuds"], ["wireless earbuds"], None],
+    )
+    assert with_keyword > without_keyword
+    assert 0 <= no_keywords <= 100
+
+
+def test_minhash_estimates_jaccard_similarity():
+    hasher = MinHasher(num_perm=256, shingle_size=3)
+    words = BASE.split()
+    edited = " ".join(words[:150] + [f"other{i}" for i in range(50)])
+    signatures = hasher.signatures([BASE, BASE, edited, "completely unrelated text about nothing in particular"])
+
+    similarity = signature_similarity(signatures[:1], signatures)[0]
+    assert similarity[1] == 1.0
+    # 148 of 248 distinct shingles are shared
+    assert similarity[2] == pytest.approx(148 / 248, abs=0.1)
+    assert similarity[3] < 0.1
+
+
+def test_signatures_are_stable_across_instances():
+    texts = [BASE, "short text"]
+    assert np.array_equal(MinHasher(seed=7).signatures(texts), MinHasher(seed=7).signatures(texts))
+
+
+def test_empty_texts_have_empty_signatures():
+    signatures = MinHasher().signatures(["", "  \n ", "—", "real words here"])
+    assert empty_signatures(signatures).tolist() == [True, True, True, False]
+
+
+def test_corpus_compares_with_earlier_documents_only():
+    hasher = MinHasher()
+    corpus = SignatureCorpus()
+    corpus.add([1, 2], hasher.signatures([BASE, BASE]))
+    first, second, new = corpus.max_similarity(hasher.signatures([BASE] * 3), [1, 2, None])
+    assert (first, second, new) == (0.0, 1.0, 1.0)
+
+
+def test_corpus_drops_documents_that_become_empty():
+    hasher = MinHasher()
+    corpus = SignatureCorpus()
+    corpus.add([1, 2], hasher.signatures([BASE, "other text entirely"]))
+    corpus.add([1, 3], hasher.signatures(["", ""]))
+    assert corpus.ids.tolist() == [2]
+
+
+def test_score_documents_within_one_batch():
+    documents = [
+        {"id": 1, "content": BASE, "title": "First"},
+        {"id": 2, "content": BASE, "title": "Copy"},
+        {"id": 3, "content": "", "title": "Empty"},
+        {"id": 4, "content": " ", "title": "Also empty"},
+    ]
+    scores = asyncio.run(score_documents(None, ContentGeneration, documents, corpus=SignatureCorpus()))
+    assert [s["originality_score"] for s in scores] == [100.0, 0.0, None, None]
+    assert scores[2]["readability_score"] is None
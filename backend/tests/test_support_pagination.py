@@ -0,0 +1,31 @@
+"""
+Support Conversation Pagination Tests
+Keyset cursors and time filter normalization
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from support_service.crud import decode_cursor, encode_cursor
+from support_service.routes import _naive_utc
+
+
+def test_cursor_round_trip():
+    values = ["session-1", datetime(2026, 1, 2, 3, 4, 5), 42]
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 3) == ["session-1", "2026-01-02T03:04:05", 42]
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", encode_cursor(["a"]), "eyJhIjogMX0"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 2)
+
+
+def test_aware_filters_become_naive_utc():
+    aware = datetime(2026, 1, 1, 10, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert _naive_utc(aware) == datetime(2026, 1, 1, 8, 0)
+    assert _naive_utc(datetime(2026, 1, 1, 10, 0)) == datetime(2026, 1, 1, 10, 0)
+    assert _naive_utc(None) is None
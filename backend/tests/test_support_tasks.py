@@ -0,0 +1,45 @@
+"""
+Support Task Tests
+Idempotent persistence of chat turns
+"""
+
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+
+from support_service import tasks
+
+
+class _Session:
+    """Async session recording executed statements"""
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_redelivered_turn_is_not_inserted_twice(monkeypatch):
+    db = _Session()
+    monkeypatch.setattr(tasks, "AsyncSessionLocal", lambda: db)
+    row = {"session_id": "s1", "user_query": "hi", "ai_response": "hello", "created_at": 1767225600.0}
+
+    asyncio.run(tasks.persist_turn("turn-1", row))
+
+    compiled = db.statements[0].compile(dialect=postgresql.dialect())
+    assert "ON CONFLICT (turn_id) DO NOTHING" in str(compiled)
+    assert compiled.params["turn_id"] == "turn-1"
+    assert compiled.params["created_at"] == datetime(2026, 1, 1)
+    assert db.commits == 1
@@ -0,0 +1,104 @@
+"""
+Escalation Ticket Tests
+Priority ordering, per-session deduplication and claim leases
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from support_service import tickets
+from support_service.tickets import TicketQueue, priority_boost
+
+
+@pytest.fixture
+def clock(monkeypatch, fake_redis):
+    now = [1_000_000.0]
+    monkeypatch.setattr(tickets, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_priority_boost_adds_up(monkeypatch):
+    monkeypatch.setattr(tickets.settings, "support_ticket_negative_boost_s", 600)
+    monkeypatch.setattr(tickets.settings, "support_ticket_product_boost_s", 300)
+    monkeypatch.setattr(tickets.settings, "support_ticket_priority_product_ids", [7])
+    assert priority_boost(None, None) == 0
+    assert priority_boost("negative", 7, "high") == 1200 + 600 + 300
+    assert priority_boost("positive", 8, "low") == -1200
+    assert priority_boost(None, None, "unknown") == 0
+
+
+def test_claims_follow_effective_wait(clock):
+    queue = TicketQueue()
+
+    async def scenario():
+        await queue.create("waiting", priority="normal")
+        clock[0] += 600
+        await queue.create("urgent", priority="urgent")
+        await queue.create("high", priority="high")
+        clock[0] += 60
+        await queue.create("low", priority="low")
+        await queue.create("new", priority="normal")
+        listed = [t["session_id"] for t in await queue.list_queued()]
+        claimed = [(await queue.claim("agent"))["session_id"] for _ in range(5)]
+        return listed, claimed, await queue.claim("agent")
+
+    listed, claimed, empty = run(scenario())
+    # urgent credits 3600s, high 1200s (beating 600s of real wait), low -1200s
+    assert claimed == ["urgent", "high", "waiting", "new", "low"]
+    assert listed == claimed
+    assert empty is None
+
+
+def test_one_open_ticket_per_session(clock):
+    queue = TicketQueue()
+
+    async def scenario():
+        first, created = await queue.create("s1")
+        again, created_again = await queue.create("s1", priority="urgent")
+        ticket = await queue.claim("agent")
+        resolved = await queue.resolve(ticket["id"], "agent")
+        _, created_after_resolve = await queue.create("s1")
+        return first["id"] == again["id"], created, created_again, resolved, created_after_resolve
+
+    assert run(scenario()) == (True, True, False, True, True)
+
+
+def test_only_the_claiming_agent_can_finish(clock):
+    queue = TicketQueue()
+
+    async def scenario():
+        await queue.create("s1")
+        ticket = await queue.claim("alice")
+        return (
+            await queue.resolve(ticket["id"], "bob"),
+            await queue.release(ticket["id"], "alice"),
+            (await queue.claim("bob"))["id"] == ticket["id"],
+        )
+
+    assert run(scenario()) == (False, True, True)
+
+
+def test_expired_claim_returns_to_queue(clock):
+    queue = TicketQueue(claim_timeout_s=60)
+
+    async def scenario():
+        await queue.create("s1")
+        first = await queue.claim("alice")
+        clock[0] += 30
+        too_soon = await queue.claim("bob")
+        clock[0] += 31
+        second = await queue.claim("bob")
+        return first, too_soon, second, await queue.resolve(first["id"], "alice"), await queue.stats()
+
+    first, too_soon, second, stale_resolve, stats = run(scenario())
+    assert too_soon is None
+    assert second["id"] == first["id"]
+    assert second["agent_id"] == "bob" and second["claims"] == 2
+    assert stale_resolve is False
+    assert stats == {"queued": 0, "claimed": 1, "next_wait_s": None}